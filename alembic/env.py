@@ -23,6 +23,12 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
+# ORM 모델과 서비스 모듈에 Core 테이블로 정의된 테이블을 모두 Base.metadata 에 등록
+import app.models  # noqa: E402,F401
+import app.services.exclusion_index  # noqa: E402,F401
+import app.services.interest_index  # noqa: E402,F401
+import app.services.match_precompute  # noqa: E402,F401
+
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
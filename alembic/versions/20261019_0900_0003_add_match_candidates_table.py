@@ -0,0 +1,37 @@
+"""Add match_candidates table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """사전 계산 매칭 후보 테이블 추가"""
+    op.create_table('match_candidates',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('candidate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['candidate_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'rank')
+    )
+    op.create_index('ix_match_candidates_candidate_id', 'match_candidates', ['candidate_id'], unique=False)
+
+
+def downgrade() -> None:
+    """사전 계산 매칭 후보 테이블 삭제"""
+    op.drop_index('ix_match_candidates_candidate_id', table_name='match_candidates')
+    op.drop_table('match_candidates')
@@ -0,0 +1,33 @@
+"""Add user coordinates and geohash
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """사용자 좌표 컬럼과 위치 인덱스 추가"""
+    op.add_column('users', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index('ix_users_geohash', 'users', ['geohash'], unique=False)
+    op.create_index('ix_users_latitude_longitude', 'users', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    """사용자 좌표 컬럼과 위치 인덱스 삭제"""
+    op.drop_index('ix_users_latitude_longitude', table_name='users')
+    op.drop_index('ix_users_geohash', table_name='users')
+    op.drop_column('users', 'geohash')
+    op.drop_column('users', 'longitude')
+    op.drop_column('users', 'latitude')
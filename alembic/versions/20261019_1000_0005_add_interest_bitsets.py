@@ -0,0 +1,32 @@
+"""Add interests vocabulary and user interest bitsets
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """관심사 어휘 테이블과 사용자 관심사 비트셋 컬럼 추가"""
+    op.create_table('interests',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.add_column('users', sa.Column('interest_bits', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    """관심사 어휘 테이블과 사용자 관심사 비트셋 컬럼 삭제"""
+    op.drop_column('users', 'interest_bits')
+    op.drop_table('interests')
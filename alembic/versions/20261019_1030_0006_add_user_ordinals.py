@@ -0,0 +1,32 @@
+"""Add user ordinals for blocked/excluded user bitmaps
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """사용자 내부 서수 테이블 추가 및 기존 사용자 서수 부여"""
+    op.create_table('user_ordinals',
+        sa.Column('ordinal', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.PrimaryKeyConstraint('ordinal'),
+        sa.UniqueConstraint('user_id')
+    )
+    op.execute("INSERT INTO user_ordinals (user_id) SELECT id FROM users ORDER BY created_at, id")
+
+
+def downgrade() -> None:
+    """사용자 내부 서수 테이블 삭제"""
+    op.drop_table('user_ordinals')
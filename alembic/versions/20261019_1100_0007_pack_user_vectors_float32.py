@@ -0,0 +1,79 @@
+"""Store user vectors as packed float32 bytea instead of JSONB lists
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+VECTOR_COLUMNS = ('personality_vector', 'emotion_vector', 'lifestyle_vector', 'combined_vector')
+BATCH_SIZE = 1000
+# app.utils.vector_codec.VECTOR_DTYPE 와 같은 형식 (마이그레이션은 앱 코드에 의존하지 않음)
+VECTOR_DTYPE = np.dtype('<f4')
+
+
+def _convert(source_suffix: str, target_suffix: str, convert) -> None:
+    """user_vectors 를 user_id 순 배치로 읽어 source 컬럼 값을 변환해 target 컬럼에 저장"""
+    bind = op.get_bind()
+    sources = [sa.column(f'{name}{source_suffix}') for name in VECTOR_COLUMNS]
+    table = sa.table('user_vectors', sa.column('user_id'), *sources,
+                     *(sa.column(f'{name}{target_suffix}') for name in VECTOR_COLUMNS))
+    last_id = None
+    while True:
+        query = sa.select(table.c.user_id, *sources).order_by(table.c.user_id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(table.c.user_id > last_id)
+        rows = bind.execute(query).all()
+        if not rows:
+            break
+        for row in rows:
+            values = {f'{name}{target_suffix}': convert(value) for name, value in zip(VECTOR_COLUMNS, row[1:])}
+            bind.execute(table.update().where(table.c.user_id == row[0]).values(**values))
+        last_id = rows[-1][0]
+
+
+def _pack(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=VECTOR_DTYPE).reshape(-1).tobytes()
+
+
+def _unpack(value):
+    if value is None:
+        return None
+    return json.dumps(np.frombuffer(bytes(value), dtype=VECTOR_DTYPE).astype(float).tolist())
+
+
+def upgrade() -> None:
+    """벡터 컬럼을 float32 bytea 로 변환 (기존 JSONB 값은 옮긴 뒤 삭제)"""
+    for name in VECTOR_COLUMNS:
+        op.add_column('user_vectors', sa.Column(f'{name}_f32', sa.LargeBinary(), nullable=True))
+    _convert('', '_f32', _pack)
+    for name in VECTOR_COLUMNS:
+        op.drop_column('user_vectors', name)
+        op.alter_column('user_vectors', f'{name}_f32', new_column_name=name)
+
+
+def downgrade() -> None:
+    """벡터 컬럼을 JSONB 실수 목록으로 되돌림"""
+    for name in VECTOR_COLUMNS:
+        op.add_column('user_vectors',
+                      sa.Column(f'{name}_json', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    _convert('', '_json', _unpack)
+    for name in VECTOR_COLUMNS:
+        op.drop_column('user_vectors', name)
+        op.alter_column('user_vectors', f'{name}_json', new_column_name=name)
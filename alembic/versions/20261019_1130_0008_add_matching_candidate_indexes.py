@@ -0,0 +1,35 @@
+"""Add partial indexes for the matching candidate query
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# MatchingService._candidate_query 의 활성/매칭 허용 조건과 같아야 플래너가 인덱스를 쓴다
+MATCHABLE = sa.text('is_active AND matching_enabled')
+
+
+def upgrade() -> None:
+    """활성 + 매칭 허용 사용자의 최근 활동 순/나이 부분 인덱스 추가 (쓰기 잠금 없이 생성)"""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_matchable_last_active', 'users', [sa.text('last_active DESC')],
+                        unique=False, postgresql_where=MATCHABLE, postgresql_concurrently=True)
+        op.create_index('ix_users_matchable_age', 'users', ['age'],
+                        unique=False, postgresql_where=MATCHABLE, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """매칭 후보 부분 인덱스 삭제"""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_matchable_age', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_matchable_last_active', table_name='users', postgresql_concurrently=True)
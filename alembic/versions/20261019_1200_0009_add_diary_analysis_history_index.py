@@ -0,0 +1,31 @@
+"""Add partial index for recent completed diary analyses per user
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """완료된 분석만 담는 (user_id, processed_at DESC) 부분 인덱스 추가 (쓰기 잠금 없이 생성)"""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_diary_analysis_user_id_processed_at_completed', 'diary_analysis',
+                        ['user_id', sa.text('processed_at DESC')], unique=False,
+                        postgresql_where=sa.text("status = 'completed'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """완료 분석 부분 인덱스 삭제"""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_diary_analysis_user_id_processed_at_completed', table_name='diary_analysis',
+                      postgresql_concurrently=True)
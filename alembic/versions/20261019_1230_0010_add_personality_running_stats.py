@@ -0,0 +1,27 @@
+"""Add running trait statistics to user personality summaries
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """성격 요약에 최근 가중 누적 평균/분산 컬럼 추가 (기존 행은 다음 분석 때 이력으로 초기화)"""
+    op.add_column('user_personality_summary',
+                  sa.Column('running_stats', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """누적 통계 컬럼 삭제"""
+    op.drop_column('user_personality_summary', 'running_stats')
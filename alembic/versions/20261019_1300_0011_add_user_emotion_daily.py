@@ -0,0 +1,39 @@
+"""Add daily emotion buckets and running emotion statistics
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """사용자 일별 감정 버킷 테이블과 감정 패턴 누적 통계 컬럼 추가"""
+    op.create_table('user_emotion_daily',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('analysis_count', sa.Integer(), nullable=False),
+        sa.Column('sentiment_sum', sa.Float(), nullable=False),
+        sa.Column('intensity_sum', sa.Float(), nullable=False),
+        sa.Column('emotion_sums', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.add_column('user_emotion_patterns',
+                  sa.Column('running_stats', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    """일별 감정 버킷 테이블과 누적 통계 컬럼 삭제"""
+    op.drop_column('user_emotion_patterns', 'running_stats')
+    op.drop_table('user_emotion_daily')
@@ -7,15 +7,20 @@ from typing import Dict, List
 from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.database import get_db
 from app.core.security import get_current_user
+from app.core.user_resolver import find_user_id
 from app.schemas.analysis import (
     DiaryAnalysisRequest,
     DiaryAnalysisResponse,
 )
+from app.services.emotion_service import EmotionAnalysisService
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+emotion_service = EmotionAnalysisService()
 
 
 @router.post("/diary", response_model=DiaryAnalysisResponse)
@@ -31,7 +36,7 @@ async def analyze_diary(
     - **metadata**: 추가 메타데이터 (날짜, 날씨, 활동 등)
     """
     try:
-        logger.info(f"📝 일기 분석 요청: user={current_user['uid']}, diary_id={request.diary_id}")
+        logger.debug("📝 일기 분석 요청: user=%s, diary_id=%s", current_user['uid'], request.diary_id)
         
         # Firebase 사용자 ID 설정
         user_uid = current_user["uid"]
@@ -75,11 +80,11 @@ async def analyze_diary(
             "processed_by": "gemini-1.5-flash"
         }
         
-        logger.info(f"✅ 일기 분석 완료: {analysis_result['analysis_id']}")
+        logger.debug("✅ 일기 분석 완료: %s", analysis_result['analysis_id'])
         return analysis_result
         
     except Exception as e:
-        logger.error(f"❌ 일기 분석 실패: {str(e)}")
+        logger.error("❌ 일기 분석 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
@@ -95,7 +100,7 @@ async def get_analysis_result(
     분석 결과 조회
     """
     try:
-        logger.info(f"🔍 분석 결과 조회: user={current_user['uid']}, diary_id={diary_id}")
+        logger.debug("🔍 분석 결과 조회: user=%s, diary_id=%s", current_user['uid'], diary_id)
         
         # 시뮬레이션 응답 (실제 DB 조회 필요)
         analysis_result = {
@@ -113,7 +118,7 @@ async def get_analysis_result(
         return analysis_result
         
     except Exception as e:
-        logger.error(f"❌ 분석 결과 조회 실패: {str(e)}")
+        logger.error("❌ 분석 결과 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve analysis: {str(e)}"
@@ -123,33 +128,26 @@ async def get_analysis_result(
 @router.get("/emotions")
 async def get_user_emotions(
     current_user: Dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     사용자 감정 패턴 조회
+    
+    분석이 저장될 때마다 갱신되는 user_emotion_patterns 한 행을 그대로 읽는다.
     """
     try:
-        logger.info(f"😊 감정 패턴 조회: user={current_user['uid']}")
+        logger.debug("😊 감정 패턴 조회: user=%s", current_user['uid'])
         
-        # 시뮬레이션 감정 패턴
-        emotion_patterns = {
-            "user_uid": current_user["uid"],
-            "period": "last_30_days",
-            "dominant_emotions": ["기쁨", "만족", "평온"],
-            "emotion_trends": {
-                "기쁨": [0.6, 0.7, 0.8, 0.7, 0.9],
-                "슬픔": [0.1, 0.2, 0.1, 0.0, 0.1],
-                "분노": [0.0, 0.1, 0.0, 0.1, 0.0],
-                "불안": [0.2, 0.1, 0.3, 0.2, 0.1]
-            },
-            "average_sentiment": 0.75,
-            "mood_stability": 0.8,
-            "last_updated": "2025-06-14T15:00:00Z"
-        }
+        user_id = await find_user_id(db, current_user["uid"])
+        emotion_patterns = await emotion_service.get_user_emotion_patterns(user_id, db)
+        # 내부 users.id 는 응답에 노출하지 않고 Firebase UID 로 대체
+        emotion_patterns.pop("user_id", None)
+        emotion_patterns["user_uid"] = current_user["uid"]
         
         return emotion_patterns
         
     except Exception as e:
-        logger.error(f"❌ 감정 패턴 조회 실패: {str(e)}")
+        logger.error("❌ 감정 패턴 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve emotion patterns: {str(e)}"
@@ -164,7 +162,7 @@ async def get_user_personality(
     사용자 성격 분석 결과 조회
     """
     try:
-        logger.info(f"🧠 성격 분석 조회: user={current_user['uid']}")
+        logger.debug("🧠 성격 분석 조회: user=%s", current_user['uid'])
         
         # 시뮬레이션 성격 분석
         personality_analysis = {
@@ -188,7 +186,7 @@ async def get_user_personality(
         return personality_analysis
         
     except Exception as e:
-        logger.error(f"❌ 성격 분석 조회 실패: {str(e)}")
+        logger.error("❌ 성격 분석 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve personality analysis: {str(e)}"
@@ -203,7 +201,7 @@ async def get_user_insights(
     사용자 종합 인사이트 조회
     """
     try:
-        logger.info(f"💡 인사이트 조회: user={current_user['uid']}")
+        logger.debug("💡 인사이트 조회: user=%s", current_user['uid'])
         
         # 시뮬레이션 인사이트
         insights = {
@@ -235,7 +233,7 @@ async def get_user_insights(
         return insights
         
     except Exception as e:
-        logger.error(f"❌ 인사이트 조회 실패: {str(e)}")
+        logger.error("❌ 인사이트 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve insights: {str(e)}"
@@ -252,7 +250,7 @@ async def get_analysis_history(
     분석 이력 조회
     """
     try:
-        logger.info(f"📚 분석 이력 조회: user={current_user['uid']}, limit={limit}, offset={offset}")
+        logger.debug("📚 분석 이력 조회: user=%s, limit=%s, offset=%s", current_user['uid'], limit, offset)
         
         # 시뮬레이션 이력 데이터
         history = {
@@ -276,7 +274,7 @@ async def get_analysis_history(
         return history
         
     except Exception as e:
-        logger.error(f"❌ 분석 이력 조회 실패: {str(e)}")
+        logger.error("❌ 분석 이력 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve analysis history: {str(e)}"
@@ -292,7 +290,7 @@ async def delete_analysis(
     분석 결과 삭제
     """
     try:
-        logger.info(f"🗑️ 분석 삭제: user={current_user['uid']}, diary_id={diary_id}")
+        logger.debug("🗑️ 분석 삭제: user=%s, diary_id=%s", current_user['uid'], diary_id)
         
         # 시뮬레이션 삭제 (실제 DB 삭제 필요)
         return {
@@ -303,7 +301,7 @@ async def delete_analysis(
         }
         
     except Exception as e:
-        logger.error(f"❌ 분석 삭제 실패: {str(e)}")
+        logger.error("❌ 분석 삭제 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete analysis: {str(e)}"
@@ -318,7 +316,7 @@ async def get_analysis_stats(
     분석 통계 조회
     """
     try:
-        logger.info(f"📊 분석 통계 조회: user={current_user['uid']}")
+        logger.debug("📊 분석 통계 조회: user=%s", current_user['uid'])
         
         # 시뮬레이션 통계
         stats = {
@@ -337,7 +335,7 @@ async def get_analysis_stats(
         return stats
         
     except Exception as e:
-        logger.error(f"❌ 분석 통계 조회 실패: {str(e)}")
+        logger.error("❌ 분석 통계 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve analysis stats: {str(e)}"
@@ -46,7 +46,7 @@ async def verify_firebase_token_endpoint(
             "provider": decoded_token.get("firebase", {}).get("sign_in_provider"),
         }
         
-        logger.info(f"✅ Firebase 토큰 검증 성공: {user_info['uid']}")
+        logger.debug("✅ Firebase 토큰 검증 성공: %s", user_info['uid'])
         
         return {
             "message": "Token verified successfully",
@@ -57,7 +57,7 @@ async def verify_firebase_token_endpoint(
         }
         
     except Exception as e:
-        logger.error(f"❌ Firebase 토큰 검증 실패: {str(e)}")
+        logger.error("❌ Firebase 토큰 검증 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Firebase token verification failed: {str(e)}",
@@ -87,7 +87,7 @@ async def refresh_firebase_token(
         }
         
     except Exception as e:
-        logger.error(f"❌ Firebase 토큰 갱신 실패: {str(e)}")
+        logger.error("❌ Firebase 토큰 갱신 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Token refresh validation failed: {str(e)}",
@@ -125,7 +125,7 @@ async def create_firebase_custom_token(
         }
         
     except Exception as e:
-        logger.error(f"❌ 커스텀 토큰 생성 실패: {str(e)}")
+        logger.error("❌ 커스텀 토큰 생성 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Custom token creation failed: {str(e)}"
@@ -139,7 +139,7 @@ async def get_current_user_info(
     """
     현재 로그인된 사용자 정보 조회
     """
-    logger.info(f"👤 사용자 정보 조회: {current_user['uid']}")
+    logger.debug("👤 사용자 정보 조회: %s", current_user['uid'])
     
     return UserResponse(
         uid=current_user["uid"],
@@ -169,7 +169,7 @@ async def validate_firebase_token(
     """
     Firebase 토큰 유효성 검증
     """
-    logger.info(f"✅ 토큰 유효성 검증: {current_user['uid']}")
+    logger.debug("✅ 토큰 유효성 검증: %s", current_user['uid'])
     
     return {
         "valid": True,
@@ -3,76 +3,127 @@
 """
 import logging
 import time
+from datetime import datetime, timezone
 from typing import Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.database import get_db
 from app.core.security import get_current_user
+from app.core.user_resolver import find_user_id, resolve_user_id
 from app.schemas.matching import (
     MatchingRequest,
     CompatibilityRequest,
+    MatchingFilters,
 )
+from app.services.matching_service import MatchingService
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
+matching_service = MatchingService()
 
 
 @router.post("/candidates")
 async def get_matching_candidates(
     request: MatchingRequest,
     current_user: Dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     사용자 매칭 후보 추천 - Firebase 인증 적용
+    
+    야간 배치로 사전 계산된 목록을 우선 사용하고, 없으면 즉시 계산한다.
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"💕 매칭 후보 요청: user={user_uid}")
+        logger.debug("💕 매칭 후보 요청: user=%s", user_uid)
         
-        # 시뮬레이션 매칭 후보
-        candidates = [
-            {
-                "user_uid": f"candidate_{i}",
-                "name": f"매칭후보_{i}",
-                "compatibility_score": 0.85 - (i * 0.05),
-                "common_interests": ["독서", "영화", "카페"],
-                "personality_match": "높음",
-                "age_range": "20대",
-                "distance": f"{5 + i}km",
-                "last_active": "2일 전"
-            }
-            for i in range(1, min(request.limit + 1, 6))
-        ]
+        user_id = await resolve_user_id(
+            db, user_uid, email=current_user.get("email"), name=current_user.get("name")
+        )
+        filters = MatchingFilters(**request.filters) if request.filters else None
+        
+        candidates, source = await matching_service.get_match_candidates(
+            user_id,
+            db,
+            limit=request.limit,
+            min_compatibility=request.min_compatibility,
+            filters=filters,
+            mutual=request.mutual,
+        )
         
         return {
             "user_uid": user_uid,
-            "candidates": candidates,
+            "candidates": [candidate.dict() for candidate in candidates],
             "total_count": len(candidates),
             "filters_applied": request.filters or {},
-            "generated_at": "2025-06-14T15:00:00Z"
+            "mutual": request.mutual,
+            "source": source,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
         }
         
     except Exception as e:
-        logger.error(f"❌ 매칭 후보 검색 실패: {str(e)}")
+        logger.error("❌ 매칭 후보 검색 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to find matching candidates: {str(e)}"
         )
 
 
+@router.get("/candidates/{candidate_uid}/explanation")
+async def get_match_explanation(
+    candidate_uid: str,
+    current_user: Dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    후보 카드 상세 (매칭 근거, 공통 특성, 보완 특성)
+    
+    후보 목록은 가벼운 카드만 반환하고, 카드를 눌렀을 때 이 엔드포인트로 설명을 요청한다.
+    결과는 두 사용자의 프로필 버전 단위로 캐시된다.
+    """
+    try:
+        user_uid = current_user["uid"]
+        logger.debug("🔎 매칭 설명 요청: user=%s, candidate=%s", user_uid, candidate_uid)
+        
+        user_id = await resolve_user_id(
+            db, user_uid, email=current_user.get("email"), name=current_user.get("name")
+        )
+        candidate_id = await find_user_id(db, candidate_uid)
+        if candidate_id is None:
+            raise ValueError("사용자 데이터를 찾을 수 없습니다")
+        
+        explanation = await matching_service.explain_match(user_id, candidate_id, db)
+        return explanation.dict()
+        
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        logger.error("❌ 매칭 설명 조회 실패: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to explain match: {str(e)}"
+        )
+
+
 @router.post("/compatibility")
 async def calculate_compatibility(
     request: CompatibilityRequest,
     current_user: Dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     두 사용자 간 호환성 점수 계산
+    
+    결과는 두 사용자의 프로필 버전 단위로 캐시되며 A→B, B→A 요청이 같은 항목을 쓴다.
+    상대가 매칭을 껐거나 요청자가 차단/제외한 사용자면 404.
     """
     try:
         user_uid = current_user["uid"]
         target_user_uid = request.target_user_id
         
-        logger.info(f"💘 호환성 계산: {user_uid} vs {target_user_uid}")
+        logger.debug("💘 호환성 계산: %s vs %s", user_uid, target_user_uid)
         
         # 자기 자신과의 호환성 계산 방지
         if user_uid == target_user_uid:
@@ -81,35 +132,22 @@ async def calculate_compatibility(
                 detail="Cannot calculate compatibility with yourself"
             )
         
-        # 시뮬레이션 호환성 결과
-        compatibility = {
-            "user1_uid": user_uid,
-            "user2_uid": target_user_uid,
-            "overall_score": 0.82,
-            "compatibility_breakdown": {
-                "personality_match": 0.85,
-                "interest_overlap": 0.78,
-                "communication_style": 0.80,
-                "lifestyle_compatibility": 0.86,
-                "emotional_compatibility": 0.83
-            },
-            "shared_traits": ["낙관적", "사교적", "창의적"],
-            "complementary_traits": ["계획적 vs 자유로운", "이성적 vs 감성적"],
-            "potential_challenges": ["시간 관리 스타일 차이", "의사결정 방식 차이"],
-            "recommendations": [
-                "공통 관심사인 독서와 영화 감상을 함께 즐겨보세요",
-                "서로 다른 시간 관리 스타일을 존중하며 조율해보세요",
-                "정기적인 대화 시간을 가져 소통을 늘려보세요"
-            ],
-            "calculated_at": "2025-06-14T15:00:00Z"
-        }
+        user_id = await resolve_user_id(
+            db, user_uid, email=current_user.get("email"), name=current_user.get("name")
+        )
+        target_user_id = await find_user_id(db, target_user_uid)
+        if target_user_id is None:
+            raise ValueError("사용자 데이터를 찾을 수 없습니다")
         
-        return compatibility
+        compatibility = await matching_service.calculate_compatibility(user_id, target_user_id, db)
+        return compatibility.dict()
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ 호환성 계산 실패: {str(e)}")
+        logger.error("❌ 호환성 계산 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to calculate compatibility: {str(e)}"
@@ -125,7 +163,7 @@ async def get_matching_profile(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"👤 매칭 프로필 조회: user={user_uid}")
+        logger.debug("👤 매칭 프로필 조회: user=%s", user_uid)
         
         # 시뮬레이션 매칭 프로필
         profile = {
@@ -167,7 +205,7 @@ async def get_matching_profile(
         return profile
         
     except Exception as e:
-        logger.error(f"❌ 매칭 프로필 조회 실패: {str(e)}")
+        logger.error("❌ 매칭 프로필 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve matching profile: {str(e)}"
@@ -184,7 +222,7 @@ async def update_matching_preferences(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"⚙️ 매칭 선호도 업데이트: user={user_uid}")
+        logger.debug("⚙️ 매칭 선호도 업데이트: user=%s", user_uid)
         
         # 시뮬레이션 업데이트
         return {
@@ -195,7 +233,7 @@ async def update_matching_preferences(
         }
         
     except Exception as e:
-        logger.error(f"❌ 매칭 선호도 업데이트 실패: {str(e)}")
+        logger.error("❌ 매칭 선호도 업데이트 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update matching preferences: {str(e)}"
@@ -211,7 +249,7 @@ async def get_matching_preferences(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"📋 매칭 선호도 조회: user={user_uid}")
+        logger.debug("📋 매칭 선호도 조회: user=%s", user_uid)
         
         # 시뮬레이션 선호도
         preferences = {
@@ -238,7 +276,7 @@ async def get_matching_preferences(
         return preferences
         
     except Exception as e:
-        logger.error(f"❌ 매칭 선호도 조회 실패: {str(e)}")
+        logger.error("❌ 매칭 선호도 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve matching preferences: {str(e)}"
@@ -256,7 +294,7 @@ async def get_matching_history(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"📚 매칭 이력 조회: user={user_uid}")
+        logger.debug("📚 매칭 이력 조회: user=%s", user_uid)
         
         # 시뮬레이션 매칭 이력
         history = {
@@ -283,7 +321,7 @@ async def get_matching_history(
         return history
         
     except Exception as e:
-        logger.error(f"❌ 매칭 이력 조회 실패: {str(e)}")
+        logger.error("❌ 매칭 이력 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve matching history: {str(e)}"
@@ -300,7 +338,7 @@ async def submit_matching_feedback(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"📝 매칭 피드백 제출: user={user_uid}")
+        logger.debug("📝 매칭 피드백 제출: user=%s", user_uid)
         
         # 시뮬레이션 피드백 처리
         return {
@@ -312,7 +350,7 @@ async def submit_matching_feedback(
         }
         
     except Exception as e:
-        logger.error(f"❌ 매칭 피드백 제출 실패: {str(e)}")
+        logger.error("❌ 매칭 피드백 제출 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to submit feedback: {str(e)}"
@@ -328,7 +366,7 @@ async def get_matching_analytics(
     """
     try:
         user_uid = current_user["uid"]
-        logger.info(f"📊 매칭 분석 조회: user={user_uid}")
+        logger.debug("📊 매칭 분석 조회: user=%s", user_uid)
         
         # 시뮬레이션 분석 데이터
         analytics = {
@@ -361,7 +399,7 @@ async def get_matching_analytics(
         return analytics
         
     except Exception as e:
-        logger.error(f"❌ 매칭 분석 조회 실패: {str(e)}")
+        logger.error("❌ 매칭 분석 조회 실패: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve matching analytics: {str(e)}"
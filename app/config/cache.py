@@ -0,0 +1,42 @@
+"""
+Redis 캐시 클라이언트 (선택사항)
+
+REDIS_URL 이 없거나 redis 패키지를 쓸 수 없으면 None 을 반환하며,
+호출하는 쪽은 메모리 캐시/DB 조회만으로 동작해야 한다.
+"""
+import logging
+from typing import Optional
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis():
+    """공유 비동기 Redis 클라이언트 (설정되지 않았으면 None)"""
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("redis 패키지가 설치되지 않아 Redis 캐시를 사용하지 않습니다")
+            return None
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def set_redis(client: Optional[object]) -> None:
+    """공유 클라이언트 교체 (테스트/스크립트용, None 이면 해제)"""
+    global _redis_client
+    _redis_client = client
+
+
+async def close_redis() -> None:
+    """공유 클라이언트 연결 종료"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.close()
+        _redis_client = None
@@ -42,6 +42,17 @@ class Settings(BaseSettings):
     
     # Firebase 사용 여부 (자동 감지)
     USE_FIREBASE: bool = Field(default=True)
+
+    # Firebase 토큰 검증 캐시 (0이면 비활성화)
+    FIREBASE_TOKEN_CACHE_SIZE: int = Field(default=10000, description="검증된 토큰 캐시 최대 항목 수")
+    FIREBASE_REVOCATION_CHECK_INTERVAL: int = Field(default=0, description="캐시된 토큰 폐기 재확인 주기(초)")
+    FIREBASE_VERIFY_WORKERS: int = Field(default=4, description="토큰 서명 검증 스레드 수")
+    FIREBASE_LOCAL_VERIFICATION: bool = Field(default=True, description="캐시된 공개 인증서로 로컬 검증")
+    FIREBASE_AUTH_DEBUG: bool = Field(default=False, description="성공한 요청에도 토큰 상세 진단 로그 출력")
+
+    # Firebase UID → users.id 해석 캐시 (0이면 비활성화)
+    USER_ID_CACHE_TTL: int = Field(default=300, description="사용자 ID 해석 캐시 유효 시간(초)")
+    USER_ID_CACHE_SIZE: int = Field(default=10000, description="사용자 ID 해석 캐시 최대 항목 수")
     
     # JWT 설정
     SECRET_KEY: str = Field(..., description="JWT 시크릿 키")
@@ -67,7 +78,49 @@ class Settings(BaseSettings):
     MAX_DIARY_LENGTH: int = Field(default=5000)
     ANALYSIS_CACHE_TTL: int = Field(default=86400)  # 24시간
     BATCH_SIZE: int = Field(default=10)
-    
+    PERSONALITY_HALF_LIFE_ANALYSES: float = Field(
+        default=10.0, description="성격 누적 통계에서 가중치가 절반이 되는 분석 수 (최근 분석 우선)"
+    )
+    EMOTION_HALF_LIFE_ANALYSES: float = Field(
+        default=20.0, description="감정 분포/평균 감정 점수에서 가중치가 절반이 되는 분석 수"
+    )
+    EMOTION_PATTERN_TIMEZONE: str = Field(default="Asia/Seoul", description="일별/요일별 감정 집계 기준 시간대")
+    USER_VECTOR_HALF_LIFE_ANALYSES: float = Field(
+        default=20.0, description="사용자 매칭 벡터에서 가중치가 절반이 되는 분석 수"
+    )
+    USER_VECTOR_BACKFILL_CHUNK_SIZE: int = Field(default=500, description="벡터 백필에서 한 번에 처리할 사용자 수")
+    
+    # 매칭 후보 검색 (사용자 벡터 ANN 인덱스)
+    MATCHING_CANDIDATE_POOL: int = Field(default=300, description="벡터 인덱스에서 가져올 후보 수")
+    VECTOR_INDEX_PATH: str = Field(default="data/user_vector_index.npz", description="벡터 인덱스 스냅샷 경로")
+    VECTOR_INDEX_NPROBE: int = Field(default=8, description="검색 시 탐색할 클러스터 수")
+    VECTOR_INDEX_REFRESH_SECONDS: int = Field(default=60, description="벡터 인덱스 델타 갱신 주기 (0이면 갱신 안 함)")
+    GEO_INDEX_REFRESH_SECONDS: int = Field(default=60, description="위치 인덱스 델타 갱신 주기 (0이면 갱신 안 함)")
+    INTEREST_MINHASH_PERMUTATIONS: int = Field(
+        default=0, description="관심사 MinHash 서명 길이 (0이면 비트셋 정확 Jaccard)"
+    )
+    EXCLUSION_BITMAP_CACHE_SIZE: int = Field(default=10000, description="메모리에 둘 차단/제외 비트맵 수")
+    EXCLUSION_BITMAP_TTL_SECONDS: int = Field(default=300, description="차단/제외 비트맵 캐시 유지 시간 (메모리/Redis)")
+    MATCH_EXPLANATION_CACHE_SIZE: int = Field(default=10000, description="메모리에 둘 매칭 설명/호환성 결과 수")
+    MATCH_EXPLANATION_CACHE_TTL_SECONDS: int = Field(default=86400, description="매칭 설명/호환성 결과 캐시 유지 시간 (메모리/Redis)")
+    FEATURE_SNAPSHOT_PATH: str = Field(default="data/matching_features.bin", description="매칭 특성 행렬 스냅샷 경로 (mmap)")
+    FEATURE_SNAPSHOT_REFRESH_SECONDS: int = Field(default=60, description="특성 스냅샷 델타 갱신 주기 (0이면 갱신 안 함)")
+    FEATURE_SNAPSHOT_OVERLAY_SIZE: int = Field(default=50000, description="스냅샷 델타 오버레이 최대 사용자 수 (LRU)")
+    
+    # 매칭 후보 사전 계산 (야간 배치)
+    MATCH_PRECOMPUTE_TOP_K: int = Field(default=100, description="사용자별로 저장할 후보 수")
+    MATCH_PRECOMPUTE_WORKERS: int = Field(default=4, description="채점 프로세스 수")
+    MATCH_PRECOMPUTE_BLOCK_SIZE: int = Field(default=256, description="프로세스당 한 번에 채점할 사용자 수")
+    MATCH_PRECOMPUTE_MAX_AGE_HOURS: int = Field(default=36, description="사전 계산 목록 유효 시간 (초과 시 즉시 계산)")
+    
+    # 로깅 (큐 기반 JSON 파이프라인)
+    LOG_JSON: bool = Field(default=True, description="JSON 한 줄 로그 출력 (false면 텍스트)")
+    LOG_QUEUE_SIZE: int = Field(default=10000, description="로그 큐 최대 크기 (초과 시 버림)")
+    LOG_SAMPLING: str = Field(
+        default="request_started=0.01",
+        description="이벤트별 샘플링 비율 (예: request_started=0.01,request_completed=0.1)",
+    )
+
     # Sentry 모니터링 (선택사항)
     SENTRY_DSN: Optional[str] = Field(None, description="Sentry DSN")
     
@@ -0,0 +1,168 @@
+"""
+Firebase ID 토큰 서명 키 관리 및 로컬 검증
+Google 공개 인증서를 캐시 헤더 기준으로 로컬에 보관하고 백그라운드에서 갱신
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from firebase_admin import auth
+from google.auth import jwt as google_jwt
+
+logger = logging.getLogger(__name__)
+
+# Firebase ID 토큰 서명용 Google 공개 인증서
+ID_TOKEN_CERT_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ID_TOKEN_ISSUER_PREFIX = "https://securetoken.google.com/"
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class KeySource:
+    """토큰 서명 인증서 제공자 인터페이스 (kid → PEM 인증서)"""
+
+    def get_certificates(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def refresh(self) -> None:
+        """인증서 갱신 (필요 없는 구현은 무시)"""
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """다음 갱신까지 남은 시간 (None이면 갱신하지 않음)"""
+        return None
+
+
+class StaticKeySource(KeySource):
+    """고정 인증서 제공자 (테스트/부하 테스트/오프라인 환경용)"""
+
+    def __init__(self, certificates: Dict[str, str]):
+        self.certificates = dict(certificates)
+
+    def get_certificates(self) -> Dict[str, str]:
+        return self.certificates
+
+
+class GoogleCertificateKeySource(KeySource):
+    """
+    Google 공개 인증서 캐시
+
+    - 응답의 Cache-Control max-age (Age 헤더 차감) 동안 로컬 캐시 사용
+    - 만료 refresh_margin 초 전에 백그라운드 갱신 (run_refresh_loop)
+    - 캐시가 비었거나 만료되면 호출 스레드에서 동기 갱신 (검증 스레드 풀에서만 호출됨)
+    """
+
+    def __init__(
+        self,
+        url: str = ID_TOKEN_CERT_URL,
+        timeout: float = 5.0,
+        min_ttl: int = 60,
+        refresh_margin: int = 300,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.min_ttl = min_ttl
+        self.refresh_margin = refresh_margin
+        self._certificates: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_certificates(self) -> Dict[str, str]:
+        if not self._certificates or time.time() >= self._expires_at:
+            with self._lock:
+                # 다른 스레드가 먼저 갱신했는지 재확인
+                if not self._certificates or time.time() >= self._expires_at:
+                    self._fetch()
+        return self._certificates
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._fetch()
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        return max(float(self.min_ttl), self._expires_at - self.refresh_margin - time.time())
+
+    def _fetch(self) -> None:
+        response = httpx.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        certificates = response.json()
+
+        self._certificates = certificates
+        self._expires_at = time.time() + self._parse_ttl(response.headers)
+        logger.debug("Firebase 공개 인증서 갱신: %d개, %.0f초 유효",
+                     len(certificates), self._expires_at - time.time())
+
+    def _parse_ttl(self, headers: httpx.Headers) -> int:
+        """Cache-Control max-age - Age (최소 min_ttl)"""
+        match = _MAX_AGE_PATTERN.search(headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else self.min_ttl
+        try:
+            age = int(headers.get("age", 0))
+        except ValueError:
+            age = 0
+        return max(self.min_ttl, max_age - age)
+
+
+async def run_refresh_loop(source: KeySource, retry_interval: int = 30) -> None:
+    """캐시 헤더 주기에 맞춰 인증서를 백그라운드 갱신"""
+    while True:
+        delay = source.seconds_until_refresh()
+        if delay is None:
+            return
+
+        await asyncio.sleep(delay)
+        try:
+            await asyncio.to_thread(source.refresh)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("⚠️ Firebase 공개 인증서 갱신 실패: %s", e)
+            await asyncio.sleep(retry_interval)
+
+
+def verify_id_token_locally(
+    token: str,
+    key_source: KeySource,
+    project_id: str,
+    clock_skew_seconds: int = 0,
+) -> Dict[str, Any]:
+    """
+    캐시된 인증서로 Firebase ID 토큰 검증 (네트워크 호출 없음)
+
+    firebase_admin.auth.verify_id_token 과 동일한 헤더/클레임 검사를 수행하며
+    실패 시 같은 예외 타입(InvalidIdTokenError / ExpiredIdTokenError)을 발생시킨다.
+    """
+    try:
+        header = google_jwt.decode_header(token)
+        certificates = key_source.get_certificates()
+        claims = google_jwt.decode(
+            token,
+            certs=certificates,
+            audience=project_id,
+            clock_skew_in_seconds=clock_skew_seconds,
+        )
+    except ValueError as e:
+        if "Token expired" in str(e):
+            raise auth.ExpiredIdTokenError(str(e), cause=e)
+        raise auth.InvalidIdTokenError(str(e), cause=e)
+
+    if header.get("alg") != "RS256":
+        raise auth.InvalidIdTokenError(
+            f'Firebase ID token has incorrect algorithm. Expected "RS256" but got "{header.get("alg")}".'
+        )
+
+    expected_issuer = ID_TOKEN_ISSUER_PREFIX + project_id
+    if claims.get("iss") != expected_issuer:
+        raise auth.InvalidIdTokenError(
+            f'Firebase ID token has incorrect "iss" (issuer) claim. Expected "{expected_issuer}".'
+        )
+
+    subject = claims.get("sub")
+    if not isinstance(subject, str) or not subject or len(subject) > 128:
+        raise auth.InvalidIdTokenError('Firebase ID token has an invalid "sub" (subject) claim.')
+
+    claims["uid"] = subject
+    return claims
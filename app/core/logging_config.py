@@ -0,0 +1,200 @@
+"""
+로깅 파이프라인 설정
+
+stdlib logging 과 structlog 를 하나의 큐 기반 파이프라인으로 통합한다.
+- 요청 경로에서는 레코드를 큐에 넣기만 하고 (포맷/직렬화/출력 없음)
+- 백그라운드 스레드(QueueListener)가 JSON 으로 직렬화해 stdout 에 기록
+- request_started 같은 대량 이벤트는 이벤트별 샘플링으로 N건 중 1건만 기록
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
+
+import structlog
+
+# LogRecord 기본 속성 (이외의 속성은 extra 필드로 간주해 JSON 에 포함)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_sampling_rates(spec: str) -> Dict[str, float]:
+    """'request_started=0.01,request_completed=0.1' 형식의 샘플링 설정 파싱"""
+    rates: Dict[str, float] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class EventSampler:
+    """
+    이벤트 이름별 샘플링 (결정적: 1/rate 건마다 1건 통과)
+
+    stdlib 레코드는 포맷 전 메시지 템플릿, structlog 레코드는 이벤트 이름이 키가 된다.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        self.periods: Dict[str, int] = {}
+        for event, rate in (rates or {}).items():
+            self.periods[event] = 0 if rate <= 0 else max(1, round(1 / rate))
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def should_log(self, event: Any) -> bool:
+        period = self.periods.get(event) if isinstance(event, str) else None
+        if period is None or period == 1:
+            return True
+        if period == 0:
+            return False
+
+        with self._lock:
+            count = self._counters.get(event, 0)
+            self._counters[event] = count + 1
+        return count % period == 0
+
+
+class SamplingFilter(logging.Filter):
+    """QueueHandler 앞단에서 샘플링 (큐에 넣기 전 버림)"""
+
+    def __init__(self, sampler: EventSampler):
+        super().__init__()
+        self.sampler = sampler
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # structlog 레코드는 프로세서 체인에서 이미 샘플링됨
+        if hasattr(record, "event_fields"):
+            return True
+        return self.sampler.should_log(record.msg)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    호출 스레드에서 메시지를 포맷하지 않는 QueueHandler
+
+    기본 QueueHandler.prepare 는 호출 스레드에서 msg % args 를 수행하므로,
+    포맷은 리스너 스레드로 미루고 예외 정보만 미리 문자열로 만든다.
+    큐가 가득 차면 요청을 막지 않고 레코드를 버린다.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """한 줄 JSON 포맷터 (리스너 스레드에서만 실행)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        entry.update(entry.pop("event_fields", None) or {})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _structlog_sampling_processor(sampler: EventSampler):
+    """structlog 레벨 필터 직후 샘플링 (버려진 이벤트는 이후 변환 비용도 생략)"""
+
+    def processor(logger, method_name, event_dict):
+        if not sampler.should_log(event_dict.get("event")):
+            raise structlog.DropEvent
+        return event_dict
+
+    return processor
+
+
+def _render_to_log_kwargs(logger, method_name, event_dict):
+    """structlog 이벤트를 stdlib 호출 인자로 변환 (키워드는 event_fields 로 묶어 LogRecord 속성과 충돌 방지)"""
+    event = event_dict.pop("event", "")
+    exc_info = event_dict.pop("exc_info", None)
+    return {"msg": event, "exc_info": exc_info, "extra": {"event_fields": event_dict}}
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    json_output: bool = True,
+    sampling: Optional[Dict[str, float]] = None,
+    queue_size: int = 10000,
+    stream: Optional[TextIO] = None,
+) -> logging.handlers.QueueListener:
+    """
+    루트 로거를 큐 기반 파이프라인으로 설정하고 리스너 스레드 시작
+
+    structlog 이벤트도 stdlib 레코드(event=메시지, 키워드=extra)로 변환되어 같은 큐를 거친다.
+    """
+    global _listener
+    stop_logging()
+
+    sampler = EventSampler(sampling)
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sampler))
+
+    output_handler = logging.StreamHandler(stream or sys.stdout)
+    output_handler.setFormatter(
+        JSONFormatter() if json_output
+        else logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            _structlog_sampling_processor(sampler),
+            _render_to_log_kwargs,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    _listener = logging.handlers.QueueListener(log_queue, output_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """리스너 스레드 종료 (큐에 남은 레코드는 모두 기록한 뒤 반환)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# 프로세스 종료 시 큐에 남은 로그 기록 (lifespan 종료 이후 로그도 포함)
+atexit.register(stop_logging)
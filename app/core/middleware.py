@@ -16,24 +16,27 @@ class LoggingMiddleware(BaseHTTPMiddleware):
     """요청/응답 로깅 미들웨어"""
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+        start_time = time.perf_counter()
+        # 전체 URL 문자열 대신 경로만 한 번 계산해 재사용
+        method = request.method
+        path = request.url.path
         
-        # 요청 로깅
+        # 요청 로깅 (대량 이벤트 - LOG_SAMPLING 으로 샘플링)
         logger.info(
             "request_started",
-            method=request.method,
-            url=str(request.url),
+            method=method,
+            path=path,
             client_ip=request.client.host if request.client else None,
         )
         
         response = await call_next(request)
         
         # 응답 로깅
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
         logger.info(
             "request_completed",
-            method=request.method,
-            url=str(request.url),
+            method=method,
+            path=path,
             status_code=response.status_code,
             process_time=round(process_time, 4),
         )
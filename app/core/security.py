@@ -2,7 +2,9 @@
 Firebase Admin SDK 기반 보안 시스템
 python-jose 제거하고 Firebase만 사용
 """
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
@@ -14,6 +16,13 @@ from passlib.context import CryptContext
 
 from app.config.settings import get_settings
 from app.core.exceptions import AuthenticationException
+from app.core.firebase_keys import (
+    GoogleCertificateKeySource,
+    KeySource,
+    run_refresh_loop,
+    verify_id_token_locally,
+)
+from app.core.token_cache import TokenVerificationCache
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -28,6 +37,24 @@ security = HTTPBearer()
 firebase_initialized = False
 firebase_app = None
 
+# 검증된 토큰 클레임 캐시 (토큰 해시 → 클레임, exp까지 유효)
+token_cache = TokenVerificationCache(
+    max_size=settings.FIREBASE_TOKEN_CACHE_SIZE,
+    revocation_check_interval=settings.FIREBASE_REVOCATION_CHECK_INTERVAL,
+)
+
+# 토큰 서명 검증 전용 스레드 풀 (이벤트 루프 블로킹 방지)
+_verification_executor = ThreadPoolExecutor(
+    max_workers=settings.FIREBASE_VERIFY_WORKERS,
+    thread_name_prefix="firebase-verify",
+)
+
+# 서명 인증서 제공자 (None이면 firebase_admin 검증 사용)
+key_source: Optional[KeySource] = (
+    GoogleCertificateKeySource() if settings.FIREBASE_LOCAL_VERIFICATION else None
+)
+_key_refresh_task: Optional[asyncio.Task] = None
+
 
 def initialize_firebase():
     """Firebase Admin SDK 초기화 (중복 호출 방지)"""
@@ -160,117 +187,144 @@ def initialize_firebase():
 # initialize_firebase()  # 주석 처리 - main.py에서 명시적으로 호출
 
 
+def set_key_source(source: Optional[KeySource]) -> None:
+    """토큰 서명 인증서 제공자 교체 (테스트/오프라인 부하 테스트용)"""
+    global key_source
+    key_source = source
+
+
+def start_key_refresh() -> None:
+    """서명 인증서 백그라운드 갱신 시작 (이벤트 루프 안에서 호출)"""
+    global _key_refresh_task
+    if key_source is None or (_key_refresh_task and not _key_refresh_task.done()):
+        return
+    _key_refresh_task = asyncio.create_task(run_refresh_loop(key_source))
+
+
+async def stop_key_refresh() -> None:
+    """서명 인증서 백그라운드 갱신 중지"""
+    global _key_refresh_task
+    if _key_refresh_task is None:
+        return
+    _key_refresh_task.cancel()
+    try:
+        await _key_refresh_task
+    except asyncio.CancelledError:
+        pass
+    _key_refresh_task = None
+
+
+def _verify_id_token_sync(token: str, check_revoked: bool) -> Dict[str, Any]:
+    """토큰 서명 검증 (검증 스레드 풀에서 실행)"""
+    # 폐기 확인은 Firebase 사용자 조회가 필요하므로 Admin SDK 사용
+    if check_revoked or key_source is None or not settings.FIREBASE_PROJECT_ID:
+        return auth.verify_id_token(token, check_revoked=check_revoked)
+    return verify_id_token_locally(token, key_source, settings.FIREBASE_PROJECT_ID)
+
+
+async def run_token_verification(token: str, check_revoked: bool = False) -> Dict[str, Any]:
+    """이벤트 루프를 막지 않도록 스레드 풀에서 토큰 검증"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _verification_executor, _verify_id_token_sync, token, check_revoked
+    )
+
+
+def _log_token_diagnostics(token: str, error: Optional[Exception] = None) -> None:
+    """토큰 상세 진단 로그 (검증 실패 시 또는 FIREBASE_AUTH_DEBUG 설정 시에만 실행)"""
+    import base64
+    import json
+
+    log = logger.error if error is not None else logger.info
+    if error is not None:
+        log(f"❌ Firebase 토큰 검증 실패: {type(error).__name__}: {error}")
+
+    clean_token = "".join(token.split())
+    token_parts = clean_token.split('.')
+    log(f"🎫 원본 토큰 길이: {len(token)}, 정제 후 길이: {len(clean_token)}, 부분 개수: {len(token_parts)}")
+
+    if len(token_parts) != 3:
+        log(f"❌ 잘못된 토큰 형식: {len(token_parts)}개 부분 (정상: 3개)")
+        return
+
+    # 토큰 헤더/페이로드 디코딩하여 프로젝트 정보 확인
+    try:
+        header_data = token_parts[0] + '=' * (-len(token_parts[0]) % 4)
+        header = json.loads(base64.urlsafe_b64decode(header_data))
+        log(f"🔍 토큰 헤더: {header}")
+    except Exception as e:
+        log(f"⚠️ 토큰 헤더 디코딩 실패: {e}")
+
+    try:
+        payload_data = token_parts[1] + '=' * (-len(token_parts[1]) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(payload_data))
+        log(f"🔍 토큰 발급자(iss): {payload.get('iss', 'N/A')}")
+        log(f"🔍 토큰 대상(aud): {payload.get('aud', 'N/A')}")
+        log(f"🔍 토큰 만료시간: {payload.get('exp', 'N/A')}")
+        log(f"🏗️ 백엔드 Firebase Project ID: {settings.FIREBASE_PROJECT_ID}")
+
+        # 프로젝트 ID 일치 여부 확인
+        if settings.FIREBASE_PROJECT_ID and payload.get('aud') != settings.FIREBASE_PROJECT_ID:
+            log(f"❌ 프로젝트 ID 불일치! 토큰 aud: {payload.get('aud')}, 백엔드 설정: {settings.FIREBASE_PROJECT_ID}")
+    except Exception as e:
+        log(f"⚠️ 토큰 페이로드 디코딩 실패: {e}")
+
+    # 각 부분의 Base64 길이 검사 (나머지 1은 잘린 토큰)
+    for part_name, part in zip(["header", "payload", "signature"], token_parts):
+        remainder = len(part) % 4
+        if remainder == 1:
+            log(f"❌ {part_name} 부분 Base64 오류: 길이 {len(part)} (나머지 1은 유효하지 않음)")
+            log(f"   첫 10글자: {part[:10]}..., 마지막 10글자: ...{part[-10:]}")
+            log("   ☝️ 토큰 복사 시 잘린 것 같습니다. 전체 토큰을 다시 복사해주세요!")
+        else:
+            log(f"🔧 {part_name} - 길이: {len(part)}, 나머지: {remainder}")
+
+
 async def verify_firebase_token(token: str) -> Dict[str, Any]:
     """Firebase ID 토큰 검증"""
-    logger.info(f"🔍 Firebase 토큰 검증 시작: {token[:30]}...")
-    
     if not firebase_initialized:
         logger.error("❌ Firebase not initialized")
         raise AuthenticationException("Firebase authentication service is not available")
-    
+
+    # 이미 검증된 토큰이면 캐시된 클레임 반환 (서명 검증 생략)
+    cached_claims = token_cache.get(token)
+    if cached_claims is not None:
+        return cached_claims
+    check_revoked = token_cache.needs_revocation_check(token)
+
+    if settings.FIREBASE_AUTH_DEBUG:
+        _log_token_diagnostics(token)
+
+    # 토큰 정제 - 공백, 개행문자, 탭 제거 (JWT에는 공백이 없으므로 대부분 그대로 통과)
+    clean_token = "".join(token.split())
+
     try:
-        # 토큰 정제 - 공백, 개행문자, 탭 제거
-        clean_token = token.strip().replace('\n', '').replace('\r', '').replace('\t', '').replace(' ', '')
-        
-        # 토큰 기본 정보 로깅
-        logger.info(f"🎫 원본 토큰 길이: {len(token)}")
-        logger.info(f"🎫 정제 후 토큰 길이: {len(clean_token)}")
-        logger.info(f"🎫 토큰 부분 개수: {len(clean_token.split('.'))}")
-        
         # JWT 토큰은 3개 부분으로 구성되어야 함
-        token_parts = clean_token.split('.')
-        if len(token_parts) != 3:
-            logger.error(f"❌ 잘못된 토큰 형식: {len(token_parts)}개 부분 (정상: 3개)")
-            raise AuthenticationException(f"Invalid token format: expected 3 parts, got {len(token_parts)}")
-        
-        # 토큰 헤더 디코딩하여 프로젝트 정보 확인
-        try:
-            import base64
-            import json
-            header_data = token_parts[0]
-            # Base64 패딩 추가
-            while len(header_data) % 4 != 0:
-                header_data += '='
-            header = json.loads(base64.b64decode(header_data))
-            logger.info(f"🔍 토큰 헤더: {header}")
-        except Exception as e:
-            logger.warning(f"⚠️ 토큰 헤더 디코딩 실패: {e}")
-        
-        # 토큰 페이로드 디코딩하여 발급자(iss) 확인
-        try:
-            payload_data = token_parts[1]
-            while len(payload_data) % 4 != 0:
-                payload_data += '='
-            payload = json.loads(base64.b64decode(payload_data))
-            logger.info(f"🔍 토큰 발급자(iss): {payload.get('iss', 'N/A')}")
-            logger.info(f"🔍 토큰 대상(aud): {payload.get('aud', 'N/A')}")
-            logger.info(f"🔍 토큰 만료시간: {payload.get('exp', 'N/A')}")
-            
-            # 현재 백엔드 Firebase 설정 정보 로깅
-            from app.config.settings import get_settings
-            settings = get_settings()
-            logger.info(f"🏗️ 백엔드 Firebase Project ID: {settings.FIREBASE_PROJECT_ID}")
-            
-            # 프로젝트 ID 일치 여부 확인
-            expected_aud = f"projects/{settings.FIREBASE_PROJECT_ID}"
-            if settings.FIREBASE_PROJECT_ID and payload.get('aud') != settings.FIREBASE_PROJECT_ID:
-                logger.error(f"❌ 프로젝트 ID 불일치!")
-                logger.error(f"   토큰 aud: {payload.get('aud')}")
-                logger.error(f"   백엔드 설정: {settings.FIREBASE_PROJECT_ID}")
-                
-        except Exception as e:
-            logger.warning(f"⚠️ 토큰 페이로드 디코딩 실패: {e}")
-        
-        # 각 부분의 Base64 유효성 및 패딩 처리
-        validated_parts = []
-        for i, part in enumerate(token_parts):
-            part_name = ["header", "payload", "signature"][i]
-            original_length = len(part)
-            remainder = original_length % 4
-            
-            logger.info(f"🔧 {part_name} - 원본 길이: {original_length}, 나머지: {remainder}")
-            
-            # Base64 유효성 검사
-            if remainder == 1:
-                logger.error(f"❌ {part_name} 부분 Base64 오류: 나머지 1은 유효하지 않음")
-                logger.error(f"   토큰이 잘렸거나 손상되었을 가능성이 높음")
-                logger.error(f"   마지막 10글자: ...{part[-10:]}")
-                logger.error(f"   첫 10글자: {part[:10]}...")
-                logger.error(f"   전체 길이: {len(part)} (나머지: {remainder})")
-                logger.error(f"   ☝️ 토큰 복사 시 잘린 것 같습니다. 전체 토큰을 다시 복사해주세요!")
-                raise AuthenticationException(f"Invalid Base64 format in {part_name}: remainder 1 is not valid. Token may be truncated.")
-            
-            # 올바른 패딩 추가
-            padded_part = part
-            if remainder == 2:
-                padded_part += '=='
-                logger.info(f"🔧 {part_name} - 패딩 2개 추가")
-            elif remainder == 3:
-                padded_part += '='
-                logger.info(f"🔧 {part_name} - 패딩 1개 추가")
-            elif remainder == 0:
-                logger.info(f"🔧 {part_name} - 패딩 불필요")
-            
-            validated_parts.append(padded_part)
-            logger.info(f"🔧 {part_name} - 최종 길이: {len(padded_part)}")
-        
-        # 패딩이 추가된 토큰 재구성
-        final_token = '.'.join(validated_parts)
-        
-        # Firebase Admin SDK로 토큰 검증
-        logger.info(f"🔥 Firebase Admin SDK 토큰 검증 시도...")
-        decoded_token = auth.verify_id_token(final_token)
-        logger.info(f"✅ Firebase 토큰 검증 성공: uid={decoded_token.get('uid')}")
+        if clean_token.count('.') != 2:
+            raise AuthenticationException(
+                f"Invalid token format: expected 3 parts, got {clean_token.count('.') + 1}"
+            )
+
+        # Firebase Admin SDK 호환 검증 (스레드 풀에서 실행)
+        decoded_token = await run_token_verification(clean_token, check_revoked)
+        token_cache.put(token, decoded_token, revocation_checked=check_revoked)
         return decoded_token
-        
-    except auth.InvalidIdTokenError as e:
-        logger.error(f"❌ Invalid Firebase token: {str(e)}")
-        raise AuthenticationException(f"Invalid Firebase token: {str(e)}")
+
+    except AuthenticationException as e:
+        _log_token_diagnostics(token, e)
+        raise
+    except auth.RevokedIdTokenError as e:
+        token_cache.invalidate(token)
+        _log_token_diagnostics(token, e)
+        raise AuthenticationException(f"Revoked Firebase token: {str(e)}")
     except auth.ExpiredIdTokenError as e:
-        logger.error(f"❌ Expired Firebase token: {str(e)}")
+        _log_token_diagnostics(token, e)
         raise AuthenticationException(f"Expired Firebase token: {str(e)}")
+    except auth.InvalidIdTokenError as e:
+        _log_token_diagnostics(token, e)
+        raise AuthenticationException(f"Invalid Firebase token: {str(e)}")
     except Exception as e:
-        logger.error(f"❌ Firebase token verification failed: {str(e)}")
+        _log_token_diagnostics(token, e)
         raise AuthenticationException(f"Firebase token verification failed: {str(e)}")
 
 
@@ -305,8 +359,7 @@ async def get_current_user(
     """Firebase 토큰으로부터 현재 사용자 정보 추출"""
     try:
         token = credentials.credentials
-        logger.info(f"🔍 사용자 인증 시작: {token[:30]}...")
-        
+
         # 개발 환경에서 테스트 토큰 허용
         if settings.DEBUG and token == "test-token-for-development":
             logger.info("🧪 개발 모드: 테스트 토큰 사용")
@@ -330,10 +383,7 @@ async def get_current_user(
         
         # Firebase 토큰 검증
         decoded_token = await verify_firebase_token(token)
-        user_info = get_user_from_token(decoded_token)
-        
-        logger.info(f"✅ 사용자 인증 성공: {user_info['uid']}")
-        return user_info
+        return get_user_from_token(decoded_token)
         
     except HTTPException:
         raise  # HTTPException은 그대로 전달
@@ -421,6 +471,7 @@ def get_firebase_status() -> Dict[str, Any]:
         "use_firebase": settings.USE_FIREBASE,
         "project_id": settings.FIREBASE_PROJECT_ID[:10] + "..." if settings.FIREBASE_PROJECT_ID else None,
         "client_email": settings.FIREBASE_CLIENT_EMAIL[:20] + "..." if settings.FIREBASE_CLIENT_EMAIL else None,
+        "token_cache": token_cache.stats(),
     }
 
 
@@ -0,0 +1,164 @@
+"""
+Firebase ID 토큰 검증 결과 캐시
+검증된 클레임을 토큰 해시 기준으로 만료(exp) 시점까지 보관
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def hash_token(token: str) -> str:
+    """토큰 원문 대신 캐시 키로 사용할 SHA-256 해시"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class _CacheEntry:
+    """캐시 항목 (클레임, 만료 시각, 마지막 폐기 확인 시각)"""
+
+    __slots__ = ("claims", "expires_at", "revocation_checked_at")
+
+    def __init__(self, claims: Dict[str, Any], expires_at: float, revocation_checked_at: float):
+        self.claims = claims
+        self.expires_at = expires_at
+        self.revocation_checked_at = revocation_checked_at
+
+
+class TokenVerificationCache:
+    """
+    검증된 Firebase 토큰 클레임의 LRU 캐시
+
+    - 키: 토큰의 SHA-256 해시 (원문 토큰은 메모리에 남기지 않음)
+    - 만료: 토큰의 exp 클레임 (clock_skew 만큼 일찍 만료)
+    - revocation_check_interval > 0 이면 해당 주기가 지난 항목은 미스로 처리하여
+      check_revoked=True 재검증을 유도
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        revocation_check_interval: int = 0,
+        clock_skew: int = 5,
+    ):
+        self.max_size = max_size
+        self.revocation_check_interval = revocation_check_interval
+        self.clock_skew = clock_skew
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """캐시된 클레임 반환 (없거나 만료/폐기 확인 필요 시 None)"""
+        if self.max_size <= 0:
+            return None
+
+        key = hash_token(token)
+        now = time.time() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry.expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            if self.revocation_check_due(entry, now):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.claims
+
+    def put(
+        self,
+        token: str,
+        claims: Dict[str, Any],
+        now: Optional[float] = None,
+        revocation_checked: bool = False,
+    ) -> None:
+        """검증된 클레임 저장 (exp 클레임이 없거나 이미 지난 토큰은 저장하지 않음)"""
+        if self.max_size <= 0:
+            return
+
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+
+        now = time.time() if now is None else now
+        expires_at = float(exp) - self.clock_skew
+        if expires_at <= now:
+            return
+
+        key = hash_token(token)
+        with self._lock:
+            previous = self._entries.get(key)
+            if revocation_checked:
+                revocation_checked_at = now
+            elif previous is not None:
+                revocation_checked_at = previous.revocation_checked_at
+            else:
+                revocation_checked_at = now
+
+            self._entries[key] = _CacheEntry(claims, expires_at, revocation_checked_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def needs_revocation_check(self, token: str, now: Optional[float] = None) -> bool:
+        """캐시 항목이 있으나 폐기 여부 재확인 주기가 지났는지 여부"""
+        if self.revocation_check_interval <= 0:
+            return False
+
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(hash_token(token))
+            return entry is not None and self.revocation_check_due(entry, now)
+
+    def revocation_check_due(self, entry: _CacheEntry, now: float) -> bool:
+        """폐기 확인 주기 경과 여부"""
+        if self.revocation_check_interval <= 0:
+            return False
+        return now - entry.revocation_checked_at >= self.revocation_check_interval
+
+    def invalidate(self, token: str) -> None:
+        """특정 토큰 캐시 제거"""
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def invalidate_uid(self, uid: str) -> int:
+        """특정 사용자의 모든 캐시 항목 제거 (로그아웃/토큰 폐기 시)"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.claims.get("uid") == uid]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """캐시 전체 비우기"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 상태 반환"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "revocation_check_interval": self.revocation_check_interval,
+        }
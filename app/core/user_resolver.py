@@ -0,0 +1,211 @@
+"""
+Firebase UID → 내부 사용자 ID(users.id) 해석
+
+users.firebase_uid 유니크 인덱스(ix_users_firebase_uid)로 한 번 조회하고,
+없으면 INSERT ... ON CONFLICT 로 생성한 뒤 결과를 프로세스 내 TTL 캐시에 보관한다.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# 해석에 필요한 users 컬럼만 정의 (스키마는 alembic 0001 기준)
+users_table = sa.Table(
+    "users",
+    sa.MetaData(),
+    sa.Column("id", sa.Uuid(), primary_key=True),
+    sa.Column("firebase_uid", sa.String(255), nullable=False),
+    sa.Column("email", sa.String(255)),
+    sa.Column("name", sa.String(255)),
+    sa.Column("is_active", sa.Boolean()),
+    sa.Index("ix_users_firebase_uid", "firebase_uid", unique=True),
+)
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+class UserIdResolver:
+    """
+    firebase_uid → users.id 해석기 (TTL + LRU 캐시)
+
+    - 캐시 적중: DB 접근 없음
+    - 캐시 미스: 인덱스 조회 1회, 신규 사용자면 upsert 1회
+    """
+
+    def __init__(self, ttl: int = 300, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    def get_cached(self, firebase_uid: str, now: Optional[float] = None) -> Optional[str]:
+        """캐시된 사용자 ID 반환 (없거나 만료되면 None)"""
+        if self.max_size <= 0:
+            return None
+        now = time.time() if now is None else now
+
+        with self._lock:
+            entry = self._entries.get(firebase_uid)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if now >= expires_at:
+                del self._entries[firebase_uid]
+                return None
+            self._entries.move_to_end(firebase_uid)
+            return user_id
+
+    def remember(self, firebase_uid: str, user_id: str, now: Optional[float] = None) -> None:
+        """해석 결과 캐시에 저장"""
+        if self.max_size <= 0:
+            return
+        now = time.time() if now is None else now
+
+        with self._lock:
+            self._entries[firebase_uid] = (user_id, now + self.ttl)
+            self._entries.move_to_end(firebase_uid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, firebase_uid: str) -> None:
+        """사용자 삭제 등으로 매핑이 바뀌었을 때 캐시 제거"""
+        with self._lock:
+            self._entries.pop(firebase_uid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created,
+        }
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        firebase_uid: str,
+        email: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> str:
+        """firebase_uid에 해당하는 users.id 반환 (없으면 생성)"""
+        if not firebase_uid:
+            raise ValueError("firebase_uid is required")
+
+        user_id = self.get_cached(firebase_uid)
+        if user_id is not None:
+            self.hits += 1
+            return user_id
+        self.misses += 1
+
+        result = await db.execute(
+            sa.select(users_table.c.id).where(users_table.c.firebase_uid == firebase_uid)
+        )
+        found = result.scalar_one_or_none()
+        if found is None:
+            found = await self._upsert(db, firebase_uid, email, name)
+
+        user_id = str(found)
+        self.remember(firebase_uid, user_id)
+        return user_id
+
+    async def lookup(self, db: AsyncSession, firebase_uid: str) -> Optional[str]:
+        """firebase_uid에 해당하는 users.id 반환 (없으면 생성하지 않고 None)"""
+        if not firebase_uid:
+            return None
+
+        user_id = self.get_cached(firebase_uid)
+        if user_id is not None:
+            self.hits += 1
+            return user_id
+        self.misses += 1
+
+        result = await db.execute(
+            sa.select(users_table.c.id).where(users_table.c.firebase_uid == firebase_uid)
+        )
+        found = result.scalar_one_or_none()
+        if found is None:
+            return None
+
+        user_id = str(found)
+        self.remember(firebase_uid, user_id)
+        return user_id
+
+    async def _upsert(
+        self, db: AsyncSession, firebase_uid: str, email: Optional[str], name: Optional[str]
+    ) -> uuid.UUID:
+        """
+        INSERT ... ON CONFLICT (firebase_uid) 로 사용자 생성
+
+        동시 요청이 먼저 생성한 경우에도 충돌 시 no-op UPDATE 로 기존 id를 RETURNING 한다.
+        """
+        insert = _INSERT_BY_DIALECT.get(db.bind.dialect.name)
+        if insert is None:
+            raise RuntimeError(f"Unsupported dialect for user upsert: {db.bind.dialect.name}")
+
+        statement = insert(users_table).values(
+            id=uuid.uuid4(),
+            firebase_uid=firebase_uid,
+            email=email,
+            name=name,
+            is_active=True,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[users_table.c.firebase_uid],
+            set_={"firebase_uid": statement.excluded.firebase_uid},
+        ).returning(users_table.c.id)
+
+        result = await db.execute(statement)
+        user_id = result.scalar_one()
+        # 이후 분석 결과의 FK 대상이 되도록 즉시 커밋 (신규 사용자일 때만 발생)
+        await db.commit()
+
+        self.created += 1
+        logger.info("👤 사용자 생성/연결: firebase_uid=%s, user_id=%s", firebase_uid, user_id)
+        return user_id
+
+
+user_id_resolver = UserIdResolver(
+    ttl=settings.USER_ID_CACHE_TTL,
+    max_size=settings.USER_ID_CACHE_SIZE,
+)
+
+
+async def resolve_user_id(
+    db: AsyncSession,
+    firebase_uid: str,
+    email: Optional[str] = None,
+    name: Optional[str] = None,
+) -> str:
+    """Firebase UID를 내부 사용자 ID로 해석 (전역 해석기 사용)"""
+    return await user_id_resolver.resolve(db, firebase_uid, email=email, name=name)
+
+
+async def find_user_id(db: AsyncSession, firebase_uid: str) -> Optional[str]:
+    """다른 사용자의 Firebase UID를 내부 사용자 ID로 해석 (없으면 None, 생성하지 않음)"""
+    return await user_id_resolver.lookup(db, firebase_uid)
@@ -20,14 +20,17 @@ from app.core.middleware import (
     SecurityHeadersMiddleware,
 )
 from app.core.exceptions import add_exception_handlers
+from app.core.logging_config import configure_logging, parse_sampling_rates
 
 # 설정 로드
 settings = get_settings()
 
-# 로거 설정
-logging.basicConfig(
+# 로거 설정 (stdlib/structlog 공통 큐 기반 파이프라인)
+configure_logging(
     level=logging.INFO if not settings.DEBUG else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    json_output=settings.LOG_JSON,
+    sampling=parse_sampling_rates(settings.LOG_SAMPLING),
+    queue_size=settings.LOG_QUEUE_SIZE,
 )
 logger = logging.getLogger(__name__)
 
@@ -52,6 +55,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         from app.core.security import firebase_initialized as firebase_status_after_init
         
         if firebase_success:
+            from app.core.security import start_key_refresh
+            start_key_refresh()
             logger.info("🔥 Firebase 초기화 완료 - 인증 서비스 준비 완료")
         else:
             logger.info("🔥 Firebase 비활성화 모드 - 서버는 정상 구동")
@@ -60,6 +65,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         if settings.DATABASE_URL:
             await initialize_database()
             logger.info("🗄️ 데이터베이스 연결 완료")
+            await initialize_vector_index()
+            await initialize_geo_index()
+            await initialize_interest_vocabulary()
+            await initialize_feature_snapshot()
         else:
             logger.info("🗄️ 데이터베이스 연결 없음 (개발/테스트 모드)")
         
@@ -101,13 +110,64 @@ async def initialize_database():
         raise
 
 
+async def initialize_vector_index():
+    """매칭 후보 검색용 사용자 벡터 인덱스 복원/구축 + 델타 갱신 시작 (다른 워커의 벡터 변경 반영)"""
+    try:
+        from app.config.database import AsyncSessionLocal
+        from app.services.vector_index import load_or_build_user_vector_index, start_vector_index_refresh
+        index = await load_or_build_user_vector_index(AsyncSessionLocal)
+        logger.info("🧭 사용자 벡터 인덱스 준비 완료: %d명", len(index))
+        start_vector_index_refresh(AsyncSessionLocal)
+    except Exception as e:
+        # 인덱스가 없으면 최근 활동 기반 후보 조회로 동작하므로 계속 진행
+        logger.error("❌ 사용자 벡터 인덱스 초기화 실패: %s", e)
+
+
+async def initialize_geo_index():
+    """반경 검색용 사용자 위치 인덱스 구축 + 델타 갱신 시작 (다른 워커의 위치 변경 반영)"""
+    try:
+        from app.config.database import AsyncSessionLocal
+        from app.services.geo_index import build_user_geo_index, start_geo_index_refresh
+        async with AsyncSessionLocal() as db:
+            index = await build_user_geo_index(db)
+        logger.info("📍 사용자 위치 인덱스 준비 완료: %d명", len(index))
+        start_geo_index_refresh(AsyncSessionLocal)
+    except Exception as e:
+        # 인덱스가 없으면 위/경도 범위 조회로 동작하므로 계속 진행
+        logger.error("❌ 사용자 위치 인덱스 초기화 실패: %s", e)
+
+
+async def initialize_interest_vocabulary():
+    """관심사 어휘(문자열 → 정수 ID) 캐시 적재"""
+    try:
+        from app.config.database import AsyncSessionLocal
+        from app.services.interest_index import load_interest_vocabulary
+        async with AsyncSessionLocal() as db:
+            vocabulary = await load_interest_vocabulary(db)
+        logger.info("🏷️ 관심사 어휘 적재 완료: %d개", len(vocabulary))
+    except Exception as e:
+        logger.error("❌ 관심사 어휘 적재 실패: %s", e)
+
+
+async def initialize_feature_snapshot():
+    """매칭 특성 스냅샷 매핑 + 델타 갱신 시작 (파일이 없으면 DB 조회로 동작)"""
+    try:
+        from app.config.database import AsyncSessionLocal
+        from app.services.feature_snapshot import feature_store, start_snapshot_refresh
+        if feature_store.load(settings.FEATURE_SNAPSHOT_PATH):
+            logger.info("🧮 매칭 특성 스냅샷 매핑 완료: %d명", len(feature_store))
+        else:
+            logger.info("🧮 매칭 특성 스냅샷 없음 - 후보 특성은 DB 에서 조회")
+        start_snapshot_refresh(AsyncSessionLocal)
+    except Exception as e:
+        logger.error("❌ 매칭 특성 스냅샷 초기화 실패: %s", e)
+
+
 async def initialize_redis():
     """Redis 초기화"""
     try:
-        import redis.asyncio as redis
-        redis_client = redis.from_url(settings.REDIS_URL)
-        await redis_client.ping()
-        await redis_client.close()
+        from app.config.cache import get_redis
+        await get_redis().ping()
         logger.info("🔴 Redis 연결 테스트 완료")
     except Exception as e:
         logger.error(f"❌ Redis 초기화 실패: {e}")
@@ -139,8 +199,25 @@ async def cleanup_resources():
     try:
         # 데이터베이스 연결 정리
         # Redis 연결 정리
-        # 기타 리소스 정리
-        pass
+        from app.config.cache import close_redis
+        await close_redis()
+        # Firebase 인증서 갱신 작업 정리
+        from app.core.security import stop_key_refresh
+        await stop_key_refresh()
+        # 특성 스냅샷 델타 갱신 작업 정리
+        from app.services.feature_snapshot import stop_snapshot_refresh
+        await stop_snapshot_refresh()
+        # 위치 인덱스 델타 갱신 작업 정리
+        from app.services.geo_index import stop_geo_index_refresh
+        await stop_geo_index_refresh()
+        # 벡터 인덱스 델타 갱신 작업 정리
+        from app.services.vector_index import stop_vector_index_refresh
+        await stop_vector_index_refresh()
+        # 사용자 벡터 인덱스 스냅샷 저장 (다음 시작 시 재구축 생략)
+        if settings.DATABASE_URL:
+            from app.services.vector_index import user_vector_index
+            if len(user_vector_index):
+                user_vector_index.save(settings.VECTOR_INDEX_PATH)
     except Exception as e:
         logger.error(f"❌ 리소스 정리 중 오류: {e}")
 
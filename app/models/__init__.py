@@ -0,0 +1,25 @@
+"""
+데이터베이스 모델 패키지 (스키마는 alembic 마이그레이션 기준)
+"""
+
+from app.models.user import User, UserVector, MatchingPreference
+from app.models.diary import Diary
+from app.models.analysis import (
+    DiaryAnalysis,
+    UserPersonalitySummary,
+    UserEmotionPattern,
+    UserEmotionDaily,
+    AIModelVersion,
+)
+
+__all__ = [
+    "User",
+    "UserVector",
+    "MatchingPreference",
+    "Diary",
+    "DiaryAnalysis",
+    "UserPersonalitySummary",
+    "UserEmotionPattern",
+    "UserEmotionDaily",
+    "AIModelVersion",
+]
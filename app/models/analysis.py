@@ -0,0 +1,141 @@
+"""
+AI 분석 관련 데이터베이스 모델
+"""
+import uuid
+
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text, func, text
+
+from app.config.database import Base
+from app.models.types import JSONType, UUIDType
+
+
+class DiaryAnalysis(Base):
+    """일기 분석 결과"""
+    __tablename__ = "diary_analysis"
+
+    id = Column(UUIDType(), primary_key=True, default=uuid.uuid4, index=True)
+    analysis_id = Column(String(255), nullable=False, unique=True, index=True)
+    diary_id = Column(String(255), nullable=False, index=True)
+    user_id = Column(UUIDType(), ForeignKey("users.id"), nullable=False, index=True)
+    content = Column(Text, nullable=False)
+    content_length = Column(Integer)
+
+    # 감정 분석
+    emotions = Column(JSONType)
+    primary_emotion = Column(String(50))
+    secondary_emotions = Column(JSONType)
+    sentiment_score = Column(Float)
+    emotional_intensity = Column(Float)
+    emotional_stability = Column(Float)
+
+    # 성격 분석
+    personality = Column(JSONType)
+    mbti_indicators = Column(JSONType)
+    big5_traits = Column(JSONType)
+    predicted_mbti = Column(String(4))
+
+    # 키워드/주제
+    keywords = Column(JSONType)
+    topics = Column(JSONType)
+    entities = Column(JSONType)
+    themes = Column(JSONType)
+
+    # 생활 패턴
+    lifestyle_patterns = Column(JSONType)
+    activity_patterns = Column(JSONType)
+    social_patterns = Column(JSONType)
+
+    insights = Column(JSONType)
+    recommendations = Column(JSONType)
+
+    # 메타데이터
+    analysis_version = Column(String(50))
+    processing_time_seconds = Column(Float)
+    confidence_score = Column(Float)
+    status = Column(String(50), default="completed")
+    error_message = Column(Text)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # 사용자별 최근 완료 분석 조회 (완료 행만 담는 부분 인덱스)
+        Index(
+            "ix_diary_analysis_user_id_processed_at_completed", "user_id", processed_at.desc(),
+            postgresql_where=text("status = 'completed'"),
+            sqlite_where=text("status = 'completed'"),
+        ),
+    )
+
+
+class UserPersonalitySummary(Base):
+    """사용자 성격 요약 (분석 누적)"""
+    __tablename__ = "user_personality_summary"
+
+    user_id = Column(UUIDType(), primary_key=True, index=True)
+    overall_mbti = Column(String(4))
+    overall_big5 = Column(JSONType)
+    personality_traits = Column(JSONType)
+    mbti_consistency = Column(Float)
+    trait_stability = Column(JSONType)
+    personality_evolution = Column(JSONType)
+    # 최근 가중 누적 평균/분산 (app.utils.running_stats.RunningStats.to_dict)
+    running_stats = Column(JSONType)
+    analysis_count = Column(Integer, default=0)
+    confidence_level = Column(Float)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class UserEmotionPattern(Base):
+    """사용자 감정 패턴 (분석 누적)"""
+    __tablename__ = "user_emotion_patterns"
+
+    user_id = Column(UUIDType(), primary_key=True, index=True)
+    emotion_distribution = Column(JSONType)
+    dominant_emotions = Column(JSONType)
+    avg_sentiment_score = Column(Float)
+    emotional_range = Column(Float)
+    emotional_volatility = Column(Float)
+    weekly_pattern = Column(JSONType)
+    monthly_pattern = Column(JSONType)
+    seasonal_pattern = Column(JSONType)
+    emotion_trends = Column(JSONType)
+    sentiment_trends = Column(JSONType)
+    # 최근 가중 누적 통계와 집계 기간 (EmotionAnalysisService.update_user_emotion_patterns)
+    running_stats = Column(JSONType)
+    analysis_count = Column(Integer, default=0)
+    analysis_period_days = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class UserEmotionDaily(Base):
+    """사용자 일별 감정 버킷 (분석 저장 시 증분 누적)"""
+    __tablename__ = "user_emotion_daily"
+
+    user_id = Column(UUIDType(), ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    analysis_count = Column(Integer, nullable=False, default=0)
+    sentiment_sum = Column(Float, nullable=False, default=0.0)
+    intensity_sum = Column(Float, nullable=False, default=0.0)
+    emotion_sums = Column(JSONType)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class AIModelVersion(Base):
+    """AI 모델 버전 정보"""
+    __tablename__ = "ai_model_versions"
+
+    id = Column(UUIDType(), primary_key=True, default=uuid.uuid4)
+    model_name = Column(String(100), nullable=False)
+    model_version = Column(String(50), nullable=False)
+    model_type = Column(String(50), nullable=False)
+    model_config = Column(JSONType)
+    api_endpoint = Column(String(255))
+    performance_metrics = Column(JSONType)
+    accuracy_score = Column(Float)
+    is_active = Column(Boolean, default=True)
+    is_default = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    deployed_at = Column(DateTime(timezone=True))
@@ -0,0 +1,36 @@
+"""
+일기 데이터베이스 모델
+"""
+import uuid
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, func
+
+from app.config.database import Base
+from app.models.types import JSONType, UUIDType
+
+
+class Diary(Base):
+    """사용자 일기 원문"""
+    __tablename__ = "diaries"
+
+    id = Column(UUIDType(), primary_key=True, default=uuid.uuid4, index=True)
+    diary_id = Column(String(255), nullable=False, unique=True, index=True)
+    user_id = Column(UUIDType(), ForeignKey("users.id"), nullable=False, index=True)
+    title = Column(String(500))
+    content = Column(Text, nullable=False)
+    original_content = Column(Text)
+    diary_metadata = Column(JSONType)
+    tags = Column(JSONType)
+    word_count = Column(Integer)
+    character_count = Column(Integer)
+    writing_time_minutes = Column(Integer)
+    user_mood = Column(String(50))
+    user_emotion_tags = Column(JSONType)
+    weather = Column(String(50))
+    location = Column(String(255))
+    is_private = Column(Boolean)
+    is_deleted = Column(Boolean)
+    is_analyzed = Column(Boolean)
+    diary_date = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
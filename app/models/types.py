@@ -0,0 +1,50 @@
+"""
+모델 공통 컬럼 타입 (PostgreSQL 운영 / SQLite 테스트 겸용)
+"""
+import uuid
+
+from sqlalchemy import JSON, LargeBinary, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+from app.utils.vector_codec import decode_vector, encode_vector
+
+# PostgreSQL 에서는 JSONB, 그 외(테스트용 SQLite)에서는 JSON
+# None 은 JSON null 이 아닌 SQL NULL 로 저장 (IS NOT NULL 조건/부분 인덱스와 일치)
+JSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+
+class UUIDType(TypeDecorator):
+    """
+    UUID 컬럼 (PostgreSQL 네이티브 UUID, 그 외 CHAR(32))
+
+    서비스 계층은 사용자 ID를 문자열로 다루므로 바인딩 시 문자열도 uuid.UUID 로 변환한다.
+    """
+    impl = Uuid
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(str(value))
+
+
+class Float32VectorType(TypeDecorator):
+    """
+    float32 벡터 컬럼 (bytea / BLOB)
+
+    목록이나 NumPy 배열을 받아 little-endian float32 바이트로 저장하고,
+    읽을 때는 np.frombuffer 로 복사 없는 읽기 전용 배열을 반환한다.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_vector(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_vector(value)
+
+    def compare_values(self, x, y):
+        # 변경 감지: 배열끼리 == 는 원소별 비교(차원이 다르면 오류)이므로 저장 바이트로 비교
+        return encode_vector(x) == encode_vector(y)
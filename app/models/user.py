@@ -0,0 +1,92 @@
+"""
+사용자 관련 데이터베이스 모델
+"""
+import uuid
+
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, func, text
+
+from app.config.database import Base
+from app.models.types import Float32VectorType, JSONType, UUIDType
+
+
+class User(Base):
+    """사용자 (Firebase UID 로 식별)"""
+    __tablename__ = "users"
+
+    id = Column(UUIDType(), primary_key=True, default=uuid.uuid4, index=True)
+    firebase_uid = Column(String(255), nullable=False, unique=True, index=True)
+    email = Column(String(255), index=True)
+    name = Column(String(255))
+    picture = Column(String(500))
+    bio = Column(Text)
+    age = Column(Integer)
+    location = Column(String(255))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12), index=True)
+    settings = Column(JSONType, default=dict)
+    interest_bits = Column(LargeBinary)
+    preferences = Column(JSONType, default=dict)
+    is_active = Column(Boolean, default=True)
+    is_verified = Column(Boolean, default=False)
+    email_verified = Column(Boolean, default=False)
+    matching_enabled = Column(Boolean, default=True)
+    profile_visibility = Column(String(20), default="public")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    last_login = Column(DateTime(timezone=True))
+    last_active = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_users_latitude_longitude", "latitude", "longitude"),
+        # 매칭 후보 조회 (활성 + 매칭 허용 사용자만 담는 부분 인덱스)
+        Index(
+            "ix_users_matchable_last_active", last_active.desc(),
+            postgresql_where=text("is_active AND matching_enabled"),
+            sqlite_where=text("is_active = 1 AND matching_enabled = 1"),
+        ),
+        Index(
+            "ix_users_matchable_age", "age",
+            postgresql_where=text("is_active AND matching_enabled"),
+            sqlite_where=text("is_active = 1 AND matching_enabled = 1"),
+        ),
+    )
+
+
+class UserVector(Base):
+    """사용자 매칭 벡터"""
+    __tablename__ = "user_vectors"
+
+    user_id = Column(UUIDType(), ForeignKey("users.id"), primary_key=True, index=True)
+    personality_vector = Column(Float32VectorType())
+    emotion_vector = Column(Float32VectorType())
+    lifestyle_vector = Column(Float32VectorType())
+    combined_vector = Column(Float32VectorType())
+    vector_version = Column(String(20), default="1.0")
+    analysis_count = Column(Integer, default=0)
+    confidence_score = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class MatchingPreference(Base):
+    """매칭 선호도"""
+    __tablename__ = "matching_preferences"
+
+    user_id = Column(UUIDType(), ForeignKey("users.id"), primary_key=True, index=True)
+    enabled = Column(Boolean, default=True)
+    visibility = Column(String(20), default="public")
+    preferred_age_min = Column(Integer)
+    preferred_age_max = Column(Integer)
+    preferred_location_radius = Column(Integer)
+    preferred_personality_types = Column(JSONType, default=list)
+    personality_weight = Column(Integer, default=35)
+    emotion_weight = Column(Integer, default=25)
+    lifestyle_weight = Column(Integer, default=25)
+    interest_weight = Column(Integer, default=15)
+    min_compatibility_threshold = Column(Integer, default=50)
+    diversity_factor = Column(Integer, default=0)
+    excluded_users = Column(JSONType, default=list)
+    blocked_users = Column(JSONType, default=list)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -23,6 +23,60 @@ class EmotionAnalysis(BaseModel):
     confidence: float = Field(..., description="신뢰도 (0 ~ 1)")
 
 
+class EmotionScore(BaseModel):
+    """개별 감정 점수"""
+    emotion: str = Field(..., description="감정")
+    score: float = Field(..., description="점수 (0 ~ 1)")
+    confidence: float = Field(..., description="신뢰도 (0 ~ 1)")
+
+
+class MBTIIndicators(BaseModel):
+    """MBTI 지표별 점수 (0 ~ 1)"""
+    E: float = 0.5
+    I: float = 0.5
+    S: float = 0.5
+    N: float = 0.5
+    T: float = 0.5
+    F: float = 0.5
+    J: float = 0.5
+    P: float = 0.5
+
+
+class Big5Traits(BaseModel):
+    """Big5 성격 특성 점수 (0 ~ 1)"""
+    openness: float = 0.5
+    conscientiousness: float = 0.5
+    extraversion: float = 0.5
+    agreeableness: float = 0.5
+    neuroticism: float = 0.5
+
+
+class PersonalityAnalysis(BaseModel):
+    """성격 분석 결과 (서비스 내부용)"""
+    mbti_indicators: MBTIIndicators
+    big5_traits: Big5Traits
+    predicted_mbti: Optional[str] = Field(None, description="예측 MBTI")
+    personality_summary: List[str] = Field(default=[], description="성격 요약")
+    confidence_level: float = Field(default=0.5, description="신뢰도")
+
+
+class KeywordExtraction(BaseModel):
+    """키워드/주제 추출 결과 (서비스 내부용)"""
+    keywords: List[str] = Field(default=[])
+    topics: List[str] = Field(default=[])
+    entities: List[Any] = Field(default=[])
+    themes: List[str] = Field(default=[])
+
+
+class LifestylePattern(BaseModel):
+    """생활 패턴 분석 결과 (서비스 내부용)"""
+    activity_patterns: Dict[str, float] = Field(default={})
+    social_patterns: Dict[str, float] = Field(default={})
+    time_patterns: Dict[str, float] = Field(default={})
+    interest_areas: List[str] = Field(default=[])
+    values_orientation: Dict[str, float] = Field(default={})
+
+
 class PersonalityInsights(BaseModel):
     """성격 인사이트 - 단순화"""
     openness: float = Field(..., description="개방성")
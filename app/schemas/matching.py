@@ -2,7 +2,7 @@
 매칭 관련 Pydantic 스키마 - Firebase 중심으로 단순화
 """
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -12,6 +12,7 @@ class MatchingRequest(BaseModel):
     limit: int = Field(default=10, ge=1, le=50, description="추천 후보 수")
     min_compatibility: float = Field(default=0.5, ge=0.0, le=1.0, description="최소 호환성 점수")
     filters: Optional[Dict[str, Any]] = Field(default={}, description="추가 필터")
+    mutual: bool = Field(default=False, description="상호 점수 (양방향 점수의 조화 평균) 사용 여부")
 
 
 class CompatibilityRequest(BaseModel):
@@ -19,6 +20,14 @@ class CompatibilityRequest(BaseModel):
     target_user_id: str = Field(..., description="상대방 사용자 UID")
 
 
+class MatchingFilters(BaseModel):
+    """후보 검색 필터 (서비스 내부용)"""
+    age_range: Optional[Tuple[int, int]] = Field(None, description="나이 범위 (최소, 최대)")
+    location: Optional[str] = Field(None, description="지역 (부분 일치, 대소문자 무시)")
+    radius_km: Optional[float] = Field(None, gt=0, description="검색 반경(km), 없으면 선호도의 preferred_location_radius")
+    exclude_users: List[str] = Field(default=[], description="제외할 사용자 ID")
+
+
 class MatchingCandidate(BaseModel):
     """매칭 후보자 정보 - 단순화"""
     user_uid: str = Field(..., description="Firebase 사용자 UID")
@@ -31,6 +40,29 @@ class MatchingCandidate(BaseModel):
     last_active: Optional[str] = Field(None, description="마지막 활동")
 
 
+class MatchExplanation(BaseModel):
+    """후보 카드 상세 (카드를 눌렀을 때 요청)"""
+    user_uid: str = Field(..., description="후보 Firebase 사용자 UID")
+    compatibility_score: float = Field(..., description="호환성 점수")
+    compatibility_level: str = Field(..., description="호환성 수준")
+    breakdown: Dict[str, float] = Field(default={}, description="영역별 호환성")
+    match_reasons: List[str] = Field(default=[], description="매칭 근거")
+    shared_traits: List[str] = Field(default=[], description="공통 특성")
+    complementary_traits: List[str] = Field(default=[], description="상호 보완 특성")
+    common_interests: List[str] = Field(default=[], description="공통 관심사")
+    profile_version: str = Field(..., description="계산에 사용한 두 프로필의 버전")
+    generated_at: str = Field(..., description="생성 시간")
+
+
+class CompatibilityBreakdown(BaseModel):
+    """영역별 호환성 점수"""
+    personality_compatibility: float
+    emotion_compatibility: float
+    lifestyle_compatibility: float
+    interest_compatibility: float
+    communication_compatibility: float
+
+
 class MatchingCandidatesResponse(BaseModel):
     """매칭 후보 목록 응답 - 단순화"""
     user_uid: str = Field(..., description="요청 사용자 UID")
@@ -45,11 +77,14 @@ class CompatibilityResponse(BaseModel):
     user1_uid: str = Field(..., description="사용자 1 UID")
     user2_uid: str = Field(..., description="사용자 2 UID")
     overall_score: float = Field(..., description="전체 호환성 점수")
+    compatibility_level: Optional[str] = Field(None, description="호환성 수준")
     compatibility_breakdown: Dict[str, float] = Field(default={}, description="세부 호환성")
+    strengths: List[str] = Field(default=[], description="관계 강점")
     shared_traits: List[str] = Field(default=[], description="공통 특성")
     complementary_traits: List[str] = Field(default=[], description="상호 보완 특성")
     potential_challenges: List[str] = Field(default=[], description="잠재적 도전과제")
     recommendations: List[str] = Field(default=[], description="관계 개선 제안")
+    confidence_level: Optional[float] = Field(None, description="분석 신뢰도")
     calculated_at: str = Field(..., description="계산 시간")
 
 
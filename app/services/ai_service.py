@@ -4,8 +4,7 @@ AI 분석 서비스
 import asyncio
 import json
 import time
-import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 
 import google.generativeai as genai
@@ -15,6 +14,10 @@ from sqlalchemy import select, update, and_
 
 from app.config.settings import get_settings
 from app.core.exceptions import AIServiceException
+from app.core.user_resolver import resolve_user_id
+from app.services.match_precompute import refresh_user_matches
+from app.services.user_vectors import fold_user_vector
+from app.services.vector_index import user_vector_index
 
 # 모델 import를 지연 로딩으로 처리
 try:
@@ -41,6 +44,7 @@ from app.schemas.analysis import (
 from app.services.emotion_service import EmotionAnalysisService
 from app.services.personality_service import PersonalityAnalysisService
 from app.utils.helpers import generate_analysis_id
+from app.utils.vector_codec import has_values
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -49,83 +53,6 @@ logger = structlog.get_logger()
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
 
-def validate_and_fix_user_id(user_id: str) -> str:
-    """user_id 검증 및 올바른 UUID로 변환/생성"""
-    if not user_id:
-        return str(uuid.uuid4())
-    
-    # 이미 올바른 UUID 형식인지 확인
-    try:
-        uuid.UUID(user_id)
-        return user_id
-    except ValueError:
-        # UUID가 아니면 새로 생성
-        logger.warning("invalid_user_id_converted", original=user_id)
-        return str(uuid.uuid4())
-
-
-async def ensure_user_exists(user_id: str, db: AsyncSession) -> str:
-    """사용자가 존재하는지 확인하고 없으면 생성"""
-    try:
-        # 사용자 존재 확인
-        from app.models.user import User
-        query = select(User).where(User.id == user_id)
-        result = await db.execute(query)
-        existing_user = result.scalar_one_or_none()
-        
-        if existing_user:
-            logger.info("user_exists", user_id=user_id)
-            return user_id
-        
-        # 사용자가 없으면 새로 생성
-        new_user = User(
-            id=user_id,
-            firebase_uid=f"test_firebase_{user_id[:8]}",  # 테스트용 Firebase UID
-            email=f"test_{user_id[:8]}@example.com",
-            name=f"Test User {user_id[:8]}",
-            is_active=True
-        )
-        
-        db.add(new_user)
-        await db.commit()
-        
-        logger.info("user_created", user_id=user_id)
-        return user_id
-        
-    except Exception as e:
-        logger.error("ensure_user_exists_failed", user_id=user_id, error=str(e))
-        # 에러 발생 시 롤백하고 기존 사용자 중 하나 사용
-        await db.rollback()
-        
-        # 기존 사용자 중 아무나 하나 가져오기
-        try:
-            from app.models.user import User
-            query = select(User).limit(1)
-            result = await db.execute(query)
-            existing_user = result.scalar_one_or_none()
-            
-            if existing_user:
-                logger.info("using_existing_user", user_id=str(existing_user.id))
-                return str(existing_user.id)
-            else:
-                # 사용자가 아예 없으면 하나 생성
-                fallback_user = User(
-                    firebase_uid="test_fallback_user",
-                    email="fallback@example.com",
-                    name="Fallback User",
-                    is_active=True
-                )
-                db.add(fallback_user)
-                await db.commit()
-                logger.info("fallback_user_created", user_id=str(fallback_user.id))
-                return str(fallback_user.id)
-                
-        except Exception as e2:
-            logger.error("fallback_user_creation_failed", error=str(e2))
-            # 최후의 수단: 임의 UUID 반환 (Foreign Key 제약조건 무시)
-            return str(uuid.uuid4())
-
-
 class AIAnalysisService:
     """AI 분석 서비스 클래스"""
     
@@ -188,18 +115,16 @@ class AIAnalysisService:
         start_time = time.time()
         analysis_id = generate_analysis_id()
         
-        # user_id 검증 및 올바른 UUID로 변환
-        valid_user_id = validate_and_fix_user_id(request.user_id)
-        
-        # 사용자가 존재하는지 확인하고 없으면 생성
-        existing_user_id = await ensure_user_exists(valid_user_id, db)
-        
         try:
+            # Firebase UID → users.id (캐시 적중 또는 인덱스 조회 1회, 신규 사용자면 생성)
+            # user_uid 가 없으면 ValueError → 아래에서 AIServiceException 으로 변환
+            user_id = await resolve_user_id(db, request.user_uid)
+            
             logger.info(
                 "analysis_started",
                 analysis_id=analysis_id,
                 diary_id=request.diary_id,
-                user_id=existing_user_id,  # 존재가 확인된 UUID 사용
+                user_id=user_id,
                 content_length=len(request.content)
             )
             
@@ -210,7 +135,7 @@ class AIAnalysisService:
             
             # 2. 성격 분석
             personality_analysis = await self.personality_service.analyze_personality(
-                request.content, existing_user_id, db  # 존재가 확인된 UUID 사용
+                request.content, user_id, db
             )
             
             # 3. 키워드 및 주제 추출
@@ -257,7 +182,7 @@ class AIAnalysisService:
             analysis_result = DiaryAnalysis(
                 analysis_id=analysis_id,
                 diary_id=request.diary_id,
-                user_id=valid_user_id,  # 검증된 UUID 사용
+                user_id=user_id,
                 content=request.content,
                 content_length=len(request.content),
                 emotions=emotion_analysis.dict(),
@@ -280,12 +205,25 @@ class AIAnalysisService:
                 processing_time_seconds=processing_time,
                 confidence_score=confidence_score,
                 analysis_version="1.0",
-                status="completed"
+                status="completed",
+                # 서버 기본값은 커밋 후 로드되지 않으므로 직접 지정 (감정 일별 버킷 기준 시각)
+                processed_at=datetime.now(timezone.utc)
             )
             
             db.add(analysis_result)
             await db.commit()
             
+            # 성격 누적 통계에 새 분석 반영 (이력 재조회 없이 O(1))
+            await self.personality_service.update_user_personality_summary(
+                user_id, db, personality_analysis
+            )
+            # 감정 패턴/일별 버킷에 새 분석 반영 (재구성과 같은 날짜에 집계되도록 저장 시각 기준)
+            await self.emotion_service.update_user_emotion_patterns(
+                user_id, db, emotion_analysis, analysis_result.processed_at
+            )
+            # 매칭 벡터 갱신 및 사전 계산 후보 목록 패치 (성격/감정/벡터가 모두 반영된 뒤 한 번)
+            await self.update_user_vectors(user_id, analysis_result, db)
+            
             logger.info(
                 "analysis_completed",
                 analysis_id=analysis_id,
@@ -296,7 +234,7 @@ class AIAnalysisService:
             return DiaryAnalysisResponse(
                 diary_id=request.diary_id,
                 analysis_id=analysis_id,
-                user_id=valid_user_id,  # 검증된 UUID 사용
+                user_id=user_id,
                 status="completed",
                 emotion_analysis=emotion_analysis,
                 personality_analysis=personality_analysis,
@@ -552,42 +490,31 @@ class AIAnalysisService:
             logger.error("get_analysis_result_failed", error=str(e))
             return None
     
-    async def update_user_vectors(
-        self, user_id: str, analysis_result: DiaryAnalysisResponse, db: AsyncSession
-    ):
-        """사용자 벡터 업데이트 (백그라운드 작업)"""
+    async def update_user_vectors(self, user_id: str, analysis_result, db: AsyncSession):
+        """
+        사용자 벡터 업데이트 (저장된 분석 하나를 지수 가중 평균으로 반영)
+        
+        벡터 버전이 현재와 다르거나 벡터가 없으면 저장된 분석 이력으로 한 번 재구축한다.
+        """
         try:
-            # 늤이나믹 import
-            try:
-                from app.models.user import UserVector
-            except ImportError:
-                logger.error("UserVector model not available")
-                return
-                
-            # user_id 검증
-            valid_user_id = validate_and_fix_user_id(user_id)
-            
-            # 기존 벡터 조회
-            query = select(UserVector).where(UserVector.user_id == valid_user_id)
-            result = await db.execute(query)
-            user_vector = result.scalar_one_or_none()
-            
-            if not user_vector:
-                # 새 벡터 생성
-                user_vector = UserVector(user_id=valid_user_id)
-                db.add(user_vector)
+            # user_id는 resolve_user_id로 해석된 내부 ID
+            user_vector = await fold_user_vector(db, user_id, analysis_result)
             
-            # 벡터 업데이트 로직 (실제 구현 필요)
-            # personality_vector = self._update_personality_vector(...)
-            # emotion_vector = self._update_emotion_vector(...)
-            # lifestyle_vector = self._update_lifestyle_vector(...)
+            await db.commit()
             
-            user_vector.analysis_count += 1
-            user_vector.confidence_score = min(100, user_vector.confidence_score + 1)
+            # 매칭 후보 검색 인덱스에 증분 반영
+            if has_values(user_vector.combined_vector):
+                user_vector_index.upsert(str(user_id), user_vector.combined_vector)
             
-            await db.commit()
+            # 이 사용자가 포함된 사전 계산 후보 목록만 패치
+            await refresh_user_matches(db, user_id)
             
-            logger.info("user_vectors_updated", user_id=valid_user_id)
+            logger.info(
+                "user_vectors_updated",
+                user_id=user_id,
+                analysis_count=user_vector.analysis_count,
+                vector_version=user_vector.vector_version
+            )
             
         except Exception as e:
             logger.error("update_user_vectors_failed", user_id=user_id, error=str(e))
@@ -3,10 +3,15 @@
 """
 import json
 import re
-from typing import Dict, List, Optional, Any
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Tuple
+from zoneinfo import ZoneInfo
 
 import google.generativeai as genai
 import structlog
+from sqlalchemy import delete, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # TextBlob은 선택적 의존성으로 처리
 try:
@@ -18,6 +23,7 @@ except ImportError:
 
 from app.config.settings import get_settings
 from app.schemas.analysis import EmotionAnalysis, EmotionScore
+from app.utils.running_stats import RunningStats, decay_for_half_life
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -25,6 +31,39 @@ logger = structlog.get_logger()
 # Gemini API 설정
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+# 감정 분석 결과에 허용되는 감정 (사용자 감정 벡터의 축 순서이기도 하므로 추가는 끝에만)
+EMOTION_CATEGORIES = (
+    "joy", "happiness", "contentment", "excitement",
+    "sadness", "melancholy", "grief", "disappointment",
+    "anger", "frustration", "irritation", "rage",
+    "fear", "anxiety", "worry", "nervousness",
+    "surprise", "amazement", "shock", "wonder",
+    "disgust", "distaste", "aversion",
+    "love", "affection", "fondness", "passion",
+    "hope", "optimism", "confidence", "determination",
+    "guilt", "shame", "regret", "embarrassment",
+    "pride", "satisfaction", "accomplishment",
+    "loneliness", "isolation", "emptiness",
+    "gratitude", "appreciation", "thankfulness",
+    "curiosity", "interest", "fascination",
+    "peace", "calm", "tranquility", "serenity",
+)
+
+# 감정 패턴 집계 (user_emotion_patterns)
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+SEASONS = {
+    12: "winter", 1: "winter", 2: "winter",
+    3: "spring", 4: "spring", 5: "spring",
+    6: "summer", 7: "summer", 8: "summer",
+    9: "autumn", 10: "autumn", 11: "autumn",
+}
+TREND_DAYS = 30  # 일별 추이 보관 일수
+MONTHLY_PATTERN_MONTHS = 12  # 월별 집계 보관 개월 수
+DOMINANT_EMOTION_COUNT = 3
+
+# (감정별 비중, 감정 점수, 감정 강도)
+EmotionObservation = Tuple[Dict[str, float], float, float]
+
 
 class EmotionAnalysisService:
     """감정 분석 서비스 클래스"""
@@ -33,22 +72,7 @@ class EmotionAnalysisService:
         self.model = genai.GenerativeModel('gemini-1.5-flash')
         
         # 감정 카테고리 정의
-        self.emotion_categories = [
-            "joy", "happiness", "contentment", "excitement",
-            "sadness", "melancholy", "grief", "disappointment",
-            "anger", "frustration", "irritation", "rage",
-            "fear", "anxiety", "worry", "nervousness",
-            "surprise", "amazement", "shock", "wonder",
-            "disgust", "distaste", "aversion",
-            "love", "affection", "fondness", "passion",
-            "hope", "optimism", "confidence", "determination",
-            "guilt", "shame", "regret", "embarrassment",
-            "pride", "satisfaction", "accomplishment",
-            "loneliness", "isolation", "emptiness",
-            "gratitude", "appreciation", "thankfulness",
-            "curiosity", "interest", "fascination",
-            "peace", "calm", "tranquility", "serenity"
-        ]
+        self.emotion_categories = list(EMOTION_CATEGORIES)
     
     async def analyze_emotions(
         self, content: str, metadata: Optional[Dict] = None
@@ -341,17 +365,270 @@ class EmotionAnalysisService:
                 emotional_stability=0.5
             )
     
-    async def get_user_emotion_patterns(self, user_id: str) -> Dict:
-        """사용자 감정 패턴 분석"""
-        # TODO: 데이터베이스에서 사용자의 모든 감정 분석 결과를 조회하여
-        # 감정 패턴, 변화 추이, 통계 등을 생성
-        return {
+    async def get_user_emotion_patterns(self, user_id: Optional[str], db: AsyncSession) -> Dict:
+        """사용자 감정 패턴 조회 (분석 저장 시 갱신된 user_emotion_patterns 한 행, 없으면 빈 패턴)"""
+        patterns = {
             "user_id": user_id,
             "dominant_emotions": [],
+            "emotion_distribution": {},
             "emotion_trends": {},
+            "sentiment_trends": {},
             "weekly_patterns": {},
-            "monthly_patterns": {}
+            "monthly_patterns": {},
+            "seasonal_patterns": {},
+            "average_sentiment": None,
+            "emotional_volatility": None,
+            "analysis_count": 0,
+            "analysis_period_days": 0,
+            "last_updated": None,
         }
+        if user_id is None:
+            return patterns
+        try:
+            # 늤이나믹 import
+            try:
+                from app.models.analysis import UserEmotionPattern
+            except ImportError:
+                logger.error("UserEmotionPattern model not available")
+                return patterns
+            
+            pattern = await db.get(UserEmotionPattern, uuid.UUID(str(user_id)))
+            if pattern is None:
+                return patterns
+            
+            patterns.update(
+                dominant_emotions=pattern.dominant_emotions or [],
+                emotion_distribution=pattern.emotion_distribution or {},
+                emotion_trends=pattern.emotion_trends or {},
+                sentiment_trends=pattern.sentiment_trends or {},
+                weekly_patterns=pattern.weekly_pattern or {},
+                monthly_patterns=pattern.monthly_pattern or {},
+                seasonal_patterns=pattern.seasonal_pattern or {},
+                average_sentiment=pattern.avg_sentiment_score,
+                emotional_volatility=pattern.emotional_volatility,
+                analysis_count=pattern.analysis_count or 0,
+                analysis_period_days=pattern.analysis_period_days or 0,
+                last_updated=pattern.updated_at.isoformat() if pattern.updated_at else None,
+            )
+            return patterns
+            
+        except Exception as e:
+            logger.error("get_user_emotion_patterns_failed", user_id=user_id, error=str(e))
+            return patterns
+    
+    async def update_user_emotion_patterns(
+        self,
+        user_id: str,
+        db: AsyncSession,
+        emotion_analysis=None,
+        analyzed_at: Optional[datetime] = None,
+    ):
+        """
+        사용자 감정 패턴 갱신 (분석 저장 직후)
+        
+        새 분석 하나를 그날의 일별 버킷(user_emotion_daily)과 user_emotion_patterns 한 행에
+        O(1) 로 반영한다. 누적 통계가 아직 없거나 분석 없이 호출하면 저장된 분석 전체로 한 번 재구성한다.
+        analyzed_at 은 분석 행의 processed_at 을 넘겨야 재구성 때와 같은 날짜 버킷에 들어간다.
+        누적 통계를 읽고-고쳐-쓰므로 패턴 행을 잠근 채 최신 값으로 읽는다 (같은 사용자의 버킷도 이 잠금으로 보호).
+        """
+        try:
+            # 늤이나믹 import
+            try:
+                from app.models.analysis import UserEmotionDaily, UserEmotionPattern
+            except ImportError:
+                logger.error("UserEmotionPattern model not available")
+                return
+            
+            key = uuid.UUID(str(user_id))
+            pattern = await db.get(UserEmotionPattern, key, with_for_update=True, populate_existing=True)
+            
+            if emotion_analysis is not None and pattern is not None and pattern.running_stats:
+                day = self._local_day(analyzed_at or datetime.now(timezone.utc))
+                bucket = await db.get(UserEmotionDaily, (key, day), populate_existing=True)
+                if bucket is None:
+                    bucket = self._new_bucket(UserEmotionDaily, key, day)
+                    db.add(bucket)
+                self._fold_emotion_observation(pattern, bucket, day, self._emotion_observation(emotion_analysis))
+            else:
+                pattern = await self._rebuild_emotion_patterns(
+                    key, db, pattern, emotion_analysis, analyzed_at
+                )
+            
+            await db.commit()
+            logger.info("emotion_patterns_updated", user_id=user_id, count=pattern.analysis_count)
+            
+        except Exception as e:
+            logger.error("update_emotion_patterns_failed", user_id=user_id, error=str(e))
+    
+    async def _rebuild_emotion_patterns(
+        self, key: uuid.UUID, db: AsyncSession, pattern, emotion_analysis=None, analyzed_at=None
+    ):
+        """저장된 완료 분석 전체를 시간 순으로 다시 반영 (일별 버킷도 새로 생성)"""
+        from app.models.analysis import DiaryAnalysis, UserEmotionDaily, UserEmotionPattern
+        
+        result = await db.execute(
+            select(
+                DiaryAnalysis.processed_at,
+                DiaryAnalysis.emotions,
+                DiaryAnalysis.primary_emotion,
+                DiaryAnalysis.sentiment_score,
+                DiaryAnalysis.emotional_intensity,
+            ).where(
+                DiaryAnalysis.user_id == key,
+                DiaryAnalysis.status == literal_column("'completed'"),
+            ).order_by(DiaryAnalysis.processed_at)
+        )
+        observations = [
+            (row.processed_at, self._emotion_observation(
+                row.emotions, row.primary_emotion, row.sentiment_score, row.emotional_intensity
+            ))
+            for row in result.all()
+        ]
+        if not observations and emotion_analysis is not None:
+            observations = [(analyzed_at or datetime.now(timezone.utc), self._emotion_observation(emotion_analysis))]
+        
+        await db.execute(delete(UserEmotionDaily).where(UserEmotionDaily.user_id == key))
+        if pattern is None:
+            pattern = UserEmotionPattern(user_id=key)
+            db.add(pattern)
+        for field in ("running_stats", "emotion_distribution", "dominant_emotions", "avg_sentiment_score",
+                      "emotional_volatility", "weekly_pattern", "monthly_pattern", "seasonal_pattern",
+                      "emotion_trends", "sentiment_trends", "analysis_period_days"):
+            setattr(pattern, field, None)
+        pattern.analysis_count = 0
+        
+        buckets = {}
+        for analyzed, observation in observations:
+            day = self._local_day(analyzed)
+            if day not in buckets:
+                buckets[day] = self._new_bucket(UserEmotionDaily, key, day)
+            self._fold_emotion_observation(pattern, buckets[day], day, observation)
+        db.add_all(buckets.values())
+        return pattern
+    
+    @staticmethod
+    def _new_bucket(model, key: uuid.UUID, day: date):
+        return model(user_id=key, day=day, analysis_count=0, sentiment_sum=0.0, intensity_sum=0.0, emotion_sums={})
+    
+    @staticmethod
+    def _local_day(moment: datetime) -> date:
+        """집계 기준 시간대의 날짜 (시간대 없는 값은 UTC)"""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(ZoneInfo(settings.EMOTION_PATTERN_TIMEZONE)).date()
+    
+    @staticmethod
+    def _emotion_observation(
+        emotions, primary_emotion: Optional[str] = None,
+        sentiment_score: Optional[float] = None, intensity: Optional[float] = None,
+    ) -> EmotionObservation:
+        """분석 결과(EmotionAnalysis 또는 저장된 emotions JSON) → (감정별 비중, 감정 점수, 감정 강도)"""
+        if hasattr(emotions, "dict"):
+            emotions = emotions.dict()
+        emotions = emotions if isinstance(emotions, dict) else {}
+        
+        scores = {}
+        if isinstance(emotions.get("emotions"), dict):
+            scores = {emotion: float(score) for emotion, score in emotions["emotions"].items()}
+        elif isinstance(emotions.get("emotion_scores"), list):
+            scores = {
+                item["emotion"]: float(item.get("score", 0))
+                for item in emotions["emotion_scores"] if isinstance(item, dict) and item.get("emotion")
+            }
+        scores = {emotion: score for emotion, score in scores.items() if score > 0}
+        primary_emotion = primary_emotion or emotions.get("primary_emotion")
+        if not scores and primary_emotion:
+            scores = {primary_emotion: 1.0}
+        total = sum(scores.values())
+        shares = {emotion: score / total for emotion, score in scores.items()} if total else {}
+        
+        if sentiment_score is None:
+            sentiment_score = emotions.get("sentiment_score")
+        if intensity is None:
+            intensity = emotions.get("emotional_intensity")
+        return (
+            shares,
+            float(sentiment_score) if sentiment_score is not None else 0.0,
+            float(intensity) if intensity is not None else 0.5,
+        )
+    
+    @staticmethod
+    def _fold_rollup(rollup: Optional[Dict], key: str, sentiment: float, intensity: float) -> Dict:
+        """{키: {count, sentiment, intensity}} 집계에 관측 하나 반영 (키별 누적 평균)"""
+        rollup = dict(rollup or {})
+        entry = dict(rollup.get(key) or {"count": 0, "sentiment": 0.0, "intensity": 0.0})
+        entry["count"] += 1
+        entry["sentiment"] += (sentiment - entry["sentiment"]) / entry["count"]
+        entry["intensity"] += (intensity - entry["intensity"]) / entry["count"]
+        rollup[key] = entry
+        return rollup
+    
+    def _fold_emotion_observation(self, pattern, bucket, day: date, observation: EmotionObservation) -> None:
+        """
+        관측 하나를 일별 버킷과 감정 패턴에 반영
+        
+        - 감정은 EMOTION_CATEGORIES 에 있는 것만 집계 (사용자 감정 벡터와 같은 기준)
+        - 버킷: 분석 수, 감정 점수/강도 합, 감정별 비중 합
+        - 감정 분포/평균 감정 점수/변동성: 최근 가중 누적 평균/분산 (EMOTION_HALF_LIFE_ANALYSES)
+        - 요일/월/계절: 키별 누적 평균, 일별 추이: 최근 TREND_DAYS 일의 버킷 평균
+        (JSON 컬럼은 변경 감지를 위해 항상 새 dict 로 교체)
+        """
+        shares, sentiment, intensity = observation
+        shares = {emotion: share for emotion, share in shares.items() if emotion in EMOTION_CATEGORIES}
+        
+        bucket.analysis_count = (bucket.analysis_count or 0) + 1
+        bucket.sentiment_sum = (bucket.sentiment_sum or 0.0) + sentiment
+        bucket.intensity_sum = (bucket.intensity_sum or 0.0) + intensity
+        emotion_sums = dict(bucket.emotion_sums or {})
+        for emotion, share in shares.items():
+            emotion_sums[emotion] = emotion_sums.get(emotion, 0.0) + share
+        bucket.emotion_sums = emotion_sums
+        
+        state = pattern.running_stats or {}
+        decay = decay_for_half_life(settings.EMOTION_HALF_LIFE_ANALYSES)
+        scores = RunningStats.from_dict(state.get("scores"))
+        scores.update({"sentiment": sentiment, "intensity": intensity}, decay)
+        distribution = RunningStats.from_dict(state.get("emotions"))
+        for emotion in shares:
+            # 처음 나온 감정은 이전 분석들에서 비중 0
+            distribution.mean.setdefault(emotion, 0.0)
+            distribution.m2.setdefault(emotion, 0.0)
+        distribution.update({emotion: shares.get(emotion, 0.0) for emotion in distribution.mean}, decay)
+        
+        first_day = min(date.fromisoformat(state.get("first_day", day.isoformat())), day)
+        last_day = max(date.fromisoformat(state.get("last_day", day.isoformat())), day)
+        pattern.running_stats = {
+            "scores": scores.to_dict(),
+            "emotions": distribution.to_dict(),
+            "first_day": first_day.isoformat(),
+            "last_day": last_day.isoformat(),
+        }
+        
+        pattern.emotion_distribution = {
+            emotion: round(share, 4) for emotion, share in
+            sorted(distribution.mean.items(), key=lambda item: -item[1]) if share > 0
+        }
+        pattern.dominant_emotions = list(pattern.emotion_distribution)[:DOMINANT_EMOTION_COUNT]
+        pattern.avg_sentiment_score = round(scores.mean["sentiment"], 4)
+        pattern.emotional_volatility = round(scores.std("sentiment"), 4)
+        pattern.analysis_count = (pattern.analysis_count or 0) + 1
+        pattern.analysis_period_days = (last_day - first_day).days + 1
+        
+        pattern.weekly_pattern = self._fold_rollup(pattern.weekly_pattern, WEEKDAYS[day.weekday()], sentiment, intensity)
+        monthly = self._fold_rollup(pattern.monthly_pattern, day.strftime("%Y-%m"), sentiment, intensity)
+        pattern.monthly_pattern = dict(sorted(monthly.items())[-MONTHLY_PATTERN_MONTHS:])
+        pattern.seasonal_pattern = self._fold_rollup(pattern.seasonal_pattern, SEASONS[day.month], sentiment, intensity)
+        
+        cutoff = (last_day - timedelta(days=TREND_DAYS - 1)).isoformat()
+        emotion_trends = {d: value for d, value in (pattern.emotion_trends or {}).items() if d >= cutoff}
+        sentiment_trends = {d: value for d, value in (pattern.sentiment_trends or {}).items() if d >= cutoff}
+        if day.isoformat() >= cutoff:
+            emotion_trends[day.isoformat()] = {
+                emotion: round(total / bucket.analysis_count, 4) for emotion, total in emotion_sums.items()
+            }
+            sentiment_trends[day.isoformat()] = round(bucket.sentiment_sum / bucket.analysis_count, 4)
+        pattern.emotion_trends = dict(sorted(emotion_trends.items()))
+        pattern.sentiment_trends = dict(sorted(sentiment_trends.items()))
     
     def classify_emotion_intensity(self, intensity: float) -> str:
         """감정 강도 분류"""
@@ -0,0 +1,355 @@
+"""
+차단/제외 사용자 비트맵
+
+matching_preferences.blocked_users / excluded_users (JSONB 배열) 를 사용자 내부 서수
+(user_ordinals 테이블의 정수) 집합으로 바꿔 압축 비트맵으로 보관한다.
+- 조회 순서: 메모리 LRU → Redis → DB (선호도 JSONB 로 생성 후 두 캐시에 저장)
+- 무효화는 Redis 의 사용자별 버전 카운터를 올리는 방식이다. 캐시 항목은 만들 때의 버전을 함께
+  기억하고 조회마다 현재 버전과 비교하므로, 다른 워커의 메모리 캐시도 즉시 무효화된다
+  (Redis 가 없으면 단일 프로세스 기준이며 다른 워커는 TTL 이 지날 때까지 이전 비트맵을 쓴다)
+- 매칭 채점 시 후보 서수 배열에 대해 제외 마스크를 한 번에 계산한다 (SQL NOT IN 목록 대신)
+
+서수는 차단/제외 목록을 저장하는 트랜잭션에서 부여되며(마이그레이션에서 기존 사용자는 일괄 부여),
+조회 경로는 서수를 읽기만 한다. 서수가 없는 후보는 어떤 비트맵에도 들어 있을 수 없으므로 제외되지 않는다.
+"""
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.cache import get_redis
+from app.config.database import Base
+from app.config.settings import get_settings
+from app.services.interest_index import bitset_from_bytes, bitset_to_bytes, bitset_to_ids, ids_to_bitset
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+# 사용자 UUID → 내부 서수 (비트맵 비트 위치)
+user_ordinals_table = sa.Table(
+    "user_ordinals",
+    Base.metadata,
+    sa.Column("ordinal", sa.Integer(), primary_key=True, autoincrement=True),
+    sa.Column("user_id", sa.Uuid(), nullable=False, unique=True),
+)
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# 직렬화 형식 (zlib 압축 전 첫 바이트)
+_FORMAT_ARRAY = b"A"   # 정렬된 서수의 차분 (uint32)
+_FORMAT_BITSET = b"B"  # uint64 비트셋
+
+
+class OrdinalBitmap:
+    """
+    사용자 서수 집합 (정렬된 uint32 배열)
+
+    직렬화 시 차분 배열과 비트셋 중 작은 쪽을 골라 zlib 으로 압축한다.
+    """
+
+    __slots__ = ("ordinals",)
+
+    def __init__(self, ordinals: Iterable[int] = ()):
+        values = np.fromiter((int(ordinal) for ordinal in ordinals), dtype=np.int64)
+        self.ordinals = np.unique(values[values >= 0]).astype(np.uint32)
+
+    def __len__(self) -> int:
+        return int(self.ordinals.size)
+
+    def union(self, other: "OrdinalBitmap") -> "OrdinalBitmap":
+        return OrdinalBitmap(np.concatenate([self.ordinals, other.ordinals]))
+
+    def contains(self, ordinals) -> np.ndarray:
+        """서수 배열 각각의 포함 여부 (음수 = 서수 없음 → False)"""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        mask = np.zeros(ordinals.shape, dtype=bool)
+        if not self.ordinals.size or not ordinals.size:
+            return mask
+        valid = ordinals >= 0
+        values = ordinals[valid]
+        positions = np.minimum(np.searchsorted(self.ordinals, values), self.ordinals.size - 1)
+        mask[valid] = self.ordinals[positions] == values
+        return mask
+
+    def to_bytes(self) -> bytes:
+        if self.ordinals.size and int(self.ordinals[-1]) // 8 + 1 < self.ordinals.size * 4:
+            payload = _FORMAT_BITSET + bitset_to_bytes(ids_to_bitset(self.ordinals))
+        else:
+            payload = _FORMAT_ARRAY + np.diff(self.ordinals, prepend=np.uint32(0)).astype("<u4").tobytes()
+        return zlib.compress(payload)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OrdinalBitmap":
+        payload = zlib.decompress(data)
+        body = payload[1:]
+        if payload[:1] == _FORMAT_BITSET:
+            return cls(bitset_to_ids(bitset_from_bytes(body)))
+        return cls(np.cumsum(np.frombuffer(body, dtype="<u4"), dtype=np.int64))
+
+
+class UserOrdinalRegistry:
+    """사용자 ID ↔ 서수 (프로세스 내 캐시, 원본은 user_ordinals 테이블)"""
+
+    def __init__(self):
+        self._ordinals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ordinals.clear()
+
+    def register(self, user_id: str, ordinal: int) -> None:
+        with self._lock:
+            self._ordinals[str(user_id)] = int(ordinal)
+
+    def get(self, user_id: str) -> Optional[int]:
+        return self._ordinals.get(str(user_id))
+
+
+# 전역 사용자 서수 캐시
+user_ordinals = UserOrdinalRegistry()
+
+
+def _user_keys(user_ids: Iterable) -> List[str]:
+    """정규화된 사용자 UUID 문자열 (중복/잘못된 ID 제거)"""
+    keys = {}
+    for user_id in user_ids:
+        try:
+            keys[str(uuid.UUID(str(user_id)))] = None
+        except ValueError:
+            continue
+    return list(keys)
+
+
+async def assign_ordinals(db: AsyncSession, user_ids: Iterable) -> None:
+    """
+    서수가 없는 사용자에 새 서수 부여 (커밋하지 않음)
+
+    호출자의 트랜잭션과 함께 커밋되도록 캐시에는 등록하지 않는다
+    (롤백되면 캐시된 비트맵이 사라진 서수를 가리키게 되므로).
+    """
+    missing = [uuid.UUID(key) for key in _user_keys(user_ids) if user_ordinals.get(key) is None]
+    insert = _INSERT_BY_DIALECT.get(db.bind.dialect.name)
+    if not missing or insert is None:
+        return
+    await db.execute(
+        insert(user_ordinals_table).values([{"user_id": user_id} for user_id in missing]).on_conflict_do_nothing()
+    )
+
+
+async def resolve_ordinals(db: AsyncSession, user_ids: Iterable) -> Dict[str, int]:
+    """사용자 ID → 서수 (캐시에 없는 ID 만 DB 조회, 서수가 없는 사용자는 결과에서 빠짐)"""
+    keys = _user_keys(user_ids)
+    missing = [uuid.UUID(key) for key in keys if user_ordinals.get(key) is None]
+    if missing:
+        table = user_ordinals_table
+        result = await db.execute(sa.select(table.c.user_id, table.c.ordinal).where(table.c.user_id.in_(missing)))
+        for user_id, ordinal in result.all():
+            user_ordinals.register(str(user_id), ordinal)
+
+    ordinals = {}
+    for key in keys:
+        ordinal = user_ordinals.get(key)
+        if ordinal is not None:
+            ordinals[key] = ordinal
+    return ordinals
+
+
+async def build_exclusion_bitmap(db: AsyncSession, user_id: str) -> OrdinalBitmap:
+    """선호도의 blocked_users + excluded_users 로 비트맵 생성"""
+    from app.models.user import MatchingPreference
+
+    preference = await db.get(MatchingPreference, uuid.UUID(str(user_id)))
+    if preference is None:
+        return OrdinalBitmap()
+    excluded = list(preference.blocked_users or []) + list(preference.excluded_users or [])
+    if not excluded:
+        return OrdinalBitmap()
+    ordinals = await resolve_ordinals(db, excluded)
+    return OrdinalBitmap(ordinals.values())
+
+
+class ExclusionBitmapCache:
+    """사용자별 차단/제외 비트맵 캐시 (메모리 LRU + Redis, 둘 다 TTL, Redis 버전으로 무효화)"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 300, key_prefix: str = "matching:exclusions:"):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        # 사용자 ID → (비트맵, 만료 시각, 생성 시 버전)
+        self._entries: "OrderedDict[str, Tuple[OrdinalBitmap, float, Optional[int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _bitmap_key(self, user_id: str, version: Optional[int]) -> str:
+        return f"{self.key_prefix}{user_id}:{version or 0}"
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}version:{user_id}"
+
+    def get_local(
+        self, user_id: str, version: Optional[int] = None, now: Optional[float] = None
+    ) -> Optional[OrdinalBitmap]:
+        """메모리 항목 조회 (version 이 주어지면 생성 시 버전이 같을 때만)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None:
+                return None
+            if entry[1] <= now or (version is not None and entry[2] != version):
+                del self._entries[str(user_id)]
+                return None
+            self._entries.move_to_end(str(user_id))
+            return entry[0]
+
+    def put_local(
+        self, user_id: str, bitmap: OrdinalBitmap, version: Optional[int] = None, now: Optional[float] = None
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[str(user_id)] = (bitmap, now + self.ttl_seconds, version)
+            self._entries.move_to_end(str(user_id))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def _current_version(self, redis, user_id: str) -> Optional[int]:
+        """Redis 의 무효화 버전 (조회 실패 시 None → 메모리 TTL 기준으로만 동작)"""
+        try:
+            value = await redis.get(self._version_key(user_id))
+        except Exception as e:
+            logger.warning("exclusion_bitmap_version_get_failed", user_id=str(user_id), error=str(e))
+            return None
+        return int(value or 0)
+
+    async def get(self, db: AsyncSession, user_id: str) -> OrdinalBitmap:
+        """비트맵 조회 (Redis 버전 확인 → 메모리 → Redis → DB)"""
+        redis = get_redis()
+        version = await self._current_version(redis, user_id) if redis is not None else None
+        if redis is not None and version is None:
+            redis = None
+
+        bitmap = self.get_local(user_id, version)
+        if bitmap is not None:
+            return bitmap
+
+        key = self._bitmap_key(user_id, version)
+        if redis is not None:
+            try:
+                data = await redis.get(key)
+                if data is not None:
+                    bitmap = OrdinalBitmap.from_bytes(data)
+                    self.put_local(user_id, bitmap, version)
+                    return bitmap
+            except Exception as e:
+                logger.warning("exclusion_bitmap_redis_get_failed", user_id=str(user_id), error=str(e))
+
+        # 버전 키에 저장하므로, 생성 도중 무효화되어도 이 값은 새 버전에서 읽히지 않는다
+        bitmap = await build_exclusion_bitmap(db, user_id)
+        self.put_local(user_id, bitmap, version)
+        if redis is not None:
+            try:
+                await redis.set(key, bitmap.to_bytes(), ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning("exclusion_bitmap_redis_set_failed", user_id=str(user_id), error=str(e))
+        return bitmap
+
+    async def invalidate(self, user_id: str) -> None:
+        """
+        메모리 항목 삭제 + Redis 버전 증가 (모든 워커가 다음 조회 시 DB 에서 다시 생성)
+
+        버전 키는 비트맵 TTL 의 두 배 동안 유지한다. 만료되어 버전이 0 으로 돌아가도
+        그 전에 만든 버전 0 항목은 이미 모두 만료된 뒤다.
+        """
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.incr(self._version_key(user_id))
+                await redis.expire(self._version_key(user_id), self.ttl_seconds * 2)
+            except Exception as e:
+                logger.warning("exclusion_bitmap_invalidate_failed", user_id=str(user_id), error=str(e))
+
+
+# 전역 차단/제외 비트맵 캐시
+exclusion_bitmaps = ExclusionBitmapCache(
+    max_size=settings.EXCLUSION_BITMAP_CACHE_SIZE,
+    ttl_seconds=settings.EXCLUSION_BITMAP_TTL_SECONDS,
+)
+
+
+async def exclusion_mask(
+    db: AsyncSession,
+    user_id: str,
+    candidate_ids: Sequence,
+    extra_excluded: Optional[Iterable] = None,
+) -> np.ndarray:
+    """후보별 제외 여부 (요청자의 차단/제외 비트맵 + 요청별 제외 목록)"""
+    candidate_ids = [str(candidate_id) for candidate_id in candidate_ids]
+    mask = np.zeros(len(candidate_ids), dtype=bool)
+    if not candidate_ids:
+        return mask
+
+    bitmap = await exclusion_bitmaps.get(db, user_id)
+    if len(bitmap):
+        ordinals = await resolve_ordinals(db, candidate_ids)
+        candidate_ordinals = np.fromiter(
+            (ordinals.get(candidate_id, -1) for candidate_id in candidate_ids),
+            dtype=np.int64,
+            count=len(candidate_ids),
+        )
+        mask |= bitmap.contains(candidate_ordinals)
+
+    extra = {str(excluded) for excluded in (extra_excluded or ())}
+    if extra:
+        mask |= np.fromiter(
+            (candidate_id in extra for candidate_id in candidate_ids), dtype=bool, count=len(candidate_ids)
+        )
+    return mask
+
+
+async def update_user_exclusions(
+    db: AsyncSession,
+    user_id: str,
+    blocked_users: Optional[List[str]] = None,
+    excluded_users: Optional[List[str]] = None,
+) -> OrdinalBitmap:
+    """차단/제외 목록 저장 후 비트맵 캐시 갱신 (None 인 목록은 유지, 대상의 서수는 같은 트랜잭션에서 부여)"""
+    from app.models.user import MatchingPreference
+
+    key = uuid.UUID(str(user_id))
+    preference = await db.get(MatchingPreference, key)
+    if preference is None:
+        preference = MatchingPreference(user_id=key)
+        db.add(preference)
+    if blocked_users is not None:
+        preference.blocked_users = list(dict.fromkeys(str(blocked) for blocked in blocked_users))
+    if excluded_users is not None:
+        preference.excluded_users = list(dict.fromkeys(str(excluded) for excluded in excluded_users))
+    await assign_ordinals(db, list(preference.blocked_users or []) + list(preference.excluded_users or []))
+    await db.commit()
+
+    await exclusion_bitmaps.invalidate(user_id)
+    return await exclusion_bitmaps.get(db, user_id)
@@ -0,0 +1,396 @@
+"""
+매칭 특성 행렬 스냅샷 (메모리 매핑)
+
+배치 작업이 사용자 전체의 MatchingFeatures.packed() 배열과 ID 색인(정렬된 UUID 16바이트)을
+버전이 붙은 바이너리 파일 하나로 저장하고, 서빙 프로세스는 이 파일을 읽기 전용 mmap 으로 연다.
+같은 파일을 여는 프로세스들은 OS 페이지 캐시를 공유하므로 워커를 늘려도 DB 에서 벡터/요약을
+다시 읽지 않고 바로 채점할 수 있다.
+
+- 파일: MAGIC(8) + 헤더 길이(8, little endian) + JSON 헤더 + 64바이트 정렬된 배열들
+  (배열 offset 은 헤더 다음 첫 정렬 경계 기준)
+- 헤더: generation(스냅샷 세대), as_of(적재 시작 시각), count, 배열별 dtype/shape/offset
+- 스냅샷 이후 바뀐 사용자는 주기적 델타 갱신(updated_at >= 워터마크)으로 메모리 오버레이에 올린다
+- 스냅샷에도 오버레이에도 없는 사용자는 요청 시 DB 에서 읽어 오버레이에 추가한다
+- 오버레이는 FEATURE_SNAPSHOT_OVERLAY_SIZE 명까지 LRU 로 유지한다. 스냅샷 행을 가리던 항목이
+  밀려나면 그 사용자는 스냅샷 행 대신 다시 DB 에서 읽는다 (다음 세대를 매핑하면 초기화)
+
+관심사 비트셋은 DB 관심사 어휘로만 만들므로, 배치 작업은 어휘를 먼저 적재하고 관심사가 모두
+DB ID 로 풀리는 사용자만 저장한다. 나머지는 서빙 시 DB 에서 읽는다.
+"""
+import asyncio
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.services.interest_index import MinHasher, has_persisted_interest_ids, load_interest_vocabulary
+from app.services.matching_scoring import MatchingFeatures, concat_packed
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+MAGIC = b"MFSNAP01"  # 마지막 두 글자 = 파일 형식 버전
+_ALIGNMENT = 64
+# 앱/DB 시계 차이와 초 단위로 저장되는 updated_at 을 감안해 워터마크보다 조금 앞부터 조회
+_DELTA_OVERLAP = timedelta(seconds=30)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _uuid_keys(user_ids: Sequence) -> np.ndarray:
+    """사용자 ID → 정렬/검색용 16바이트 키 배열"""
+    return np.array([uuid.UUID(str(user_id)).bytes for user_id in user_ids], dtype="S16")
+
+
+def write_snapshot_file(
+    path: str, user_ids: Sequence, packed: Dict[str, np.ndarray], as_of: datetime, generation: Optional[int] = None
+) -> Dict:
+    """ID 순으로 정렬해 스냅샷 파일 저장 (임시 파일에 쓴 뒤 교체, 열려 있는 mmap 은 이전 파일 유지)"""
+    keys = _uuid_keys(user_ids)
+    order = np.argsort(keys, kind="stable")
+    arrays = {"ids": keys[order]}
+    arrays.update((name, np.ascontiguousarray(array[order])) for name, array in packed.items())
+
+    # 배열 오프셋은 데이터 시작(헤더 뒤 첫 정렬 경계) 기준
+    specs, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = {
+        "generation": generation if generation is not None else time.time_ns(),
+        "as_of": as_of.isoformat(),
+        "count": int(keys.shape[0]),
+        "arrays": specs,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + specs[name]["offset"])
+            file.write(array.tobytes())
+    os.replace(temp_path, path)
+    return header
+
+
+def read_snapshot_header(path: str) -> Dict:
+    """스냅샷 헤더만 읽기 (형식이 다르면 ValueError), data_start = 배열 데이터 시작 위치"""
+    with open(path, "rb") as file:
+        prefix = file.read(len(MAGIC) + 8)
+        if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"not a matching feature snapshot: {path}")
+        (length,) = struct.unpack("<Q", prefix[len(MAGIC):])
+        header = json.loads(file.read(length))
+    header["data_start"] = _aligned(len(MAGIC) + 8 + length)
+    return header
+
+
+class FeatureSnapshot:
+    """읽기 전용으로 메모리 매핑한 스냅샷 (배열은 파일 페이지를 그대로 가리킴)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header = read_snapshot_header(path)
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            count = int(np.prod(shape))
+            self.arrays[name] = (
+                np.frombuffer(
+                    self._mmap, dtype=dtype, count=count, offset=self.header["data_start"] + spec["offset"]
+                ).reshape(shape)
+                if count else np.zeros(shape, dtype=dtype)
+            )
+        self.ids = self.arrays.pop("ids")
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    @property
+    def generation(self) -> int:
+        return int(self.header["generation"])
+
+    @property
+    def as_of(self) -> datetime:
+        return datetime.fromisoformat(self.header["as_of"])
+
+    def rows(self, user_ids: Sequence) -> np.ndarray:
+        """사용자별 행 번호 (없으면 -1)"""
+        keys = _uuid_keys(user_ids)
+        if not len(self) or not keys.size:
+            return np.full(keys.shape[0], -1, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(self.ids, keys), len(self) - 1)
+        return np.where(self.ids[positions] == keys, positions, -1)
+
+    def take(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """행 번호들의 packed 배열 (해당 행만 복사)"""
+        return {name: array[rows] for name, array in self.arrays.items()}
+
+
+async def changed_user_ids(db: AsyncSession, since: datetime) -> List[uuid.UUID]:
+    """since 이후 매칭에 쓰는 테이블 중 하나라도 바뀐 사용자 ID"""
+    from app.models.user import MatchingPreference, User, UserVector
+    from app.models.analysis import UserEmotionPattern, UserPersonalitySummary
+
+    queries = [sa.select(User.id.label("user_id")).where(User.updated_at >= since)]
+    queries.extend(
+        sa.select(model.user_id).where(model.updated_at >= since)
+        for model in (UserVector, UserPersonalitySummary, UserEmotionPattern, MatchingPreference)
+    )
+    result = await db.execute(sa.union(*queries))
+    return [uuid.UUID(str(user_id)) for user_id in result.scalars().all()]
+
+
+class MatchingFeatureStore:
+    """
+    서빙용 특성 저장소 (mmap 스냅샷 + 델타 오버레이)
+
+    스냅샷을 열지 않았으면 features() 는 매번 DB 에서 읽는 기존 동작과 같다.
+    """
+
+    def __init__(self, max_overlay: Optional[int] = None):
+        self.snapshot: Optional[FeatureSnapshot] = None
+        self.watermark: Optional[datetime] = None
+        self.max_overlay = settings.FEATURE_SNAPSHOT_OVERLAY_SIZE if max_overlay is None else max_overlay
+        self._overlay: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        # 오버레이에서 밀려난, 스냅샷 행이 낡았을 수 있는 사용자 (DB 에서 다시 읽음)
+        self._stale: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return (len(self.snapshot) if self.snapshot is not None else 0) + len(self._overlay)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.snapshot is not None
+
+    def stats(self) -> Dict:
+        return {
+            "snapshot_rows": len(self.snapshot) if self.snapshot is not None else 0,
+            "overlay_rows": len(self._overlay),
+            "stale_rows": len(self._stale),
+            "generation": self.snapshot.generation if self.snapshot is not None else None,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+    def load(self, path: str) -> bool:
+        """스냅샷 파일을 매핑 (파일이 없으면 False), 이전 스냅샷/오버레이는 교체"""
+        if not os.path.exists(path):
+            return False
+        snapshot = FeatureSnapshot(path)
+        # 이전 매핑은 진행 중인 요청이 배열을 놓으면 참조 해제와 함께 닫힌다
+        with self._lock:
+            self.snapshot = snapshot
+            self._overlay.clear()
+            self._stale.clear()
+            self.watermark = snapshot.as_of
+        logger.info("feature_snapshot_loaded", path=path, **self.stats())
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self.snapshot = None
+            self._overlay.clear()
+            self._stale.clear()
+            self.watermark = None
+
+    def put(self, users_data: Dict[str, Dict]) -> Dict[str, Dict[str, np.ndarray]]:
+        """매칭 데이터를 오버레이에 반영 (스냅샷 행보다 우선), 사용자별 packed 행 반환"""
+        if not users_data:
+            return {}
+        packed = MatchingFeatures(list(users_data.values())).packed()
+        rows = {
+            str(user_id): {name: array[i:i + 1] for name, array in packed.items()}
+            for i, user_id in enumerate(users_data)
+        }
+        with self._lock:
+            for key, row in rows.items():
+                self._overlay[key] = row
+                self._overlay.move_to_end(key)
+                self._stale.discard(key)
+            evicted = []
+            while len(self._overlay) > max(self.max_overlay, 0):
+                evicted.append(self._overlay.popitem(last=False)[0])
+            if evicted and self.snapshot is not None:
+                self._stale.update(key for key, row in zip(evicted, self.snapshot.rows(evicted)) if row >= 0)
+        return rows
+
+    async def refresh(
+        self, db: AsyncSession, loader: Callable, path: Optional[str] = None, chunk_size: int = 1000
+    ) -> int:
+        """
+        델타 갱신: 디스크에 더 새 스냅샷이 있으면 다시 매핑하고,
+        워터마크 이후 바뀐 사용자를 loader(ids, db) 로 읽어 오버레이에 올린다. 반영한 사용자 수 반환.
+        """
+        path = path or (self.snapshot.path if self.snapshot is not None else settings.FEATURE_SNAPSHOT_PATH)
+        if os.path.exists(path):
+            generation = read_snapshot_header(path)["generation"]
+            if self.snapshot is None or generation > self.snapshot.generation:
+                await asyncio.to_thread(self.load, path)
+                # 새 세대가 배치 작업 이후 추가된 관심사 ID 를 쓸 수 있으므로 어휘도 다시 적재
+                await load_interest_vocabulary(db)
+        if self.snapshot is None:
+            return 0
+
+        started = datetime.now(timezone.utc)
+        changed = await changed_user_ids(db, self.watermark - _DELTA_OVERLAP)
+        for start in range(0, len(changed), chunk_size):
+            self.put(await loader(changed[start:start + chunk_size], db))
+        self.watermark = started
+        if changed:
+            logger.info("feature_snapshot_delta_applied", count=len(changed), **self.stats())
+        return len(changed)
+
+    async def features(
+        self,
+        db: AsyncSession,
+        user_ids: Sequence,
+        loader: Callable,
+        minhasher: Optional[MinHasher] = None,
+        users: Optional[List] = None,
+    ) -> Tuple[List[str], MatchingFeatures]:
+        """
+        사용자들의 특성 행렬 (찾은 ID 목록, 특성; 요청 순서 유지, 없는 사용자 제외)
+
+        오버레이 → 스냅샷 순으로 찾고, 둘 다 없는 사용자만 loader(ids, db, users=users) 로 읽는다.
+        """
+        keys = list(dict.fromkeys(str(uuid.UUID(str(user_id))) for user_id in user_ids))
+        if self.snapshot is None:
+            users_data = await loader(keys, db, users=users)
+            found = [key for key in keys if key in users_data]
+            return found, MatchingFeatures([users_data[key] for key in found], minhasher)
+
+        with self._lock:
+            snapshot = self.snapshot
+            overlay = {key: self._overlay[key] for key in keys if key in self._overlay}
+            stale = {key for key in keys if key in self._stale}
+        rest = [key for key in keys if key not in overlay]
+        rows = snapshot.rows(rest)
+        if stale:
+            rows[[key in stale for key in rest]] = -1
+
+        order = [key for key, row in zip(rest, rows) if row >= 0]
+        parts = [snapshot.take(rows[rows >= 0])]
+        order.extend(overlay)
+        parts.extend(overlay.values())
+
+        missing = [key for key, row in zip(rest, rows) if row < 0]
+        if missing:
+            loaded = self.put(await loader(missing, db, users=users))
+            for key in missing:
+                if key in loaded:
+                    order.append(key)
+                    parts.append(loaded[key])
+
+        packed = concat_packed(parts)
+        position = {key: i for i, key in enumerate(order)}
+        found = [key for key in keys if key in position]
+        index = np.array([position[key] for key in found], dtype=np.intp)
+        return found, MatchingFeatures.from_packed({name: array[index] for name, array in packed.items()}, minhasher)
+
+
+# 전역 특성 저장소
+feature_store = MatchingFeatureStore()
+
+
+async def write_feature_snapshot(session_factory=None, path: Optional[str] = None, chunk_size: int = 1000) -> Dict:
+    """
+    배치 진입점: 사용자 전체의 특성 행렬을 스냅샷 파일로 저장
+
+    관심사가 DB 어휘에 없는 사용자는 저장하지 않고 deferred 로 센다.
+    """
+    from app.models.user import User
+    from app.services.matching_service import MatchingService
+
+    if session_factory is None:
+        from app.config.database import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+    path = path or settings.FEATURE_SNAPSHOT_PATH
+
+    matching_service = MatchingService()
+    as_of = datetime.now(timezone.utc)
+    user_ids, parts, deferred = [], [], 0
+    async with session_factory() as db:
+        await load_interest_vocabulary(db)
+        result = await db.execute(sa.select(User.id))
+        all_ids = [str(user_id) for user_id in result.scalars().all()]
+        # 청크 단위 일괄 조회 (청크당 고정 쿼리 수)
+        for start in range(0, len(all_ids), chunk_size):
+            loaded = await matching_service._get_users_matching_data(all_ids[start:start + chunk_size], db)
+            chunk = {
+                user_id: data for user_id, data in loaded.items()
+                if has_persisted_interest_ids(data.get("user"))
+            }
+            deferred += len(loaded) - len(chunk)
+            user_ids.extend(chunk)
+            parts.append(MatchingFeatures(list(chunk.values())).packed())
+
+    header = await asyncio.to_thread(write_snapshot_file, path, user_ids, concat_packed(parts), as_of)
+    stats = {"users": header["count"], "deferred": deferred, "generation": header["generation"], "path": path}
+    logger.info("feature_snapshot_written", **stats)
+    return stats
+
+
+async def run_refresh_loop(session_factory, interval_seconds: int) -> None:
+    """주기적 델타 갱신 (스냅샷이 없으면 파일이 생길 때까지 같은 주기로 확인)"""
+    from app.services.matching_service import MatchingService
+
+    loader = MatchingService()._get_users_matching_data
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as db:
+                await feature_store.refresh(db, loader)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("feature_snapshot_refresh_failed", error=str(e))
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def start_snapshot_refresh(session_factory, interval_seconds: Optional[int] = None) -> None:
+    """델타 갱신 백그라운드 작업 시작 (이벤트 루프 안에서 호출, 주기 0 이면 시작 안 함)"""
+    global _refresh_task
+    interval_seconds = settings.FEATURE_SNAPSHOT_REFRESH_SECONDS if interval_seconds is None else interval_seconds
+    if interval_seconds <= 0 or (_refresh_task and not _refresh_task.done()):
+        return
+    _refresh_task = asyncio.create_task(run_refresh_loop(session_factory, interval_seconds))
+
+
+async def stop_snapshot_refresh() -> None:
+    """델타 갱신 백그라운드 작업 중지"""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
@@ -0,0 +1,291 @@
+"""
+사용자 위치 인덱스 (geohash 버킷)
+
+users.latitude/longitude/geohash 를 기준으로 반경 검색을 한다.
+- geohash 접두어(정밀도 1~6)별 버킷에 사용자 ID 를 보관
+- 반경 r 검색: 셀 크기가 r 이상인 가장 세밀한 정밀도를 골라 중심 셀 + 주변 8셀만 후보로 모은 뒤
+  하버사인 거리로 정확히 거른다
+인덱스가 비어 있으면 MatchingService 는 위/경도 범위(bounding box) SQL 조회로 대신한다.
+
+update_user_location 은 이 프로세스의 인덱스만 고치므로, 워커마다 주기적으로
+users.updated_at 이 동기화 시점 이후인 행만 다시 읽어 (refresh_user_geo_index)
+다른 워커의 위치 변경과 매칭 가능 여부 변경을 반영한다.
+"""
+import asyncio
+import math
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 6  # 약 1.2km x 0.6km
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# 델타 조회 여유 (updated_at 은 트랜잭션 시작 시각이므로, 동기화 직후 커밋된 긴 트랜잭션도 포함)
+SYNC_MARGIN = timedelta(minutes=5)
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """위/경도 → geohash 문자열"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            bounds[0] = middle
+        else:
+            bits <<= 1
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """정밀도별 셀 크기 (위도 도, 경도 도)"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """반경을 포함하는 위/경도 범위 (min_lat, max_lat, min_lon, max_lon)"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(89.9, abs(latitude) + lat_delta)))
+    lon_delta = min(180.0, radius_km / (KM_PER_DEGREE * max(cos_lat, 1e-6)))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lon_delta, longitude + lon_delta
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes) -> np.ndarray:
+    """기준점과 여러 지점 사이의 대원 거리 (km, 벡터화)"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> Optional[Set[str]]:
+    """반경 원을 덮는 geohash 셀 집합 (반경이 너무 커서 셀로 줄일 수 없으면 None)"""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    lat_span, lon_span = max_lat - latitude, max_lon - longitude
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lon_size = geohash_cell_size(precision)
+        if lat_size >= lat_span and lon_size >= lon_span:
+            cells = set()
+            for lat_step in (-1, 0, 1):
+                cell_lat = min(90.0, max(-90.0, latitude + lat_step * lat_size))
+                for lon_step in (-1, 0, 1):
+                    cell_lon = (longitude + lon_step * lon_size + 180.0) % 360.0 - 180.0
+                    cells.add(encode_geohash(cell_lat, cell_lon, precision))
+            return cells
+    return None
+
+
+class GeohashBucketIndex:
+    """geohash 접두어 버킷 기반 반경 검색 인덱스"""
+
+    def __init__(self):
+        self._locations: Dict[str, Tuple[float, float, str]] = {}
+        self._buckets: Dict[str, Set[str]] = {}
+        # DB 와 마지막으로 맞춘 시점 (읽은 users.updated_at 의 최댓값)
+        self.synced_at: Optional[datetime] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, user_id: str) -> bool:
+        return str(user_id) in self._locations
+
+    def clear(self) -> None:
+        with self._lock:
+            self._locations.clear()
+            self._buckets.clear()
+
+    def location(self, user_id: str) -> Optional[Tuple[float, float]]:
+        entry = self._locations.get(str(user_id))
+        return None if entry is None else entry[:2]
+
+    def upsert(self, user_id: str, latitude: Optional[float], longitude: Optional[float]) -> None:
+        """위치 등록/변경 (좌표가 없으면 제거)"""
+        user_id = str(user_id)
+        with self._lock:
+            self.remove(user_id)
+            if latitude is None or longitude is None:
+                return
+            geohash = encode_geohash(latitude, longitude)
+            self._locations[user_id] = (float(latitude), float(longitude), geohash)
+            for precision in range(1, GEOHASH_PRECISION + 1):
+                self._buckets.setdefault(geohash[:precision], set()).add(user_id)
+
+    def remove(self, user_id: str) -> bool:
+        with self._lock:
+            entry = self._locations.pop(str(user_id), None)
+            if entry is None:
+                return False
+            geohash = entry[2]
+            for precision in range(1, GEOHASH_PRECISION + 1):
+                bucket = self._buckets.get(geohash[:precision])
+                if bucket is not None:
+                    bucket.discard(str(user_id))
+                    if not bucket:
+                        del self._buckets[geohash[:precision]]
+            return True
+
+    def within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        exclude: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """반경 내 사용자 [(user_id, 거리 km)] (가까운 순)"""
+        with self._lock:
+            cells = covering_cells(latitude, longitude, radius_km)
+            if cells is None:
+                user_ids = set(self._locations)
+            else:
+                user_ids = set().union(*(self._buckets.get(cell, ()) for cell in cells))
+            user_ids.difference_update(str(user_id) for user_id in (exclude or ()))
+            if not user_ids:
+                return []
+
+            user_ids = list(user_ids)
+            coordinates = np.array([self._locations[user_id][:2] for user_id in user_ids], dtype=np.float64)
+
+        distances = haversine_km(latitude, longitude, coordinates[:, 0], coordinates[:, 1])
+        inside = np.flatnonzero(distances <= radius_km)
+        inside = inside[np.argsort(distances[inside], kind="stable")]
+        return [(user_ids[i], float(distances[i])) for i in inside]
+
+
+# 전역 사용자 위치 인덱스 (매칭 가능한 사용자만)
+user_geo_index = GeohashBucketIndex()
+
+
+async def build_user_geo_index(db: AsyncSession, index: Optional[GeohashBucketIndex] = None) -> GeohashBucketIndex:
+    """매칭 가능한 사용자 위치로 인덱스 구축"""
+    from app.models.user import User
+
+    index = index or user_geo_index
+    synced_at = (await db.execute(select(func.max(User.updated_at)))).scalar()
+    result = await db.execute(
+        select(User.id, User.latitude, User.longitude).where(
+            and_(
+                User.is_active == True,
+                User.matching_enabled == True,
+                User.latitude.isnot(None),
+                User.longitude.isnot(None),
+            )
+        )
+    )
+    index.clear()
+    for user_id, latitude, longitude in result.all():
+        index.upsert(str(user_id), latitude, longitude)
+    index.synced_at = synced_at
+    logger.info("geo_index_built", size=len(index))
+    return index
+
+
+async def refresh_user_geo_index(db: AsyncSession, index: Optional[GeohashBucketIndex] = None) -> int:
+    """동기화 시점 이후 바뀐 사용자만 다시 읽어 반영 (반영 행 수, 동기화 시점이 없으면 전체 구축)"""
+    from app.models.user import User
+
+    index = index or user_geo_index
+    if index.synced_at is None:
+        await build_user_geo_index(db, index)
+        return len(index)
+
+    result = await db.execute(
+        select(User.id, User.latitude, User.longitude, User.is_active, User.matching_enabled, User.updated_at)
+        .where(User.updated_at >= index.synced_at - SYNC_MARGIN)
+    )
+    rows = result.all()
+    synced_at = index.synced_at
+    for user_id, latitude, longitude, is_active, matching_enabled, updated_at in rows:
+        if is_active and matching_enabled and latitude is not None and longitude is not None:
+            index.upsert(str(user_id), latitude, longitude)
+        else:
+            index.remove(str(user_id))
+        if updated_at is not None and updated_at > synced_at:
+            synced_at = updated_at
+    index.synced_at = synced_at
+    return len(rows)
+
+
+async def run_geo_refresh_loop(session_factory, interval_seconds: int) -> None:
+    """주기적 위치 인덱스 델타 갱신"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as db:
+                await refresh_user_geo_index(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("geo_index_refresh_failed", error=str(e))
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def start_geo_index_refresh(session_factory, interval_seconds: Optional[int] = None) -> None:
+    """위치 인덱스 델타 갱신 백그라운드 작업 시작 (이벤트 루프 안에서 호출, 주기 0 이면 시작 안 함)"""
+    global _refresh_task
+    interval_seconds = settings.GEO_INDEX_REFRESH_SECONDS if interval_seconds is None else interval_seconds
+    if interval_seconds <= 0 or (_refresh_task and not _refresh_task.done()):
+        return
+    _refresh_task = asyncio.create_task(run_geo_refresh_loop(session_factory, interval_seconds))
+
+
+async def stop_geo_index_refresh() -> None:
+    """위치 인덱스 델타 갱신 백그라운드 작업 중지"""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
+
+
+async def update_user_location(
+    db: AsyncSession, user_id: str, latitude: Optional[float], longitude: Optional[float]
+) -> None:
+    """사용자 좌표 저장 (geohash 함께 갱신) 및 위치 인덱스 반영 (매칭 가능한 사용자만, 아니면 제거)"""
+    from app.models.user import User
+
+    geohash = encode_geohash(latitude, longitude) if latitude is not None and longitude is not None else None
+    result = await db.execute(
+        update(User)
+        .where(User.id == uuid.UUID(str(user_id)))
+        .values(latitude=latitude, longitude=longitude, geohash=geohash)
+        .returning(User.is_active, User.matching_enabled)
+    )
+    row = result.first()
+    await db.commit()
+    if row is not None and row.is_active and row.matching_enabled:
+        user_geo_index.upsert(str(user_id), latitude, longitude)
+    else:
+        user_geo_index.remove(str(user_id))
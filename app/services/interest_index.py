@@ -0,0 +1,244 @@
+"""
+관심사 정수 ID 인터닝과 비트셋 Jaccard
+
+- 관심사 문자열은 interests 테이블에서 정수 ID 로 인터닝하고 (프로필 저장 시),
+  사용자별로 users.interest_bits 에 uint64 비트셋(리틀 엔디언 바이트)으로 저장한다.
+- 매칭 시 Jaccard 는 popcount(교집합) / (|A| + |B| - 교집합) 으로 후보 전체를 한 번에 계산한다.
+- 관심사 어휘가 매우 클 때는 INTEREST_MINHASH_PERMUTATIONS > 0 으로 MinHash 서명 근사를 쓴다.
+
+비트셋이 아직 없는 사용자(기존 데이터)는 settings["interests"] 중 DB 어휘에 등록된 관심사만 반영한다.
+임시 ID 를 만들면 다른 워커가 같은 값을 DB ID 로 받아 비트가 겹치므로 (다른 관심사가 같은 관심사로 계산됨)
+처음 보는 관심사는 건너뛴다. 기존 사용자는 scripts/backfill_interest_bits.py 로 비트셋을 채운다.
+"""
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import Base
+
+logger = structlog.get_logger()
+
+# 관심사 어휘 (id 가 비트 위치)
+interests_table = sa.Table(
+    "interests",
+    Base.metadata,
+    sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+    sa.Column("name", sa.String(100), nullable=False, unique=True),
+)
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+_POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+_MINHASH_PRIME = (1 << 31) - 1
+
+
+def popcount_rows(words: np.ndarray) -> np.ndarray:
+    """(N, W) uint64 행렬의 행별 1 비트 수"""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    if words.size == 0:
+        return np.zeros(words.shape[0], dtype=np.int64)
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape[0], -1).sum(axis=1, dtype=np.int64)
+
+
+def ids_to_bitset(ids: Iterable[int]) -> np.ndarray:
+    """정수 ID 목록 → uint64 비트셋"""
+    ids = np.fromiter((int(i) for i in ids), dtype=np.int64)
+    if ids.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    words = np.zeros(int(ids.max()) // 64 + 1, dtype=np.uint64)
+    np.bitwise_or.at(words, ids // 64, np.left_shift(np.uint64(1), (ids % 64).astype(np.uint64)))
+    return words
+
+
+def bitset_to_ids(words: np.ndarray) -> np.ndarray:
+    """uint64 비트셋 → 정수 ID 배열 (오름차순)"""
+    bits = np.unpackbits(np.ascontiguousarray(words, dtype="<u8").view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits)
+
+
+def bitset_to_bytes(words: np.ndarray) -> bytes:
+    return np.ascontiguousarray(words, dtype="<u8").tobytes()
+
+
+def bitset_from_bytes(data: Optional[bytes]) -> np.ndarray:
+    if not data:
+        return np.zeros(0, dtype=np.uint64)
+    return np.frombuffer(data, dtype="<u8").astype(np.uint64)
+
+
+def bitset_jaccard(query: np.ndarray, matrix: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    요청 비트셋 1개 대비 후보 비트셋 행렬의 Jaccard (float32)
+
+    교집합은 요청 비트셋에서 0 이 아닌 워드만 비교한다. 합집합이 0 이면 0.
+    """
+    query_size = int(popcount_rows(query[np.newaxis, :])[0]) if query.size else 0
+    columns = np.flatnonzero(query)
+    columns = columns[columns < matrix.shape[1]]
+    if columns.size:
+        intersection = popcount_rows(matrix[:, columns] & query[columns])
+    else:
+        intersection = np.zeros(matrix.shape[0], dtype=np.int64)
+
+    union = sizes + query_size - intersection
+    jaccard = np.zeros(matrix.shape[0], dtype=np.float32)
+    np.divide(intersection, union, out=jaccard, where=union > 0)
+    return jaccard
+
+
+class MinHasher:
+    """정수 ID 집합의 MinHash 서명 (h(x) = (a*x + b) mod p)"""
+
+    def __init__(self, permutations: int, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        self.permutations = permutations
+        self._a = rng.integers(1, _MINHASH_PRIME, size=permutations, dtype=np.int64)
+        self._b = rng.integers(0, _MINHASH_PRIME, size=permutations, dtype=np.int64)
+
+    def signature(self, ids: Sequence[int]) -> np.ndarray:
+        """서명 (빈 집합이면 모두 p)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return np.full(self.permutations, _MINHASH_PRIME, dtype=np.int64)
+        hashes = (self._a[:, np.newaxis] * ids[np.newaxis, :] + self._b[:, np.newaxis]) % _MINHASH_PRIME
+        return hashes.min(axis=1)
+
+    @staticmethod
+    def similarity(query: np.ndarray, signatures: np.ndarray) -> np.ndarray:
+        """서명 일치 비율 = Jaccard 추정치 (float32)"""
+        return (signatures == query).mean(axis=1).astype(np.float32)
+
+
+class InterestVocabulary:
+    """
+    관심사 문자열 ↔ 정수 ID (프로세스 내 캐시, 원본은 interests 테이블)
+
+    DB 에 저장된 (id, name) 만 등록한다 (시작 시 전체 적재, 인터닝할 때마다 추가).
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def register(self, interest_id: int, name: str) -> None:
+        """DB 에 저장된 (id, name) 등록"""
+        with self._lock:
+            self._ids[name] = interest_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def ids_for(self, names: Iterable[str]) -> List[int]:
+        """등록된 관심사의 ID 목록 (처음 보는 관심사는 건너뜀)"""
+        ids = (self._ids.get(name) for name in names)
+        return [interest_id for interest_id in ids if interest_id is not None]
+
+
+# 전역 관심사 어휘
+interest_vocabulary = InterestVocabulary()
+
+
+def user_interest_bitset(user) -> np.ndarray:
+    """사용자 관심사 비트셋 (저장된 interest_bits 우선, 없으면 settings 의 문자열 중 등록된 관심사)"""
+    stored = getattr(user, "interest_bits", None)
+    if stored:
+        return bitset_from_bytes(stored)
+    settings = getattr(user, "settings", None)
+    interests = (settings or {}).get("interests", []) or []
+    return ids_to_bitset(interest_vocabulary.ids_for(dict.fromkeys(interests)))
+
+
+def has_persisted_interest_ids(user) -> bool:
+    """관심사 비트셋이 관심사를 모두 담는지 (저장된 interest_bits 가 있거나 모든 관심사가 DB 어휘에 있음)"""
+    if getattr(user, "interest_bits", None):
+        return True
+    settings = getattr(user, "settings", None)
+    interests = (settings or {}).get("interests", []) or []
+    return all(interest_vocabulary.get(name) is not None for name in interests)
+
+
+async def load_interest_vocabulary(db: AsyncSession) -> InterestVocabulary:
+    """interests 테이블 전체를 어휘 캐시에 등록"""
+    result = await db.execute(sa.select(interests_table.c.id, interests_table.c.name))
+    for interest_id, name in result.all():
+        interest_vocabulary.register(interest_id, name)
+    logger.info("interest_vocabulary_loaded", size=len(interest_vocabulary))
+    return interest_vocabulary
+
+
+async def intern_interests(db: AsyncSession, names: Sequence[str]) -> List[int]:
+    """관심사 문자열을 DB ID 로 인터닝 (새 관심사는 INSERT ... ON CONFLICT DO NOTHING)"""
+    names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    if not names:
+        return []
+
+    table = interests_table
+    insert = _INSERT_BY_DIALECT.get(db.bind.dialect.name)
+    if insert is not None:
+        await db.execute(insert(table).values([{"name": name} for name in names]).on_conflict_do_nothing())
+    result = await db.execute(sa.select(table.c.id, table.c.name).where(table.c.name.in_(names)))
+    ids = {name: interest_id for interest_id, name in result.all()}
+    for name, interest_id in ids.items():
+        interest_vocabulary.register(interest_id, name)
+    return [ids[name] for name in names if name in ids]
+
+
+async def update_user_interests(db: AsyncSession, user_id: str, interests: Sequence[str]) -> List[int]:
+    """사용자 관심사 저장 (settings 의 문자열 목록 + interest_bits 비트셋)"""
+    from app.models.user import User
+
+    interest_ids = await intern_interests(db, interests)
+    user = await db.get(User, uuid.UUID(str(user_id)))
+    if user is None:
+        return []
+
+    names = list(dict.fromkeys(name.strip() for name in interests if name and name.strip()))
+    user.settings = {**(user.settings or {}), "interests": names}
+    user.interest_bits = bitset_to_bytes(ids_to_bitset(interest_ids))
+    await db.commit()
+    return interest_ids
+
+
+async def backfill_interest_bits(db: AsyncSession, batch_size: int = 500) -> int:
+    """interest_bits 가 없는 사용자의 관심사 비트셋 일괄 생성 (처리한 사용자 수 반환)"""
+    from app.models.user import User
+
+    processed = 0
+    while True:
+        result = await db.execute(
+            sa.select(User).where(User.interest_bits.is_(None)).order_by(User.id).limit(batch_size)
+        )
+        users = result.scalars().all()
+        if not users:
+            return processed
+
+        names = {
+            name.strip()
+            for user in users
+            for name in ((user.settings or {}).get("interests", []) or [])
+            if name and name.strip()
+        }
+        await intern_interests(db, sorted(names))
+        for user in users:
+            interests = [name.strip() for name in ((user.settings or {}).get("interests", []) or []) if name and name.strip()]
+            user.interest_bits = bitset_to_bytes(ids_to_bitset(interest_vocabulary.get(name) for name in interests))
+        await db.commit()
+        processed += len(users)
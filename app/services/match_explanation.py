@@ -0,0 +1,146 @@
+"""
+매칭 설명 (카드 상세) / 두 사용자 호환성 결과 캐시
+
+후보 목록은 가벼운 카드만 반환하고, 매칭 근거/공통 특성/보완 특성은 카드를 눌렀을 때
+MatchingService.explain_match 가 계산한다. 결과는 (요청자, 후보, 두 프로필 버전) 키로
+메모리 LRU 와 Redis 에 보관하므로 어느 한쪽 프로필이 바뀌면 자연히 새로 계산된다.
+MatchingService.calculate_compatibility 는 순서 없는 쌍 키로 양방향 결과를 한 항목에 둔다.
+
+프로필 버전: users / user_vectors / user_personality_summary / user_emotion_patterns /
+matching_preferences 의 updated_at 을 한 번의 조인 조회로 모은 값.
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.cache import get_redis
+from app.config.settings import get_settings
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+
+async def profile_versions(db: AsyncSession, user_ids: Iterable) -> Dict[str, Tuple[str, bool]]:
+    """사용자별 (프로필 버전, 매칭 가능 여부) — 버전은 매칭에 쓰는 테이블들의 updated_at, 없는 사용자는 제외"""
+    from app.models.user import MatchingPreference, User, UserVector
+    from app.models.analysis import UserEmotionPattern, UserPersonalitySummary
+
+    related = (UserVector, UserPersonalitySummary, UserEmotionPattern, MatchingPreference)
+    query = sa.select(
+        User.id, User.is_active, User.matching_enabled, User.updated_at, *(model.updated_at for model in related)
+    ).select_from(User)
+    for model in related:
+        query = query.outerjoin(model, model.user_id == User.id)
+    query = query.where(User.id.in_([uuid.UUID(str(user_id)) for user_id in user_ids]))
+
+    result = await db.execute(query)
+    return {
+        str(row[0]): (
+            "|".join(timestamp.isoformat() if timestamp else "-" for timestamp in row[3:]),
+            bool(row[1] and row[2]),
+        )
+        for row in result.all()
+    }
+
+
+def pair_version(requester_version: str, candidate_version: str) -> str:
+    """두 프로필 버전을 합친 짧은 해시"""
+    return hashlib.sha1(f"{requester_version}/{candidate_version}".encode("utf-8")).hexdigest()[:16]
+
+
+class MatchResultCache:
+    """매칭 설명/호환성 결과 캐시 (메모리 LRU + Redis JSON, 둘 다 TTL)"""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 86400, key_prefix: str = "matching:explanation:"):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def key(requester_id: str, candidate_id: str, version: str) -> str:
+        return f"{requester_id}:{candidate_id}:{version}"
+
+    def _get_local(self, key: str, now: float) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _put_local(self, key: str, value: Dict, now: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        """캐시된 설명 (메모리 → Redis, 없으면 None)"""
+        now = time.time()
+        value = self._get_local(key, now)
+        if value is None:
+            redis = get_redis()
+            if redis is not None:
+                try:
+                    data = await redis.get(f"{self.key_prefix}{key}")
+                    if data is not None:
+                        value = json.loads(data)
+                        self._put_local(key, value, now)
+                except Exception as e:
+                    logger.warning("match_explanation_redis_get_failed", error=str(e))
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def put(self, key: str, value: Dict) -> None:
+        self._put_local(key, value, time.time())
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(
+                    f"{self.key_prefix}{key}", json.dumps(value, ensure_ascii=False), ex=self.ttl_seconds
+                )
+            except Exception as e:
+                logger.warning("match_explanation_redis_set_failed", error=str(e))
+
+
+# 전역 매칭 설명 캐시 (요청자 → 후보)
+explanation_cache = MatchResultCache(
+    max_size=settings.MATCH_EXPLANATION_CACHE_SIZE,
+    ttl_seconds=settings.MATCH_EXPLANATION_CACHE_TTL_SECONDS,
+)
+
+# 전역 호환성 결과 캐시 (순서 없는 쌍, 양방향 결과를 한 항목에)
+compatibility_cache = MatchResultCache(
+    max_size=settings.MATCH_EXPLANATION_CACHE_SIZE,
+    ttl_seconds=settings.MATCH_EXPLANATION_CACHE_TTL_SECONDS,
+    key_prefix="matching:compatibility:",
+)
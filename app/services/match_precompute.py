@@ -0,0 +1,344 @@
+"""
+사용자별 상위 K명 매칭 후보 사전 계산 (야간 배치)
+
+매칭 가능한 사용자 전체를 블록 단위로 나눠 ProcessPoolExecutor 로 병렬 채점하고
+(MatchingService 와 같은 BatchCompatibilityScorer 사용) 결과를 match_candidates 테이블에 저장한다.
+POST /matching/candidates 는 이 테이블을 먼저 읽고, 목록이 없으면 즉시 계산한다.
+
+한 사용자의 프로필이 바뀌면 refresh_user_matches 가 역색인(candidate_id 인덱스)으로
+그 사용자가 들어 있는 목록만 찾아 해당 항목을 다시 채점/패치한다.
+
+실행: python scripts/precompute_matches.py
+"""
+import asyncio
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import Base
+from app.config.settings import get_settings
+from app.services.matching_scoring import BatchCompatibilityScorer, _age_allowed, select_diverse_top_k
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+# 사용자별 사전 계산 후보 목록 (rank 1 이 가장 높은 점수)
+match_candidates_table = sa.Table(
+    "match_candidates",
+    Base.metadata,
+    sa.Column("user_id", sa.Uuid(), primary_key=True),
+    sa.Column("rank", sa.Integer(), primary_key=True),
+    sa.Column("candidate_id", sa.Uuid(), nullable=False),
+    sa.Column("score", sa.Float(), nullable=False),
+    sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+    sa.Index("ix_match_candidates_candidate_id", "candidate_id"),
+)
+
+TopKLists = Dict[str, List[Tuple[str, float]]]
+
+# 작업 프로세스별 상태 (initializer 에서 한 번만 구성)
+_worker_state: Dict = {}
+
+
+def portable_matching_data(data: Dict) -> Dict:
+    """ORM 객체 대신 채점에 필요한 값만 담은 피클 가능한 매칭 데이터"""
+    def copy(source, fields):
+        if not source:
+            return None
+        return SimpleNamespace(**{field: getattr(source, field, None) for field in fields})
+
+    return {
+        "user": copy(data.get("user"), ("settings", "interest_bits")),
+        "vector": copy(data.get("vector"), ("lifestyle_vector",)),
+        "personality": copy(data.get("personality"), ("overall_mbti", "overall_big5")),
+        "emotion": copy(data.get("emotion"), ("emotional_volatility", "avg_sentiment_score", "emotion_distribution")),
+        "preference": copy(
+            data.get("preference"),
+            ("personality_weight", "emotion_weight", "lifestyle_weight", "interest_weight", "diversity_factor"),
+        ),
+    }
+
+
+def _init_worker(user_ids: List[str], users_data: List[Dict], scorer: BatchCompatibilityScorer, top_k: int):
+    _worker_state.update(
+        user_ids=user_ids,
+        users_data=users_data,
+        features=scorer.features(users_data),
+        scorer=scorer,
+        top_k=top_k,
+    )
+
+
+def _score_block(block: Tuple[int, int]) -> TopKLists:
+    """requester 행 범위 [start, stop) 각각의 상위 K명 (본인 제외)"""
+    start, stop = block
+    user_ids = _worker_state["user_ids"]
+    users_data = _worker_state["users_data"]
+    features = _worker_state["features"]
+    scorer = _worker_state["scorer"]
+    top_k = _worker_state["top_k"]
+
+    lists = {}
+    for i in range(start, stop):
+        requester = users_data[i]
+        scores = scorer.score_features(requester, scorer.features([requester]), features)["overall"]
+        scores[i] = -1.0
+        top = select_diverse_top_k(scores, features, top_k, scorer.diversity_for(requester), 0.0)
+        lists[user_ids[i]] = [(user_ids[j], float(scores[j])) for j in top]
+    return lists
+
+
+def compute_top_k_lists(
+    user_ids: Sequence[str],
+    users_data: Sequence[Dict],
+    scorer: BatchCompatibilityScorer,
+    top_k: int,
+    workers: int = 1,
+    block_size: int = 256,
+) -> TopKLists:
+    """전체 사용자 쌍을 채점해 사용자별 상위 K명 목록 계산 (workers > 1 이면 프로세스 병렬)"""
+    user_ids = [str(user_id) for user_id in user_ids]
+    users_data = [portable_matching_data(data) for data in users_data]
+    blocks = [(start, min(start + block_size, len(user_ids))) for start in range(0, len(user_ids), block_size)]
+
+    lists: TopKLists = {}
+    if workers <= 1 or len(blocks) <= 1:
+        _init_worker(user_ids, users_data, scorer, top_k)
+        try:
+            for block in blocks:
+                lists.update(_score_block(block))
+        finally:
+            _worker_state.clear()
+        return lists
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(user_ids, users_data, scorer, top_k),
+    ) as executor:
+        for block_lists in executor.map(_score_block, blocks):
+            lists.update(block_lists)
+    return lists
+
+
+async def store_top_k_lists(
+    db: AsyncSession,
+    lists: TopKLists,
+    computed_at: Optional[datetime] = None,
+    chunk_size: int = 1000,
+    computed_at_by_user: Optional[Dict[str, datetime]] = None,
+) -> int:
+    """사용자별 목록 교체 저장 (한 트랜잭션, 저장한 행 수 반환)"""
+    computed_at = computed_at or datetime.now(timezone.utc)
+    computed_at_by_user = computed_at_by_user or {}
+    table = match_candidates_table
+    items = list(lists.items())
+
+    stored = 0
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        await db.execute(
+            sa.delete(table).where(table.c.user_id.in_([uuid.UUID(user_id) for user_id, _ in chunk]))
+        )
+        rows = [
+            {
+                "user_id": uuid.UUID(user_id),
+                "rank": rank,
+                "candidate_id": uuid.UUID(candidate_id),
+                "score": score,
+                "computed_at": computed_at_by_user.get(user_id, computed_at),
+            }
+            for user_id, candidates in chunk
+            for rank, (candidate_id, score) in enumerate(candidates, start=1)
+        ]
+        if rows:
+            await db.execute(sa.insert(table), rows)
+        stored += len(rows)
+    await db.commit()
+    return stored
+
+
+async def load_top_k_list(
+    db: AsyncSession, user_id: str, max_age: Optional[timedelta] = None
+) -> List[Tuple[uuid.UUID, float]]:
+    """저장된 후보 목록 [(candidate_id, score)] (순위 순, 없거나 오래됐으면 빈 목록)"""
+    table = match_candidates_table
+    query = (
+        sa.select(table.c.candidate_id, table.c.score)
+        .where(table.c.user_id == uuid.UUID(str(user_id)))
+        .order_by(table.c.rank)
+    )
+    if max_age is not None:
+        query = query.where(table.c.computed_at >= datetime.now(timezone.utc) - max_age)
+    result = await db.execute(query)
+    return [(candidate_id, score) for candidate_id, score in result.all()]
+
+
+async def run_precompute_job(
+    session_factory=None,
+    top_k: Optional[int] = None,
+    workers: Optional[int] = None,
+    block_size: Optional[int] = None,
+    load_chunk_size: int = 1000,
+) -> Dict:
+    """야간 배치 진입점: 매칭 가능 사용자 전체의 상위 K명 목록 재계산"""
+    from app.models.user import User
+    from app.services.matching_service import MatchingService
+
+    if session_factory is None:
+        from app.config.database import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+    top_k = top_k or settings.MATCH_PRECOMPUTE_TOP_K
+    workers = workers or settings.MATCH_PRECOMPUTE_WORKERS
+    block_size = block_size or settings.MATCH_PRECOMPUTE_BLOCK_SIZE
+
+    matching_service = MatchingService()
+    started_at = datetime.now(timezone.utc)
+
+    async with session_factory() as db:
+        result = await db.execute(
+            sa.select(User.id).where(sa.and_(User.is_active == True, User.matching_enabled == True))
+        )
+        eligible_ids = [str(user_id) for user_id in result.scalars().all()]
+
+        # 매칭 데이터는 청크 단위로 일괄 조회 (청크당 고정 쿼리 수)
+        user_ids, users_data = [], []
+        for start in range(0, len(eligible_ids), load_chunk_size):
+            chunk = await matching_service._get_users_matching_data(
+                eligible_ids[start:start + load_chunk_size], db
+            )
+            for user_id, data in chunk.items():
+                user_ids.append(user_id)
+                users_data.append(data)
+
+    lists = await asyncio.to_thread(
+        compute_top_k_lists, user_ids, users_data, matching_service.batch_scorer, top_k, workers, block_size
+    )
+
+    async with session_factory() as db:
+        stored = await store_top_k_lists(db, lists, computed_at=started_at)
+
+    stats = {
+        "users": len(user_ids),
+        "rows": stored,
+        "workers": workers,
+        "seconds": round((datetime.now(timezone.utc) - started_at).total_seconds(), 2),
+    }
+    logger.info("match_precompute_completed", **stats)
+    return stats
+
+
+async def refresh_user_matches(
+    db: AsyncSession, user_id: str, top_k: Optional[int] = None, matching_service=None
+) -> Dict:
+    """
+    프로필이 바뀐 사용자 1명 기준 증분 갱신
+
+    - 이웃: 그 사용자가 들어 있는 목록의 주인(역색인) + 본인 목록의 후보 + 벡터 인덱스 근접 사용자
+    - 본인 목록: 이웃 전체를 다시 채점해 교체
+    - 이웃의 목록: 그 사용자 항목만 다시 채점해 순위 패치 (다른 항목과 계산 시각은 그대로).
+      목록 주인별 점수는 상호 점수의 역방향(주인의 가중치/선호 나이 범위)을 한 번에 계산하며,
+      주인의 선호 나이 범위 밖이면 목록에서 뺀다
+    """
+    try:
+        from app.services.matching_service import MatchingService
+        from app.services.vector_index import user_vector_index
+
+        matching_service = matching_service or MatchingService()
+        scorer = matching_service.batch_scorer
+        top_k = top_k or settings.MATCH_PRECOMPUTE_TOP_K
+        table = match_candidates_table
+        target = str(uuid.UUID(str(user_id)))
+
+        result = await db.execute(
+            sa.select(table.c.user_id).where(table.c.candidate_id == uuid.UUID(target))
+        )
+        containing = {str(owner_id) for owner_id in result.scalars().all()}
+        result = await db.execute(
+            sa.select(table.c.candidate_id).where(table.c.user_id == uuid.UUID(target))
+        )
+        neighbourhood = containing | {str(candidate_id) for candidate_id in result.scalars().all()}
+
+        vector = user_vector_index.vector(target)
+        if vector is not None:
+            neighbourhood.update(
+                neighbour_id for neighbour_id, _ in
+                user_vector_index.search(vector, settings.MATCHING_CANDIDATE_POOL, exclude={target})
+            )
+        neighbourhood.discard(target)
+
+        users_data = await matching_service._get_users_matching_data([target, *neighbourhood], db)
+        target_data = users_data.pop(target, None)
+        if target_data is None:
+            return {"patched": 0}
+
+        def is_eligible(data: Dict) -> bool:
+            return bool(data["user"].is_active and data["user"].matching_enabled)
+
+        target_eligible = is_eligible(target_data)
+        target_features = scorer.features([target_data])
+        now = datetime.now(timezone.utc)
+
+        # 본인 목록: 매칭 가능한 이웃 전체 재채점
+        lists: TopKLists = {}
+        eligible_ids = [neighbour_id for neighbour_id, data in users_data.items() if is_eligible(data)]
+        if target_eligible and eligible_ids:
+            neighbour_features = scorer.features([users_data[neighbour_id] for neighbour_id in eligible_ids])
+            scores = scorer.score_features(target_data, target_features, neighbour_features)["overall"]
+            top = select_diverse_top_k(scores, neighbour_features, top_k, scorer.diversity_for(target_data), 0.0)
+            lists[target] = [(eligible_ids[j], float(scores[j])) for j in top]
+        elif not target_eligible:
+            lists[target] = []  # 매칭을 끈 사용자의 목록 삭제
+
+        # 이웃 목록: 저장된 목록이 있는 사용자만 해당 항목 패치
+        result = await db.execute(
+            sa.select(table.c.user_id, table.c.candidate_id, table.c.score, table.c.computed_at)
+            .where(table.c.user_id.in_([uuid.UUID(owner_id) for owner_id in users_data]))
+            .order_by(table.c.user_id, table.c.rank)
+        )
+        stored: TopKLists = {}
+        computed_at_by_user: Dict[str, datetime] = {}
+        for owner_id, candidate_id, score, computed_at in result.all():
+            stored.setdefault(str(owner_id), []).append((str(candidate_id), score))
+            computed_at_by_user[str(owner_id)] = computed_at
+        computed_at_by_user.pop(target, None)
+
+        # 목록 주인 → 대상 점수를 한 번에 (상호 점수의 역방향)
+        owners = list(stored)
+        owner_scores: Dict[str, float] = {}
+        if target_eligible and owners:
+            owner_features = scorer.features([users_data[owner_id] for owner_id in owners])
+            backward = scorer.score_mutual_features(target_data, target_features, owner_features)["backward"]
+            allowed = _age_allowed(target_features.age[0], owner_features.age_min, owner_features.age_max)
+            owner_scores = {
+                owner_id: float(score) for owner_id, score, ok in zip(owners, backward, allowed) if ok
+            }
+
+        for owner_id, entries in stored.items():
+            patched = [(candidate_id, score) for candidate_id, score in entries if candidate_id != target]
+            score = owner_scores.get(owner_id)
+            if score is not None:
+                # 점수가 더 낮은 첫 항목 앞에 삽입 (다양성 재정렬된 목록도 나머지 순서 유지)
+                position = next((p for p, (_, other) in enumerate(patched) if other < score), len(patched))
+                patched.insert(position, (target, score))
+                patched = patched[:top_k]
+            if patched != entries:
+                lists[owner_id] = patched
+
+        if lists:
+            await store_top_k_lists(db, lists, computed_at=now, computed_at_by_user=computed_at_by_user)
+
+        stats = {"patched": len(lists) - (1 if target in lists else 0), "neighbourhood": len(neighbourhood)}
+        logger.info("match_lists_refreshed", user_id=target, **stats)
+        return stats
+
+    except Exception as e:
+        logger.error("refresh_user_matches_failed", user_id=str(user_id), error=str(e))
+        await db.rollback()
+        return {"patched": 0}
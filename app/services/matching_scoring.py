@@ -0,0 +1,583 @@
+"""
+배치 호환성 점수 계산 (NumPy 벡터화)
+
+요청자 1명과 후보 N명의 매칭 데이터를 float32 특성 행렬로 묶어
+MatchingService 의 쌍별 계산(_calculate_compatibility_score 등)과 같은 점수를
+배열 연산 한 번으로 계산하고, 상위 K명은 전체 정렬 없이 argpartition 으로 선택한다.
+선호도의 diversity_factor 가 있으면 같은 특성 행렬로 MMR 재정렬을 한다 (추가 조회 없음).
+상호 점수 모드는 후보 쪽 가중치/나이 선호로 역방향 점수도 같은 배열 연산으로 구해
+두 방향의 조화 평균을 쓴다.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.interest_index import (
+    MinHasher,
+    bitset_jaccard,
+    bitset_to_ids,
+    popcount_rows,
+    user_interest_bitset,
+)
+from app.utils.vector_codec import has_values
+
+BIG5_TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+
+# MatchingService._calculate_emotion_distribution_compatibility 와 같은 상호 보완 감정 쌍
+COMPLEMENTARY_EMOTION_PAIRS = (
+    ("anxiety", "calm"),
+    ("sadness", "joy"),
+    ("anger", "peace"),
+    ("stress", "relaxation"),
+)
+
+COMPONENTS = ("personality", "emotion", "lifestyle", "interest")
+
+# MatchingFeatures.packed() 에 그대로 들어가는 행 단위 배열
+PACKED_ARRAYS = (
+    "has_personality", "big5", "big5_mask",
+    "has_emotion", "volatility", "volatility_mask", "sentiment", "sentiment_mask",
+    "emotion_balance", "emotion_balance_mask",
+    "age", "age_min", "age_max", "has_preference", "weights",
+)
+
+# MBTI 축별 +1 글자 (나머지 글자는 -1)
+MBTI_AXES = ("E", "S", "T", "J")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행별 L2 정규화 (0 벡터는 그대로)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _centered(block: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """값이 있는 행의 열 평균을 빼고 값이 없는 행은 0 (후보 간 차이만 남김)"""
+    block = block.astype(np.float32, copy=True)
+    if present.any():
+        block[present] -= block[present].mean(axis=0)
+    block[~present] = 0.0
+    return block
+
+
+def _age_allowed(ages, age_min, age_max) -> np.ndarray:
+    """선호 나이 범위가 나이를 허용하는지 (브로드캐스트, 범위 끝이나 나이가 NaN 이면 허용)"""
+    ages, age_min, age_max = np.broadcast_arrays(
+        np.asarray(ages, dtype=np.float32), np.asarray(age_min, dtype=np.float32), np.asarray(age_max, dtype=np.float32)
+    )
+    with np.errstate(invalid="ignore"):
+        return ~((ages < age_min) | (ages > age_max))
+
+
+def _as_float(value) -> Optional[float]:
+    """숫자로 변환 가능한 값만 float 로 (그 외 None)"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MatchingFeatures:
+    """
+    사용자 N명의 매칭 특성 행렬 (행 순서 = user_ids 순서)
+
+    결측값은 0 으로 채우고 별도 마스크로 표시한다.
+    """
+
+    def __init__(self, users_data: Sequence[Dict], minhasher: Optional[MinHasher] = None):
+        n = len(users_data)
+        self.size = n
+
+        self.has_personality = np.zeros(n, dtype=bool)
+        self.mbti = np.empty(n, dtype=object)
+        self.big5 = np.zeros((n, len(BIG5_TRAITS)), dtype=np.float32)
+        self.big5_mask = np.zeros((n, len(BIG5_TRAITS)), dtype=bool)
+
+        self.has_emotion = np.zeros(n, dtype=bool)
+        self.volatility = np.zeros(n, dtype=np.float32)
+        self.volatility_mask = np.zeros(n, dtype=bool)
+        self.sentiment = np.zeros(n, dtype=np.float32)
+        self.sentiment_mask = np.zeros(n, dtype=bool)
+        # 상호 보완 감정 쌍별 (첫 감정 - 둘째 감정) 점수
+        self.emotion_balance = np.zeros((n, len(COMPLEMENTARY_EMOTION_PAIRS)), dtype=np.float32)
+        self.emotion_balance_mask = np.zeros(n, dtype=bool)
+
+        self.lifestyle_vectors: List[Optional[np.ndarray]] = [None] * n
+        interest_bits: List[np.ndarray] = [np.zeros(0, dtype=np.uint64)] * n
+
+        # 상호 점수용: 나이, 선호 나이 범위(없으면 NaN), 선호도 가중치(0~1, 비어 있으면 NaN)
+        self.age = np.full(n, np.nan, dtype=np.float32)
+        self.age_min = np.full(n, np.nan, dtype=np.float32)
+        self.age_max = np.full(n, np.nan, dtype=np.float32)
+        self.has_preference = np.zeros(n, dtype=bool)
+        self.weights = np.full((n, len(COMPONENTS)), np.nan, dtype=np.float32)
+
+        for i, data in enumerate(users_data):
+            self._pack_row(i, data, interest_bits)
+
+        # 관심사 비트셋 행렬 (N, W) 과 행별 관심사 수
+        width = max((bits.shape[0] for bits in interest_bits), default=0)
+        self.interest_matrix = np.zeros((n, width), dtype=np.uint64)
+        for i, bits in enumerate(interest_bits):
+            self.interest_matrix[i, :bits.shape[0]] = bits
+        self._set_interest_stats(minhasher)
+
+    def _set_interest_stats(self, minhasher: Optional[MinHasher]) -> None:
+        """관심사 행렬로 행별 관심사 수와 (설정 시) MinHash 서명 계산"""
+        self.interest_sizes = popcount_rows(self.interest_matrix)
+        self.interest_signatures = None
+        self._profiles: Optional[np.ndarray] = None
+        if minhasher is not None:
+            self.interest_signatures = np.stack(
+                [minhasher.signature(bitset_to_ids(bits)) for bits in self.interest_matrix]
+            ) if self.size else np.zeros((0, minhasher.permutations), dtype=np.int64)
+
+    def packed(self) -> Dict[str, np.ndarray]:
+        """
+        고정 dtype 배열만으로 된 특성 (스냅샷 파일/행 단위 병합용, from_packed 로 복원)
+
+        MBTI 는 S8 바이트 문자열(없으면 빈 값), 생활 패턴 벡터는 (N, 최대 차원) 행렬 + 행별 차원.
+        """
+        dimensions = [vector.shape[0] if vector is not None else 0 for vector in self.lifestyle_vectors]
+        lifestyle = np.zeros((self.size, max(dimensions, default=0)), dtype=np.float32)
+        for i, vector in enumerate(self.lifestyle_vectors):
+            if vector is not None:
+                lifestyle[i, :vector.shape[0]] = vector
+
+        packed = {name: getattr(self, name) for name in PACKED_ARRAYS}
+        packed.update(
+            mbti=np.array([str(value).encode("utf-8")[:8] if value else b"" for value in self.mbti], dtype="S8"),
+            lifestyle=lifestyle,
+            lifestyle_dim=np.array(dimensions, dtype=np.int32),
+            interest_matrix=self.interest_matrix,
+        )
+        return packed
+
+    @classmethod
+    def from_packed(cls, packed: Dict[str, np.ndarray], minhasher: Optional[MinHasher] = None) -> "MatchingFeatures":
+        """packed() 배열(또는 그 행 일부)로 특성 행렬 복원"""
+        features = cls.__new__(cls)
+        features.size = int(packed["mbti"].shape[0])
+        for name in PACKED_ARRAYS:
+            setattr(features, name, np.array(packed[name]))
+        features.mbti = np.empty(features.size, dtype=object)
+        features.mbti[:] = [value.decode("utf-8") or None for value in packed["mbti"]]
+        features.lifestyle_vectors = [
+            np.array(row[:dimension], dtype=np.float32) if dimension else None
+            for row, dimension in zip(packed["lifestyle"], packed["lifestyle_dim"])
+        ]
+        features.interest_matrix = np.array(packed["interest_matrix"], dtype=np.uint64)
+        features._set_interest_stats(minhasher)
+        return features
+
+    def _pack_row(self, i: int, data: Dict, interest_bits: List[np.ndarray]) -> None:
+        personality = data.get("personality")
+        if personality:
+            self.has_personality[i] = True
+            self.mbti[i] = personality.overall_mbti or None
+            big5 = personality.overall_big5 or {}
+            for j, trait in enumerate(BIG5_TRAITS):
+                value = _as_float(big5.get(trait))
+                if value is not None:
+                    self.big5[i, j] = value
+                    self.big5_mask[i, j] = True
+
+        emotion = data.get("emotion")
+        if emotion:
+            self.has_emotion[i] = True
+            volatility = _as_float(emotion.emotional_volatility)
+            if volatility is not None:
+                self.volatility[i] = volatility
+                self.volatility_mask[i] = True
+            sentiment = _as_float(emotion.avg_sentiment_score)
+            if sentiment is not None:
+                self.sentiment[i] = sentiment
+                self.sentiment_mask[i] = True
+            distribution = emotion.emotion_distribution
+            if distribution:
+                self.emotion_balance_mask[i] = True
+                for j, (first, second) in enumerate(COMPLEMENTARY_EMOTION_PAIRS):
+                    self.emotion_balance[i, j] = (
+                        (_as_float(distribution.get(first, 0)) or 0.0)
+                        - (_as_float(distribution.get(second, 0)) or 0.0)
+                    )
+
+        vector = data.get("vector")
+        if vector is not None and has_values(vector.lifestyle_vector):
+            self.lifestyle_vectors[i] = np.asarray(vector.lifestyle_vector, dtype=np.float32)
+
+        user = data.get("user")
+        if user is not None:
+            interest_bits[i] = user_interest_bitset(user)
+            age = _as_float(getattr(user, "age", None))
+            if age is not None:
+                self.age[i] = age
+
+        preference = data.get("preference")
+        if preference:
+            self.has_preference[i] = True
+            for j, name in enumerate(COMPONENTS):
+                weight = _as_float(getattr(preference, f"{name}_weight", None))
+                if weight is not None:
+                    self.weights[i, j] = weight / 100
+            for column, attribute in ((self.age_min, "preferred_age_min"), (self.age_max, "preferred_age_max")):
+                value = _as_float(getattr(preference, attribute, None))
+                if value is not None:
+                    column[i] = value
+
+    def profile_matrix(self) -> np.ndarray:
+        """
+        후보 간 유사도용 프로필 행렬 (N, d)
+
+        MBTI 축(±1), Big5, 감정 지표, 생활 패턴 벡터(가장 흔한 차원)를 영역별로 중심화/정규화해
+        이어 붙인 뒤 행을 다시 정규화한다. 내적 = 코사인 유사도. 한 번 계산하면 재사용.
+        """
+        if self._profiles is not None:
+            return self._profiles
+
+        mbti = np.zeros((self.size, len(MBTI_AXES)), dtype=np.float32)
+        for i, value in enumerate(self.mbti):
+            if isinstance(value, str) and len(value) >= len(MBTI_AXES):
+                mbti[i] = [1.0 if value[j] == axis else -1.0 for j, axis in enumerate(MBTI_AXES)]
+        emotion = np.column_stack([
+            np.where(self.volatility_mask, self.volatility, 0.0),
+            np.where(self.sentiment_mask, self.sentiment, 0.0),
+            np.where(self.emotion_balance_mask[:, np.newaxis], self.emotion_balance, 0.0),
+        ])
+        blocks = [
+            (mbti, np.abs(mbti).sum(axis=1) > 0),
+            (np.where(self.big5_mask, self.big5, 0.0), self.big5_mask.any(axis=1)),
+            (emotion, self.has_emotion),
+        ]
+        dimensions = Counter(vector.shape[0] for vector in self.lifestyle_vectors if vector is not None)
+        if dimensions:
+            blocks.append(self.lifestyle_matrix(dimensions.most_common(1)[0][0]))
+
+        self._profiles = _normalize_rows(
+            np.hstack([_normalize_rows(_centered(block, present)) for block, present in blocks])
+        ).astype(np.float32)
+        return self._profiles
+
+    def lifestyle_matrix(self, dimension: int):
+        """길이가 dimension 인 생활 패턴 벡터만 모은 (N, dimension) 행렬과 마스크"""
+        matrix = np.zeros((self.size, dimension), dtype=np.float32)
+        mask = np.zeros(self.size, dtype=bool)
+        for i, vector in enumerate(self.lifestyle_vectors):
+            if vector is not None and vector.shape == (dimension,):
+                matrix[i] = vector
+                mask[i] = True
+        return matrix, mask
+
+
+class BatchCompatibilityScorer:
+    """요청자 대비 후보 전체의 호환성 점수를 한 번에 계산"""
+
+    def __init__(
+        self,
+        mbti_compatibility_matrix: Dict[str, List[str]],
+        default_weights: Dict[str, float],
+        minhash_permutations: int = 0,
+    ):
+        self.mbti_compatibility_matrix = mbti_compatibility_matrix
+        self.default_weights = default_weights
+        # 0 이면 비트셋 정확 Jaccard, 양수면 MinHash 근사 (관심사 어휘가 매우 클 때)
+        self.minhasher = MinHasher(minhash_permutations) if minhash_permutations > 0 else None
+
+    def features(self, users_data: Sequence[Dict]) -> MatchingFeatures:
+        """이 계산기 설정(MinHash 여부)에 맞는 특성 행렬"""
+        return MatchingFeatures(users_data, self.minhasher)
+
+    def weights_for(self, requester_data: Dict) -> Optional[Dict[str, float]]:
+        """요청자 선호도 가중치 (값이 비어 있으면 None → 쌍별 계산과 같이 0.5 처리)"""
+        preference = requester_data.get("preference")
+        if not preference:
+            return dict(self.default_weights)
+        weights = {
+            "personality": preference.personality_weight,
+            "emotion": preference.emotion_weight,
+            "lifestyle": preference.lifestyle_weight,
+            "interest": preference.interest_weight,
+        }
+        if any(_as_float(value) is None for value in weights.values()):
+            return None
+        return {key: float(value) / 100 for key, value in weights.items()}
+
+    @staticmethod
+    def diversity_for(requester_data: Dict) -> float:
+        """요청자 선호도의 diversity_factor (0~100) → 0~1"""
+        value = _as_float(getattr(requester_data.get("preference"), "diversity_factor", None))
+        return min(1.0, max(0.0, value / 100)) if value is not None else 0.0
+
+    def score(self, requester_data: Dict, candidates_data: Sequence[Dict]) -> np.ndarray:
+        """후보별 전체 호환성 점수 (float32, 후보 순서)"""
+        return self.score_components(requester_data, candidates_data)["overall"]
+
+    def score_components(
+        self, requester_data: Dict, candidates_data: Sequence[Dict]
+    ) -> Dict[str, np.ndarray]:
+        """영역별 점수와 전체 점수 (각각 float32 배열)"""
+        requester = self.features([requester_data])
+        candidates = self.features(candidates_data)
+        return self.score_features(requester_data, requester, candidates)
+
+    def score_features(
+        self, requester_data: Dict, requester: MatchingFeatures, candidates: MatchingFeatures
+    ) -> Dict[str, np.ndarray]:
+        components = {
+            "personality": self._personality(requester, candidates),
+            "emotion": self._emotion(requester, candidates),
+            "lifestyle": self._lifestyle(requester, candidates),
+            "interest": self._interest(requester, candidates),
+        }
+
+        weights = self.weights_for(requester_data)
+        if weights is None:
+            overall = np.full(candidates.size, 0.5, dtype=np.float32)
+        else:
+            overall = np.zeros(candidates.size, dtype=np.float32)
+            for name in COMPONENTS:
+                overall += components[name] * np.float32(weights[name])
+            np.clip(overall, 0.0, 1.0, out=overall)
+
+        components["overall"] = overall
+        return components
+
+    def weight_matrix(self, features: MatchingFeatures) -> np.ndarray:
+        """행별 선호도 가중치 (N, 4): 선호도가 없으면 기본 가중치, 값이 비어 있으면 NaN 행"""
+        defaults = np.array([self.default_weights[name] for name in COMPONENTS], dtype=np.float32)
+        weights = np.where(features.has_preference[:, np.newaxis], features.weights, defaults)
+        weights[np.isnan(weights).any(axis=1)] = np.nan
+        return weights.astype(np.float32)
+
+    def score_mutual_features(
+        self, requester_data: Dict, requester: MatchingFeatures, candidates: MatchingFeatures
+    ) -> Dict[str, np.ndarray]:
+        """
+        상호 점수: 요청자 → 후보(forward), 후보 → 요청자(backward) 와 두 값의 조화 평균(overall)
+
+        각 방향은 점수를 매기는 쪽의 가중치와 선호 나이 범위를 쓴다 (범위 밖이면 그 방향 0점).
+        영역 점수는 MBTI 호환표만 방향에 따라 다르고 나머지는 대칭이므로,
+        역방향은 성격 점수만 후보 쪽 유형 기준으로 다시 계산한다.
+        """
+        components = self.score_features(requester_data, requester, candidates)
+        forward = components["overall"].copy()
+        forward[~_age_allowed(candidates.age, requester.age_min[0], requester.age_max[0])] = 0.0
+
+        reverse = dict(components, personality=self._personality(requester, candidates, reverse=True))
+        weights = self.weight_matrix(candidates)
+        backward = np.zeros(candidates.size, dtype=np.float32)
+        for j, name in enumerate(COMPONENTS):
+            backward += reverse[name] * np.nan_to_num(weights[:, j])
+        np.clip(backward, 0.0, 1.0, out=backward)
+        backward[np.isnan(weights).any(axis=1)] = 0.5
+        backward[~_age_allowed(requester.age[0], candidates.age_min, candidates.age_max)] = 0.0
+
+        total = forward + backward
+        mutual = np.zeros(candidates.size, dtype=np.float32)
+        np.divide(2 * forward * backward, total, out=mutual, where=total > 0)
+
+        components.update(forward=forward, backward=backward, overall=mutual)
+        return components
+
+    def _mbti_scores(self, requester_mbti: Optional[str], candidate_mbti: np.ndarray) -> np.ndarray:
+        """MBTI 호환성 (서로 다른 유형 값은 최대 16가지이므로 유형별로 한 번만 계산)"""
+        scores = np.full(candidate_mbti.shape[0], 0.5, dtype=np.float32)
+        if not requester_mbti or requester_mbti not in self.mbti_compatibility_matrix:
+            return scores
+
+        compatible_types = self.mbti_compatibility_matrix[requester_mbti]
+        present = np.array([bool(value) for value in candidate_mbti], dtype=bool)
+        if not present.any():
+            return scores
+
+        types, inverse = np.unique(candidate_mbti[present].astype(str), return_inverse=True)
+        type_scores = np.empty(len(types), dtype=np.float32)
+        for k, other in enumerate(types):
+            if other in compatible_types:
+                type_scores[k] = 0.9 - compatible_types.index(other) * 0.1
+            elif len(other) >= 4:
+                similarity = sum(1 for i in range(4) if requester_mbti[i] == other[i]) / 4
+                type_scores[k] = 0.3 + similarity * 0.4
+            else:
+                type_scores[k] = np.nan  # 쌍별 계산에서는 예외 → 성격 점수 0.5
+        scores[present] = type_scores[inverse]
+        return scores
+
+    def _reverse_mbti_scores(self, requester_mbti: Optional[str], candidate_mbti: np.ndarray) -> np.ndarray:
+        """후보 유형 기준으로 본 요청자 MBTI 호환성 (후보 유형별로 한 번만 계산)"""
+        scores = np.full(candidate_mbti.shape[0], 0.5, dtype=np.float32)
+        present = np.array([bool(value) for value in candidate_mbti], dtype=bool)
+        if not present.any():
+            return scores
+
+        requester = np.array([requester_mbti], dtype=object)
+        types, inverse = np.unique(candidate_mbti[present].astype(str), return_inverse=True)
+        type_scores = np.array([self._mbti_scores(other, requester)[0] for other in types], dtype=np.float32)
+        scores[present] = type_scores[inverse]
+        return scores
+
+    def _personality(
+        self, requester: MatchingFeatures, candidates: MatchingFeatures, reverse: bool = False
+    ) -> np.ndarray:
+        result = np.full(candidates.size, 0.5, dtype=np.float32)
+        if not requester.has_personality[0]:
+            return result
+
+        if reverse:
+            mbti = self._reverse_mbti_scores(requester.mbti[0], candidates.mbti)
+        else:
+            mbti = self._mbti_scores(requester.mbti[0], candidates.mbti)
+
+        # Big5: 두 사용자 모두 있는 특성만 평균 (1 - |차이|)
+        both = candidates.big5_mask & requester.big5_mask[0]
+        similarity = np.where(both, 1.0 - np.abs(candidates.big5 - requester.big5[0]), 0.0)
+        counts = both.sum(axis=1)
+        big5 = np.full(candidates.size, 0.5, dtype=np.float32)
+        np.divide(similarity.sum(axis=1), counts, out=big5, where=counts > 0)
+
+        personality = mbti * 0.6 + big5 * 0.4
+        personality = np.where(np.isnan(personality), 0.5, personality)
+        return np.where(candidates.has_personality, personality, result).astype(np.float32)
+
+    def _emotion(self, requester: MatchingFeatures, candidates: MatchingFeatures) -> np.ndarray:
+        result = np.full(candidates.size, 0.5, dtype=np.float32)
+        if not requester.has_emotion[0]:
+            return result
+
+        total = np.zeros(candidates.size, dtype=np.float32)
+        count = np.zeros(candidates.size, dtype=np.float32)
+
+        if requester.volatility_mask[0]:
+            factor = np.maximum(0.0, 1.0 - np.abs(candidates.volatility - requester.volatility[0]))
+            total += np.where(candidates.volatility_mask, factor, 0.0)
+            count += candidates.volatility_mask
+
+        if requester.sentiment_mask[0]:
+            factor = np.maximum(0.0, 1.0 - np.abs(candidates.sentiment - requester.sentiment[0]) / 2)
+            total += np.where(candidates.sentiment_mask, factor, 0.0)
+            count += candidates.sentiment_mask
+
+        if requester.emotion_balance_mask[0]:
+            # |(a1 - a2) + (b2 - b1)| / 2 의 쌍 평균
+            complementarity = np.abs(requester.emotion_balance[0] - candidates.emotion_balance) / 2
+            factor = np.clip(complementarity.mean(axis=1), 0.0, 1.0)
+            total += np.where(candidates.emotion_balance_mask, factor, 0.0)
+            count += candidates.emotion_balance_mask
+
+        emotion = np.full(candidates.size, 0.5, dtype=np.float32)
+        np.divide(total, count, out=emotion, where=count > 0)
+        return np.where(candidates.has_emotion, emotion, result).astype(np.float32)
+
+    def _lifestyle(self, requester: MatchingFeatures, candidates: MatchingFeatures) -> np.ndarray:
+        result = np.full(candidates.size, 0.5, dtype=np.float32)
+        query = requester.lifestyle_vectors[0]
+        if query is None:
+            return result
+
+        matrix, mask = candidates.lifestyle_matrix(query.shape[0])
+        query_norm = np.linalg.norm(query)
+        norms = np.linalg.norm(matrix, axis=1)
+        valid = mask & (norms > 0) & (query_norm > 0)
+        if not valid.any():
+            return result
+
+        cosine = np.zeros(candidates.size, dtype=np.float32)
+        np.divide(matrix @ query, norms * query_norm, out=cosine, where=valid)
+        return np.where(valid, np.clip(cosine, 0.0, 1.0), result).astype(np.float32)
+
+    def _interest(self, requester: MatchingFeatures, candidates: MatchingFeatures) -> np.ndarray:
+        result = np.full(candidates.size, 0.5, dtype=np.float32)
+        if requester.interest_sizes[0] == 0:
+            return result
+
+        # 관심사 비트셋 popcount Jaccard (MinHash 설정 시 서명 일치 비율)
+        if requester.interest_signatures is not None and candidates.interest_signatures is not None:
+            similarity = MinHasher.similarity(requester.interest_signatures[0], candidates.interest_signatures)
+        else:
+            similarity = bitset_jaccard(
+                requester.interest_matrix[0], candidates.interest_matrix, candidates.interest_sizes
+            )
+        return np.where(candidates.interest_sizes > 0, similarity, result).astype(np.float32)
+
+
+def concat_packed(parts: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """packed() 배열들을 행 방향으로 이어 붙임 (생활 패턴/관심사 열 수가 다르면 0 으로 채움)"""
+    if not parts:
+        return MatchingFeatures([]).packed()
+    result = {}
+    for name in parts[0]:
+        arrays = [part[name] for part in parts]
+        if arrays[0].ndim == 2:
+            width = max(array.shape[1] for array in arrays)
+            arrays = [np.pad(array, ((0, 0), (0, width - array.shape[1]))) for array in arrays]
+        result[name] = np.concatenate(arrays)
+    return result
+
+
+def select_top_k(scores: np.ndarray, k: int, min_score: float = 0.0) -> np.ndarray:
+    """
+    min_score 이상인 점수 중 상위 k개의 인덱스 (점수 내림차순, 동점은 원래 순서)
+
+    전체 정렬 대신 argpartition 으로 k개만 고른 뒤 그 k개만 정렬한다.
+    """
+    eligible = np.flatnonzero(scores >= min_score)
+    if k <= 0 or eligible.size == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if eligible.size > k:
+        partition = np.argpartition(-scores[eligible], k - 1)[:k]
+        # k번째 점수와 같은 동점 후보가 잘리지 않도록 경계 점수 이상은 모두 포함 후 정렬
+        threshold = scores[eligible[partition]].min()
+        eligible = eligible[scores[eligible] >= threshold]
+
+    order = np.lexsort((eligible, -scores[eligible]))
+    return eligible[order][:k]
+
+
+def select_diverse_top_k(
+    scores: np.ndarray,
+    features: MatchingFeatures,
+    k: int,
+    diversity: float,
+    min_score: float = 0.0,
+    pool_factor: int = 4,
+) -> np.ndarray:
+    """
+    점수와 후보 간 다양성을 함께 고려한 상위 k개 인덱스 (MMR)
+
+    diversity(0~1) 가 0 이면 select_top_k 와 같다. 그 외에는 점수 상위 k * pool_factor 명 안에서
+    (1 - diversity)·점수 - diversity·(이미 고른 후보와의 최대 유사도) 가 가장 큰 후보를 차례로 고른다.
+    유사도 = 프로필 코사인과 관심사 Jaccard 의 평균 (고른 후보의 관심사가 없으면 코사인만).
+    고를 때마다 새 후보와의 유사도만 갱신하므로 O(N + k · pool · d).
+    """
+    diversity = min(1.0, max(0.0, float(diversity)))
+    if diversity <= 0:
+        return select_top_k(scores, k, min_score)
+
+    pool = select_top_k(scores, k * pool_factor, min_score)
+    if pool.size <= 1:
+        return pool[:k]
+
+    profiles = features.profile_matrix()[pool]
+    interests = features.interest_matrix[pool]
+    interest_sizes = features.interest_sizes[pool]
+    relevance = scores[pool].astype(np.float32)
+    max_similarity = np.zeros(pool.size, dtype=np.float32)
+    available = np.ones(pool.size, dtype=bool)
+
+    order = []
+    for _ in range(min(k, pool.size)):
+        mmr = np.where(available, (1.0 - diversity) * relevance - diversity * max_similarity, -np.inf)
+        best = int(np.argmax(mmr))  # 동점이면 점수가 높은(풀 앞쪽) 후보
+        order.append(best)
+        available[best] = False
+
+        similarity = np.clip(profiles @ profiles[best], 0.0, 1.0)
+        if interest_sizes[best] > 0:
+            similarity = (similarity + bitset_jaccard(interests[best], interests, interest_sizes)) / 2
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+    return pool[np.asarray(order, dtype=np.intp)]
@@ -1,14 +1,14 @@
 """
 매칭 서비스
 """
-import math
+import uuid
 import numpy as np
 from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, func, not_
+from sqlalchemy import select, and_, or_, func
 
 # 모델 import를 지연 로딩으로 처리 (동적 import)
 from app.schemas.matching import (
@@ -17,9 +17,26 @@ from app.schemas.matching import (
     CompatibilityBreakdown,
     MatchingProfile,
     MatchingAnalytics,
-    MatchingFilters
+    MatchingFilters,
+    MatchExplanation,
 )
+from app.config.settings import get_settings
+from app.services.exclusion_index import exclusion_mask
+from app.services.feature_snapshot import feature_store
+from app.services.geo_index import bounding_box, haversine_km, user_geo_index
+from app.services.interest_index import bitset_jaccard, popcount_rows, user_interest_bitset
+from app.services.match_explanation import (
+    compatibility_cache,
+    explanation_cache,
+    pair_version,
+    profile_versions,
+)
+from app.services.match_precompute import load_top_k_list
+from app.services.matching_scoring import BatchCompatibilityScorer, select_diverse_top_k
+from app.services.vector_index import user_vector_index
+from app.utils.vector_codec import has_values
 
+settings = get_settings()
 logger = structlog.get_logger()
 
 
@@ -54,6 +71,13 @@ class MatchingService:
             "ISTJ": ["ESFP", "ESTP", "ESTJ", "ISFJ"],
             "ISTP": ["ESFJ", "ESTJ", "ESTP", "ISFP"]
         }
+        
+        # 후보 전체를 한 번에 계산하는 배치 점수 계산기 (쌍별 계산과 같은 규칙)
+        self.batch_scorer = BatchCompatibilityScorer(
+            self.mbti_compatibility_matrix,
+            self.default_weights,
+            minhash_permutations=settings.INTEREST_MINHASH_PERMUTATIONS,
+        )
     
     async def find_matching_candidates(
         self,
@@ -62,12 +86,16 @@ class MatchingService:
         limit: int = 10,
         min_compatibility: float = 0.5,
         filters: Optional[MatchingFilters] = None,
+        mutual: bool = False,
     ) -> List[MatchingCandidate]:
         """
         매칭 후보 검색
+        
+        mutual=True 면 후보가 요청자를 평가한 점수(후보의 가중치/선호 나이)도 함께 계산해
+        두 방향의 조화 평균으로 순위를 매긴다.
         """
         try:
-            logger.info("finding_matching_candidates", user_id=user_id, limit=limit)
+            logger.info("finding_matching_candidates", user_id=user_id, limit=limit, mutual=mutual)
             
             # 1. 사용자 정보 및 벡터 조회
             user_data = await self._get_user_matching_data(user_id, db)
@@ -76,40 +104,61 @@ class MatchingService:
                 return []
             
             # 2. 후보자 목록 조회 (필터링 적용)
-            candidates = await self._get_candidate_users(user_id, filters, db)
-            
-            # 3. 각 후보자와의 호환성 계산
-            compatibility_scores = []
-            for candidate in candidates:
-                candidate_data = await self._get_user_matching_data(candidate.id, db)
-                if not candidate_data:
-                    continue
-                
-                compatibility = await self._calculate_compatibility_score(
-                    user_data, candidate_data
-                )
-                
-                if compatibility >= min_compatibility:
-                    compatibility_scores.append({
-                        "user": candidate,
-                        "user_data": candidate_data,
-                        "compatibility": compatibility
-                    })
+            requester_vector = user_data["vector"].combined_vector if user_data["vector"] else None
+            candidates = await self._get_candidate_users(
+                user_id,
+                filters,
+                db,
+                requester_vector,
+                origin=self._coordinates(user_data["user"]),
+                radius_km=self._search_radius(user_data, filters),
+            )
             
-            # 4. 호환성 점수로 정렬
-            compatibility_scores.sort(key=lambda x: x["compatibility"], reverse=True)
+            # 3. 후보 특성 행렬 (특성 스냅샷에 있으면 mmap 에서, 없으면 후보 수와 무관한 고정 쿼리 수로 일괄 조회)
+            candidates_by_id = {str(candidate.id): candidate for candidate in candidates}
+            candidate_ids, candidate_features = await feature_store.features(
+                db,
+                list(candidates_by_id),
+                self._get_users_matching_data,
+                self.batch_scorer.minhasher,
+                users=candidates,
+            )
+            scored_candidates = [candidates_by_id[candidate_id] for candidate_id in candidate_ids]
+            
+            # 4. 후보 전체 호환성 일괄 계산 (NumPy 벡터화)
+            score = self.batch_scorer.score_mutual_features if mutual else self.batch_scorer.score_features
+            scores = score(user_data, self.batch_scorer.features([user_data]), candidate_features)["overall"]
+            
+            # 차단/제외 사용자 마스크 (요청자 비트맵 + 요청 필터)
+            excluded = await exclusion_mask(
+                db,
+                user_id,
+                candidate_ids,
+                filters.exclude_users if filters else None,
+            )
+            scores[excluded] = -np.inf
+            
+            # 5. 최소 호환성 이상 중 상위 limit 명 선택 (diversity_factor 가 있으면 MMR 재정렬)
+            top_indices = select_diverse_top_k(
+                scores,
+                candidate_features,
+                limit,
+                self.batch_scorer.diversity_for(user_data),
+                min_compatibility,
+            )
             
-            # 5. 매칭 후보 객체 생성
+            # 6. 매칭 후보 객체 생성
             matching_candidates = []
-            for i, item in enumerate(compatibility_scores[:limit]):
-                candidate = await self._create_matching_candidate(
-                    item["user"], 
-                    item["user_data"], 
-                    item["compatibility"],
-                    i + 1,
+            for rank, index in enumerate(top_indices, start=1):
+                candidate = scored_candidates[index]
+                matching_candidate = await self._create_matching_candidate(
+                    candidate,
+                    {"user": candidate},
+                    float(scores[index]),
+                    rank,
                     user_data
                 )
-                matching_candidates.append(candidate)
+                matching_candidates.append(matching_candidate)
             
             logger.info(
                 "matching_candidates_found",
@@ -123,67 +172,219 @@ class MatchingService:
             logger.error("find_matching_candidates_failed", user_id=user_id, error=str(e))
             return []
     
+    async def get_match_candidates(
+        self,
+        user_id: str,
+        db: AsyncSession,
+        limit: int = 10,
+        min_compatibility: float = 0.5,
+        filters: Optional[MatchingFilters] = None,
+        mutual: bool = False,
+    ) -> Tuple[List[MatchingCandidate], str]:
+        """
+        매칭 후보 조회 (후보 목록, 출처)
+        
+        필터가 없으면 야간 배치로 저장된 목록을 먼저 사용하고,
+        목록이 없거나 오래된 경우(신규 사용자 등) 즉시 계산한다.
+        저장된 목록은 요청자 방향 점수이므로 상호 점수 요청은 항상 즉시 계산한다.
+        """
+        if not filters and not mutual:
+            precomputed = await load_top_k_list(
+                db, user_id, max_age=timedelta(hours=settings.MATCH_PRECOMPUTE_MAX_AGE_HOURS)
+            )
+            precomputed = [(candidate_id, score) for candidate_id, score in precomputed if score >= min_compatibility]
+            if precomputed:
+                candidates = await self._candidates_from_precomputed(user_id, precomputed, limit, db)
+                if candidates:
+                    return candidates, "precomputed"
+        
+        candidates = await self.find_matching_candidates(user_id, db, limit, min_compatibility, filters, mutual)
+        return candidates, "on_demand"
+    
+    async def _candidates_from_precomputed(
+        self, user_id: str, precomputed: List[Tuple[uuid.UUID, float]], limit: int, db: AsyncSession
+    ) -> List[MatchingCandidate]:
+        """저장된 (후보 ID, 점수) 목록으로 후보 객체 생성 (현재 매칭 불가/차단된 사용자는 제외)"""
+        try:
+            from app.models.user import MatchingPreference, User
+        except ImportError:
+            logger.error("User model not available")
+            return []
+        
+        excluded = await exclusion_mask(db, user_id, [candidate_id for candidate_id, _ in precomputed])
+        precomputed = [entry for entry, blocked in zip(precomputed, excluded) if not blocked]
+        
+        requester_id = uuid.UUID(str(user_id))
+        result = await db.execute(
+            select(User).where(User.id.in_([requester_id] + [candidate_id for candidate_id, _ in precomputed]))
+        )
+        users = {user.id: user for user in result.scalars().all()}
+        requester_data = {"user": users.get(requester_id), "preference": await db.get(MatchingPreference, requester_id)}
+        
+        # 선호 반경 밖의 후보 제외 (사전 계산 목록은 위치를 고려하지 않음)
+        origin = self._coordinates(requester_data["user"])
+        radius_km = self._search_radius(requester_data, None) if origin else None
+        
+        candidates = []
+        for candidate_id, score in precomputed:
+            candidate = users.get(candidate_id)
+            if not candidate or not candidate.is_active or not candidate.matching_enabled:
+                continue
+            if radius_km:
+                destination = self._coordinates(candidate)
+                if not destination or haversine_km(*origin, [destination[0]], [destination[1]])[0] > radius_km:
+                    continue
+            candidates.append(await self._create_matching_candidate(
+                candidate, {"user": candidate}, score, len(candidates) + 1, requester_data
+            ))
+            if len(candidates) >= limit:
+                break
+        return candidates
+    
+    async def explain_match(self, user_id: str, candidate_id: str, db: AsyncSession) -> MatchExplanation:
+        """
+        후보 카드 상세 (매칭 근거, 공통 특성, 보완 특성)
+        
+        후보 목록에서는 계산하지 않고 카드를 눌렀을 때만 계산하며,
+        (요청자, 후보, 두 프로필 버전) 단위로 캐시한다.
+        후보가 없거나 매칭할 수 없는(차단/제외 포함) 사용자면 ValueError.
+        """
+        requester_key, candidate_key = str(user_id), str(candidate_id)
+        versions = await profile_versions(db, [requester_key, candidate_key])
+        if requester_key not in versions or candidate_key not in versions or requester_key == candidate_key:
+            raise ValueError("사용자 데이터를 찾을 수 없습니다")
+        if not versions[candidate_key][1] or (await exclusion_mask(db, requester_key, [candidate_key]))[0]:
+            raise ValueError("매칭할 수 없는 사용자입니다")
+        
+        version = pair_version(versions[requester_key][0], versions[candidate_key][0])
+        cache_key = explanation_cache.key(requester_key, candidate_key, version)
+        cached = await explanation_cache.get(cache_key)
+        if cached is not None:
+            return MatchExplanation(**cached)
+        
+        users_data = await self._get_users_matching_data([requester_key, candidate_key], db)
+        requester_data = users_data.get(requester_key)
+        candidate_data = users_data.get(candidate_key)
+        if not requester_data or not candidate_data:
+            raise ValueError("사용자 데이터를 찾을 수 없습니다")
+        candidate_user = candidate_data["user"]
+        
+        score = float(self.batch_scorer.score(requester_data, [candidate_data])[0])
+        breakdown = await self._calculate_compatibility_breakdown(requester_data, candidate_data)
+        reasons = await self._generate_match_reasons(requester_data, candidate_data, score)
+        shared_traits, complementary_traits = await self._analyze_trait_compatibility(
+            requester_data, candidate_data
+        )
+        
+        explanation = MatchExplanation(
+            user_uid=candidate_user.firebase_uid,
+            compatibility_score=round(score, 3),
+            compatibility_level=self._determine_compatibility_level(score),
+            breakdown=breakdown.dict(),
+            match_reasons=reasons,
+            shared_traits=shared_traits,
+            complementary_traits=complementary_traits,
+            common_interests=self._common_interests(requester_data["user"], candidate_user),
+            profile_version=version,
+            generated_at=datetime.now(timezone.utc).isoformat(),
+        )
+        await explanation_cache.put(cache_key, explanation.dict())
+        return explanation
+    
     async def calculate_compatibility(
         self, user_id_1: str, user_id_2: str, db: AsyncSession
     ) -> CompatibilityResponse:
         """
         두 사용자 간 호환성 점수 계산
+        
+        (순서 없는 쌍, 두 프로필 버전) 단위로 캐시한다. 전체 점수는 user_id_1 의 선호도 가중치를
+        쓰므로 캐시 미스 때 양방향 결과를 함께 계산해 A→B, B→A 요청이 같은 항목을 쓴다.
+        상대가 없거나 매칭할 수 없는(차단/제외 포함) 사용자면 캐시 조회 전에 ValueError.
         """
         try:
-            # 1. 두 사용자 데이터 조회
-            user1_data = await self._get_user_matching_data(user_id_1, db)
-            user2_data = await self._get_user_matching_data(user_id_2, db)
+            first, second = str(user_id_1), str(user_id_2)
             
-            if not user1_data or not user2_data:
+            # 1. 프로필 버전 조회 (캐시 키) + 매칭 가능 여부 확인 (explain_match 와 같은 기준)
+            versions = await profile_versions(db, [first, second])
+            if first not in versions or second not in versions:
                 raise ValueError("사용자 데이터를 찾을 수 없습니다")
+            if not versions[second][1] or (await exclusion_mask(db, first, [second]))[0]:
+                raise ValueError("매칭할 수 없는 사용자입니다")
+            low, high = sorted((first, second))
+            cache_key = compatibility_cache.key(low, high, pair_version(versions[low][0], versions[high][0]))
+            
+            entry = await compatibility_cache.get(cache_key)
+            if entry is None:
+                # 2. 두 사용자 데이터 일괄 조회 후 양방향 계산
+                users_data = await self._get_users_matching_data([first, second], db)
+                if first not in users_data or second not in users_data:
+                    raise ValueError("사용자 데이터를 찾을 수 없습니다")
+                entry = {
+                    low: (await self._compatibility_report(users_data[low], users_data[high])).dict(),
+                    high: (await self._compatibility_report(users_data[high], users_data[low])).dict(),
+                }
+                await compatibility_cache.put(cache_key, entry)
             
-            # 2. 호환성 점수 계산
-            overall_compatibility = await self._calculate_compatibility_score(
-                user1_data, user2_data
-            )
-            
-            # 3. 세부 호환성 분석
-            breakdown = await self._calculate_compatibility_breakdown(
-                user1_data, user2_data
-            )
-            
-            # 4. 호환성 수준 결정
-            compatibility_level = self._determine_compatibility_level(overall_compatibility)
-            
-            # 5. 관계 강점 및 주의사항 분석
-            strengths, challenges = await self._analyze_relationship_dynamics(
-                user1_data, user2_data, breakdown
-            )
-            
-            # 6. 추천사항 생성
-            recommendations = await self._generate_relationship_recommendations(
-                breakdown, strengths, challenges
-            )
-            
-            # 7. 신뢰도 계산
-            confidence_level = self._calculate_compatibility_confidence(
-                user1_data, user2_data
-            )
-            
-            return CompatibilityResponse(
-                user_id_1=user_id_1,
-                user_id_2=user_id_2,
-                overall_compatibility=round(overall_compatibility, 3),
-                compatibility_level=compatibility_level,
-                breakdown=breakdown,
-                strengths=strengths,
-                potential_challenges=challenges,
-                recommendations=recommendations,
-                calculated_at=datetime.utcnow(),
-                confidence_level=confidence_level
-            )
+            return CompatibilityResponse(**entry[first])
             
         except Exception as e:
             logger.error("calculate_compatibility_failed", error=str(e))
             raise
     
+    async def _compatibility_report(self, user1_data: Dict, user2_data: Dict) -> CompatibilityResponse:
+        """user1 기준 호환성 결과 (점수, 세부 점수, 관계 역학, 추천, 신뢰도)"""
+        # 호환성 점수 계산
+        overall_compatibility = await self._calculate_compatibility_score(
+            user1_data, user2_data
+        )
+        
+        # 세부 호환성 분석
+        breakdown = await self._calculate_compatibility_breakdown(
+            user1_data, user2_data
+        )
+        
+        # 관계 강점 및 주의사항 분석
+        strengths, challenges = await self._analyze_relationship_dynamics(
+            user1_data, user2_data, breakdown
+        )
+        shared_traits, complementary_traits = await self._analyze_trait_compatibility(
+            user1_data, user2_data
+        )
+        
+        # 추천사항 생성
+        recommendations = await self._generate_relationship_recommendations(
+            breakdown, strengths, challenges
+        )
+        
+        return CompatibilityResponse(
+            user1_uid=user1_data["user"].firebase_uid,
+            user2_uid=user2_data["user"].firebase_uid,
+            overall_score=round(overall_compatibility, 3),
+            compatibility_level=self._determine_compatibility_level(overall_compatibility),
+            compatibility_breakdown=breakdown.dict(),
+            strengths=strengths,
+            shared_traits=shared_traits,
+            complementary_traits=complementary_traits,
+            potential_challenges=challenges,
+            recommendations=recommendations,
+            confidence_level=round(self._calculate_compatibility_confidence(user1_data, user2_data), 3),
+            calculated_at=datetime.now(timezone.utc).isoformat(),
+        )
+    
     async def _get_user_matching_data(self, user_id: str, db: AsyncSession) -> Optional[Dict]:
         """사용자 매칭 데이터 조회"""
+        users_data = await self._get_users_matching_data([user_id], db)
+        return users_data.get(str(user_id))
+    
+    async def _get_users_matching_data(
+        self, user_ids: List[str], db: AsyncSession, users: Optional[List] = None
+    ) -> Dict[str, Dict]:
+        """
+        여러 사용자의 매칭 데이터 일괄 조회 (사용자 수와 무관하게 테이블당 IN 쿼리 1회)
+        
+        users 에 이미 조회한 User 객체를 넘기면 users 테이블 조회를 생략한다.
+        반환: {str(user_id): {"user", "vector", "personality", "emotion", "preference"}}
+        """
         try:
             # 늤이나믹 import
             try:
@@ -191,58 +392,75 @@ class MatchingService:
                 from app.models.analysis import UserPersonalitySummary, UserEmotionPattern
             except ImportError as e:
                 logger.error(f"Model import failed: {e}")
-                return None
-                
-            # 기본 사용자 정보
-            user_query = select(User).where(User.id == user_id)
-            user_result = await db.execute(user_query)
-            user = user_result.scalar_one_or_none()
-            
-            if not user:
-                return None
-            
-            # 사용자 벡터
-            vector_query = select(UserVector).where(UserVector.user_id == user_id)
-            vector_result = await db.execute(vector_query)
-            user_vector = vector_result.scalar_one_or_none()
+                return {}
+            
+            # 중복 제거 후 UUID 로 정규화 (잘못된 ID는 제외)
+            ids = {}
+            for user_id in user_ids:
+                try:
+                    key = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+                except ValueError:
+                    continue
+                ids[key] = None
+            ids = list(ids)
             
-            # 성격 요약
-            personality_query = select(UserPersonalitySummary).where(
-                UserPersonalitySummary.user_id == user_id
-            )
-            personality_result = await db.execute(personality_query)
-            personality_summary = personality_result.scalar_one_or_none()
+            if not ids:
+                return {}
             
-            # 감정 패턴
-            emotion_query = select(UserEmotionPattern).where(
-                UserEmotionPattern.user_id == user_id
-            )
-            emotion_result = await db.execute(emotion_query)
-            emotion_pattern = emotion_result.scalar_one_or_none()
-            
-            # 매칭 선호도
-            preference_query = select(MatchingPreference).where(
-                MatchingPreference.user_id == user_id
-            )
-            preference_result = await db.execute(preference_query)
-            matching_preference = preference_result.scalar_one_or_none()
+            # 기본 사용자 정보
+            id_set = set(ids)
+            users_by_id = {user.id: user for user in (users or []) if user.id in id_set}
+            missing_ids = [user_id for user_id in ids if user_id not in users_by_id]
+            if missing_ids:
+                user_result = await db.execute(select(User).where(User.id.in_(missing_ids)))
+                users_by_id.update((user.id, user) for user in user_result.scalars())
+            
+            if not users_by_id:
+                return {}
+            found_ids = list(users_by_id)
+            
+            # 사용자 벡터, 성격 요약, 감정 패턴, 매칭 선호도 (테이블당 1회)
+            related = {}
+            for key, model in (
+                ("vector", UserVector),
+                ("personality", UserPersonalitySummary),
+                ("emotion", UserEmotionPattern),
+                ("preference", MatchingPreference),
+            ):
+                result = await db.execute(select(model).where(model.user_id.in_(found_ids)))
+                related[key] = {row.user_id: row for row in result.scalars()}
             
             return {
-                "user": user,
-                "vector": user_vector,
-                "personality": personality_summary,
-                "emotion": emotion_pattern,
-                "preference": matching_preference
+                str(user_id): {
+                    "user": user,
+                    "vector": related["vector"].get(user_id),
+                    "personality": related["personality"].get(user_id),
+                    "emotion": related["emotion"].get(user_id),
+                    "preference": related["preference"].get(user_id)
+                }
+                for user_id, user in users_by_id.items()
             }
             
         except Exception as e:
-            logger.error("get_user_matching_data_failed", user_id=user_id, error=str(e))
-            return None
+            logger.error("get_users_matching_data_failed", count=len(user_ids), error=str(e))
+            return {}
     
     async def _get_candidate_users(
-        self, user_id: str, filters: Optional[MatchingFilters], db: AsyncSession
+        self,
+        user_id: str,
+        filters: Optional[MatchingFilters],
+        db: AsyncSession,
+        query_vector: Optional[List[float]] = None,
+        origin: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
     ) -> List:
-        """후보자 목록 조회"""
+        """
+        후보자 목록 조회
+        
+        반경이 있으면 반경 내 가까운 순으로, 그렇지 않고 요청자의 combined_vector 와
+        벡터 인덱스가 있으면 벡터가 가까운 MATCHING_CANDIDATE_POOL 명을,
+        둘 다 아니면 최근 활동 순으로 조회한다.
+        """
         try:
             # 늤이나믹 import
             try:
@@ -251,32 +469,36 @@ class MatchingService:
                 logger.error("User model not available")
                 return []
                 
-            query = select(User).where(
-                and_(
-                    User.id != user_id,  # 본인 제외
-                    User.is_active == True,
-                    User.matching_enabled == True
-                )
-            )
-            
-            # 필터 적용
-            if filters:
-                if filters.age_range:
-                    min_age, max_age = filters.age_range
-                    query = query.where(
-                        and_(
-                            User.age >= min_age,
-                            User.age <= max_age
-                        )
+            query = self._candidate_query(User, user_id, filters)
+            
+            # 반경 필터 (위치 인덱스, 비어 있으면 위/경도 범위 조회 후 정확한 거리로 거름)
+            if origin and radius_km:
+                nearby_ids = self._nearby_user_ids(user_id, filters, origin, radius_km)
+                if nearby_ids is None:
+                    min_lat, max_lat, min_lon, max_lon = bounding_box(*origin, radius_km)
+                    result = await db.execute(query.where(and_(
+                        User.latitude.between(min_lat, max_lat),
+                        User.longitude.between(min_lon, max_lon),
+                    )))
+                    users = result.scalars().all()
+                    distances = haversine_km(
+                        *origin, [user.latitude for user in users], [user.longitude for user in users]
                     )
+                    order = [i for i in np.argsort(distances, kind="stable") if distances[i] <= radius_km]
+                    return [users[i] for i in order[:settings.MATCHING_CANDIDATE_POOL]]
                 
-                if filters.location:
-                    query = query.where(User.location.ilike(f"%{filters.location}%"))
-                
-                if filters.exclude_users:
-                    query = query.where(not_(User.id.in_(filters.exclude_users)))
-            
-            # 최근 활동 우선
+                result = await db.execute(query.where(User.id.in_(nearby_ids)))
+                rank = {user_id: position for position, user_id in enumerate(nearby_ids)}
+                return sorted(result.scalars().all(), key=lambda user: rank[user.id])
+            
+            # 벡터 인덱스 근접 후보 (인덱스 순위 유지)
+            nearest_ids = self._nearest_user_ids(user_id, filters, query_vector)
+            if nearest_ids:
+                result = await db.execute(query.where(User.id.in_(nearest_ids)))
+                rank = {user_id: position for position, user_id in enumerate(nearest_ids)}
+                return sorted(result.scalars().all(), key=lambda user: rank[user.id])
+            
+            # 최근 활동 우선 (ix_users_matchable_last_active 역순 스캔)
             query = query.order_by(User.last_active.desc()).limit(100)
             
             result = await db.execute(query)
@@ -286,6 +508,99 @@ class MatchingService:
             logger.error("get_candidate_users_failed", error=str(e))
             return []
     
+    @staticmethod
+    def _candidate_query(User, user_id: str, filters: Optional[MatchingFilters]):
+        """
+        후보자 기본 조회 (본인 제외, 활성 + 매칭 허용, 요청 필터)
+        
+        활성/매칭 허용 조건은 부분 인덱스 ix_users_matchable_last_active /
+        ix_users_matchable_age 의 WHERE 절과 같은 형태로 유지해야 인덱스를 쓴다.
+        """
+        query = select(User).where(
+            and_(
+                User.id != user_id,  # 본인 제외
+                User.is_active == True,
+                User.matching_enabled == True
+            )
+        )
+        
+        # 필터 적용
+        if filters:
+            if filters.age_range:
+                min_age, max_age = filters.age_range
+                query = query.where(
+                    and_(
+                        User.age >= min_age,
+                        User.age <= max_age
+                    )
+                )
+            
+            if filters.location:
+                # 대소문자 무시 부분 일치 (ILIKE '%...%', 입력의 % / _ 는 문자 그대로)
+                query = query.where(User.location.icontains(filters.location, autoescape=True))
+        
+        return query
+    
+    def _nearby_user_ids(
+        self,
+        user_id: str,
+        filters: Optional[MatchingFilters],
+        origin: Tuple[float, float],
+        radius_km: float,
+    ) -> Optional[List[uuid.UUID]]:
+        """위치 인덱스에서 반경 내 사용자 ID 목록 (가까운 순, 인덱스가 비어 있으면 None)"""
+        if not len(user_geo_index):
+            return None
+        
+        exclude = {str(user_id)}
+        if filters and filters.exclude_users:
+            exclude.update(str(excluded) for excluded in filters.exclude_users)
+        
+        nearby = user_geo_index.within(*origin, radius_km, exclude=exclude)
+        return [uuid.UUID(candidate_id) for candidate_id, _ in nearby[:settings.MATCHING_CANDIDATE_POOL]]
+    
+    @staticmethod
+    def _coordinates(user) -> Optional[Tuple[float, float]]:
+        """사용자 좌표 (없으면 None)"""
+        latitude = getattr(user, "latitude", None)
+        longitude = getattr(user, "longitude", None)
+        if latitude is None or longitude is None:
+            return None
+        return latitude, longitude
+    
+    @staticmethod
+    def _search_radius(user_data: Dict, filters: Optional[MatchingFilters]) -> Optional[float]:
+        """검색 반경(km): 요청 필터 우선, 없으면 선호도의 preferred_location_radius"""
+        if filters and filters.radius_km:
+            return float(filters.radius_km)
+        preference = user_data.get("preference")
+        if preference and preference.preferred_location_radius:
+            return float(preference.preferred_location_radius)
+        return None
+    
+    def _nearest_user_ids(
+        self,
+        user_id: str,
+        filters: Optional[MatchingFilters],
+        query_vector: Optional[List[float]],
+    ) -> List[uuid.UUID]:
+        """벡터 인덱스에서 요청자와 가까운 사용자 ID 목록 (인덱스를 쓸 수 없으면 빈 목록)"""
+        if not has_values(query_vector) or not len(user_vector_index):
+            return []
+        
+        exclude = {str(user_id)}
+        if filters and filters.exclude_users:
+            exclude.update(str(excluded) for excluded in filters.exclude_users)
+        
+        nearest = user_vector_index.search(query_vector, settings.MATCHING_CANDIDATE_POOL, exclude=exclude)
+        nearest_ids = []
+        for candidate_id, _ in nearest:
+            try:
+                nearest_ids.append(uuid.UUID(candidate_id))
+            except ValueError:
+                continue
+        return nearest_ids
+    
     async def _calculate_compatibility_score(
         self, user1_data: Dict, user2_data: Dict
     ) -> float:
@@ -436,7 +751,8 @@ class MatchingService:
             vector1 = user1_data["vector"]
             vector2 = user2_data["vector"]
             
-            if not vector1 or not vector2 or not vector1.lifestyle_vector or not vector2.lifestyle_vector:
+            if not vector1 or not vector2 or not has_values(vector1.lifestyle_vector) \
+                    or not has_values(vector2.lifestyle_vector):
                 return 0.5
             
             # 벡터 간 코사인 유사도 계산
@@ -453,46 +769,37 @@ class MatchingService:
     def _calculate_interest_compatibility(
         self, user1_data: Dict, user2_data: Dict
     ) -> float:
-        """관심사 호환성 계산"""
+        """관심사 호환성 계산 (인터닝된 관심사 비트셋의 Jaccard)"""
         try:
-            user1 = user1_data["user"]
-            user2 = user2_data["user"]
+            interests1 = user_interest_bitset(user1_data["user"])
+            interests2 = user_interest_bitset(user2_data["user"])
             
-            # 사용자 설정에서 관심사 추출 (임시로 빈 리스트 사용)
-            interests1 = user1.settings.get("interests", []) if user1.settings else []
-            interests2 = user2.settings.get("interests", []) if user2.settings else []
-            
-            if not interests1 or not interests2:
+            if not interests1.any() or not interests2.any():
                 return 0.5
             
-            # 공통 관심사 비율 계산
-            common_interests = set(interests1) & set(interests2)
-            total_interests = set(interests1) | set(interests2)
-            
-            if total_interests:
-                jaccard_similarity = len(common_interests) / len(total_interests)
-                return jaccard_similarity
-            else:
-                return 0.5
+            # 공통 관심사 비율 계산 (popcount)
+            candidate = interests2[np.newaxis, :]
+            return float(bitset_jaccard(interests1, candidate, popcount_rows(candidate))[0])
                 
         except Exception as e:
             logger.error("calculate_interest_compatibility_failed", error=str(e))
             return 0.5
     
-    def _calculate_cosine_similarity(self, vector1: List[float], vector2: List[float]) -> float:
-        """코사인 유사도 계산"""
+    def _calculate_cosine_similarity(self, vector1, vector2) -> float:
+        """코사인 유사도 계산 (목록/float32 배열 공통)"""
         try:
-            if not vector1 or not vector2 or len(vector1) != len(vector2):
+            if not has_values(vector1) or not has_values(vector2) or len(vector1) != len(vector2):
                 return 0.5
             
-            dot_product = sum(a * b for a, b in zip(vector1, vector2))
-            norm1 = math.sqrt(sum(a * a for a in vector1))
-            norm2 = math.sqrt(sum(b * b for b in vector2))
+            vector1 = np.asarray(vector1, dtype=np.float64)
+            vector2 = np.asarray(vector2, dtype=np.float64)
+            norm1 = float(np.linalg.norm(vector1))
+            norm2 = float(np.linalg.norm(vector2))
             
             if norm1 == 0 or norm2 == 0:
                 return 0.5
             
-            return dot_product / (norm1 * norm2)
+            return float(vector1 @ vector2) / (norm1 * norm2)
             
         except Exception:
             return 0.5
@@ -667,57 +974,39 @@ class MatchingService:
         rank: int,
         requester_data: Dict
     ) -> MatchingCandidate:
-        """매칭 후보 객체 생성"""
-        try:
-            # 기본 정보 (익명화)
-            age_range = f"{candidate_user.age//10*10}대" if candidate_user.age else None
-            location = candidate_user.location.split()[0] if candidate_user.location else None
-            
-            # 성격 정보
-            personality_type = None
-            personality_traits = []
-            if candidate_data["personality"]:
-                personality_type = candidate_data["personality"].overall_mbti
-                personality_traits = candidate_data["personality"].personality_traits or []
-            
-            # 호환성 수준
-            compatibility_level = self._determine_compatibility_level(compatibility_score)
-            
-            # 매칭 근거 생성
-            match_reasons = await self._generate_match_reasons(
-                requester_data, candidate_data, compatibility_score
-            )
-            
-            # 공통점과 상호 보완적 특성
-            common_traits, complementary_traits = await self._analyze_trait_compatibility(
-                requester_data, candidate_data
-            )
-            
-            return MatchingCandidate(
-                user_id=str(candidate_user.id),
-                compatibility_score=round(compatibility_score, 3),
-                compatibility_level=compatibility_level,
-                age_range=age_range,
-                location=location,
-                interests=[],  # TODO: 관심사 추출
-                personality_type=personality_type,
-                personality_traits=personality_traits[:3],
-                match_reasons=match_reasons,
-                common_traits=common_traits,
-                complementary_traits=complementary_traits,
-                last_active=candidate_user.last_active,
-                match_rank=rank
-            )
-            
-        except Exception as e:
-            logger.error("create_matching_candidate_failed", error=str(e))
-            # 기본 객체 반환
-            return MatchingCandidate(
-                user_id=str(candidate_user.id),
-                compatibility_score=compatibility_score,
-                compatibility_level="fair",
-                match_rank=rank
-            )
+        """매칭 후보 카드 생성 (매칭 근거/특성 분석은 카드를 눌렀을 때 explain_match 에서)"""
+        # 기본 정보 (익명화)
+        age_range = f"{candidate_user.age//10*10}대" if candidate_user.age else None
+        
+        # 공통 관심사
+        requester_user = requester_data.get("user")
+        common_interests = self._common_interests(requester_user, candidate_user)
+        
+        # 거리 (두 사용자 모두 좌표가 있을 때만)
+        distance = None
+        origin = self._coordinates(requester_user)
+        destination = self._coordinates(candidate_user)
+        if origin and destination:
+            distance_km = float(haversine_km(*origin, [destination[0]], [destination[1]])[0])
+            distance = f"{max(1, round(distance_km))}km"
+        
+        return MatchingCandidate(
+            user_uid=candidate_user.firebase_uid,
+            name=candidate_user.name or "익명 사용자",
+            compatibility_score=round(compatibility_score, 3),
+            common_interests=common_interests,
+            personality_match=self._determine_compatibility_level(compatibility_score),
+            age_range=age_range,
+            distance=distance,
+            last_active=candidate_user.last_active.isoformat() if candidate_user.last_active else None,
+        )
+    
+    @staticmethod
+    def _common_interests(requester_user, candidate_user) -> List[str]:
+        """후보 관심사 중 요청자와 겹치는 것 (후보 순서 유지)"""
+        requester_interests = set((requester_user.settings or {}).get("interests", []) or []) if requester_user else set()
+        candidate_interests = (candidate_user.settings or {}).get("interests", []) or []
+        return [interest for interest in candidate_interests if interest in requester_interests]
     
     async def _generate_match_reasons(
         self, user1_data: Dict, user2_data: Dict, compatibility_score: float
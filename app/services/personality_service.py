@@ -2,17 +2,20 @@
 성격 분석 서비스
 """
 import json
+import math
+import uuid
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 
 import google.generativeai as genai
 import structlog
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, literal_column
 
 from app.config.settings import get_settings
 # 모델 import를 지연 로딩으로 처리 (동적 import)
 from app.schemas.analysis import PersonalityAnalysis, MBTIIndicators, Big5Traits
+from app.utils.running_stats import RunningStats, decay_for_half_life
 
 settings = get_settings()
 logger = structlog.get_logger()
@@ -20,6 +23,11 @@ logger = structlog.get_logger()
 # Gemini API 설정
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
+MBTI_DIMENSIONS = ("E", "I", "S", "N", "T", "F", "J", "P")
+BIG5_TRAITS = ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")
+# 종합 성격(매칭에 쓰는 overall_mbti 등)을 공개하는 최소 분석 수
+MIN_SUMMARY_ANALYSES = 3
+
 
 class PersonalityAnalysisService:
     """성격 분석 서비스 클래스"""
@@ -61,23 +69,21 @@ class PersonalityAnalysisService:
             # 1. 현재 텍스트 분석
             current_analysis = await self._analyze_single_text(content)
             
-            # 2. 사용자의 이전 분석 결과 조회 (일관성 확인용)
-            historical_analyses = await self._get_user_historical_analyses(user_id, db)
+            # 2. 사용자의 누적 성격 통계 조회 (이력 재조회 없이 요약 1행)
+            summary = await self._get_personality_summary(user_id, db)
+            stats = RunningStats.from_dict(summary.running_stats if summary else None)
+            analysis_count = (summary.analysis_count or 0) if summary else 0
             
-            # 3. 이전 분석과 비교하여 일관성 점수 계산
-            consistency_score = self._calculate_personality_consistency(
-                current_analysis, historical_analyses
-            )
+            # 3. 누적 통계와 비교하여 일관성 점수 계산
+            consistency_score = self._calculate_personality_consistency(current_analysis, stats)
             
             # 4. 신뢰도 점수 계산
             confidence_level = self._calculate_confidence_level(
-                content, historical_analyses, consistency_score
+                content, analysis_count, consistency_score
             )
             
             # 5. 성격 요약 생성
-            personality_summary = await self._generate_personality_summary(
-                current_analysis, historical_analyses
-            )
+            personality_summary = await self._generate_personality_summary(current_analysis)
             
             # 6. MBTI 유형 예측
             predicted_mbti = self._predict_mbti_type(current_analysis["mbti_indicators"])
@@ -175,19 +181,19 @@ class PersonalityAnalysisService:
                 
             # UUID 형식 검증
             try:
-                import uuid
                 uuid.UUID(user_id)
             except ValueError:
                 # 잘못된 UUID 형식이면 빈 배열 반환
                 logger.warning("invalid_user_id_format", user_id=user_id)
                 return []
             
-            # 최근 10개 분석 결과 조회
+            # 최근 10개 분석 결과 조회 (ix_diary_analysis_user_id_processed_at_completed)
+            # 상태는 바인딩 파라미터가 아닌 리터럴이어야 준비된 문장의 일반 계획에서도 부분 인덱스 조건과 일치
             query = select(DiaryAnalysis).where(
                 and_(
                     DiaryAnalysis.user_id == user_id,
                     DiaryAnalysis.personality.isnot(None),
-                    DiaryAnalysis.status == "completed"
+                    DiaryAnalysis.status == literal_column("'completed'")
                 )
             ).order_by(DiaryAnalysis.processed_at.desc()).limit(limit)
             
@@ -211,47 +217,31 @@ class PersonalityAnalysisService:
             return []
     
     def _calculate_personality_consistency(
-        self, current_analysis: Dict, historical_analyses: List[Dict]
+        self, current_analysis: Dict, stats: RunningStats
     ) -> float:
-        """성격 분석 일관성 점수 계산"""
-        if not historical_analyses:
+        """
+        성격 분석 일관성 점수 계산
+        
+        차원별로 현재 점수와 이전 분석들의 최근 가중 RMS 거리를 누적 평균/분산에서 구해
+        1 에서 뺀 값의 평균 (MBTI 와 Big5 를 절반씩).
+        """
+        if stats.weight <= 0:
             return 0.5  # 기본값
         
         try:
-            consistency_scores = []
             current_mbti = current_analysis["mbti_indicators"]
             current_big5 = current_analysis["big5_traits"]
             
-            for historical in historical_analyses:
-                # MBTI 일관성 계산
-                mbti_consistency = 0
-                for dimension in ["E", "I", "S", "N", "T", "F", "J", "P"]:
-                    current_score = current_mbti.get(dimension, 0.5)
-                    historical_score = historical["mbti_indicators"].get(dimension, 0.5)
-                    mbti_consistency += 1 - abs(current_score - historical_score)
-                
-                mbti_consistency /= 8  # 평균
-                
-                # Big5 일관성 계산
-                big5_consistency = 0
-                for trait in ["openness", "conscientiousness", "extraversion", 
-                             "agreeableness", "neuroticism"]:
-                    current_score = current_big5.get(trait, 0.5)
-                    historical_score = historical["big5_traits"].get(trait, 0.5)
-                    big5_consistency += 1 - abs(current_score - historical_score)
-                
-                big5_consistency /= 5  # 평균
-                
-                # 전체 일관성
-                total_consistency = (mbti_consistency + big5_consistency) / 2
-                consistency_scores.append(total_consistency)
-            
-            # 가중 평균 (최근 분석에 더 높은 가중치)
-            weights = [1.0 / (i + 1) for i in range(len(consistency_scores))]
-            weighted_avg = sum(score * weight for score, weight in 
-                              zip(consistency_scores, weights)) / sum(weights)
+            mbti_consistency = sum(
+                1 - stats.rms_distance(dimension, current_mbti.get(dimension, 0.5))
+                for dimension in MBTI_DIMENSIONS
+            ) / len(MBTI_DIMENSIONS)
+            big5_consistency = sum(
+                1 - stats.rms_distance(trait, current_big5.get(trait, 0.5))
+                for trait in BIG5_TRAITS
+            ) / len(BIG5_TRAITS)
             
-            return round(weighted_avg, 3)
+            return round((mbti_consistency + big5_consistency) / 2, 3)
             
         except Exception as e:
             logger.error("consistency_calculation_failed", error=str(e))
@@ -260,7 +250,7 @@ class PersonalityAnalysisService:
     def _calculate_confidence_level(
         self, 
         content: str, 
-        historical_analyses: List[Dict], 
+        analysis_count: int, 
         consistency_score: float
     ) -> float:
         """신뢰도 점수 계산"""
@@ -269,7 +259,6 @@ class PersonalityAnalysisService:
             length_confidence = min(1.0, len(content) / 1000)  # 1000자 기준
             
             # 2. 분석 횟수 기반 신뢰도
-            analysis_count = len(historical_analyses)
             count_confidence = min(1.0, analysis_count / 10)  # 10회 기준
             
             # 3. 일관성 기반 신뢰도
@@ -287,9 +276,7 @@ class PersonalityAnalysisService:
         except Exception:
             return 0.6  # 기본값
     
-    async def _generate_personality_summary(
-        self, current_analysis: Dict, historical_analyses: List[Dict]
-    ) -> List[str]:
+    async def _generate_personality_summary(self, current_analysis: Dict) -> List[str]:
         """성격 요약 생성"""
         try:
             # MBTI 기반 주요 특성 추출
@@ -472,109 +459,126 @@ class PersonalityAnalysisService:
             logger.error("get_user_personality_failed", error=str(e))
             return {"error": "성격 분석 조회 중 오류가 발생했습니다."}
     
-    async def update_user_personality_summary(
-        self, user_id: str, db: AsyncSession
-    ):
-        """사용자 성격 요약 업데이트 (백그라운드 작업)"""
+    async def _get_personality_summary(self, user_id: str, db: AsyncSession, for_update: bool = False):
+        """사용자 성격 요약 행 (없거나 조회 실패 시 None, for_update 면 커밋까지 행 잠금 후 최신 값으로)"""
         try:
             # 늤이나믹 import
             try:
                 from app.models.analysis import UserPersonalitySummary
             except ImportError:
                 logger.error("UserPersonalitySummary model not available")
-                return
-                
-            # 최근 분석 결과들 조회 (최소 3개 이상)
-            historical_analyses = await self._get_user_historical_analyses(
-                user_id, db, limit=20
+                return None
+            
+            return await db.get(
+                UserPersonalitySummary, uuid.UUID(str(user_id)),
+                with_for_update=for_update, populate_existing=for_update,
             )
             
-            if len(historical_analyses) < 3:
-                logger.info("insufficient_data_for_personality_summary", 
-                           user_id=user_id, count=len(historical_analyses))
+        except Exception as e:
+            logger.error("get_personality_summary_failed", user_id=user_id, error=str(e))
+            return None
+    
+    @staticmethod
+    def _trait_values(analysis) -> Dict[str, float]:
+        """분석 결과(dict 또는 PersonalityAnalysis) → MBTI 지표 + Big5 점수"""
+        if hasattr(analysis, "dict"):
+            analysis = analysis.dict()
+        values = {dimension: analysis["mbti_indicators"].get(dimension, 0.5) for dimension in MBTI_DIMENSIONS}
+        values.update({trait: analysis["big5_traits"].get(trait, 0.5) for trait in BIG5_TRAITS})
+        return values
+    
+    async def update_user_personality_summary(
+        self, user_id: str, db: AsyncSession, analysis=None
+    ):
+        """
+        사용자 성격 요약 업데이트 (백그라운드 작업)
+        
+        analysis(이미 저장된 새 분석 결과)를 누적 평균/분산에 O(1) 로 반영한다.
+        누적 통계가 아직 없거나 analysis 없이 호출하면 최근 이력으로 한 번 재구성한다.
+        누적 통계는 읽고-고쳐-쓰므로 요약 행을 잠근 채 읽어 동시 분석의 갱신이 유실되지 않게 한다.
+        """
+        try:
+            # 늤이나믹 import
+            try:
+                from app.models.analysis import UserPersonalitySummary
+            except ImportError:
+                logger.error("UserPersonalitySummary model not available")
                 return
             
-            # 종합 성격 분석 계산
-            overall_analysis = self._calculate_overall_personality(historical_analyses)
+            summary = await self._get_personality_summary(user_id, db, for_update=True)
+            stats = RunningStats.from_dict(summary.running_stats if summary else None)
+            decay = decay_for_half_life(settings.PERSONALITY_HALF_LIFE_ANALYSES)
             
-            # 데이터베이스 업데이트
-            query = select(UserPersonalitySummary).where(
-                UserPersonalitySummary.user_id == user_id
-            )
-            result = await db.execute(query)
-            personality_summary = result.scalar_one_or_none()
-            
-            if personality_summary:
-                # 기존 레코드 업데이트
-                personality_summary.overall_mbti = overall_analysis["overall_mbti"]
-                personality_summary.overall_big5 = overall_analysis["overall_big5"]
-                personality_summary.personality_traits = overall_analysis["personality_traits"]
-                personality_summary.mbti_consistency = overall_analysis["mbti_consistency"]
-                personality_summary.confidence_level = overall_analysis["confidence_level"]
-                personality_summary.analysis_count = len(historical_analyses)
+            if analysis is not None and stats.weight > 0:
+                stats.update(self._trait_values(analysis), decay)
+                analysis_count = (summary.analysis_count or 0) + 1
             else:
-                # 새 레코드 생성
-                personality_summary = UserPersonalitySummary(
-                    user_id=user_id,
-                    overall_mbti=overall_analysis["overall_mbti"],
-                    overall_big5=overall_analysis["overall_big5"],
-                    personality_traits=overall_analysis["personality_traits"],
-                    mbti_consistency=overall_analysis["mbti_consistency"],
-                    confidence_level=overall_analysis["confidence_level"],
-                    analysis_count=len(historical_analyses)
-                )
-                db.add(personality_summary)
+                # 이력 재구성 (오래된 분석부터 반영, 새 분석도 이미 이력에 포함)
+                historical_analyses = await self._get_user_historical_analyses(user_id, db, limit=20)
+                stats = RunningStats()
+                for past in reversed(historical_analyses):
+                    stats.update(self._trait_values(past), decay)
+                analysis_count = len(historical_analyses)
+                if not historical_analyses and analysis is not None:
+                    stats.update(self._trait_values(analysis), decay)
+                    analysis_count = 1
+            
+            if summary is None:
+                summary = UserPersonalitySummary(user_id=uuid.UUID(str(user_id)))
+                db.add(summary)
+            summary.running_stats = stats.to_dict()
+            summary.analysis_count = analysis_count
+            
+            # 분석이 충분할 때만 종합 결과 공개 (매칭에 사용)
+            published = analysis_count >= MIN_SUMMARY_ANALYSES
+            if published:
+                overall_analysis = self._calculate_overall_personality(stats, analysis_count)
+                summary.overall_mbti = overall_analysis["overall_mbti"]
+                summary.overall_big5 = overall_analysis["overall_big5"]
+                summary.personality_traits = overall_analysis["personality_traits"]
+                summary.mbti_consistency = overall_analysis["mbti_consistency"]
+                summary.trait_stability = overall_analysis["trait_stability"]
+                summary.confidence_level = overall_analysis["confidence_level"]
+            else:
+                logger.info("insufficient_data_for_personality_summary", 
+                           user_id=user_id, count=analysis_count)
             
             await db.commit()
             
-            logger.info("personality_summary_updated", user_id=user_id)
+            if published:
+                # 사전 계산 후보 목록 패치는 벡터까지 반영한 뒤 update_user_vectors 에서 한 번만
+                logger.info("personality_summary_updated", user_id=user_id, count=analysis_count)
             
         except Exception as e:
             logger.error("update_personality_summary_failed", user_id=user_id, error=str(e))
     
-    def _calculate_overall_personality(self, historical_analyses: List[Dict]) -> Dict:
-        """종합 성격 분석 계산"""
+    def _calculate_overall_personality(self, stats: RunningStats, analysis_count: int) -> Dict:
+        """누적 통계 → 종합 성격 (최근 가중 평균, 일관성, 신뢰도)"""
         try:
-            # 가중 평균 계산 (최근 분석에 높은 가중치)
-            weights = [1.0 / (i + 1) for i in range(len(historical_analyses))]
-            total_weight = sum(weights)
-            
-            # MBTI 평균
-            mbti_avg = {}
-            for dimension in ["E", "I", "S", "N", "T", "F", "J", "P"]:
-                weighted_sum = sum(
-                    analysis["mbti_indicators"].get(dimension, 0.5) * weight
-                    for analysis, weight in zip(historical_analyses, weights)
-                )
-                mbti_avg[dimension] = weighted_sum / total_weight
-            
-            # Big5 평균
-            big5_avg = {}
-            for trait in ["openness", "conscientiousness", "extraversion", 
-                         "agreeableness", "neuroticism"]:
-                weighted_sum = sum(
-                    analysis["big5_traits"].get(trait, 0.5) * weight
-                    for analysis, weight in zip(historical_analyses, weights)
-                )
-                big5_avg[trait] = weighted_sum / total_weight
+            mbti_avg = {dimension: stats.mean.get(dimension, 0.5) for dimension in MBTI_DIMENSIONS}
+            big5_avg = {trait: stats.mean.get(trait, 0.5) for trait in BIG5_TRAITS}
             
             # 전체 MBTI 유형 결정
             overall_mbti = self._predict_mbti_type(mbti_avg)
             
             # 일관성 점수 계산
-            mbti_consistency = self._calculate_mbti_consistency(historical_analyses)
+            mbti_consistency = self._calculate_mbti_consistency(stats, analysis_count)
             
             # 신뢰도 계산
-            confidence_level = min(1.0, len(historical_analyses) / 10 * mbti_consistency)
+            confidence_level = min(1.0, analysis_count / 10 * mbti_consistency)
             
             # 성격 특성 요약
             personality_traits = self._extract_personality_traits(mbti_avg, big5_avg)
             
+            # Big5 특성별 안정도 (표준편차 0.5 에서 0)
+            trait_stability = {trait: round(max(0.0, 1 - 2 * stats.std(trait)), 3) for trait in BIG5_TRAITS}
+            
             return {
                 "overall_mbti": overall_mbti,
                 "overall_big5": big5_avg,
                 "personality_traits": personality_traits,
                 "mbti_consistency": mbti_consistency,
+                "trait_stability": trait_stability,
                 "confidence_level": confidence_level
             }
             
@@ -585,32 +589,24 @@ class PersonalityAnalysisService:
                 "overall_big5": {},
                 "personality_traits": [],
                 "mbti_consistency": 0.5,
+                "trait_stability": {},
                 "confidence_level": 0.3
             }
     
-    def _calculate_mbti_consistency(self, historical_analyses: List[Dict]) -> float:
-        """MBTI 일관성 점수 계산"""
-        if len(historical_analyses) < 2:
+    def _calculate_mbti_consistency(self, stats: RunningStats, analysis_count: int) -> float:
+        """
+        MBTI 일관성 점수 계산
+        
+        두 분석 점수 차이의 RMS 는 분산의 2배의 제곱근이므로 이를 1 에서 뺀 값의 차원 평균.
+        """
+        if analysis_count < 2:
             return 1.0
         
         try:
-            consistency_scores = []
-            
-            for i in range(len(historical_analyses) - 1):
-                current = historical_analyses[i]["mbti_indicators"]
-                next_analysis = historical_analyses[i + 1]["mbti_indicators"]
-                
-                dimension_consistency = []
-                for dimension in ["E", "I", "S", "N", "T", "F", "J", "P"]:
-                    current_score = current.get(dimension, 0.5)
-                    next_score = next_analysis.get(dimension, 0.5)
-                    consistency = 1 - abs(current_score - next_score)
-                    dimension_consistency.append(consistency)
-                
-                avg_consistency = sum(dimension_consistency) / len(dimension_consistency)
-                consistency_scores.append(avg_consistency)
-            
-            return sum(consistency_scores) / len(consistency_scores)
+            consistency = sum(
+                1 - math.sqrt(2 * stats.variance(dimension)) for dimension in MBTI_DIMENSIONS
+            ) / len(MBTI_DIMENSIONS)
+            return round(max(0.0, consistency), 3)
             
         except Exception:
             return 0.5
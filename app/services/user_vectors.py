@@ -0,0 +1,275 @@
+"""
+사용자 매칭 벡터 (user_vectors) 구성
+
+분석 하나에서 성격/감정/생활 패턴 특징 벡터를 만들고, 사용자 벡터를 지수 가중 평균으로
+갱신한다 (최근 분석 우선, 관측 하나당 O(1)). n 번째 분석까지의 가중치 합은
+(1 - decay^n) / (1 - decay) 이므로 analysis_count 만으로 이어서 갱신할 수 있다.
+
+- personality_vector: MBTI 8축 + Big5 5개 (0 ~ 1)
+- emotion_vector: EMOTION_CATEGORIES 순서의 감정 비중 + 감정 점수 + 감정 강도
+- lifestyle_vector: 생활 패턴 그룹별 키를 고정 버킷에 해싱한 값 (키가 자유 텍스트이므로)
+- combined_vector: 블록별 L2 정규화 후 sqrt(가중치) 를 곱해 이어 붙인 벡터
+  (두 사용자의 코사인 유사도 = 블록별 코사인 유사도의 가중 평균)
+
+축 구성이 바뀌면 VECTOR_VERSION 을 올린다. 버전이 다른 행은 다음 분석 때 이력으로
+다시 만들어지고, 기존 사용자 전체는 backfill_user_vectors 로 청크 단위 재구축한다.
+
+실행: python scripts/backfill_user_vectors.py
+"""
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import sqlalchemy as sa
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.services.emotion_service import EMOTION_CATEGORIES, EmotionAnalysisService
+from app.services.matching_scoring import BIG5_TRAITS
+from app.utils.running_stats import decay_for_half_life
+from app.utils.vector_codec import has_values
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+VECTOR_VERSION = "2.0"
+
+MBTI_AXES = ("E", "I", "S", "N", "T", "F", "J", "P")
+LIFESTYLE_GROUPS = ("activity_patterns", "social_patterns", "time_patterns", "values_orientation")
+LIFESTYLE_BUCKETS = 8  # 그룹당 해시 버킷 수
+COMBINED_WEIGHTS = {"personality": 0.4, "emotion": 0.3, "lifestyle": 0.3}
+
+VECTOR_FIELDS = {
+    "personality": "personality_vector",
+    "emotion": "emotion_vector",
+    "lifestyle": "lifestyle_vector",
+}
+
+# 재구축 시 읽는 diary_analysis 컬럼 (analysis_features 가 쓰는 값만)
+ANALYSIS_COLUMNS = (
+    "emotions", "primary_emotion", "sentiment_score", "emotional_intensity",
+    "personality", "mbti_indicators", "big5_traits", "lifestyle_patterns",
+)
+
+_EMOTION_AXES = {emotion: i for i, emotion in enumerate(EMOTION_CATEGORIES)}
+
+
+def _field(source, name: str):
+    """ORM 행/Row/dict/pydantic 객체에서 같은 이름의 값"""
+    if isinstance(source, dict):
+        return source.get(name)
+    value = getattr(source, name, None)
+    return value.dict() if hasattr(value, "dict") else value
+
+
+def _scores(values, keys: Iterable[str]) -> np.ndarray:
+    values = values if isinstance(values, dict) else {}
+    return np.array([float(values.get(key, 0.5) or 0.0) for key in keys], dtype=np.float32)
+
+
+def _bucket(key: str) -> int:
+    """프로세스와 무관하게 같은 값이 나오는 해시 버킷 (hash() 는 실행마다 다름)"""
+    return zlib.crc32(key.encode("utf-8")) % LIFESTYLE_BUCKETS
+
+
+def analysis_features(analysis) -> Dict[str, np.ndarray]:
+    """분석 하나 → 블록별 특징 벡터 (값이 없는 항목은 중립값)"""
+    personality = _field(analysis, "personality") or {}
+    mbti = _field(analysis, "mbti_indicators") or personality.get("mbti_indicators")
+    big5 = _field(analysis, "big5_traits") or personality.get("big5_traits")
+
+    shares, sentiment, intensity = EmotionAnalysisService._emotion_observation(
+        _field(analysis, "emotions"),
+        _field(analysis, "primary_emotion"),
+        _field(analysis, "sentiment_score"),
+        _field(analysis, "emotional_intensity"),
+    )
+    emotion = np.zeros(len(EMOTION_CATEGORIES) + 2, dtype=np.float32)
+    for name, share in shares.items():
+        if name in _EMOTION_AXES:
+            emotion[_EMOTION_AXES[name]] = share
+    emotion[-2:] = (sentiment, intensity)
+
+    lifestyle = np.zeros(len(LIFESTYLE_GROUPS) * LIFESTYLE_BUCKETS, dtype=np.float32)
+    patterns = _field(analysis, "lifestyle_patterns") or {}
+    for g, group in enumerate(LIFESTYLE_GROUPS):
+        for key, value in (patterns.get(group) or {}).items():
+            slot = g * LIFESTYLE_BUCKETS + _bucket(str(key))
+            lifestyle[slot] = max(lifestyle[slot], float(value or 0.0))
+
+    return {
+        "personality": np.concatenate([_scores(mbti, MBTI_AXES), _scores(big5, BIG5_TRAITS)]),
+        "emotion": emotion,
+        "lifestyle": lifestyle,
+    }
+
+
+def combine_vectors(vectors: Dict[str, np.ndarray]) -> np.ndarray:
+    """블록별 L2 정규화 × sqrt(가중치) 를 이어 붙인 결합 벡터 (성격 점수는 0.5 중심으로 이동)"""
+    blocks = []
+    for name, weight in COMBINED_WEIGHTS.items():
+        block = np.asarray(vectors[name], dtype=np.float32)
+        if name == "personality":
+            block = block - 0.5
+        norm = np.linalg.norm(block)
+        blocks.append(block * (np.sqrt(weight) / norm) if norm > 0 else np.zeros_like(block))
+    return np.concatenate(blocks)
+
+
+def accumulated_weight(count: int, decay: float) -> float:
+    """분석 count 개의 지수 가중치 합"""
+    if decay >= 1.0:
+        return float(count)
+    return (1.0 - decay ** count) / (1.0 - decay)
+
+
+def fold_features(
+    vectors: Optional[Dict[str, np.ndarray]], features: Dict[str, np.ndarray], count: int, decay: float
+) -> Dict[str, np.ndarray]:
+    """이미 count 개 분석이 반영된 벡터에 분석 하나를 더한 지수 가중 평균"""
+    weight = accumulated_weight(count + 1, decay)
+    folded = {}
+    for name, value in features.items():
+        previous = (vectors or {}).get(name)
+        if previous is None or len(previous) != len(value):
+            previous = value
+        folded[name] = (previous + (value - previous) / weight).astype(np.float32)
+    return folded
+
+
+def is_current(user_vector) -> bool:
+    """현재 축 구성으로 만들어진 벡터인지"""
+    return (
+        user_vector is not None
+        and user_vector.vector_version == VECTOR_VERSION
+        and (user_vector.analysis_count or 0) > 0
+        and all(has_values(getattr(user_vector, field)) for field in VECTOR_FIELDS.values())
+    )
+
+
+def stored_vectors(user_vector) -> Dict[str, np.ndarray]:
+    return {name: np.asarray(getattr(user_vector, field), dtype=np.float32) for name, field in VECTOR_FIELDS.items()}
+
+
+def apply_vectors(user_vector, vectors: Dict[str, np.ndarray], count: int) -> None:
+    """블록 벡터/결합 벡터/버전/분석 수 기록"""
+    for name, field in VECTOR_FIELDS.items():
+        setattr(user_vector, field, vectors[name])
+    user_vector.combined_vector = combine_vectors(vectors)
+    user_vector.vector_version = VECTOR_VERSION
+    user_vector.analysis_count = count
+    user_vector.confidence_score = min(100, count)
+
+
+async def rebuild_user_vectors(db: AsyncSession, user_ids: List[str], decay: Optional[float] = None) -> Dict[str, object]:
+    """
+    사용자들의 완료 분석 전체를 시간 순으로 다시 반영 (사용자 수와 무관하게 쿼리 2회)
+
+    분석이 없는 사용자는 건너뛴다. 커밋은 호출자가 한다.
+    """
+    from app.models.analysis import DiaryAnalysis
+    from app.models.user import UserVector
+
+    if decay is None:
+        decay = decay_for_half_life(settings.USER_VECTOR_HALF_LIFE_ANALYSES)
+    keys = [uuid.UUID(str(user_id)) for user_id in user_ids]
+    if not keys:
+        return {}
+
+    result = await db.execute(
+        sa.select(DiaryAnalysis.user_id, *(getattr(DiaryAnalysis, column) for column in ANALYSIS_COLUMNS))
+        .where(
+            DiaryAnalysis.user_id.in_(keys),
+            DiaryAnalysis.status == sa.literal_column("'completed'"),
+        )
+        .order_by(DiaryAnalysis.user_id, DiaryAnalysis.processed_at)
+    )
+    folded: Dict[uuid.UUID, Dict] = {}
+    counts: Dict[uuid.UUID, int] = {}
+    for row in result.all():
+        count = counts.get(row.user_id, 0)
+        folded[row.user_id] = fold_features(folded.get(row.user_id), analysis_features(row), count, decay)
+        counts[row.user_id] = count + 1
+
+    existing = await db.execute(sa.select(UserVector).where(UserVector.user_id.in_(list(folded))))
+    rows = {row.user_id: row for row in existing.scalars().all()}
+    for key, vectors in folded.items():
+        user_vector = rows.get(key)
+        if user_vector is None:
+            user_vector = rows[key] = UserVector(user_id=key)
+            db.add(user_vector)
+        apply_vectors(user_vector, vectors, counts[key])
+    return {str(key): row for key, row in rows.items() if key in folded}
+
+
+async def fold_user_vector(db: AsyncSession, user_id: str, analysis):
+    """
+    새 분석 하나를 사용자 벡터에 반영 (현재 버전이면 O(1), 아니면 이력으로 재구축)
+
+    analysis 는 이미 저장된 분석 행이어야 한다 (재구축 시 이력에 포함). 커밋은 호출자가 한다.
+    """
+    from app.models.user import UserVector
+
+    key = uuid.UUID(str(user_id))
+    # 읽고-고쳐-쓰므로 커밋까지 행 잠금 (동시 분석의 반영 유실 방지)
+    user_vector = await db.get(UserVector, key, with_for_update=True, populate_existing=True)
+    if not is_current(user_vector):
+        rebuilt = await rebuild_user_vectors(db, [str(key)])
+        if str(key) in rebuilt:
+            return rebuilt[str(key)]
+
+    if user_vector is None:
+        user_vector = UserVector(user_id=key)
+        db.add(user_vector)
+    decay = decay_for_half_life(settings.USER_VECTOR_HALF_LIFE_ANALYSES)
+    count = (user_vector.analysis_count or 0) if is_current(user_vector) else 0
+    current = stored_vectors(user_vector) if count else None
+    apply_vectors(user_vector, fold_features(current, analysis_features(analysis), count, decay), count + 1)
+    return user_vector
+
+
+async def backfill_user_vectors(
+    session_factory=None, chunk_size: Optional[int] = None, force: bool = False
+) -> Dict:
+    """
+    기존 사용자 벡터 일괄 구축 (사용자 ID 순 키셋 페이지, 청크마다 커밋)
+
+    벡터가 없거나 버전이 다른 사용자만 처리한다 (force 면 전체). 매칭 후보 인덱스는 여기서
+    갱신하지 않는다: 실행 중인 워커는 다음 시작 때 반영하며, 시작 시 스냅샷의 벡터 버전이
+    VECTOR_VERSION 과 다르면 DB 에서 다시 구축하고 같으면 updated_at 델타로 백필 결과를 읽는다.
+    """
+    from app.models.user import User, UserVector
+
+    if session_factory is None:
+        from app.config.database import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+    chunk_size = chunk_size or settings.USER_VECTOR_BACKFILL_CHUNK_SIZE
+    started_at = datetime.now(timezone.utc)
+
+    query = sa.select(User.id).outerjoin(UserVector, UserVector.user_id == User.id).order_by(User.id).limit(chunk_size)
+    if not force:
+        query = query.where(sa.or_(UserVector.user_id.is_(None), UserVector.vector_version.is_distinct_from(VECTOR_VERSION)))
+
+    stats = {"users": 0, "built": 0, "chunks": 0}
+    last_id = None
+    while True:
+        async with session_factory() as db:
+            page = query if last_id is None else query.where(User.id > last_id)
+            user_ids = (await db.execute(page)).scalars().all()
+            if not user_ids:
+                break
+            built = await rebuild_user_vectors(db, [str(user_id) for user_id in user_ids])
+            await db.commit()
+
+        last_id = user_ids[-1]
+        stats["users"] += len(user_ids)
+        stats["built"] += len(built)
+        stats["chunks"] += 1
+        logger.info("user_vector_backfill_chunk", chunk=stats["chunks"], users=len(user_ids), built=len(built))
+
+    stats["seconds"] = round((datetime.now(timezone.utc) - started_at).total_seconds(), 2)
+    logger.info("user_vector_backfill_completed", **stats)
+    return stats
@@ -0,0 +1,506 @@
+"""
+사용자 벡터 근사 최근접 이웃(ANN) 인덱스
+
+user_vectors.combined_vector 를 대상으로 하는 NumPy 기반 IVF-flat 인덱스.
+- 시작 시 디스크 스냅샷을 읽고, 스냅샷의 DB 동기화 시점(synced_at) 이후 바뀐
+  user_vectors 행(updated_at 기준)만 DB 에서 다시 읽어 반영. 스냅샷이 없거나 맞출 수 없으면 DB 에서 새로 구축
+- update_user_vectors 에서 벡터가 바뀔 때마다 증분 반영 (해당 클러스터 목록만 수정)
+- 검색은 요청 벡터와 가까운 nprobe 개 클러스터만 훑으므로 전체 사용자 수와 무관하게 빠름
+
+인덱스는 프로세스 단위로 유지된다. 다른 워커의 갱신은 주기적 델타 갱신
+(VECTOR_INDEX_REFRESH_SECONDS)으로 반영되고, 델타로 맞출 수 없거나 크기가 크게 바뀌면
+DB 에서 다시 구축한다 (synced_at 은 DB 에서 읽은 시점까지만 올라가므로, 어느 워커가 저장한
+스냅샷을 읽어도 그 이후 변경은 모두 다시 읽힌다).
+
+인덱스에는 현재 벡터 버전(VECTOR_VERSION) 행만 넣는다. 스냅샷의 벡터 버전이 다르면
+(벡터 구성 변경 배포 후) 델타 없이 DB 에서 다시 구축한다.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.utils.vector_codec import has_values
+
+settings = get_settings()
+logger = structlog.get_logger()
+
+# 델타 조회 여유 (updated_at 은 트랜잭션 시작 시각이므로, 동기화 직후 커밋된 긴 트랜잭션도 포함)
+SYNC_MARGIN = timedelta(minutes=5)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (코사인 유사도 = 내적)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+class IVFFlatIndex:
+    """
+    역파일(IVF) + 평탄(flat) 검색 인덱스 (코사인 유사도)
+
+    벡터 수가 min_train_size 미만이면 클러스터 없이 전체를 직접 비교한다.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 256,
+        train_iterations: int = 10,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.train_iterations = train_iterations
+        self.seed = seed
+
+        self.dimension: Optional[int] = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._slot_ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_size = 0
+        # DB 와 마지막으로 맞춘 시점 (읽은 user_vectors.updated_at 의 최댓값)
+        self.synced_at: Optional[datetime] = None
+        # 인덱스에 담은 벡터의 구성 버전 (user_vectors.vector_version)
+        self.vector_version: Optional[str] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: str) -> bool:
+        return str(user_id) in self._slots
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """학습 이후 크기가 2배 이상 변하면 클러스터 재학습 권장"""
+        size = len(self)
+        if not self.is_trained:
+            return size >= self.min_train_size
+        return size > self._trained_size * 2 or size * 2 < self._trained_size
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self),
+            "dimension": self.dimension,
+            "trained": self.is_trained,
+            "nlist": len(self._lists),
+            "nprobe": self.nprobe,
+        }
+
+    # ----- 구축 -----
+
+    def build(self, ids: Sequence[str], vectors) -> None:
+        """전체 벡터로 인덱스 재구축 (클러스터 학습 포함)"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("vectors must be a (len(ids), dimension) matrix")
+
+        normalized = _normalize(matrix)
+        keep = np.linalg.norm(matrix, axis=1) > 0
+        ids = [str(user_id) for user_id, kept in zip(ids, keep) if kept]
+        normalized = normalized[keep]
+
+        centroids = None
+        if len(ids) >= self.min_train_size:
+            centroids = self._train(normalized)
+
+        with self._lock:
+            self._reset(matrix.shape[1])
+            self._vectors = normalized.copy()
+            self._slot_ids = list(ids)
+            self._slots = {user_id: slot for slot, user_id in enumerate(ids)}
+            self._set_centroids(centroids)
+            self._trained_size = len(ids)
+
+    def clear(self) -> None:
+        """모든 벡터와 클러스터 제거"""
+        with self._lock:
+            self._reset(0)
+            self.dimension = None
+
+    def _reset(self, dimension: int) -> None:
+        self.dimension = dimension
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._slot_ids = []
+        self._slots = {}
+        self._free_slots = []
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._centroids = None
+        self._lists = []
+        self._list_arrays = {}
+        self._trained_size = 0
+
+    def _train(self, vectors: np.ndarray) -> np.ndarray:
+        """구면 k-means 로 클러스터 중심 학습"""
+        rng = np.random.default_rng(self.seed)
+        n = vectors.shape[0]
+        nlist = self.nlist or int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        # 학습은 최대 50,000개 표본으로 (대규모에서도 구축 시간 제한)
+        sample = vectors if n <= 50000 else vectors[rng.choice(n, 50000, replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()), replace=False)]
+            centroids = _normalize(sums)
+
+        return centroids
+
+    def _set_centroids(self, centroids: Optional[np.ndarray]) -> None:
+        self._centroids = centroids
+        self._list_arrays = {}
+        self._assignments = np.full(len(self._slot_ids), -1, dtype=np.int32)
+        if centroids is None:
+            self._lists = []
+            return
+
+        self._lists = [set() for _ in range(centroids.shape[0])]
+        active = np.array([slot for slot, user_id in enumerate(self._slot_ids) if user_id is not None],
+                          dtype=np.intp)
+        if active.size:
+            labels = np.argmax(self._vectors[active] @ centroids.T, axis=1)
+            self._assignments[active] = labels
+            for slot, label in zip(active.tolist(), labels.tolist()):
+                self._lists[label].add(slot)
+
+    # ----- 증분 갱신 -----
+
+    def upsert(self, user_id: str, vector: Sequence[float]) -> bool:
+        """사용자 벡터 추가/교체 (차원이 다르거나 영벡터면 제거 후 False)"""
+        user_id = str(user_id)
+        query = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            if self.dimension is None or (len(self) == 0 and not self.is_trained):
+                if self.dimension != query.shape[0]:
+                    self._reset(query.shape[0])
+            if query.ndim != 1 or query.shape[0] != self.dimension or not np.linalg.norm(query) > 0:
+                self.remove(user_id)
+                return False
+
+            normalized = _normalize(query)
+            slot = self._slots.get(user_id)
+            if slot is None:
+                slot = self._allocate_slot()
+                self._slots[user_id] = slot
+                self._slot_ids[slot] = user_id
+            else:
+                self._detach(slot)
+
+            self._vectors[slot] = normalized
+            if self.is_trained:
+                label = int(np.argmax(self._centroids @ normalized))
+                self._assignments[slot] = label
+                self._lists[label].add(slot)
+                self._list_arrays.pop(label, None)
+            return True
+
+    def remove(self, user_id: str) -> bool:
+        """사용자 벡터 제거"""
+        with self._lock:
+            slot = self._slots.pop(str(user_id), None)
+            if slot is None:
+                return False
+            self._detach(slot)
+            self._slot_ids[slot] = None
+            self._vectors[slot] = 0.0
+            self._free_slots.append(slot)
+            return True
+
+    def _detach(self, slot: int) -> None:
+        label = int(self._assignments[slot]) if slot < self._assignments.shape[0] else -1
+        if label >= 0:
+            self._lists[label].discard(slot)
+            self._list_arrays.pop(label, None)
+            self._assignments[slot] = -1
+
+    def _allocate_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+
+        slot = len(self._slot_ids)
+        if slot >= self._vectors.shape[0]:
+            capacity = max(16, self._vectors.shape[0] * 2)
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            vectors[:slot] = self._vectors[:slot]
+            self._vectors = vectors
+            assignments = np.full(capacity, -1, dtype=np.int32)
+            assignments[:slot] = self._assignments[:slot]
+            self._assignments = assignments
+        self._slot_ids.append(None)
+        return slot
+
+    def vector(self, user_id: str) -> Optional[np.ndarray]:
+        """등록된 (정규화된) 벡터 사본 (없으면 None)"""
+        with self._lock:
+            slot = self._slots.get(str(user_id))
+            return None if slot is None else self._vectors[slot].copy()
+
+    # ----- 검색 -----
+
+    def _list_array(self, label: int) -> np.ndarray:
+        array = self._list_arrays.get(label)
+        if array is None:
+            array = np.fromiter(self._lists[label], dtype=np.intp, count=len(self._lists[label]))
+            self._list_arrays[label] = array
+        return array
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int,
+        exclude: Optional[Iterable[str]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """코사인 유사도 상위 k명 [(user_id, similarity)] (유사도 내림차순)"""
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if k <= 0 or len(self) == 0 or query.shape != (self.dimension,):
+                return []
+            query = _normalize(query)
+
+            if self.is_trained:
+                probe = min(nprobe or self.nprobe, len(self._lists))
+                nearest_lists = np.argpartition(-(self._centroids @ query), probe - 1)[:probe]
+                slots = np.concatenate([self._list_array(int(label)) for label in nearest_lists])
+            else:
+                slots = np.fromiter(self._slots.values(), dtype=np.intp, count=len(self._slots))
+
+            excluded = {self._slots[str(user_id)] for user_id in (exclude or ()) if str(user_id) in self._slots}
+            if excluded:
+                slots = slots[~np.isin(slots, list(excluded))]
+            if slots.size == 0:
+                return []
+
+            similarities = self._vectors[slots] @ query
+            if slots.size > k:
+                top = np.argpartition(-similarities, k - 1)[:k]
+            else:
+                top = np.arange(slots.size)
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            return [(self._slot_ids[slots[i]], float(similarities[i])) for i in top]
+
+    # ----- 저장/복원 -----
+
+    def save(self, path: str) -> None:
+        """디스크 스냅샷 저장 (같은 디렉터리의 고유 임시 파일에 쓴 뒤 교체)"""
+        with self._lock:
+            slots = np.array(sorted(self._slots.values()), dtype=np.intp)
+            ids = np.array([self._slot_ids[slot] for slot in slots], dtype=str)
+            vectors = self._vectors[slots] if slots.size else np.zeros((0, self.dimension or 0), np.float32)
+            centroids = self._centroids if self.is_trained else np.zeros((0, self.dimension or 0), np.float32)
+            trained_size = self._trained_size
+            synced_at = self.synced_at.isoformat() if self.synced_at else ""
+            vector_version = self.vector_version or ""
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 여러 워커가 동시에 저장해도 서로의 임시 파일을 덮어쓰지 않도록 프로세스마다 고유한 임시 파일
+        with tempfile.NamedTemporaryFile(
+            dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False
+        ) as file:
+            temp_path = file.name
+            try:
+                np.savez(file, ids=ids, vectors=vectors, centroids=centroids,
+                         trained_size=np.array(trained_size), synced_at=np.array(synced_at),
+                         vector_version=np.array(vector_version))
+            except BaseException:
+                file.close()
+                os.unlink(temp_path)
+                raise
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> None:
+        """디스크 스냅샷 복원 (클러스터 재학습 없이 배정만 다시 계산)"""
+        with np.load(path, allow_pickle=False) as data:
+            ids = [str(user_id) for user_id in data["ids"]]
+            vectors = data["vectors"].astype(np.float32)
+            centroids = data["centroids"].astype(np.float32)
+            trained_size = int(data["trained_size"])
+            synced_at = str(data["synced_at"]) if "synced_at" in data.files else ""
+            vector_version = str(data["vector_version"]) if "vector_version" in data.files else ""
+
+        with self._lock:
+            self._reset(vectors.shape[1])
+            self._vectors = vectors
+            self._slot_ids = ids
+            self._slots = {user_id: slot for slot, user_id in enumerate(ids)}
+            self._set_centroids(centroids if centroids.shape[0] else None)
+            self._trained_size = trained_size
+            self.synced_at = datetime.fromisoformat(synced_at) if synced_at else None
+            self.vector_version = vector_version or None
+
+
+# 전역 사용자 벡터 인덱스
+user_vector_index = IVFFlatIndex(nprobe=settings.VECTOR_INDEX_NPROBE)
+
+
+async def build_user_vector_index(db: AsyncSession, index: Optional[IVFFlatIndex] = None) -> IVFFlatIndex:
+    """DB 의 현재 버전 combined_vector 전체로 인덱스 구축 (가장 흔한 차원만 사용)"""
+    from app.models.user import UserVector
+    from app.services.user_vectors import VECTOR_VERSION
+
+    index = index or user_vector_index
+    result = await db.execute(
+        select(UserVector.user_id, UserVector.combined_vector, UserVector.updated_at, UserVector.vector_version)
+        .where(UserVector.combined_vector.isnot(None))
+    )
+    rows, synced_at = [], None
+    for user_id, vector, updated_at, vector_version in result.all():
+        if updated_at is not None and (synced_at is None or updated_at > synced_at):
+            synced_at = updated_at
+        if vector_version == VECTOR_VERSION and has_values(vector):
+            rows.append((str(user_id), vector))
+
+    dimensions = Counter(len(vector) for _, vector in rows)
+    if not dimensions:
+        index.clear()
+        index.synced_at = synced_at
+        index.vector_version = VECTOR_VERSION
+        return index
+    dimension, _ = dimensions.most_common(1)[0]
+    rows = [(user_id, vector) for user_id, vector in rows if len(vector) == dimension]
+    if len(rows) != sum(dimensions.values()):
+        logger.warning("vector_index_dimension_mismatch", used=dimension, skipped=sum(dimensions.values()) - len(rows))
+
+    ids = [user_id for user_id, _ in rows]
+    vectors = np.array([vector for _, vector in rows], dtype=np.float32)
+    # k-means 학습은 CPU 작업이므로 이벤트 루프 밖에서 실행
+    await asyncio.to_thread(index.build, ids, vectors)
+    index.synced_at = synced_at
+    index.vector_version = VECTOR_VERSION
+    logger.info("vector_index_built", **index.stats())
+    return index
+
+
+async def apply_user_vector_delta(db: AsyncSession, index: Optional[IVFFlatIndex] = None) -> Optional[int]:
+    """
+    스냅샷 이후 바뀐 user_vectors 행만 읽어 인덱스에 반영 (반영 행 수)
+
+    synced_at 이 없거나 (이전 형식 스냅샷), 인덱스의 벡터 버전이 현재와 다르거나,
+    인덱스와 차원이 다른 현재 버전 벡터가 있으면 증분으로 맞출 수 없으므로 None 을 반환한다.
+    이전 버전 행은 인덱스에서 뺀다 (백필 전 사용자).
+    """
+    from app.models.user import UserVector
+    from app.services.user_vectors import VECTOR_VERSION
+
+    index = index or user_vector_index
+    if index.synced_at is None or index.vector_version != VECTOR_VERSION:
+        return None
+
+    result = await db.execute(
+        select(UserVector.user_id, UserVector.combined_vector, UserVector.updated_at, UserVector.vector_version)
+        .where(UserVector.updated_at >= index.synced_at - SYNC_MARGIN)
+    )
+    rows = [
+        (user_id, vector if vector_version == VECTOR_VERSION else None, updated_at)
+        for user_id, vector, updated_at, vector_version in result.all()
+    ]
+    if any(has_values(vector) and len(vector) != index.dimension for _, vector, _ in rows):
+        return None
+
+    synced_at = index.synced_at
+    for user_id, vector, updated_at in rows:
+        if has_values(vector):
+            index.upsert(str(user_id), vector)
+        else:
+            index.remove(str(user_id))
+        if updated_at is not None and updated_at > synced_at:
+            synced_at = updated_at
+    index.synced_at = synced_at
+    return len(rows)
+
+
+async def refresh_user_vector_index(db: AsyncSession, index: Optional[IVFFlatIndex] = None) -> Optional[int]:
+    """DB 델타 반영, 맞출 수 없거나 재학습이 필요하면 재구축 (델타 반영 행 수, 재구축이면 None)"""
+    index = index or user_vector_index
+    applied = await apply_user_vector_delta(db, index)
+    if applied is None or index.needs_rebuild:
+        await build_user_vector_index(db, index)
+        return None
+    return applied
+
+
+async def run_vector_index_refresh_loop(session_factory, interval_seconds: int) -> None:
+    """주기적 벡터 인덱스 델타 갱신"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as db:
+                await refresh_user_vector_index(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("vector_index_refresh_failed", error=str(e))
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def start_vector_index_refresh(session_factory, interval_seconds: Optional[int] = None) -> None:
+    """벡터 인덱스 델타 갱신 백그라운드 작업 시작 (이벤트 루프 안에서 호출, 주기 0 이면 시작 안 함)"""
+    global _refresh_task
+    interval_seconds = settings.VECTOR_INDEX_REFRESH_SECONDS if interval_seconds is None else interval_seconds
+    if interval_seconds <= 0 or (_refresh_task and not _refresh_task.done()):
+        return
+    _refresh_task = asyncio.create_task(run_vector_index_refresh_loop(session_factory, interval_seconds))
+
+
+async def stop_vector_index_refresh() -> None:
+    """벡터 인덱스 델타 갱신 백그라운드 작업 중지"""
+    global _refresh_task
+    if _refresh_task is None:
+        return
+    _refresh_task.cancel()
+    try:
+        await _refresh_task
+    except asyncio.CancelledError:
+        pass
+    _refresh_task = None
+
+
+async def load_or_build_user_vector_index(session_factory, path: Optional[str] = None) -> IVFFlatIndex:
+    """스냅샷이 있으면 복원 후 DB 델타 반영, 없거나 맞출 수 없으면 DB 에서 구축 후 저장"""
+    path = path or settings.VECTOR_INDEX_PATH
+    async with session_factory() as db:
+        if os.path.exists(path):
+            await asyncio.to_thread(user_vector_index.load, path)
+            applied = await apply_user_vector_delta(db)
+            logger.info("vector_index_loaded", path=path, delta=applied, **user_vector_index.stats())
+            if applied is not None and not user_vector_index.needs_rebuild:
+                await asyncio.to_thread(user_vector_index.save, path)
+                return user_vector_index
+
+        await build_user_vector_index(db)
+    await asyncio.to_thread(user_vector_index.save, path)
+    return user_vector_index
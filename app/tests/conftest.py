@@ -36,6 +36,15 @@ TestSessionLocal = sessionmaker(
 )
 
 
+async def explain_query_plan(db: AsyncSession, query) -> str:
+    """SQLite EXPLAIN QUERY PLAN 결과 (단계별 설명을 줄바꿈으로 이은 문자열)"""
+    compiled = query.compile(test_engine.sync_engine)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+    return "\n".join(row[3] for row in result.all())
+
+
 @pytest_asyncio.fixture
 async def test_db() -> AsyncGenerator[AsyncSession, None]:
     """테스트 데이터베이스 세션"""
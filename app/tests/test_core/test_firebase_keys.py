@@ -0,0 +1,158 @@
+"""
+Firebase 토큰 로컬 검증 테스트 (네트워크 없이 고정 인증서 사용)
+"""
+import datetime
+import threading
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from firebase_admin import auth
+from google.auth import crypt, jwt as google_jwt
+
+from app.core import security
+from app.core.firebase_keys import StaticKeySource, verify_id_token_locally
+
+PROJECT_ID = "test-project"
+KEY_ID = "test-key-1"
+
+
+def _create_signing_material():
+    """테스트용 RSA 키와 자체 서명 인증서 생성"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.test")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(private_key, hashes.SHA256())
+    )
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    certificate_pem = certificate.public_bytes(serialization.Encoding.PEM).decode()
+    return crypt.RSASigner.from_string(private_pem, key_id=KEY_ID), certificate_pem
+
+
+class TestFirebaseLocalVerification:
+    """캐시된 인증서 기반 토큰 검증 테스트 클래스"""
+
+    @pytest.fixture(scope="class")
+    def signing_material(self):
+        return _create_signing_material()
+
+    @pytest.fixture
+    def key_source(self, signing_material):
+        _, certificate_pem = signing_material
+        return StaticKeySource({KEY_ID: certificate_pem})
+
+    def _make_token(self, signer, **overrides) -> str:
+        now = int(time.time())
+        payload = {
+            "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+            "aud": PROJECT_ID,
+            "sub": "firebase-uid-123",
+            "iat": now,
+            "exp": now + 3600,
+        }
+        payload.update(overrides)
+        return google_jwt.encode(signer, payload).decode()
+
+    def test_valid_token(self, signing_material, key_source):
+        """유효한 토큰은 uid 클레임과 함께 반환"""
+        signer, _ = signing_material
+        claims = verify_id_token_locally(self._make_token(signer), key_source, PROJECT_ID)
+
+        assert claims["uid"] == "firebase-uid-123"
+
+    def test_wrong_audience(self, signing_material, key_source):
+        """다른 프로젝트 토큰은 거부"""
+        signer, _ = signing_material
+        with pytest.raises(auth.InvalidIdTokenError):
+            verify_id_token_locally(
+                self._make_token(signer, aud="other-project"), key_source, PROJECT_ID
+            )
+
+    def test_wrong_issuer(self, signing_material, key_source):
+        """발급자가 다르면 거부"""
+        signer, _ = signing_material
+        with pytest.raises(auth.InvalidIdTokenError):
+            verify_id_token_locally(
+                self._make_token(signer, iss="https://evil.example.com"), key_source, PROJECT_ID
+            )
+
+    def test_expired_token(self, signing_material, key_source):
+        """만료된 토큰은 ExpiredIdTokenError"""
+        signer, _ = signing_material
+        past = int(time.time()) - 7200
+        with pytest.raises(auth.ExpiredIdTokenError):
+            verify_id_token_locally(
+                self._make_token(signer, iat=past, exp=past + 60), key_source, PROJECT_ID
+            )
+
+    def test_unknown_key(self, signing_material):
+        """알 수 없는 kid로 서명된 토큰은 거부"""
+        signer, _ = signing_material
+        other_signer, other_certificate = _create_signing_material()
+        with pytest.raises(auth.InvalidIdTokenError):
+            verify_id_token_locally(
+                self._make_token(signer), StaticKeySource({"other": other_certificate}), PROJECT_ID
+            )
+
+    @pytest.mark.asyncio
+    async def test_verification_runs_off_event_loop(self, signing_material, key_source, monkeypatch):
+        """서명 검증은 이벤트 루프 스레드가 아닌 검증 스레드 풀에서 실행"""
+        signer, _ = signing_material
+        monkeypatch.setattr(security.settings, "FIREBASE_PROJECT_ID", PROJECT_ID)
+        original_source = security.key_source
+        security.set_key_source(key_source)
+
+        threads = []
+        original_get_certificates = key_source.get_certificates
+
+        def recording_get_certificates():
+            threads.append(threading.current_thread().name)
+            return original_get_certificates()
+
+        monkeypatch.setattr(key_source, "get_certificates", recording_get_certificates)
+        try:
+            claims = await security.run_token_verification(self._make_token(signer))
+        finally:
+            security.set_key_source(original_source)
+
+        assert claims["uid"] == "firebase-uid-123"
+        assert threads and threads[0].startswith("firebase-verify")
+
+    @pytest.mark.asyncio
+    async def test_diagnostics_only_on_failure(self, signing_material, key_source, monkeypatch, caplog):
+        """성공한 검증은 로그를 남기지 않고, 실패한 검증만 진단 로그 출력"""
+        signer, _ = signing_material
+        monkeypatch.setattr(security.settings, "FIREBASE_PROJECT_ID", PROJECT_ID)
+        monkeypatch.setattr(security.settings, "FIREBASE_AUTH_DEBUG", False)
+        monkeypatch.setattr(security, "firebase_initialized", True)
+        monkeypatch.setattr(security, "token_cache", security.TokenVerificationCache(max_size=10))
+        original_source = security.key_source
+        security.set_key_source(key_source)
+
+        try:
+            with caplog.at_level("DEBUG", logger=security.logger.name):
+                await security.verify_firebase_token(self._make_token(signer))
+                assert caplog.records == []
+
+                with pytest.raises(security.AuthenticationException):
+                    await security.verify_firebase_token(self._make_token(signer, aud="other-project"))
+        finally:
+            security.set_key_source(original_source)
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any("토큰 대상(aud): other-project" in message for message in messages)
@@ -0,0 +1,116 @@
+"""
+큐 기반 로깅 파이프라인 테스트
+"""
+import io
+import json
+import logging
+import queue
+import threading
+
+import pytest
+import structlog
+
+from app.core import logging_config
+from app.core.logging_config import (
+    EventSampler,
+    LazyQueueHandler,
+    configure_logging,
+    parse_sampling_rates,
+    stop_logging,
+)
+
+
+class TestLoggingPipeline:
+    """로깅 파이프라인 테스트 클래스"""
+
+    @pytest.fixture
+    def pipeline(self):
+        """StringIO 로 출력하는 파이프라인 (테스트 후 기존 설정 복원)"""
+        root = logging.getLogger()
+        original_handlers, original_level = list(root.handlers), root.level
+        original_config = structlog.get_config()
+        stream = io.StringIO()
+
+        def configure(**kwargs):
+            configure_logging(stream=stream, **kwargs)
+            return stream
+
+        yield configure
+
+        stop_logging()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in original_handlers:
+            root.addHandler(handler)
+        root.setLevel(original_level)
+        structlog.configure(**original_config)
+
+    def _lines(self, stream):
+        stop_logging()  # 큐 비우기
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def test_parse_sampling_rates(self):
+        """샘플링 설정 문자열 파싱"""
+        assert parse_sampling_rates("request_started=0.01, noisy=0,") == {
+            "request_started": 0.01,
+            "noisy": 0.0,
+        }
+        assert parse_sampling_rates("") == {}
+
+    def test_event_sampler(self):
+        """비율에 따라 N건 중 1건만 통과, 설정 없는 이벤트는 모두 통과"""
+        sampler = EventSampler({"request_started": 0.25, "muted": 0.0})
+
+        assert sum(sampler.should_log("request_started") for _ in range(100)) == 25
+        assert not any(sampler.should_log("muted") for _ in range(10))
+        assert all(sampler.should_log("request_completed") for _ in range(10))
+
+    def test_queue_handler_defers_formatting(self):
+        """호출 스레드에서는 메시지를 포맷하지 않음"""
+        formatted = []
+
+        class Spy:
+            def __str__(self):
+                formatted.append(threading.current_thread().name)
+                return "spy"
+
+        log_queue = queue.Queue()
+        handler = LazyQueueHandler(log_queue)
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "value=%s", (Spy(),), None)
+        handler.handle(record)
+
+        queued = log_queue.get_nowait()
+        assert formatted == []
+        assert queued.getMessage() == "value=spy"
+
+    def test_full_queue_drops_without_blocking(self):
+        """큐가 가득 차면 레코드를 버리고 계속 진행"""
+        handler = LazyQueueHandler(queue.Queue(maxsize=1))
+        for _ in range(3):
+            handler.handle(logging.LogRecord("test", logging.INFO, __file__, 1, "msg", (), None))
+
+        assert handler.dropped == 2
+
+    def test_stdlib_and_structlog_emit_json(self, pipeline):
+        """stdlib 과 structlog 로그가 같은 JSON 스트림으로 출력"""
+        stream = pipeline(sampling={"request_started": 0.5})
+
+        logging.getLogger("app.test").info("인증 실패: user=%s", "uid-1")
+        struct_logger = structlog.get_logger("app.service")
+        struct_logger.info("analysis_completed", analysis_id="a-1", filename="diary.txt")
+        for _ in range(4):
+            struct_logger.info("request_started", path="/health")
+
+        lines = self._lines(stream)
+        assert lines[0]["event"] == "인증 실패: user=uid-1"
+        assert lines[0]["logger"] == "app.test"
+        assert lines[1]["event"] == "analysis_completed"
+        assert lines[1]["analysis_id"] == "a-1"
+        assert lines[1]["filename"] == "diary.txt"
+        assert [line["event"] for line in lines[2:]] == ["request_started"] * 2
+
+    def test_listener_runs_in_background_thread(self, pipeline):
+        """출력은 리스너 스레드에서 수행"""
+        pipeline()
+        assert logging_config._listener._thread is not None
+        assert logging_config._listener._thread is not threading.current_thread()
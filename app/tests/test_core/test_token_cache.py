@@ -0,0 +1,90 @@
+"""
+Firebase 토큰 검증 캐시 테스트
+"""
+import pytest
+from unittest.mock import patch
+
+from app.core import security
+from app.core.token_cache import TokenVerificationCache, hash_token
+
+
+class TestTokenVerificationCache:
+    """토큰 검증 캐시 테스트 클래스"""
+
+    @pytest.fixture
+    def claims(self):
+        """검증된 토큰 클레임"""
+        return {"uid": "test_user_123", "email": "test@example.com", "exp": 2000}
+
+    def test_hit_until_expiry(self, claims):
+        """exp 이전에는 캐시 적중, 이후에는 미스"""
+        cache = TokenVerificationCache(max_size=10, clock_skew=0)
+        cache.put("token-a", claims, now=1000)
+
+        assert cache.get("token-a", now=1500) == claims
+        assert cache.get("token-a", now=2000) is None
+        assert len(cache) == 0
+
+    def test_keyed_by_hash(self, claims):
+        """원문 토큰이 키로 저장되지 않음"""
+        cache = TokenVerificationCache(max_size=10)
+        cache.put("token-a", claims, now=1000)
+
+        assert "token-a" not in cache._entries
+        assert hash_token("token-a") in cache._entries
+
+    def test_lru_eviction(self, claims):
+        """최대 크기 초과 시 가장 오래 사용되지 않은 항목 제거"""
+        cache = TokenVerificationCache(max_size=2, clock_skew=0)
+        cache.put("token-a", claims, now=1000)
+        cache.put("token-b", claims, now=1000)
+        cache.get("token-a", now=1001)
+        cache.put("token-c", claims, now=1002)
+
+        assert cache.get("token-a", now=1003) is not None
+        assert cache.get("token-b", now=1003) is None
+        assert cache.get("token-c", now=1003) is not None
+
+    def test_skips_tokens_without_exp(self):
+        """exp 클레임이 없는 토큰은 캐시하지 않음"""
+        cache = TokenVerificationCache(max_size=10)
+        cache.put("token-a", {"uid": "u"}, now=1000)
+
+        assert len(cache) == 0
+
+    def test_revocation_check_interval(self, claims):
+        """폐기 확인 주기가 지나면 미스로 처리하고 재확인 후 다시 적중"""
+        cache = TokenVerificationCache(max_size=10, revocation_check_interval=300, clock_skew=0)
+        cache.put("token-a", claims, now=1000)
+
+        assert cache.get("token-a", now=1200) == claims
+        assert cache.get("token-a", now=1300) is None
+        assert cache.needs_revocation_check("token-a", now=1300)
+
+        cache.put("token-a", claims, now=1300, revocation_checked=True)
+        assert cache.get("token-a", now=1400) == claims
+
+    def test_invalidate_uid(self, claims):
+        """사용자 단위 캐시 무효화"""
+        cache = TokenVerificationCache(max_size=10)
+        cache.put("token-a", claims, now=1000)
+        cache.put("token-b", dict(claims, uid="other"), now=1000)
+
+        assert cache.invalidate_uid("test_user_123") == 1
+        assert cache.get("token-b", now=1001) is not None
+
+    @pytest.mark.asyncio
+    async def test_verify_firebase_token_uses_cache(self, claims, monkeypatch):
+        """두 번째 요청부터는 Firebase 서명 검증을 호출하지 않음"""
+        cache = TokenVerificationCache(max_size=10)
+        monkeypatch.setattr(security, "token_cache", cache)
+        monkeypatch.setattr(security, "firebase_initialized", True)
+
+        valid_claims = dict(claims, exp=4102444800)
+        token = "aaaa.bbbb.cccc"
+        with patch.object(security.auth, "verify_id_token", return_value=valid_claims) as mock_verify:
+            first = await security.verify_firebase_token(token)
+            second = await security.verify_firebase_token(token)
+
+        assert first == second == valid_claims
+        assert mock_verify.call_count == 1
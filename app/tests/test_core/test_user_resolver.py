@@ -0,0 +1,122 @@
+"""
+Firebase UID → 사용자 ID 해석기 테스트
+"""
+import uuid
+
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.user_resolver import UserIdResolver, users_table
+
+
+@pytest_asyncio.fixture
+async def users_db():
+    """users 테이블만 있는 인메모리 데이터베이스 (실행된 SQL 기록)"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(users_table.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        statements.clear()
+        yield session, statements
+
+    await engine.dispose()
+
+
+class TestUserIdResolver:
+    """사용자 ID 해석기 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_creates_user_once(self, users_db):
+        """신규 UID는 한 번만 생성되고 이후에는 같은 ID 반환"""
+        db, _ = users_db
+        resolver = UserIdResolver(ttl=300, max_size=10)
+
+        first = await resolver.resolve(db, "firebase-uid-1", email="a@example.com")
+        resolver.clear()
+        second = await resolver.resolve(db, "firebase-uid-1")
+
+        count = await db.execute(sa.select(sa.func.count()).select_from(users_table))
+        assert first == second
+        assert count.scalar_one() == 1
+        assert resolver.created == 1
+
+    @pytest.mark.asyncio
+    async def test_lookup_does_not_create(self, users_db):
+        """다른 사용자 UID 조회는 없으면 None (생성하지 않음), 있으면 캐시"""
+        db, statements = users_db
+        resolver = UserIdResolver(ttl=300, max_size=10)
+        created = await resolver.resolve(db, "firebase-uid-2")
+
+        assert await resolver.lookup(db, "firebase-uid-unknown") is None
+        assert await resolver.lookup(db, "firebase-uid-2") == created
+        count = await db.execute(sa.select(sa.func.count()).select_from(users_table))
+        assert count.scalar_one() == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_database(self, users_db):
+        """캐시 적중 시 쿼리 없음, 미스 시 인덱스 조회 1회"""
+        db, statements = users_db
+        await db.execute(users_table.insert().values(
+            id=uuid.uuid4(), firebase_uid="firebase-uid-2", is_active=True
+        ))
+        statements.clear()
+        resolver = UserIdResolver(ttl=300, max_size=10)
+
+        user_id = await resolver.resolve(db, "firebase-uid-2")
+        assert len(statements) == 1
+
+        assert await resolver.resolve(db, "firebase-uid-2") == user_id
+        assert len(statements) == 1
+        assert resolver.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_upsert_returns_existing_on_conflict(self, users_db):
+        """동시 생성 경합으로 이미 존재하면 기존 ID 반환"""
+        db, _ = users_db
+        resolver = UserIdResolver(ttl=300, max_size=10)
+        user_id = await resolver.resolve(db, "firebase-uid-3")
+
+        raced_id = await resolver._upsert(db, "firebase-uid-3", None, None)
+
+        assert str(raced_id) == user_id
+
+    def test_ttl_expiry_and_lru(self):
+        """TTL 만료 및 최대 크기 초과 시 제거"""
+        resolver = UserIdResolver(ttl=60, max_size=2)
+        resolver.remember("uid-a", "id-a", now=1000)
+        resolver.remember("uid-b", "id-b", now=1000)
+
+        assert resolver.get_cached("uid-a", now=1059) == "id-a"
+        resolver.remember("uid-c", "id-c", now=1000)
+        assert resolver.get_cached("uid-b", now=1001) is None
+        assert resolver.get_cached("uid-a", now=1060) is None
+
+    @pytest.mark.asyncio
+    async def test_analysis_without_uid_raises_service_error(self, users_db):
+        """user_uid 없는 분석 요청은 AIServiceException (처리되지 않은 ValueError 아님)"""
+        from app.core.exceptions import AIServiceException
+        from app.schemas.analysis import DiaryAnalysisRequest
+        from app.services.ai_service import AIAnalysisService
+
+        db, statements = users_db
+        request = DiaryAnalysisRequest(diary_id="diary-1", content="오늘은 좋은 날")
+
+        with pytest.raises(AIServiceException):
+            await AIAnalysisService().analyze_diary(request, db)
+        assert statements == []
@@ -1,10 +1,15 @@
 """
 감정 분석 서비스 테스트
 """
+import uuid
+from datetime import datetime, timedelta
+
 import pytest
+from sqlalchemy import event
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.emotion_service import EmotionAnalysisService
 from app.schemas.analysis import EmotionAnalysis, EmotionScore
+from app.tests.conftest import test_engine
 
 
 class TestEmotionAnalysisService:
@@ -245,11 +250,11 @@ class TestEmotionAnalysisService:
         assert any("긍정적인 감정" in rec for rec in recommendations_positive)
     
     @pytest.mark.asyncio
-    async def test_get_user_emotion_patterns(self, emotion_service: EmotionAnalysisService):
-        """사용자 감정 패턴 조회 테스트"""
+    async def test_get_user_emotion_patterns(self, emotion_service: EmotionAnalysisService, test_db):
+        """사용자 감정 패턴 조회 테스트 (저장된 패턴이 없으면 빈 패턴)"""
         user_id = "test_user_123"
         
-        result = await emotion_service.get_user_emotion_patterns(user_id)
+        result = await emotion_service.get_user_emotion_patterns(user_id, test_db)
         
         assert result["user_id"] == user_id
         assert "dominant_emotions" in result
@@ -286,3 +291,133 @@ class TestEmotionAnalysisService:
         # 긴 내용도 정상적으로 처리되어야 함
         assert isinstance(result, EmotionAnalysis)
         assert result.primary_emotion is not None
+
+
+class TestEmotionPatternAggregation:
+    """감정 패턴 증분 집계 (일별 버킷) 테스트 클래스"""
+    
+    @pytest.fixture
+    def emotion_service(self):
+        return EmotionAnalysisService()
+    
+    @staticmethod
+    def make_analysis(i: int) -> EmotionAnalysis:
+        """i 에 따라 주 감정과 점수가 바뀌는 감정 분석 결과"""
+        primary = ("joy", "sadness", "calm")[i % 3]
+        return EmotionAnalysis(
+            primary_emotion=primary,
+            emotions={primary: 0.7, "anxiety": 0.3},
+            sentiment_score=(i % 5) / 5 - 0.4,
+            confidence=0.9,
+        )
+    
+    async def seed_user(self, db):
+        pytest.importorskip("app.models.analysis")
+        from app.models.user import User
+        
+        user_id = uuid.uuid4()
+        db.add(User(id=user_id, firebase_uid=f"firebase_{user_id.hex[:8]}"))
+        await db.commit()
+        return user_id
+    
+    @pytest.mark.asyncio
+    async def test_incremental_updates_match_rebuild(self, emotion_service, test_db):
+        """분석마다 diary_analysis 조회 없이 반영되고, 이력 재구성 결과와 같음"""
+        from app.models.analysis import DiaryAnalysis, UserEmotionDaily
+        
+        user_id = await self.seed_user(test_db)
+        start = datetime(2026, 3, 1, 3, 0)
+        moments = [start + timedelta(hours=10 * i) for i in range(12)]
+        analyses = [self.make_analysis(i) for i in range(12)]
+        
+        # 첫 분석으로 누적 통계 생성 후, 나머지는 증분 반영
+        await emotion_service.update_user_emotion_patterns(str(user_id), test_db, analyses[0], moments[0])
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            for analysis, moment in zip(analyses[1:], moments[1:]):
+                await emotion_service.update_user_emotion_patterns(str(user_id), test_db, analysis, moment)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+        
+        assert not [statement for statement in statements if "diary_analysis" in statement]
+        incremental = await emotion_service.get_user_emotion_patterns(str(user_id), test_db)
+        
+        buckets = (await test_db.execute(
+            UserEmotionDaily.__table__.select().where(UserEmotionDaily.user_id == user_id)
+        )).all()
+        assert sum(bucket.analysis_count for bucket in buckets) == 12
+        assert len(buckets) == len({EmotionAnalysisService._local_day(moment) for moment in moments})
+        assert incremental["analysis_count"] == 12
+        assert incremental["dominant_emotions"][0] in ("joy", "sadness", "calm", "anxiety")
+        assert sum(incremental["emotion_distribution"].values()) == pytest.approx(1.0, abs=1e-3)
+        assert sum(entry["count"] for entry in incremental["weekly_patterns"].values()) == 12
+        assert set(incremental["sentiment_trends"]) == {bucket.day.isoformat() for bucket in buckets}
+        
+        # 저장된 분석으로 처음부터 재구성해도 같은 패턴
+        for i, (analysis, moment) in enumerate(zip(analyses, moments)):
+            test_db.add(DiaryAnalysis(
+                analysis_id=f"analysis_emotion_{i}", diary_id=f"diary_{i}", user_id=user_id, content="일기",
+                emotions=analysis.dict(), primary_emotion=analysis.primary_emotion,
+                sentiment_score=analysis.sentiment_score,
+                status="completed", processed_at=moment,
+            ))
+        await test_db.commit()
+        await emotion_service.update_user_emotion_patterns(str(user_id), test_db)
+        rebuilt = await emotion_service.get_user_emotion_patterns(str(user_id), test_db)
+        
+        for key in ("dominant_emotions", "emotion_trends", "sentiment_trends", "weekly_patterns",
+                    "monthly_patterns", "seasonal_patterns", "analysis_count", "analysis_period_days"):
+            assert rebuilt[key] == incremental[key], key
+        assert rebuilt["emotion_distribution"] == pytest.approx(incremental["emotion_distribution"])
+        assert rebuilt["average_sentiment"] == pytest.approx(incremental["average_sentiment"])
+        assert rebuilt["emotional_volatility"] == pytest.approx(incremental["emotional_volatility"])
+    
+    def test_local_day_uses_pattern_timezone(self):
+        """시간대 없는 시각은 UTC 로 보고 집계 시간대 날짜로 변환"""
+        late_utc = datetime(2026, 3, 1, 20, 0)
+        assert EmotionAnalysisService._local_day(late_utc).isoformat() == "2026-03-02"
+    
+    def test_emotion_observation_normalizes_shares(self):
+        """감정 점수는 비중 합 1로, 점수가 없으면 주 감정 하나"""
+        shares, sentiment, intensity = EmotionAnalysisService._emotion_observation(self.make_analysis(0))
+        assert shares == pytest.approx({"joy": 0.7, "anxiety": 0.3})
+        assert sentiment == pytest.approx(-0.4)
+        
+        shares, sentiment, intensity = EmotionAnalysisService._emotion_observation({}, "calm", None, None)
+        assert shares == {"calm": 1.0}
+        assert (sentiment, intensity) == (0.0, 0.5)
+    
+    @pytest.mark.asyncio
+    async def test_unknown_emotions_are_not_aggregated(self, emotion_service, test_db):
+        """허용 목록에 없는 감정 이름은 분포/버킷에 들어가지 않음"""
+        from app.models.analysis import UserEmotionDaily
+        
+        user_id = await self.seed_user(test_db)
+        moment = datetime(2026, 3, 1, 3, 0)
+        for emotions in ({"joy": 0.6, "행복": 0.4}, {"calm": 0.5, "Joy!": 0.5}):
+            analysis = EmotionAnalysis(primary_emotion="joy", emotions=emotions, sentiment_score=0.5, confidence=0.9)
+            await emotion_service.update_user_emotion_patterns(str(user_id), test_db, analysis, moment)
+        
+        patterns = await emotion_service.get_user_emotion_patterns(str(user_id), test_db)
+        bucket = (await test_db.execute(
+            UserEmotionDaily.__table__.select().where(UserEmotionDaily.user_id == user_id)
+        )).one()
+        assert set(patterns["emotion_distribution"]) == {"joy", "calm"}
+        assert set(bucket.emotion_sums) == {"joy", "calm"}
+        assert patterns["analysis_count"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_emotions_endpoint_hides_internal_user_id(self, test_db):
+        """감정 패턴 응답은 내부 users.id 대신 Firebase UID 만 포함"""
+        from app.api.v1.analysis import get_user_emotions
+        
+        user_id = await self.seed_user(test_db)
+        firebase_uid = f"firebase_{user_id.hex[:8]}"
+        
+        response = await get_user_emotions(current_user={"uid": firebase_uid}, db=test_db)
+        
+        assert response["user_uid"] == firebase_uid
+        assert "user_id" not in response
+        assert str(user_id) not in map(str, response.values())
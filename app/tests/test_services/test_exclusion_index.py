@@ -0,0 +1,163 @@
+"""
+차단/제외 사용자 비트맵 테스트
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.config.cache import set_redis
+from app.services import exclusion_index
+from app.services.exclusion_index import ExclusionBitmapCache, OrdinalBitmap
+
+
+class FakeRedis:
+    """get/set/delete/incr/expire 만 있는 메모리 Redis"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key) or 0) + 1
+        return self.data[key]
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+
+class TestOrdinalBitmap:
+    """서수 비트맵 테스트 클래스"""
+
+    @pytest.mark.parametrize("ordinals", [
+        [],
+        [7],
+        random.Random(1).sample(range(1, 10_000_000), 50),  # 희소 → 차분 배열
+        list(range(1, 5000, 2)),                             # 조밀 → 비트셋
+    ])
+    def test_round_trip_and_contains(self, ordinals):
+        """직렬화 왕복 후에도 같은 집합, 포함 여부가 집합 연산과 일치"""
+        bitmap = OrdinalBitmap(ordinals)
+        restored = OrdinalBitmap.from_bytes(bitmap.to_bytes())
+
+        assert restored.ordinals.tolist() == sorted(set(ordinals))
+        probes = np.array(ordinals[:20] + [0, 2, 9_999_999, -1], dtype=np.int64)
+        expected = [int(probe) in set(ordinals) for probe in probes]
+        assert restored.contains(probes).tolist() == expected
+
+    def test_dense_bitmap_is_compressed(self):
+        """연속 구간은 원시 배열보다 훨씬 작게 저장"""
+        bitmap = OrdinalBitmap(range(1, 20001))
+        assert len(bitmap.to_bytes()) < 20000 * 4 // 20
+        assert len(bitmap.union(OrdinalBitmap([30000]))) == 20001
+
+
+class TestExclusionFiltering:
+    """차단/제외 사용자 필터링 테스트 클래스"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_caches(self, monkeypatch):
+        monkeypatch.setattr(exclusion_index, "user_ordinals", exclusion_index.UserOrdinalRegistry())
+        cache = ExclusionBitmapCache()
+        monkeypatch.setattr(exclusion_index, "exclusion_bitmaps", cache)
+        redis = FakeRedis()
+        set_redis(redis)
+        yield cache, redis
+        set_redis(None)
+
+    @pytest.mark.asyncio
+    async def test_blocked_users_masked_from_candidates(self, test_db, fresh_caches):
+        """차단/제외/필터 제외 사용자는 즉시 계산과 사전 계산 응답 모두에서 빠짐"""
+        pytest.importorskip("app.models.user")
+        from app.schemas.matching import MatchingFilters
+        from app.services.match_precompute import run_precompute_job
+        from app.services.matching_service import MatchingService
+        from app.tests.conftest import TestSessionLocal
+        from app.tests.test_services.test_matching_service import seed_users
+
+        cache, redis = fresh_caches
+        user_ids = await seed_users(test_db, 8)
+        requester = str(user_ids[0])
+        bitmap = await exclusion_index.update_user_exclusions(
+            test_db, requester, blocked_users=[user_ids[1], user_ids[2]], excluded_users=[str(user_ids[3])]
+        )
+        assert len(bitmap) == 3
+        assert cache._bitmap_key(requester, 1) in redis.data
+
+        service = MatchingService()
+        hidden = {str(user_id) for user_id in user_ids[1:4]}
+        candidates = await service.find_matching_candidates(requester, test_db, limit=10, min_compatibility=0.0)
+        users = await service._get_users_matching_data(user_ids, test_db)
+        uids = {str(user_id): users[str(user_id)]["user"].firebase_uid for user_id in user_ids}
+        assert {candidate.user_uid for candidate in candidates} == {uids[user_id] for user_id in map(str, user_ids[4:])}
+
+        filtered = await service.find_matching_candidates(
+            requester, test_db, limit=10, min_compatibility=0.0,
+            filters=MatchingFilters(exclude_users=[str(user_ids[4])]),
+        )
+        assert uids[str(user_ids[4])] not in {candidate.user_uid for candidate in filtered}
+        assert len(filtered) == 3
+
+        await run_precompute_job(TestSessionLocal, top_k=7, workers=1)
+        precomputed, source = await service.get_match_candidates(requester, test_db, limit=10, min_compatibility=0.0)
+        assert source == "precomputed"
+        assert not {candidate.user_uid for candidate in precomputed} & {uids[user_id] for user_id in hidden}
+
+    @pytest.mark.asyncio
+    async def test_cache_layers(self, test_db, fresh_caches):
+        """메모리 → Redis → DB 순 조회, 변경 시 무효화"""
+        pytest.importorskip("app.models.user")
+        from app.tests.test_services.test_matching_service import seed_users
+
+        cache, redis = fresh_caches
+        user_ids = await seed_users(test_db, 4)
+        requester = str(user_ids[0])
+        await exclusion_index.update_user_exclusions(test_db, requester, blocked_users=[user_ids[1]])
+
+        # 다른 프로세스(빈 메모리 캐시)는 Redis 에서 읽음
+        other = ExclusionBitmapCache()
+        redis.data[other._bitmap_key(requester, 1)] = OrdinalBitmap([424242]).to_bytes()
+        assert (await other.get(test_db, requester)).ordinals.tolist() == [424242]
+
+        # 차단 해제 후 재조회 시 빈 비트맵 (다른 프로세스의 메모리 캐시도 버전이 바뀌어 무효)
+        await exclusion_index.update_user_exclusions(test_db, requester, blocked_users=[])
+        assert len(await cache.get(test_db, requester)) == 0
+        assert len(await other.get(test_db, requester)) == 0
+        mask = await exclusion_index.exclusion_mask(test_db, requester, user_ids[1:])
+        assert not mask.any()
+
+    @pytest.mark.asyncio
+    async def test_read_path_does_not_assign_ordinals(self, test_db, fresh_caches):
+        """비트맵 조회는 서수를 만들거나 호출자 세션을 커밋하지 않음 (서수는 저장 트랜잭션에서 부여)"""
+        pytest.importorskip("app.models.user")
+        import sqlalchemy as sa
+
+        from app.models.user import MatchingPreference, User
+        from app.tests.test_services.test_matching_service import seed_users
+
+        cache, _ = fresh_caches
+        user_ids = await seed_users(test_db, 3)
+        requester = str(user_ids[0])
+        preference = await test_db.get(MatchingPreference, user_ids[0])
+        preference.blocked_users = [str(user_ids[1])]
+        await test_db.commit()
+
+        user = await test_db.get(User, user_ids[2])
+        user.age = 99
+        assert len(await cache.get(test_db, requester)) == 0
+        assert test_db.is_modified(user)
+        count = await test_db.scalar(sa.select(sa.func.count()).select_from(exclusion_index.user_ordinals_table))
+        assert count == 0
+        await test_db.rollback()
+
+        bitmap = await exclusion_index.update_user_exclusions(test_db, requester, blocked_users=[user_ids[1]])
+        assert len(bitmap) == 1
+        assert (await test_db.get(User, user_ids[2])).age != 99
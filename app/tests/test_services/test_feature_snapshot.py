@@ -0,0 +1,166 @@
+"""
+매칭 특성 스냅샷 (mmap) 테스트
+"""
+import random
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services import matching_service as matching_service_module
+from app.services.feature_snapshot import FeatureSnapshot, MatchingFeatureStore, write_snapshot_file
+from app.services.matching_scoring import MatchingFeatures, concat_packed
+from app.services.matching_service import MatchingService
+from app.tests.test_services.test_matching_scoring import make_user_data
+
+
+class TestFeatureSnapshotFile:
+    """스냅샷 파일 테스트 클래스"""
+
+    def test_round_trip_scores_match(self, tmp_path):
+        """파일에서 복원한 특성 행렬의 점수가 원본과 동일, 없는 ID 는 -1"""
+        scorer = MatchingService().batch_scorer
+        rng = random.Random(11)
+        users_data = [make_user_data(rng, with_preference=rng.random() < 0.5) for _ in range(120)]
+        user_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in users_data]
+        features = MatchingFeatures(users_data)
+        path = str(tmp_path / "features.bin")
+
+        header = write_snapshot_file(path, user_ids, features.packed(), as_of=datetime.now(timezone.utc))
+        snapshot = FeatureSnapshot(path)
+
+        assert len(snapshot) == header["count"] == 120
+        assert not snapshot.arrays["big5"].flags.writeable  # 읽기 전용 매핑
+        rows = snapshot.rows(user_ids + [uuid.uuid4()])
+        assert rows[-1] == -1 and (rows[:-1] >= 0).all()
+
+        restored = MatchingFeatures.from_packed(snapshot.take(rows[:-1]))
+        requester = make_user_data(rng, with_preference=True)
+        requester_features = scorer.features([requester])
+        for score in (scorer.score_features, scorer.score_mutual_features):
+            np.testing.assert_allclose(
+                score(requester, requester_features, restored)["overall"],
+                score(requester, requester_features, features)["overall"],
+                atol=1e-6,
+            )
+        np.testing.assert_allclose(restored.profile_matrix(), features.profile_matrix(), atol=1e-6)
+
+    def test_concat_pads_variable_widths(self):
+        """생활 패턴 차원/관심사 열 수가 다른 부분도 이어 붙이기"""
+        rng = random.Random(12)
+        first = MatchingFeatures([make_user_data(rng) for _ in range(3)])
+        second = MatchingFeatures([{"user": None, "vector": None, "personality": None,
+                                    "emotion": None, "preference": None}])
+
+        merged = MatchingFeatures.from_packed(concat_packed([first.packed(), second.packed()]))
+
+        assert merged.size == 4
+        assert merged.lifestyle_vectors[3] is None
+        assert merged.interest_sizes[3] == 0
+        assert merged.interest_sizes[:3].tolist() == first.interest_sizes.tolist()
+
+
+class TestMatchingFeatureStore:
+    """특성 저장소 (스냅샷 + 델타) 테스트 클래스"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_replaces_candidate_loads(self, test_db, tmp_path, monkeypatch):
+        """스냅샷이 있으면 후보 관련 테이블 조회 없이 같은 결과, 변경/신규 사용자는 델타로 반영"""
+        pytest.importorskip("app.models.user")
+        from app.models.analysis import UserPersonalitySummary
+        from app.services.feature_snapshot import write_feature_snapshot
+        from app.services.interest_index import backfill_interest_bits
+        from app.tests.conftest import TestSessionLocal
+        from app.tests.test_services.test_matching_service import QueryCounter, seed_users
+
+        service = MatchingService()
+        user_ids = await seed_users(test_db, 12)
+        await backfill_interest_bits(test_db)
+        requester = str(user_ids[0])
+        baseline = await service.find_matching_candidates(requester, test_db, limit=20, min_compatibility=0.0)
+
+        path = str(tmp_path / "features.bin")
+        stats = await write_feature_snapshot(TestSessionLocal, path=path, chunk_size=5)
+        assert (stats["users"], stats["deferred"]) == (12, 0)
+        store = MatchingFeatureStore()
+        assert store.load(path)
+        monkeypatch.setattr(matching_service_module, "feature_store", store)
+
+        with QueryCounter() as counter:
+            mapped = await service.find_matching_candidates(requester, test_db, limit=20, min_compatibility=0.0)
+        assert [(c.user_uid, c.compatibility_score) for c in mapped] == \
+            [(c.user_uid, c.compatibility_score) for c in baseline]
+        assert counter.count == 6  # 요청자 5 + 후보 목록 1
+
+        # 스냅샷 이후 프로필 변경 → 델타 갱신으로 오버레이 반영
+        summary = await test_db.get(UserPersonalitySummary, user_ids[3])
+        summary.overall_mbti = "ISTJ"
+        await test_db.commit()
+        assert await store.refresh(test_db, service._get_users_matching_data) >= 1
+        found, features = await store.features(test_db, [user_ids[3]], service._get_users_matching_data)
+        assert found == [str(user_ids[3])] and features.mbti[0] == "ISTJ"
+
+        # 스냅샷에 없는 신규 사용자는 요청 시 DB 에서 읽어 오버레이에 추가
+        new_ids = await seed_users(test_db, 1)
+        found, _ = await store.features(
+            test_db, [new_ids[0], user_ids[1], uuid.uuid4()], service._get_users_matching_data
+        )
+        assert found == [str(new_ids[0]), str(user_ids[1])]
+        assert store.stats()["overlay_rows"] >= 2
+
+    @pytest.mark.asyncio
+    async def test_unregistered_interests_are_not_snapshotted(self, test_db, tmp_path):
+        """관심사가 DB 어휘에 없는 사용자는 임시 ID 로 저장하지 않고 서빙 시 DB 에서 읽음"""
+        pytest.importorskip("app.models.user")
+        from app.models.user import User
+        from app.services.feature_snapshot import write_feature_snapshot
+        from app.services.interest_index import interest_vocabulary, update_user_interests
+        from app.tests.conftest import TestSessionLocal
+        from app.tests.test_services.test_matching_service import seed_users
+
+        user_ids = await seed_users(test_db, 3)
+        await update_user_interests(test_db, str(user_ids[0]), ["등산", "요리"])
+        # 저장된 비트셋은 없지만 관심사가 모두 DB 어휘에 있는 사용자
+        user = await test_db.get(User, user_ids[1])
+        user.settings, user.interest_bits = {"interests": ["요리"]}, None
+        await test_db.commit()
+        interest_vocabulary.clear()
+
+        stats = await write_feature_snapshot(TestSessionLocal, path=str(tmp_path / "features.bin"))
+
+        assert (stats["users"], stats["deferred"]) == (2, 1)
+        store = MatchingFeatureStore()
+        store.load(str(tmp_path / "features.bin"))
+        assert (store.snapshot.rows(user_ids) >= 0).tolist() == [True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_overlay_is_capped(self, test_db, tmp_path):
+        """오버레이는 최대 크기까지만 유지, 밀려난 델타 사용자는 낡은 스냅샷 행 대신 DB 에서 다시 읽음"""
+        pytest.importorskip("app.models.user")
+        from app.models.analysis import UserPersonalitySummary
+        from app.services.feature_snapshot import write_feature_snapshot
+        from app.services.interest_index import backfill_interest_bits
+        from app.tests.conftest import TestSessionLocal
+        from app.tests.test_services.test_matching_service import seed_users
+
+        service = MatchingService()
+        user_ids = await seed_users(test_db, 6)
+        await backfill_interest_bits(test_db)
+        path = str(tmp_path / "features.bin")
+        await write_feature_snapshot(TestSessionLocal, path=path)
+        store = MatchingFeatureStore(max_overlay=2)
+        store.load(path)
+
+        for user_id in user_ids[:4]:
+            (await test_db.get(UserPersonalitySummary, user_id)).overall_mbti = "ISTJ"
+        await test_db.commit()
+        changed = await store.refresh(test_db, service._get_users_matching_data)
+
+        assert changed >= 4  # 워터마크 겹침 구간 때문에 변경 없는 사용자도 포함될 수 있음
+        assert store.stats()["overlay_rows"] == 2
+        assert store.stats()["stale_rows"] == changed - 2
+        found, features = await store.features(test_db, user_ids, service._get_users_matching_data)
+        assert found == [str(user_id) for user_id in user_ids]
+        assert list(features.mbti[:4]) == ["ISTJ"] * 4
+        assert store.stats()["overlay_rows"] == 2
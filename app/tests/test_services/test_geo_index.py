@@ -0,0 +1,79 @@
+"""
+사용자 위치 인덱스 테스트
+"""
+import numpy as np
+import pytest
+
+from app.services.geo_index import (
+    GeohashBucketIndex,
+    covering_cells,
+    encode_geohash,
+    haversine_km,
+)
+
+SEOUL = (37.5665, 126.9780)
+BUSAN = (35.1796, 129.0756)
+
+
+class TestGeohashBucketIndex:
+    """geohash 버킷 인덱스 테스트 클래스"""
+
+    @pytest.fixture(scope="class")
+    def points(self):
+        """서울 주변 반경 약 300km 내 무작위 좌표"""
+        rng = np.random.default_rng(0)
+        latitudes = SEOUL[0] + rng.uniform(-2.5, 2.5, 3000)
+        longitudes = SEOUL[1] + rng.uniform(-3.0, 3.0, 3000)
+        return [(f"user-{i}", float(lat), float(lon)) for i, (lat, lon) in enumerate(zip(latitudes, longitudes))]
+
+    @pytest.fixture
+    def index(self, points):
+        index = GeohashBucketIndex()
+        for user_id, latitude, longitude in points:
+            index.upsert(user_id, latitude, longitude)
+        return index
+
+    def test_encode_geohash(self):
+        """알려진 geohash 값과 일치"""
+        assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        assert encode_geohash(*SEOUL, 5) == "wydm9"
+
+    def test_haversine(self):
+        """서울-부산 약 325km"""
+        distance = haversine_km(*SEOUL, [BUSAN[0]], [BUSAN[1]])[0]
+        assert distance == pytest.approx(325, abs=5)
+
+    @pytest.mark.parametrize("radius_km", [0.5, 3, 20, 150, 3000])
+    def test_within_matches_brute_force(self, index, points, radius_km):
+        """반경 검색 결과가 전체 거리 계산 결과와 동일 (가까운 순)"""
+        latitudes = np.array([point[1] for point in points])
+        longitudes = np.array([point[2] for point in points])
+        for origin in (SEOUL, (37.9, 127.5), points[17][1:]):
+            distances = haversine_km(*origin, latitudes, longitudes)
+            expected = {points[i][0] for i in np.flatnonzero(distances <= radius_km)}
+
+            found = index.within(*origin, radius_km)
+
+            assert {user_id for user_id, _ in found} == expected
+            assert [distance for _, distance in found] == sorted(distance for _, distance in found)
+
+    def test_small_radius_uses_few_cells(self):
+        """작은 반경은 세밀한 셀 9개만 확인"""
+        cells = covering_cells(*SEOUL, 1.0)
+        assert len(cells) == 9
+        assert all(len(cell) >= 5 for cell in cells)
+        assert covering_cells(*SEOUL, 20000) is None
+
+    def test_move_remove_and_exclude(self, index):
+        """위치 변경/삭제/제외가 바로 반영"""
+        index.upsert("mover", *SEOUL)
+        assert "mover" in {user_id for user_id, _ in index.within(*SEOUL, 1)}
+        assert "mover" not in {user_id for user_id, _ in index.within(*SEOUL, 1, exclude={"mover"})}
+
+        index.upsert("mover", *BUSAN)
+        assert "mover" not in {user_id for user_id, _ in index.within(*SEOUL, 50)}
+        assert index.within(*BUSAN, 1)[0][0] == "mover"
+
+        index.upsert("mover", None, None)
+        assert "mover" not in index
+        assert not index.remove("mover")
@@ -0,0 +1,163 @@
+"""
+관심사 인터닝/비트셋 Jaccard 테스트
+"""
+import random
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import interest_index
+from app.services.interest_index import (
+    InterestVocabulary,
+    MinHasher,
+    bitset_from_bytes,
+    bitset_jaccard,
+    bitset_to_bytes,
+    bitset_to_ids,
+    ids_to_bitset,
+    popcount_rows,
+)
+from app.services.matching_scoring import BatchCompatibilityScorer
+from app.services.matching_service import MatchingService
+
+
+def jaccard(first: set, second: set) -> float:
+    return len(first & second) / len(first | second)
+
+
+class TestInterestBitsets:
+    """관심사 비트셋 테스트 클래스"""
+
+    def test_bitset_round_trip(self):
+        """ID ↔ 비트셋 ↔ 바이트 변환"""
+        ids = [1, 5, 63, 64, 200]
+        words = ids_to_bitset(ids)
+
+        assert words.shape == (4,)
+        assert bitset_to_ids(words).tolist() == ids
+        assert bitset_from_bytes(bitset_to_bytes(words)).tolist() == words.tolist()
+        assert bitset_from_bytes(None).size == 0
+
+    def test_popcount_table_fallback(self, monkeypatch):
+        """NumPy 1.x (bitwise_count 없음) 경로도 같은 결과"""
+        rng = np.random.default_rng(0)
+        words = rng.integers(0, 2 ** 63, size=(50, 7), dtype=np.uint64)
+        expected = [sum(bin(int(word)).count("1") for word in row) for row in words]
+
+        assert popcount_rows(words).tolist() == expected
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+        assert popcount_rows(words).tolist() == expected
+
+    def test_jaccard_matches_python_sets(self):
+        """비트셋 Jaccard = 집합 Jaccard (너비가 다른 행 포함)"""
+        rng = random.Random(3)
+        query = set(rng.sample(range(1, 300), 12))
+        candidates = [set(rng.sample(range(1, rng.choice([40, 300])), rng.randint(1, 20))) for _ in range(200)]
+
+        width = max(max(c) for c in candidates) // 64 + 1
+        matrix = np.zeros((len(candidates), width), dtype=np.uint64)
+        for i, candidate in enumerate(candidates):
+            bits = ids_to_bitset(candidate)
+            matrix[i, :bits.shape[0]] = bits
+
+        result = bitset_jaccard(ids_to_bitset(query), matrix, popcount_rows(matrix))
+
+        np.testing.assert_allclose(result, [jaccard(query, c) for c in candidates], atol=1e-6)
+
+    def test_minhash_estimates_jaccard(self):
+        """MinHash 서명 일치 비율이 실제 Jaccard 에 근접"""
+        minhasher = MinHasher(256)
+        rng = random.Random(5)
+        base = set(rng.sample(range(100000), 400))
+        others = [set(rng.sample(sorted(base), 400 - k * 40)) | set(rng.sample(range(100000, 200000), k * 40))
+                  for k in range(10)]
+
+        signatures = np.stack([minhasher.signature(sorted(other)) for other in others])
+        estimates = minhasher.similarity(minhasher.signature(sorted(base)), signatures)
+
+        np.testing.assert_allclose(estimates, [jaccard(base, other) for other in others], atol=0.1)
+
+    def test_vocabulary_skips_unregistered_names(self):
+        """등록되지 않은 관심사는 ID 를 만들지 않아 다른 워커가 받은 DB ID 와 겹치지 않음"""
+        vocabulary = InterestVocabulary()
+        assert vocabulary.ids_for(["독서", "영화"]) == []
+
+        vocabulary.register(1, "운동")
+        vocabulary.register(2, "영화")
+
+        assert vocabulary.ids_for(["독서", "영화", "운동"]) == [2, 1]
+        assert vocabulary.get("독서") is None
+        assert len(vocabulary) == 2
+
+    def test_legacy_user_bitset_uses_registered_names_only(self, monkeypatch):
+        """interest_bits 가 없는 사용자는 DB 어휘에 있는 관심사만 비트셋에 반영"""
+        vocabulary = InterestVocabulary()
+        vocabulary.register(3, "요리")
+        monkeypatch.setattr(interest_index, "interest_vocabulary", vocabulary)
+        user = SimpleNamespace(settings={"interests": ["요리", "서핑"]}, interest_bits=None)
+
+        assert interest_index.user_interest_bitset(user) == ids_to_bitset([3])
+        assert not interest_index.has_persisted_interest_ids(user)
+
+    def test_scorer_minhash_option(self, monkeypatch):
+        """MinHash 설정 시 관심사 점수는 근사치, 관심사가 없으면 0.5"""
+        vocabulary = InterestVocabulary()
+        for i in range(60):
+            vocabulary.register(i + 1, f"interest-{i}")
+        monkeypatch.setattr(interest_index, "interest_vocabulary", vocabulary)
+        service = MatchingService()
+        scorer = BatchCompatibilityScorer(service.mbti_compatibility_matrix, service.default_weights, 512)
+        names = [f"interest-{i}" for i in range(60)]
+
+        def user(interests):
+            return {"user": SimpleNamespace(settings={"interests": interests}), "vector": None,
+                    "personality": None, "emotion": None, "preference": None}
+
+        requester = user(names[:30])
+        candidates = [user(names[15:45]), user(names[:30]), user(names[40:]), user([])]
+        scores = scorer.score_components(requester, candidates)["interest"]
+
+        np.testing.assert_allclose(scores, [1 / 3, 1.0, 0.0, 0.5], atol=0.08)
+
+
+class TestInterestPersistence:
+    """관심사 인터닝 저장 테스트 클래스"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_vocabulary(self, monkeypatch):
+        vocabulary = InterestVocabulary()
+        monkeypatch.setattr(interest_index, "interest_vocabulary", vocabulary)
+        return vocabulary
+
+    @pytest.mark.asyncio
+    async def test_update_and_backfill(self, test_db, fresh_vocabulary):
+        """프로필 저장 시 인터닝 + 비트셋 저장, 기존 사용자는 일괄 생성"""
+        pytest.importorskip("app.models.user")
+        from app.models.user import User
+
+        users = [User(id=uuid.uuid4(), firebase_uid=f"interest_{i}", settings={"interests": interests})
+                 for i, interests in enumerate([["독서", "영화"], ["영화", "운동"], []])]
+        test_db.add_all(users)
+        await test_db.commit()
+
+        ids = await interest_index.update_user_interests(test_db, str(users[0].id), [" 여행 ", "독서", "독서"])
+        assert len(ids) == 2
+        assert users[0].settings["interests"] == ["여행", "독서"]
+        assert bitset_to_ids(bitset_from_bytes(users[0].interest_bits)).tolist() == sorted(ids)
+
+        assert await interest_index.backfill_interest_bits(test_db, batch_size=1) == 2
+        movie = fresh_vocabulary.get("영화")
+        assert bitset_to_ids(bitset_from_bytes(users[1].interest_bits)).tolist() == sorted(
+            [movie, fresh_vocabulary.get("운동")]
+        )
+        assert users[2].interest_bits == b""
+
+        # 저장된 비트셋과 문자열 기반 계산이 같은 점수
+        service = MatchingService()
+        stored = service._calculate_interest_compatibility({"user": users[0]}, {"user": users[1]})
+        assert stored == pytest.approx(0.0)
+        users[1].interest_bits = None
+        users[1].settings = {"interests": ["독서", "운동"]}
+        assert service._calculate_interest_compatibility({"user": users[0]}, {"user": users[1]}) == pytest.approx(1 / 3)
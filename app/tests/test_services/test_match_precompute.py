@@ -0,0 +1,175 @@
+"""
+매칭 후보 사전 계산 테스트
+"""
+import random
+import uuid
+
+import numpy as np
+import pytest
+import sqlalchemy as sa
+
+pytest.importorskip("app.models.user")
+
+from app.models.analysis import UserPersonalitySummary
+from app.models.user import MatchingPreference, User
+from app.services.match_precompute import (
+    compute_top_k_lists,
+    load_top_k_list,
+    match_candidates_table,
+    refresh_user_matches,
+    run_precompute_job,
+)
+from app.services.matching_service import MatchingService
+from app.tests.conftest import TestSessionLocal
+from app.tests.test_services.test_matching_scoring import make_user_data
+from app.tests.test_services.test_matching_service import seed_users
+
+
+class TestMatchPrecompute:
+    """사전 계산 배치 테스트 클래스"""
+
+    @pytest.fixture
+    def matching_service(self):
+        return MatchingService()
+
+    def test_parallel_matches_serial_and_pairwise(self, matching_service):
+        """프로세스 병렬 결과 = 단일 프로세스 결과 = 요청자별 배치 채점 상위 K"""
+        rng = random.Random(11)
+        users_data = [make_user_data(rng, with_preference=i % 3 == 0) for i in range(120)]
+        user_ids = [str(uuid.uuid4()) for _ in users_data]
+        scorer = matching_service.batch_scorer
+
+        serial = compute_top_k_lists(user_ids, users_data, scorer, top_k=10, workers=1, block_size=32)
+        parallel = compute_top_k_lists(user_ids, users_data, scorer, top_k=10, workers=2, block_size=32)
+
+        assert serial == parallel
+        for i in (0, 57, 119):
+            scores = scorer.score(users_data[i], users_data)
+            scores[i] = -1.0
+            expected = [user_ids[j] for j in np.lexsort((np.arange(len(scores)), -scores))[:10]]
+            assert [candidate_id for candidate_id, _ in serial[user_ids[i]]] == expected
+            assert user_ids[i] not in dict(serial[user_ids[i]])
+
+    @pytest.mark.asyncio
+    async def test_job_stores_lists_and_serves_them(self, matching_service, test_db):
+        """배치 결과를 저장하고, 후보 요청은 저장된 목록에서 응답"""
+        user_ids = await seed_users(test_db, 12)
+        (await test_db.get(User, user_ids[11])).matching_enabled = False
+        await test_db.commit()
+
+        stats = await run_precompute_job(TestSessionLocal, top_k=5, workers=1, block_size=4)
+
+        assert stats["users"] == 11
+        assert stats["rows"] == 11 * 5
+        stored = await load_top_k_list(test_db, str(user_ids[0]))
+        assert len(stored) == 5
+        assert [score for _, score in stored] == sorted((score for _, score in stored), reverse=True)
+        assert user_ids[11] not in {candidate_id for candidate_id, _ in stored}
+
+        # 저장 이후 매칭을 끈 사용자는 응답에서 제외
+        (await test_db.get(User, stored[0][0])).matching_enabled = False
+        await test_db.commit()
+
+        candidates, source = await matching_service.get_match_candidates(
+            str(user_ids[0]), test_db, limit=3, min_compatibility=0.0
+        )
+        assert source == "precomputed"
+        assert len(candidates) == 3
+        assert candidates[0].compatibility_score == round(stored[1][1], 3)
+
+    @pytest.mark.asyncio
+    async def test_new_user_falls_back_to_on_demand(self, matching_service, test_db):
+        """저장된 목록이 없는 신규 사용자는 즉시 계산"""
+        user_ids = await seed_users(test_db, 4)
+
+        candidates, source = await matching_service.get_match_candidates(
+            str(user_ids[0]), test_db, limit=3, min_compatibility=0.0
+        )
+
+        assert source == "on_demand"
+        assert len(candidates) == 3
+        assert all(candidate.user_uid.startswith("firebase_") for candidate in candidates)
+
+    @pytest.mark.asyncio
+    async def test_refresh_patches_lists_containing_user(self, matching_service, test_db):
+        """프로필 변경 시 해당 사용자 항목만 다시 채점해 목록 패치"""
+        user_ids = await seed_users(test_db, 15)
+        await run_precompute_job(TestSessionLocal, top_k=5, workers=1)
+        target = str(user_ids[3])
+        before = {
+            str(user_id): await load_top_k_list(test_db, str(user_id)) for user_id in user_ids
+        }
+        computed_at = await self._computed_at(test_db)
+
+        summary = await test_db.get(UserPersonalitySummary, user_ids[3])
+        summary.overall_mbti = "INFJ"
+        summary.overall_big5 = {"openness": 0.1, "extraversion": 0.9}
+        await test_db.commit()
+
+        stats = await refresh_user_matches(test_db, target, top_k=5, matching_service=matching_service)
+
+        users_data = await matching_service._get_users_matching_data(user_ids, test_db)
+        assert stats["patched"] > 0
+        for user_id in map(str, user_ids):
+            if user_id == target:
+                continue
+            after = [(str(candidate_id), score) for candidate_id, score in await load_top_k_list(test_db, user_id)]
+            old = [(str(candidate_id), score) for candidate_id, score in before[user_id] if str(candidate_id) != target]
+            new_score = float(matching_service.batch_scorer.score(users_data[user_id], [users_data[target]])[0])
+            expected = sorted(old + [(target, new_score)], key=lambda entry: -entry[1])[:5]
+            assert [candidate_id for candidate_id, _ in after] == [candidate_id for candidate_id, _ in expected]
+            np.testing.assert_allclose([s for _, s in after], [s for _, s in expected], atol=1e-6)
+
+        # 패치된 목록도 야간 계산 시각 유지, 본인 목록만 새로 계산
+        refreshed = await self._computed_at(test_db)
+        assert all(refreshed[user_id] == computed_at[user_id] for user_id in refreshed if user_id != target)
+        assert refreshed[target] != computed_at[target]
+        own = await load_top_k_list(test_db, target)
+        assert len(own) == 5 and uuid.UUID(target) not in dict(own)
+
+    @pytest.mark.asyncio
+    async def test_refresh_respects_owner_age_range(self, matching_service, test_db, monkeypatch):
+        """목록 주인 전체를 한 번에 채점하고, 주인의 선호 나이 범위 밖이면 목록에서 뺌"""
+        user_ids = await seed_users(test_db, 10)
+        await run_precompute_job(TestSessionLocal, top_k=9, workers=1)
+        target = user_ids[0]  # 나이 20
+        owner = await test_db.get(MatchingPreference, user_ids[1])
+        owner.preferred_age_min, owner.preferred_age_max = 25, 40
+        await test_db.commit()
+
+        calls = []
+        score_mutual = matching_service.batch_scorer.score_mutual_features
+        monkeypatch.setattr(
+            matching_service.batch_scorer, "score_mutual_features",
+            lambda *args: calls.append(args[2].size) or score_mutual(*args),
+        )
+        await refresh_user_matches(test_db, str(target), top_k=9, matching_service=matching_service)
+
+        assert calls == [9]
+        assert target not in dict(await load_top_k_list(test_db, str(user_ids[1])))
+        assert target in dict(await load_top_k_list(test_db, str(user_ids[2])))
+
+    @pytest.mark.asyncio
+    async def test_refresh_removes_disabled_user(self, matching_service, test_db):
+        """매칭을 끈 사용자는 모든 목록에서 제거"""
+        user_ids = await seed_users(test_db, 10)
+        await run_precompute_job(TestSessionLocal, top_k=9, workers=1)
+        (await test_db.get(User, user_ids[0])).matching_enabled = False
+        await test_db.commit()
+
+        await refresh_user_matches(test_db, str(user_ids[0]), top_k=9, matching_service=matching_service)
+
+        result = await test_db.execute(
+            sa.select(match_candidates_table.c.user_id).where(
+                sa.or_(match_candidates_table.c.candidate_id == user_ids[0],
+                       match_candidates_table.c.user_id == user_ids[0])
+            )
+        )
+        assert result.all() == []
+
+    async def _computed_at(self, db):
+        result = await db.execute(
+            sa.select(match_candidates_table.c.user_id, sa.func.max(match_candidates_table.c.computed_at))
+            .group_by(match_candidates_table.c.user_id)
+        )
+        return {str(user_id): computed_at for user_id, computed_at in result.all()}
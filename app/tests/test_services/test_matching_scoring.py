@@ -0,0 +1,199 @@
+"""
+배치 호환성 점수 계산 테스트 (쌍별 계산과의 일치 여부)
+"""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.matching_scoring import MatchingFeatures, select_diverse_top_k, select_top_k
+from app.services.matching_service import MatchingService
+
+MBTI_TYPES = ["ENFJ", "ENFP", "ENTJ", "ENTP", "ESFJ", "ESFP", "ESTJ", "ESTP",
+              "INFJ", "INFP", "INTJ", "INTP", "ISFJ", "ISFP", "ISTJ", "ISTP"]
+INTERESTS = ["독서", "영화", "운동", "여행", "음악", "요리", "게임", "사진"]
+EMOTIONS = ["anxiety", "calm", "sadness", "joy", "anger", "peace", "stress", "relaxation"]
+
+
+def make_user_data(rng: random.Random, with_preference: bool = False) -> dict:
+    """일부 항목이 비어 있는 무작위 매칭 데이터"""
+    def maybe(value, probability=0.8):
+        return value if rng.random() < probability else None
+
+    personality = maybe(SimpleNamespace(
+        overall_mbti=maybe(rng.choice(MBTI_TYPES)),
+        overall_big5=maybe({
+            trait: rng.random()
+            for trait in ["openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism"]
+            if rng.random() < 0.9
+        }),
+    ))
+    emotion = maybe(SimpleNamespace(
+        emotional_volatility=maybe(rng.random()),
+        avg_sentiment_score=maybe(rng.uniform(-1, 1)),
+        emotion_distribution=maybe({e: rng.random() for e in rng.sample(EMOTIONS, rng.randint(1, 8))}),
+    ))
+    dimension = rng.choice([4, 4, 4, 3])
+    vector = SimpleNamespace(
+        lifestyle_vector=maybe([rng.uniform(-1, 1) for _ in range(dimension)])
+    )
+    user = SimpleNamespace(settings=maybe({"interests": rng.sample(INTERESTS, rng.randint(0, 5))}))
+    preference = SimpleNamespace(
+        personality_weight=rng.randint(0, 60),
+        emotion_weight=rng.randint(0, 40),
+        lifestyle_weight=rng.randint(0, 40),
+        interest_weight=rng.randint(0, 30),
+    ) if with_preference else None
+
+    return {"user": user, "vector": vector, "personality": personality,
+            "emotion": emotion, "preference": preference}
+
+
+class TestBatchCompatibilityScorer:
+    """배치 점수 계산 테스트 클래스"""
+
+    @pytest.fixture
+    def matching_service(self):
+        return MatchingService()
+
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    @pytest.mark.asyncio
+    async def test_matches_pairwise_scores(self, matching_service, seed):
+        """영역별/전체 점수가 쌍별 계산과 허용 오차 내에서 일치"""
+        rng = random.Random(seed)
+        requester = make_user_data(rng, with_preference=seed % 2 == 0)
+        candidates = [make_user_data(rng) for _ in range(300)]
+
+        components = matching_service.batch_scorer.score_components(requester, candidates)
+
+        pairwise = {
+            "personality": matching_service._calculate_personality_compatibility,
+            "emotion": matching_service._calculate_emotion_compatibility,
+            "lifestyle": matching_service._calculate_lifestyle_compatibility,
+            "interest": matching_service._calculate_interest_compatibility,
+        }
+        for name, function in pairwise.items():
+            expected = np.array([function(requester, candidate) for candidate in candidates])
+            np.testing.assert_allclose(components[name], expected, atol=1e-5, err_msg=name)
+
+        expected_overall = np.array([
+            await matching_service._calculate_compatibility_score(requester, candidate)
+            for candidate in candidates
+        ])
+        np.testing.assert_allclose(components["overall"], expected_overall, atol=1e-5)
+        assert components["overall"].dtype == np.float32
+
+    def test_requester_without_data(self, matching_service):
+        """요청자 데이터가 없으면 모든 영역 0.5"""
+        rng = random.Random(7)
+        requester = {"user": SimpleNamespace(settings=None), "vector": None,
+                     "personality": None, "emotion": None, "preference": None}
+        candidates = [make_user_data(rng) for _ in range(20)]
+
+        components = matching_service.batch_scorer.score_components(requester, candidates)
+
+        for name in ("personality", "emotion", "lifestyle", "interest", "overall"):
+            np.testing.assert_allclose(components[name], 0.5, atol=1e-6)
+
+    def test_select_top_k(self):
+        """최소 점수 이상 중 상위 k개를 내림차순으로 (동점은 원래 순서)"""
+        scores = np.array([0.2, 0.9, 0.5, 0.9, 0.7, 0.4], dtype=np.float32)
+
+        assert select_top_k(scores, 3, 0.0).tolist() == [1, 3, 4]
+        assert select_top_k(scores, 10, 0.5).tolist() == [1, 3, 4, 2]
+        assert select_top_k(scores, 2, 0.95).tolist() == []
+        assert select_top_k(scores, 0, 0.0).tolist() == []
+
+    def test_select_top_k_matches_full_sort(self):
+        """argpartition 선택 결과가 전체 정렬 결과와 동일"""
+        rng = np.random.default_rng(0)
+        scores = rng.random(5000).astype(np.float32).round(2)
+
+        expected = sorted(np.flatnonzero(scores >= 0.3), key=lambda i: (-scores[i], i))[:50]
+        assert select_top_k(scores, 50, 0.3).tolist() == expected
+
+
+class TestDiverseSelection:
+    """다양성(MMR) 재정렬 테스트 클래스"""
+
+    @staticmethod
+    def clustered_candidates():
+        """점수가 높은 거의 같은 프로필 8명 + 점수가 조금 낮은 서로 다른 프로필 8명"""
+        rng = random.Random(4)
+        twins = [
+            {"user": SimpleNamespace(settings={"interests": ["게임", "음악"]}),
+             "vector": SimpleNamespace(lifestyle_vector=[0.9, 0.1, 0.1, 0.9]),
+             "personality": SimpleNamespace(overall_mbti="ENTP", overall_big5={"openness": 0.9, "extraversion": 0.9}),
+             "emotion": None, "preference": None}
+            for _ in range(8)
+        ]
+        others = [make_user_data(rng) for _ in range(8)]
+        scores = np.array([0.9 - 0.001 * i for i in range(8)] + [0.85 - 0.001 * i for i in range(8)],
+                          dtype=np.float32)
+        return MatchingFeatures(twins + others), scores
+
+    def test_zero_diversity_is_plain_top_k(self):
+        """diversity 0 이면 점수 순 선택과 동일"""
+        features, scores = self.clustered_candidates()
+        assert select_diverse_top_k(scores, features, 5, 0.0, 0.5).tolist() == select_top_k(scores, 5, 0.5).tolist()
+
+    def test_diversity_spreads_clustered_profiles(self):
+        """비슷한 프로필이 상위를 독차지하지 않고, 최고 점수 후보는 그대로 1순위"""
+        features, scores = self.clustered_candidates()
+
+        plain = select_diverse_top_k(scores, features, 5, 0.0)
+        diverse = select_diverse_top_k(scores, features, 5, 0.5)
+
+        assert all(index < 8 for index in plain)
+        assert diverse[0] == 0
+        assert sum(index < 8 for index in diverse) == 1
+        assert len(set(diverse.tolist())) == 5
+        assert select_diverse_top_k(scores, features, 5, 0.5, min_score=0.86).tolist() == [0, 1, 2, 3, 4]
+
+    def test_diversity_from_preference(self):
+        """선호도 diversity_factor(0~100) → 0~1, 없으면 0"""
+        diversity_for = MatchingService().batch_scorer.diversity_for
+        assert diversity_for({"preference": SimpleNamespace(diversity_factor=30)}) == pytest.approx(0.3)
+        assert diversity_for({"preference": SimpleNamespace(diversity_factor=None)}) == 0.0
+        assert diversity_for({"preference": None}) == 0.0
+
+
+class TestMutualScoring:
+    """상호 점수 테스트 클래스"""
+
+    @pytest.mark.parametrize("seed", [5, 6])
+    def test_backward_matches_candidate_perspective(self, seed):
+        """역방향 점수 = 후보를 요청자로 놓고 계산한 점수, 전체 = 두 방향의 조화 평균"""
+        scorer = MatchingService().batch_scorer
+        rng = random.Random(seed)
+        requester = make_user_data(rng, with_preference=True)
+        candidates = [make_user_data(rng, with_preference=rng.random() < 0.6) for _ in range(200)]
+
+        result = scorer.score_mutual_features(requester, scorer.features([requester]), scorer.features(candidates))
+
+        expected_backward = np.array([scorer.score(candidate, [requester])[0] for candidate in candidates])
+        np.testing.assert_allclose(result["backward"], expected_backward, atol=1e-5)
+        np.testing.assert_allclose(result["forward"], scorer.score(requester, candidates), atol=1e-6)
+        forward, backward = result["forward"], result["backward"]
+        np.testing.assert_allclose(result["overall"], 2 * forward * backward / (forward + backward), atol=1e-6)
+
+    def test_age_preferences_filter_each_direction(self):
+        """점수를 매기는 쪽의 선호 나이 범위 밖이면 그 방향 0점 → 상호 점수 0"""
+        scorer = MatchingService().batch_scorer
+
+        def user(age, age_min=None, age_max=None):
+            return {"user": SimpleNamespace(settings={"interests": ["독서"]}, age=age), "vector": None,
+                    "personality": None, "emotion": None,
+                    "preference": SimpleNamespace(personality_weight=25, emotion_weight=25, lifestyle_weight=25,
+                                                  interest_weight=25, preferred_age_min=age_min,
+                                                  preferred_age_max=age_max)}
+
+        requester = user(30, age_min=25, age_max=35)
+        candidates = [user(28), user(40), user(28, age_max=29), user(None, age_min=31)]
+
+        result = scorer.score_mutual_features(requester, scorer.features([requester]), scorer.features(candidates))
+
+        assert (result["forward"] > 0).tolist() == [True, False, True, True]
+        assert (result["backward"] > 0).tolist() == [True, True, False, False]
+        assert (result["overall"] > 0).tolist() == [True, False, False, False]
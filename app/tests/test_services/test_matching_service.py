@@ -0,0 +1,410 @@
+"""
+매칭 서비스 테스트
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text, update
+
+pytest.importorskip("app.models.user")
+
+from app.models.analysis import UserEmotionPattern, UserPersonalitySummary
+from app.models.user import MatchingPreference, User, UserVector
+from app.schemas.matching import MatchingFilters
+from app.services import matching_service as matching_service_module
+from app.services.exclusion_index import update_user_exclusions
+from app.services.geo_index import (
+    GeohashBucketIndex,
+    build_user_geo_index,
+    refresh_user_geo_index,
+    update_user_location,
+    user_geo_index,
+)
+from app.services.match_explanation import MatchResultCache
+from app.services.user_vectors import VECTOR_VERSION
+from app.services.matching_service import MatchingService
+from app.services.vector_index import build_user_vector_index, user_vector_index
+from app.tests.conftest import explain_query_plan, test_engine
+
+
+async def seed_users(db, count: int):
+    """매칭 데이터가 모두 있는 사용자 생성"""
+    now = datetime.utcnow()
+    user_ids = []
+    for i in range(count):
+        user_id = uuid.uuid4()
+        user_ids.append(user_id)
+        db.add(User(
+            id=user_id,
+            firebase_uid=f"firebase_{uuid.uuid4().hex[:8]}_{i}",
+            age=20 + i % 20,
+            location="서울 강남구",
+            settings={"interests": ["독서", "영화"] if i % 2 else ["운동"]},
+            is_active=True,
+            matching_enabled=True,
+            last_active=now - timedelta(minutes=i),
+        ))
+        db.add(UserVector(
+            user_id=user_id, lifestyle_vector=[0.1 * (i % 5), 0.5, 0.3], vector_version=VECTOR_VERSION
+        ))
+        db.add(UserPersonalitySummary(
+            user_id=user_id,
+            overall_mbti="ENFP" if i % 2 else "INTJ",
+            overall_big5={"openness": 0.7, "extraversion": 0.1 * (i % 10)},
+        ))
+        db.add(UserEmotionPattern(user_id=user_id, avg_sentiment_score=0.2, emotional_volatility=0.3))
+        db.add(MatchingPreference(user_id=user_id))
+    await db.commit()
+    return user_ids
+
+
+class QueryCounter:
+    """테스트 엔진에서 실행된 SELECT 수 기록"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(test_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(test_engine.sync_engine, "before_cursor_execute", self)
+
+
+class TestMatchingService:
+    """매칭 서비스 테스트 클래스"""
+
+    @pytest.fixture
+    def matching_service(self):
+        return MatchingService()
+
+    @pytest.mark.asyncio
+    async def test_bulk_loader_query_budget(self, matching_service, test_db):
+        """사용자 수와 무관하게 테이블당 쿼리 1회 (5회)"""
+        user_ids = await seed_users(test_db, 30)
+
+        with QueryCounter() as counter:
+            users_data = await matching_service._get_users_matching_data(
+                [str(user_id) for user_id in user_ids], test_db
+            )
+
+        assert counter.count == 5
+        assert len(users_data) == 30
+        sample = users_data[str(user_ids[0])]
+        assert sample["user"].firebase_uid.endswith("_0")
+        assert sample["vector"] is not None
+        assert sample["personality"].overall_mbti == "INTJ"
+        assert sample["preference"] is not None
+
+    @pytest.mark.asyncio
+    async def test_bulk_loader_reuses_loaded_users(self, matching_service, test_db):
+        """이미 조회한 User 객체를 넘기면 users 조회 생략"""
+        user_ids = await seed_users(test_db, 3)
+        users = [await test_db.get(User, user_id) for user_id in user_ids]
+
+        with QueryCounter() as counter:
+            users_data = await matching_service._get_users_matching_data(user_ids, test_db, users=users)
+
+        assert counter.count == 4
+        assert set(users_data) == {str(user_id) for user_id in user_ids}
+
+    @pytest.mark.asyncio
+    async def test_vectors_stored_as_float32_bytes(self, matching_service, test_db):
+        """벡터는 float32 bytes 로 저장되고 읽기 전용 float32 배열로 로드"""
+        user_ids = await seed_users(test_db, 2)
+        test_db.expire_all()
+
+        raw = await test_db.execute(text("SELECT lifestyle_vector FROM user_vectors"))
+        assert [len(row[0]) for row in raw.all()] == [3 * 4, 3 * 4]
+
+        users_data = await matching_service._get_users_matching_data(user_ids, test_db)
+        vector = users_data[str(user_ids[1])]["vector"].lifestyle_vector
+        assert vector.dtype == np.float32 and not vector.flags.writeable
+        np.testing.assert_allclose(vector, [0.1, 0.5, 0.3], rtol=1e-6)
+
+    @pytest.mark.asyncio
+    async def test_find_matching_candidates_constant_queries(self, matching_service, test_db):
+        """후보 수가 늘어나도 find_matching_candidates 의 쿼리 수는 고정"""
+        user_ids = await seed_users(test_db, 5)
+        with QueryCounter() as small:
+            await matching_service.find_matching_candidates(
+                str(user_ids[0]), test_db, limit=5, min_compatibility=0.0
+            )
+
+        await seed_users(test_db, 60)
+        with QueryCounter() as large:
+            await matching_service.find_matching_candidates(
+                str(user_ids[0]), test_db, limit=5, min_compatibility=0.0
+            )
+
+        # 요청자 5 + 후보 목록 1 + 후보 관련 데이터 4
+        assert small.count == large.count == 10
+
+    @pytest.mark.asyncio
+    async def test_mutual_mode_respects_candidate_preferences(self, matching_service, test_db):
+        """상호 점수 모드는 요청자를 선호 나이 밖으로 두는 후보를 제외 (쿼리 수는 그대로)"""
+        user_ids = await seed_users(test_db, 6)
+        preference = await test_db.get(MatchingPreference, user_ids[1])
+        preference.preferred_age_min = 30  # 요청자는 20세
+        await test_db.commit()
+        users = await matching_service._get_users_matching_data(user_ids, test_db)
+        picky = users[str(user_ids[1])]["user"].firebase_uid
+
+        one_sided = await matching_service.find_matching_candidates(
+            str(user_ids[0]), test_db, limit=10, min_compatibility=0.0
+        )
+        with QueryCounter() as counter:
+            mutual = await matching_service.find_matching_candidates(
+                str(user_ids[0]), test_db, limit=10, min_compatibility=0.01, mutual=True
+            )
+
+        assert picky in {candidate.user_uid for candidate in one_sided}
+        assert picky not in {candidate.user_uid for candidate in mutual}
+        assert len(mutual) == 4
+        assert counter.count == 10
+
+    @pytest.mark.asyncio
+    async def test_unknown_and_invalid_ids(self, matching_service, test_db):
+        """존재하지 않거나 형식이 잘못된 ID는 결과에서 제외"""
+        await seed_users(test_db, 1)
+
+        users_data = await matching_service._get_users_matching_data(
+            [str(uuid.uuid4()), "firebase-uid-not-uuid"], test_db
+        )
+
+        assert users_data == {}
+
+    @pytest.mark.asyncio
+    async def test_candidates_from_vector_index(self, matching_service, test_db):
+        """벡터 인덱스가 있으면 요청자와 가까운 순서로 후보 조회"""
+        user_ids = await seed_users(test_db, 6)
+        vectors = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.7, 0.3], [0.5, 0.5], [0.95, 0.05]]
+        for user_id, vector in zip(user_ids, vectors):
+            (await test_db.get(UserVector, user_id)).combined_vector = vector
+        (await test_db.get(User, user_ids[5])).matching_enabled = False
+        await test_db.commit()
+
+        await build_user_vector_index(test_db)
+        try:
+            candidates = await matching_service._get_candidate_users(
+                str(user_ids[0]), None, test_db, vectors[0]
+            )
+        finally:
+            user_vector_index.clear()
+
+        assert [candidate.id for candidate in candidates] == [
+            user_ids[1], user_ids[3], user_ids[4], user_ids[2]
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_index", [True, False])
+    async def test_radius_filter_uses_preferred_radius(self, matching_service, test_db, use_index):
+        """선호 반경 내 사용자만 가까운 순으로 조회 (위치 인덱스 / 위경도 범위 조회)"""
+        user_ids = await seed_users(test_db, 5)
+        # 요청자(서울시청) 기준 약 0km, 3km, 11km, 25km, 325km(부산)
+        coordinates = [(37.5665, 126.9780), (37.5665, 127.0120), (37.4665, 126.9780),
+                       (37.7900, 126.9780), (35.1796, 129.0756)]
+        for user_id, (latitude, longitude) in zip(user_ids, coordinates):
+            await update_user_location(test_db, str(user_id), latitude, longitude)
+        (await test_db.get(MatchingPreference, user_ids[0])).preferred_location_radius = 20
+        await test_db.commit()
+        if not use_index:
+            user_geo_index.clear()
+
+        try:
+            candidates = await matching_service.find_matching_candidates(
+                str(user_ids[0]), test_db, limit=10, min_compatibility=0.0
+            )
+            wider = await matching_service._get_candidate_users(
+                str(user_ids[0]), MatchingFilters(radius_km=30), test_db,
+                origin=coordinates[0], radius_km=30,
+            )
+        finally:
+            user_geo_index.clear()
+
+        users = {user_id: await test_db.get(User, user_id) for user_id in user_ids}
+        assert {candidate.user_uid for candidate in candidates} == {
+            users[user_ids[1]].firebase_uid, users[user_ids[2]].firebase_uid
+        }
+        assert {candidate.distance for candidate in candidates} == {"3km", "11km"}
+        assert [user.id for user in wider] == [user_ids[1], user_ids[2], user_ids[3]]
+
+    @pytest.mark.asyncio
+    async def test_geo_index_refresh_applies_other_workers_changes(self, test_db):
+        """다른 워커가 DB 에 쓴 위치/매칭 허용 변경이 델타 갱신으로 반영"""
+        user_ids = await seed_users(test_db, 3)
+        for user_id in user_ids:
+            await update_user_location(test_db, str(user_id), 37.5665, 126.9780)
+        user_geo_index.clear()
+        index = await build_user_geo_index(test_db, GeohashBucketIndex())
+        assert len(index) == 3 and index.synced_at is not None
+
+        # 이 프로세스의 인덱스를 거치지 않는 변경 (다른 워커)
+        await test_db.execute(update(User).where(User.id == user_ids[0]).values(latitude=35.1796, longitude=129.0756))
+        await test_db.execute(update(User).where(User.id == user_ids[1]).values(matching_enabled=False))
+        await test_db.commit()
+        await refresh_user_geo_index(test_db, index)
+
+        nearby = {user_id for user_id, _ in index.within(37.5665, 126.9780, 10)}
+        assert nearby == {str(user_ids[2])}
+        assert str(user_ids[1]) not in index
+        assert index.within(35.1796, 129.0756, 1)[0][0] == str(user_ids[0])
+
+    @pytest.mark.asyncio
+    async def test_location_update_indexes_only_matchable_users(self, test_db):
+        """매칭을 끈 사용자는 좌표를 저장해도 위치 인덱스에 들어가지 않음 (있던 항목은 제거)"""
+        user_ids = await seed_users(test_db, 2)
+        try:
+            for user_id in user_ids:
+                await update_user_location(test_db, str(user_id), 37.5665, 126.9780)
+            assert all(str(user_id) in user_geo_index for user_id in user_ids)
+
+            await test_db.execute(update(User).where(User.id == user_ids[1]).values(matching_enabled=False))
+            await test_db.commit()
+            await update_user_location(test_db, str(user_ids[1]), 37.5700, 126.9800)
+            assert str(user_ids[1]) not in user_geo_index
+            assert str(user_ids[0]) in user_geo_index
+        finally:
+            user_geo_index.clear()
+
+    @pytest.mark.asyncio
+    async def test_location_filter_is_case_insensitive_substring(self, matching_service, test_db):
+        """지역 필터는 대소문자 무시 부분 일치, 와일드카드 문자는 그대로 비교"""
+        user_ids = await seed_users(test_db, 3)
+        (await test_db.get(User, user_ids[1])).location = "Seoul Gangnam"
+        await test_db.commit()
+
+        async def matched(location):
+            users = await matching_service._get_candidate_users(
+                str(user_ids[0]), MatchingFilters(location=location), test_db
+            )
+            return {user.id for user in users}
+
+        assert await matched("강남") == {user_ids[2]}
+        assert await matched("gangnam") == {user_ids[1]}
+        assert await matched("%") == set()
+
+    @pytest.mark.asyncio
+    async def test_explanation_is_lazy_and_cached_by_profile_version(self, matching_service, test_db, monkeypatch):
+        """카드에는 근거가 없고, 설명은 요청 시 계산 후 프로필이 바뀔 때까지 캐시"""
+        cache = MatchResultCache()
+        monkeypatch.setattr(matching_service_module, "explanation_cache", cache)
+        user_ids = await seed_users(test_db, 4)
+        requester, candidate = str(user_ids[1]), str(user_ids[3])
+        for user_id in (user_ids[1], user_ids[3]):
+            (await test_db.get(UserPersonalitySummary, user_id)).personality_traits = ["외향적 성향", "창의적"]
+        await test_db.commit()
+
+        cards = await matching_service.find_matching_candidates(requester, test_db, limit=3, min_compatibility=0.0)
+        assert "match_reasons" not in cards[0].dict()
+
+        first = await matching_service.explain_match(requester, candidate, test_db)
+        with QueryCounter() as counter:
+            second = await matching_service.explain_match(requester, candidate, test_db)
+
+        assert first == second
+        assert counter.count == 1  # 프로필 버전 조회만
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert set(first.shared_traits) == {"외향적 성향", "창의적"}
+        assert first.common_interests == ["독서", "영화"]
+        assert first.match_reasons
+
+        # 후보 프로필이 바뀌면 새 버전으로 다시 계산
+        summary = await test_db.get(UserPersonalitySummary, user_ids[3])
+        summary.personality_traits = ["창의적"]
+        summary.updated_at = datetime.utcnow() + timedelta(seconds=5)
+        await test_db.commit()
+        third = await matching_service.explain_match(requester, candidate, test_db)
+        assert third.shared_traits == ["창의적"]
+        assert third.profile_version != first.profile_version
+
+        # 매칭을 끈 후보, 없는 후보
+        (await test_db.get(User, user_ids[3])).matching_enabled = False
+        await test_db.commit()
+        for missing in (candidate, str(uuid.uuid4())):
+            with pytest.raises(ValueError):
+                await matching_service.explain_match(requester, missing, test_db)
+
+    @pytest.mark.asyncio
+    async def test_compatibility_cache_shared_by_both_directions(self, matching_service, test_db, monkeypatch):
+        """A→B 계산 후 B→A 는 캐시에서 (방향별 가중치 유지), 프로필이 바뀌면 다시 계산"""
+        cache = MatchResultCache(key_prefix="matching:compatibility:")
+        monkeypatch.setattr(matching_service_module, "compatibility_cache", cache)
+        user_ids = await seed_users(test_db, 2)
+        preference = await test_db.get(MatchingPreference, user_ids[1])
+        preference.personality_weight, preference.emotion_weight = 100, 0
+        preference.lifestyle_weight, preference.interest_weight = 0, 0
+        await test_db.commit()
+        a, b = str(user_ids[0]), str(user_ids[1])
+
+        forward = await matching_service.calculate_compatibility(a, b, test_db)
+        with QueryCounter() as counter:
+            backward = await matching_service.calculate_compatibility(b, a, test_db)
+
+        assert counter.count == 1  # 프로필 버전 조회만
+        assert len(cache) == 1
+        assert (forward.user1_uid, forward.user2_uid) == (backward.user2_uid, backward.user1_uid)
+        assert backward.overall_score == backward.compatibility_breakdown["personality_compatibility"]
+        assert forward.overall_score != backward.overall_score
+
+        summary = await test_db.get(UserPersonalitySummary, user_ids[0])
+        summary.overall_mbti = "ENFP"
+        summary.updated_at = datetime.utcnow() + timedelta(seconds=5)
+        await test_db.commit()
+        changed = await matching_service.calculate_compatibility(b, a, test_db)
+        assert len(cache) == 2
+        assert changed.compatibility_breakdown != backward.compatibility_breakdown
+
+        # 차단했거나 매칭을 끈 상대는 캐시가 있어도 조회 불가
+        await update_user_exclusions(test_db, a, blocked_users=[b])
+        with pytest.raises(ValueError):
+            await matching_service.calculate_compatibility(a, b, test_db)
+        await update_user_exclusions(test_db, a, blocked_users=[])
+        (await test_db.get(User, user_ids[0])).matching_enabled = False
+        await test_db.commit()
+        with pytest.raises(ValueError):
+            await matching_service.calculate_compatibility(b, a, test_db)
+
+
+class TestCandidateQueryPlan:
+    """후보 조회가 테이블 크기와 무관하게 부분 인덱스를 쓰는지 (EXPLAIN)"""
+
+    @pytest_asyncio.fixture
+    async def populated_db(self, test_db):
+        """매칭 불가 사용자가 섞인 집단 + 통계 수집"""
+        user_ids = await seed_users(test_db, 200)
+        for user_id in user_ids[::3]:
+            (await test_db.get(User, user_id)).matching_enabled = False
+        await test_db.commit()
+        await test_db.execute(text("ANALYZE"))
+        return test_db, user_ids
+
+    @pytest.mark.asyncio
+    async def test_recent_candidates_use_last_active_index(self, populated_db):
+        """최근 활동 순 조회는 부분 인덱스 순서대로 읽고 별도 정렬 없음"""
+        db, user_ids = populated_db
+        query = MatchingService._candidate_query(User, str(user_ids[0]), None)
+
+        plan = await explain_query_plan(db, query.order_by(User.last_active.desc()).limit(100))
+
+        assert "USING INDEX ix_users_matchable_last_active" in plan
+        assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.asyncio
+    async def test_age_filter_uses_age_index(self, populated_db):
+        """나이 범위 필터는 나이 부분 인덱스 범위 검색"""
+        db, user_ids = populated_db
+        filters = MatchingFilters(age_range=(25, 26))
+        query = MatchingService._candidate_query(User, str(user_ids[0]), filters)
+
+        plan = await explain_query_plan(db, query.order_by(User.last_active.desc()).limit(100))
+
+        assert "SEARCH users USING INDEX ix_users_matchable_age" in plan
@@ -0,0 +1,193 @@
+"""
+성격 분석 서비스 테스트
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import and_, event, literal_column, select
+
+pytest.importorskip("app.models.analysis")
+
+from app.config.settings import get_settings
+from app.models.analysis import DiaryAnalysis, UserPersonalitySummary
+from app.models.user import User
+from app.services.personality_service import PersonalityAnalysisService
+from app.tests.conftest import explain_query_plan, test_engine
+from app.utils.running_stats import RunningStats, decay_for_half_life
+
+
+class TestHistoricalAnalyses:
+    """사용자 이전 성격 분석 조회 테스트 클래스"""
+
+    @pytest.fixture
+    def personality_service(self):
+        return PersonalityAnalysisService()
+
+    async def seed_analyses(self, db, user_id, count: int):
+        """완료/실패/성격 없음 분석이 섞인 이력 (i 가 클수록 최근)"""
+        now = datetime.utcnow()
+        db.add(User(id=user_id, firebase_uid=f"firebase_{uuid.uuid4().hex[:8]}"))
+        for i in range(count):
+            db.add(DiaryAnalysis(
+                analysis_id=f"analysis_{user_id.hex[:8]}_{i}",
+                diary_id=f"diary_{i}",
+                user_id=user_id,
+                content="일기",
+                personality={"big5_traits": {"openness": i / count}} if i % 4 else None,
+                mbti_indicators={"E": 0.6},
+                confidence_score=i / count,
+                status="failed" if i % 5 == 0 else "completed",
+                processed_at=now - timedelta(hours=count - i),
+            ))
+        await db.commit()
+
+    @pytest.mark.asyncio
+    async def test_returns_recent_completed_analyses(self, personality_service, test_db):
+        """성격 결과가 있는 완료 분석만 최근 순으로 최대 limit 개"""
+        user_id = uuid.uuid4()
+        await self.seed_analyses(test_db, user_id, 40)
+        await self.seed_analyses(test_db, uuid.uuid4(), 10)
+
+        history = await personality_service._get_user_historical_analyses(str(user_id), test_db)
+
+        expected = [i for i in reversed(range(40)) if i % 4 and i % 5][:10]
+        assert [entry["confidence_score"] for entry in history] == [i / 40 for i in expected]
+
+    @pytest.mark.asyncio
+    async def test_uses_completed_partial_index(self, test_db):
+        """조회는 완료 행 부분 인덱스로 범위 검색하고 별도 정렬 없음"""
+        user_id = uuid.uuid4()
+        await self.seed_analyses(test_db, user_id, 40)
+        query = select(DiaryAnalysis).where(
+            and_(
+                DiaryAnalysis.user_id == str(user_id),
+                DiaryAnalysis.personality.isnot(None),
+                DiaryAnalysis.status == literal_column("'completed'"),
+            )
+        ).order_by(DiaryAnalysis.processed_at.desc()).limit(10)
+
+        plan = await explain_query_plan(test_db, query)
+
+        assert "USING INDEX ix_diary_analysis_user_id_processed_at_completed" in plan
+        assert "TEMP B-TREE" not in plan
+
+
+def make_analysis(rng) -> dict:
+    """무작위 성격 분석 결과 (MBTI 쌍 합 1)"""
+    mbti = {}
+    for first, second in (("E", "I"), ("S", "N"), ("T", "F"), ("J", "P")):
+        mbti[first] = float(rng.uniform(0.1, 0.9))
+        mbti[second] = 1 - mbti[first]
+    big5 = {trait: float(rng.uniform()) for trait in
+            ("openness", "conscientiousness", "extraversion", "agreeableness", "neuroticism")}
+    return {"mbti_indicators": mbti, "big5_traits": big5}
+
+
+class TestRunningPersonalityStats:
+    """성격 누적 통계 (O(1) 갱신) 테스트 클래스"""
+
+    @pytest.fixture
+    def personality_service(self):
+        return PersonalityAnalysisService()
+
+    def test_running_stats_match_weighted_batch(self):
+        """증분 결과가 전체 이력의 지수 가중 평균/분산과 같음"""
+        values = np.random.default_rng(0).uniform(size=30)
+        decay = decay_for_half_life(5)
+        stats = RunningStats()
+        for value in values:
+            stats.update({"x": value}, decay)
+
+        weights = decay ** np.arange(len(values))[::-1]
+        mean = np.average(values, weights=weights)
+        variance = np.average((values - mean) ** 2, weights=weights)
+        assert stats.mean["x"] == pytest.approx(mean)
+        assert stats.variance("x") == pytest.approx(variance)
+        assert stats.rms_distance("x", 0.3) == pytest.approx(
+            np.sqrt(np.average((0.3 - values) ** 2, weights=weights))
+        )
+        assert decay_for_half_life(5) ** 5 == pytest.approx(0.5)
+
+    @pytest.mark.asyncio
+    async def test_summary_updates_without_rescanning_history(self, personality_service, test_db):
+        """최초 1회만 이력으로 초기화하고 이후 분석은 diary_analysis 조회 없이 반영"""
+        rng = np.random.default_rng(1)
+        user_id = uuid.uuid4()
+        test_db.add(User(id=user_id, firebase_uid="firebase_running"))
+        analyses = [make_analysis(rng) for _ in range(6)]
+        now = datetime.utcnow()
+        for i, analysis in enumerate(analyses[:3]):
+            test_db.add(DiaryAnalysis(
+                analysis_id=f"analysis_running_{i}", diary_id=f"diary_{i}", user_id=user_id, content="일기",
+                personality=analysis, mbti_indicators=analysis["mbti_indicators"], status="completed",
+                processed_at=now - timedelta(hours=3 - i),
+            ))
+        await test_db.commit()
+
+        await personality_service.update_user_personality_summary(str(user_id), test_db)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            for analysis in analyses[3:]:
+                await personality_service.update_user_personality_summary(str(user_id), test_db, analysis)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+
+        assert not [statement for statement in statements if "diary_analysis" in statement]
+        summary = await test_db.get(UserPersonalitySummary, user_id)
+        expected = RunningStats()
+        decay = decay_for_half_life(get_settings().PERSONALITY_HALF_LIFE_ANALYSES)
+        for analysis in analyses:
+            expected.update(PersonalityAnalysisService._trait_values(analysis), decay)
+        assert summary.analysis_count == 6
+        assert summary.running_stats["weight"] == pytest.approx(expected.weight)
+        for key in expected.mean:
+            assert summary.running_stats["mean"][key] == pytest.approx(expected.mean[key])
+            assert summary.running_stats["m2"][key] == pytest.approx(expected.m2[key])
+        assert summary.overall_big5 == pytest.approx({trait: expected.mean[trait] for trait in summary.overall_big5})
+        assert 0 <= summary.mbti_consistency <= 1
+        assert set(summary.trait_stability) == set(summary.overall_big5)
+
+    @pytest.mark.asyncio
+    async def test_update_reads_latest_stats(self, personality_service, test_db):
+        """다른 세션이 먼저 반영한 분석을 덮어쓰지 않음 (세션에 남은 이전 행이 아닌 최신 행 기준)"""
+        from app.tests.conftest import TestSessionLocal
+
+        rng = np.random.default_rng(2)
+        user_id = uuid.uuid4()
+        test_db.add(User(id=user_id, firebase_uid="firebase_concurrent"))
+        await test_db.commit()
+        analyses = [make_analysis(rng) for _ in range(3)]
+        await personality_service.update_user_personality_summary(str(user_id), test_db, analyses[0])
+        summary = await test_db.get(UserPersonalitySummary, user_id)  # 세션에 이전 행을 남겨 둠
+        assert summary.analysis_count == 1
+
+        async with TestSessionLocal() as other:
+            await personality_service.update_user_personality_summary(str(user_id), other, analyses[1])
+        await personality_service.update_user_personality_summary(str(user_id), test_db, analyses[2])
+
+        expected = RunningStats()
+        decay = decay_for_half_life(get_settings().PERSONALITY_HALF_LIFE_ANALYSES)
+        for analysis in analyses:
+            expected.update(PersonalityAnalysisService._trait_values(analysis), decay)
+        assert summary.analysis_count == 3
+        assert summary.running_stats["weight"] == pytest.approx(expected.weight)
+
+    def test_consistency_uses_running_stats(self, personality_service):
+        """이력과 같은 분석은 다른 분석보다 일관성이 높고, 통계가 없으면 기본값"""
+        rng = np.random.default_rng(2)
+        base = make_analysis(rng)
+        stats = RunningStats()
+        for _ in range(5):
+            stats.update(PersonalityAnalysisService._trait_values(base), 0.9)
+
+        same = personality_service._calculate_personality_consistency(base, stats)
+        other = personality_service._calculate_personality_consistency(make_analysis(rng), stats)
+
+        assert same == pytest.approx(1.0)
+        assert other < same
+        assert personality_service._calculate_personality_consistency(base, RunningStats()) == 0.5
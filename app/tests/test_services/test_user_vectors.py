@@ -0,0 +1,178 @@
+"""
+사용자 매칭 벡터 구성 테스트
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+pytest.importorskip("app.models.analysis")
+
+from app.models.analysis import DiaryAnalysis
+from app.models.user import User, UserVector
+from app.services.user_vectors import (
+    COMBINED_WEIGHTS,
+    VECTOR_VERSION,
+    analysis_features,
+    backfill_user_vectors,
+    combine_vectors,
+    fold_features,
+    fold_user_vector,
+    rebuild_user_vectors,
+)
+from app.tests.conftest import TestSessionLocal
+from app.utils.running_stats import decay_for_half_life
+
+
+def make_analysis(rng) -> dict:
+    """무작위 분석 결과 (diary_analysis 컬럼 이름)"""
+    mbti = {}
+    for first, second in (("E", "I"), ("S", "N"), ("T", "F"), ("J", "P")):
+        mbti[first] = float(rng.uniform(0.1, 0.9))
+        mbti[second] = 1 - mbti[first]
+    emotions = {emotion: float(rng.uniform()) for emotion in ("joy", "anxiety", "calm")}
+    return {
+        "emotions": {"primary_emotion": "joy", "emotions": emotions},
+        "primary_emotion": "joy",
+        "sentiment_score": float(rng.uniform(-1, 1)),
+        "emotional_intensity": float(rng.uniform()),
+        "mbti_indicators": mbti,
+        "big5_traits": {"openness": float(rng.uniform()), "neuroticism": float(rng.uniform())},
+        "lifestyle_patterns": {
+            "activity_patterns": {"운동": float(rng.uniform()), "독서": float(rng.uniform())},
+            "time_patterns": {"오전활동": float(rng.uniform())},
+        },
+    }
+
+
+class TestVectorFeatures:
+    """특징 벡터/지수 가중 갱신 테스트 클래스"""
+
+    def test_fold_matches_weighted_average(self):
+        """증분 갱신 결과가 전체 이력의 지수 가중 평균과 같음"""
+        rng = np.random.default_rng(0)
+        analyses = [make_analysis(rng) for _ in range(25)]
+        decay = decay_for_half_life(5)
+
+        vectors = None
+        for count, analysis in enumerate(analyses):
+            vectors = fold_features(vectors, analysis_features(analysis), count, decay)
+
+        weights = decay ** np.arange(len(analyses))[::-1]
+        for name in ("personality", "emotion", "lifestyle"):
+            features = np.stack([analysis_features(analysis)[name] for analysis in analyses])
+            assert vectors[name] == pytest.approx(np.average(features, axis=0, weights=weights), abs=1e-5)
+
+    def test_features_have_fixed_layout(self):
+        """키 순서나 누락과 무관하게 같은 길이, 없는 값은 중립값"""
+        full = analysis_features(make_analysis(np.random.default_rng(1)))
+        empty = analysis_features({})
+
+        for name in full:
+            assert full[name].shape == empty[name].shape
+        assert empty["personality"] == pytest.approx(np.full_like(empty["personality"], 0.5))
+        assert not empty["lifestyle"].any()
+
+    def test_combined_cosine_is_weighted_block_cosine(self):
+        """결합 벡터의 코사인 유사도 = 블록별 코사인 유사도의 가중 평균"""
+        rng = np.random.default_rng(2)
+        first, second = (analysis_features(make_analysis(rng)) for _ in range(2))
+
+        def cosine(a, b):
+            return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+        center = {"personality": 0.5}  # 성격 점수는 0.5 중심으로 이동 후 비교
+        combined = cosine(combine_vectors(first), combine_vectors(second))
+        expected = sum(
+            weight * cosine(first[name] - center.get(name, 0), second[name] - center.get(name, 0))
+            for name, weight in COMBINED_WEIGHTS.items()
+        )
+        assert combined == pytest.approx(expected, abs=1e-5)
+
+
+class TestUserVectorUpdates:
+    """사용자 벡터 저장/재구축/백필 테스트 클래스"""
+
+    async def seed_user(self, db, rng, count: int, start: datetime = datetime(2026, 1, 1)) -> uuid.UUID:
+        user_id = uuid.uuid4()
+        db.add(User(id=user_id, firebase_uid=f"firebase_{user_id.hex[:8]}"))
+        for i in range(count):
+            db.add(DiaryAnalysis(
+                analysis_id=f"analysis_{user_id.hex[:8]}_{i}", diary_id=f"diary_{i}", user_id=user_id,
+                content="일기", status="completed", processed_at=start + timedelta(hours=i), **make_analysis(rng),
+            ))
+        await db.commit()
+        return user_id
+
+    @pytest.mark.asyncio
+    async def test_incremental_matches_rebuild(self, test_db):
+        """분석마다 O(1) 로 반영한 벡터가 이력 재구축 결과와 같음"""
+        rng = np.random.default_rng(3)
+        user_id = await self.seed_user(test_db, rng, 0)
+
+        for i in range(8):
+            analysis = DiaryAnalysis(
+                analysis_id=f"analysis_incremental_{i}", diary_id=f"diary_{i}", user_id=user_id, content="일기",
+                status="completed", processed_at=datetime(2026, 1, 1) + timedelta(hours=i), **make_analysis(rng),
+            )
+            test_db.add(analysis)
+            await test_db.commit()
+            await fold_user_vector(test_db, str(user_id), analysis)
+            await test_db.commit()
+
+        user_vector = await test_db.get(UserVector, user_id)
+        incremental = {name: np.array(getattr(user_vector, f"{name}_vector")) for name in COMBINED_WEIGHTS}
+        assert user_vector.analysis_count == 8
+        assert user_vector.vector_version == VECTOR_VERSION
+
+        await rebuild_user_vectors(test_db, [str(user_id)])
+        await test_db.commit()
+        await test_db.refresh(user_vector)
+        for name, vector in incremental.items():
+            assert getattr(user_vector, f"{name}_vector") == pytest.approx(vector, abs=1e-5)
+        assert user_vector.combined_vector == pytest.approx(combine_vectors(incremental), abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_outdated_version_is_rebuilt_from_history(self, test_db):
+        """이전 버전 행은 다음 분석 때 이력 전체로 재구축 (분석 수도 이력 기준)"""
+        rng = np.random.default_rng(4)
+        user_id = await self.seed_user(test_db, rng, 5)
+        test_db.add(UserVector(user_id=user_id, vector_version="1.0", analysis_count=40, confidence_score=40))
+        await test_db.commit()
+
+        latest = (await test_db.execute(
+            select(DiaryAnalysis).where(DiaryAnalysis.analysis_id == f"analysis_{user_id.hex[:8]}_4")
+        )).scalar_one()
+        user_vector = await fold_user_vector(test_db, str(user_id), latest)
+        await test_db.commit()
+
+        assert user_vector.vector_version == VECTOR_VERSION
+        assert user_vector.analysis_count == 5
+        assert len(user_vector.combined_vector) == sum(
+            len(vector) for vector in analysis_features({}).values()
+        )
+
+    @pytest.mark.asyncio
+    async def test_backfill_builds_outdated_users_in_chunks(self, test_db):
+        """벡터가 없거나 버전이 다른 사용자만 청크 단위로 구축"""
+        rng = np.random.default_rng(5)
+        outdated = [await self.seed_user(test_db, rng, 3) for _ in range(5)]
+        without_history = await self.seed_user(test_db, rng, 0)
+        current = await self.seed_user(test_db, rng, 2)
+        await rebuild_user_vectors(test_db, [str(current)])
+        test_db.add(UserVector(user_id=outdated[0], vector_version="1.0", analysis_count=9))
+        await test_db.commit()
+
+        stats = await backfill_user_vectors(TestSessionLocal, chunk_size=2)
+
+        assert stats["built"] == 5
+        assert stats["users"] == 6  # 현재 버전 사용자는 제외, 분석 없는 사용자는 건너뜀
+        assert stats["chunks"] == 3
+        test_db.expire_all()
+        for user_id in outdated:
+            user_vector = await test_db.get(UserVector, user_id)
+            assert user_vector.vector_version == VECTOR_VERSION
+            assert user_vector.analysis_count == 3
+        assert await test_db.get(UserVector, without_history) is None
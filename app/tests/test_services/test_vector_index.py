@@ -0,0 +1,246 @@
+"""
+사용자 벡터 ANN 인덱스 테스트
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import IVFFlatIndex
+
+
+def make_clustered_vectors(count: int, dimension: int = 32, clusters: int = 40, seed: int = 0):
+    """군집 구조가 있는 무작위 벡터"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + rng.normal(scale=0.3, size=(count, dimension))
+    return [f"user-{i}" for i in range(count)], vectors.astype(np.float32)
+
+
+def brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarities = normalized @ (query / np.linalg.norm(query))
+    return np.argsort(-similarities)[:k].tolist()
+
+
+class TestIVFFlatIndex:
+    """IVF-flat 인덱스 테스트 클래스"""
+
+    @pytest.fixture(scope="class")
+    def population(self):
+        return make_clustered_vectors(5000)
+
+    @pytest.fixture
+    def index(self, population):
+        ids, vectors = population
+        index = IVFFlatIndex(nprobe=8)
+        index.build(ids, vectors)
+        return index
+
+    def test_recall_against_brute_force(self, index, population):
+        """상위 100명 재현율이 전수 비교 대비 90% 이상"""
+        ids, vectors = population
+        rng = np.random.default_rng(1)
+        recalls = []
+        for query_slot in rng.choice(len(ids), 20, replace=False):
+            expected = {ids[i] for i in brute_force(vectors, vectors[query_slot], 100)}
+            found = {user_id for user_id, _ in index.search(vectors[query_slot], 100)}
+            recalls.append(len(expected & found) / 100)
+
+        assert index.is_trained
+        assert np.mean(recalls) >= 0.9
+
+    def test_results_sorted_and_exclude(self, index, population):
+        """유사도 내림차순, 제외 대상은 결과에 없음"""
+        ids, vectors = population
+        results = index.search(vectors[0], 50, exclude={ids[0], "unknown"})
+
+        similarities = [similarity for _, similarity in results]
+        assert similarities == sorted(similarities, reverse=True)
+        assert ids[0] not in {user_id for user_id, _ in results}
+
+    def test_incremental_upsert_and_remove(self, index, population):
+        """추가/교체/삭제가 재구축 없이 바로 검색에 반영"""
+        ids, vectors = population
+        query = vectors[10]
+
+        index.upsert("new-user", query * 2)
+        assert index.search(query, 1, exclude={ids[10]})[0][0] == "new-user"
+        assert len(index) == len(ids) + 1
+
+        index.upsert("new-user", -query)
+        assert "new-user" not in {user_id for user_id, _ in index.search(query, 100)}
+
+        assert index.remove(ids[10])
+        assert ids[10] not in {user_id for user_id, _ in index.search(query, 100)}
+        assert not index.remove(ids[10])
+        assert len(index) == len(ids)
+
+    def test_invalid_vectors_are_ignored(self, index, population):
+        """차원이 다르거나 영벡터면 등록하지 않음"""
+        ids, vectors = population
+
+        assert not index.upsert("short", [1.0, 2.0])
+        assert not index.upsert(ids[0], np.zeros(vectors.shape[1]))
+        assert ids[0] not in index
+        assert index.search([1.0, 2.0], 10) == []
+
+    def test_small_index_is_exact(self):
+        """학습 최소 크기 미만이면 전수 비교"""
+        ids, vectors = make_clustered_vectors(100, seed=3)
+        index = IVFFlatIndex()
+        for user_id, vector in zip(ids, vectors):
+            index.upsert(user_id, vector)
+
+        assert not index.is_trained
+        expected = [ids[i] for i in brute_force(vectors, vectors[5], 10)]
+        assert [user_id for user_id, _ in index.search(vectors[5], 10)] == expected
+
+    def test_save_and_load_round_trip(self, index, population, tmp_path):
+        """스냅샷 저장 후 복원하면 같은 검색 결과"""
+        ids, vectors = population
+        index.remove(ids[3])
+        path = str(tmp_path / "index" / "vectors.npz")
+        index.save(path)
+
+        restored = IVFFlatIndex(nprobe=8)
+        restored.load(path)
+
+        assert len(restored) == len(index)
+        assert restored.is_trained
+        assert restored.search(vectors[7], 20) == index.search(vectors[7], 20)
+        assert ids[3] not in restored
+
+    def test_concurrent_saves_do_not_share_temp_file(self, index, tmp_path):
+        """동시에 저장해도 (여러 워커 종료) 스냅샷이 깨지지 않고 임시 파일이 남지 않음"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        path = str(tmp_path / "vectors.npz")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: index.save(path), range(16)))
+
+        restored = IVFFlatIndex()
+        restored.load(path)
+        assert len(restored) == len(index)
+        assert [entry.name for entry in tmp_path.iterdir()] == ["vectors.npz"]
+
+
+class TestVectorIndexStartup:
+    """시작 시 스냅샷 복원 + DB 델타 반영 테스트 클래스"""
+
+    async def seed_vectors(self, db, vectors, updated_at, vector_version=None):
+        pytest.importorskip("app.models.user")
+        from app.models.user import User, UserVector
+        from app.services.user_vectors import VECTOR_VERSION
+
+        user_ids = []
+        for vector in vectors:
+            user_id = uuid.uuid4()
+            user_ids.append(str(user_id))
+            db.add(User(id=user_id, firebase_uid=f"firebase_{user_id.hex[:8]}"))
+            db.add(UserVector(
+                user_id=user_id, combined_vector=vector, updated_at=updated_at,
+                vector_version=vector_version or VECTOR_VERSION,
+            ))
+        await db.commit()
+        return user_ids
+
+    @pytest.mark.asyncio
+    async def test_snapshot_catches_up_with_database(self, test_db, tmp_path):
+        """스냅샷 이후 다른 워커가 바꾼/추가한/지운 벡터가 재시작 후 반영됨"""
+        from app.models.user import UserVector
+        from app.services import vector_index as vector_index_module
+        from app.tests.conftest import TestSessionLocal
+
+        _, vectors = make_clustered_vectors(60, dimension=8)
+        built_at = datetime(2026, 1, 1, 0, 0)
+        user_ids = await self.seed_vectors(test_db, vectors[:50], built_at)
+        index = await vector_index_module.build_user_vector_index(test_db, IVFFlatIndex(min_train_size=10))
+        path = str(tmp_path / "vectors.npz")
+        index.save(path)
+        assert index.synced_at == built_at
+
+        # 스냅샷 이후: 한 명 벡터 변경, 한 명 벡터 삭제, 새 사용자 추가 (다른 워커에서)
+        later = built_at + timedelta(hours=1)
+        moved = await test_db.get(UserVector, uuid.UUID(user_ids[0]))
+        moved.combined_vector, moved.updated_at = vectors[55], later
+        cleared = await test_db.get(UserVector, uuid.UUID(user_ids[1]))
+        cleared.combined_vector, cleared.updated_at = None, later
+        added = await self.seed_vectors(test_db, vectors[50:52], later)
+
+        restored = IVFFlatIndex(min_train_size=10)
+        original = vector_index_module.user_vector_index
+        vector_index_module.user_vector_index = restored
+        try:
+            await vector_index_module.load_or_build_user_vector_index(TestSessionLocal, path)
+        finally:
+            vector_index_module.user_vector_index = original
+
+        assert len(restored) == 51
+        assert user_ids[1] not in restored
+        assert all(user_id in restored for user_id in added)
+        assert restored.search(vectors[55], 1)[0][0] == user_ids[0]
+        assert restored.synced_at == later
+
+    @pytest.mark.asyncio
+    async def test_outdated_vector_version_is_rebuilt(self, test_db, tmp_path):
+        """이전 벡터 버전 스냅샷은 델타 없이 재구축, 이전 버전 행은 인덱스에서 제외"""
+        from app.models.user import UserVector
+        from app.services import vector_index as vector_index_module
+        from app.services.user_vectors import VECTOR_VERSION
+        from app.tests.conftest import TestSessionLocal
+
+        _, old_vectors = make_clustered_vectors(30, dimension=8)
+        _, new_vectors = make_clustered_vectors(30, dimension=12, seed=1)
+        built_at = datetime(2026, 1, 1, 0, 0)
+        old_ids = await self.seed_vectors(test_db, old_vectors, built_at, vector_version="1.0")
+        stale = IVFFlatIndex(min_train_size=10)
+        stale.build(old_ids, old_vectors)
+        stale.synced_at, stale.vector_version = built_at, "1.0"
+        path = str(tmp_path / "vectors.npz")
+        stale.save(path)
+
+        # 백필: 일부가 새 버전(다른 차원)으로 바뀜
+        for user_id, vector in zip(old_ids[:20], new_vectors):
+            user_vector = await test_db.get(UserVector, uuid.UUID(user_id))
+            user_vector.combined_vector, user_vector.vector_version = vector, VECTOR_VERSION
+            user_vector.updated_at = built_at + timedelta(hours=1)
+        await test_db.commit()
+
+        restored = IVFFlatIndex(min_train_size=10)
+        original = vector_index_module.user_vector_index
+        vector_index_module.user_vector_index = restored
+        try:
+            await vector_index_module.load_or_build_user_vector_index(TestSessionLocal, path)
+        finally:
+            vector_index_module.user_vector_index = original
+
+        assert (len(restored), restored.dimension, restored.vector_version) == (20, 12, VECTOR_VERSION)
+        assert set(old_ids[:20]) == {user_id for user_id in old_ids if user_id in restored}
+        reloaded = IVFFlatIndex()
+        reloaded.load(path)
+        assert reloaded.vector_version == VECTOR_VERSION
+
+    @pytest.mark.asyncio
+    async def test_periodic_refresh_applies_other_workers_vectors(self, test_db):
+        """실행 중에도 다른 워커가 추가/변경한 벡터가 델타 갱신으로 반영"""
+        from app.models.user import UserVector
+        from app.services.vector_index import build_user_vector_index, refresh_user_vector_index
+
+        _, vectors = make_clustered_vectors(40, dimension=8)
+        built_at = datetime(2026, 1, 1, 0, 0)
+        user_ids = await self.seed_vectors(test_db, vectors[:30], built_at)
+        index = await build_user_vector_index(test_db, IVFFlatIndex(min_train_size=10))
+
+        later = built_at + timedelta(hours=1)
+        added = await self.seed_vectors(test_db, vectors[30:32], later)
+        moved = await test_db.get(UserVector, uuid.UUID(user_ids[0]))
+        moved.combined_vector, moved.updated_at = vectors[35], later
+        await test_db.commit()
+
+        assert await refresh_user_vector_index(test_db, index) >= 3
+        assert all(user_id in index for user_id in added)
+        assert index.search(vectors[35], 1)[0][0] == user_ids[0]
+        assert index.synced_at == later
@@ -0,0 +1,74 @@
+"""
+지수 가중 누적 평균/분산 (최근 값 우선, 관측 하나당 O(1) 갱신)
+
+i 번째 이전 관측의 가중치가 decay ** i 일 때의 가중 평균과 가중 분산을
+(가중치 합, 평균, 편차 제곱합 M2) 세 값만으로 유지한다 (West 1979 의 가중 증분식).
+이력을 다시 읽지 않고 새 관측 하나로 갱신되며, 같은 순서로 관측을 넣으면
+전체 이력으로 계산한 값과 같다.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+
+def decay_for_half_life(half_life: float) -> float:
+    """가중치가 half_life 개 관측 뒤 절반이 되는 감쇠율 (0 이하면 감쇠 없음)"""
+    if half_life <= 0:
+        return 1.0
+    return 0.5 ** (1.0 / half_life)
+
+
+class RunningStats:
+    """
+    키별 지수 가중 평균/분산
+
+    모든 키가 같은 가중치 합을 공유한다 (관측마다 모든 키 값이 함께 들어오는 경우).
+    to_dict()/from_dict() 로 JSON 컬럼에 저장한다.
+    """
+
+    def __init__(self, weight: float = 0.0, mean: Optional[Dict[str, float]] = None,
+                 m2: Optional[Dict[str, float]] = None):
+        self.weight = weight
+        self.mean = dict(mean or {})
+        self.m2 = dict(m2 or {})
+
+    def update(self, values: Dict[str, float], decay: float) -> None:
+        """관측 하나 반영 (기존 가중치와 M2 는 decay 만큼 줄어듦)"""
+        self.weight = self.weight * decay + 1.0
+        for key, value in values.items():
+            value = float(value)
+            previous = self.mean.get(key, value)
+            mean = previous + (value - previous) / self.weight
+            self.mean[key] = mean
+            self.m2[key] = self.m2.get(key, 0.0) * decay + (value - previous) * (value - mean)
+
+    def variance(self, key: str) -> float:
+        """가중 분산 (관측이 없으면 0)"""
+        if self.weight <= 0:
+            return 0.0
+        return max(0.0, self.m2.get(key, 0.0) / self.weight)
+
+    def std(self, key: str) -> float:
+        return math.sqrt(self.variance(key))
+
+    def rms_distance(self, key: str, value: float) -> float:
+        """
+        value 와 이력 관측들의 가중 RMS 거리
+
+        sum(w_i * (value - x_i)^2) / sum(w_i) = (value - 평균)^2 + 분산 이므로 이력 없이 계산된다.
+        """
+        mean = self.mean.get(key, value)
+        return math.sqrt((float(value) - mean) ** 2 + self.variance(key))
+
+    def to_dict(self, keys: Optional[Iterable[str]] = None) -> Dict:
+        keys = list(keys) if keys is not None else list(self.mean)
+        return {
+            "weight": self.weight,
+            "mean": {key: self.mean[key] for key in keys if key in self.mean},
+            "m2": {key: self.m2[key] for key in keys if key in self.m2},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "RunningStats":
+        if not data:
+            return cls()
+        return cls(data.get("weight", 0.0), data.get("mean"), data.get("m2"))
@@ -0,0 +1,35 @@
+"""
+사용자 벡터 이진 직렬화 (little-endian float32)
+
+user_vectors 의 벡터 컬럼은 float32 값을 그대로 이어 붙인 bytea 이며,
+읽을 때 np.frombuffer 로 복사 없이 읽기 전용 배열을 만든다 (JSON 파싱/파이썬 float 목록 없음).
+"""
+from typing import Optional
+
+import numpy as np
+
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def encode_vector(values) -> Optional[bytes]:
+    """float 목록/배열 → bytes (None 은 그대로, 이미 bytes 면 그대로)"""
+    if values is None:
+        return None
+    if isinstance(values, (bytes, bytearray, memoryview)):
+        return bytes(values)
+    return np.asarray(values, dtype=VECTOR_DTYPE).reshape(-1).tobytes()
+
+
+def decode_vector(data) -> Optional[np.ndarray]:
+    """bytes → float32 배열 (버퍼를 그대로 가리키는 읽기 전용 배열)"""
+    if data is None:
+        return None
+    if isinstance(data, (list, tuple, np.ndarray)):
+        # 이전 JSON 형식/메모리 객체 호환
+        return np.asarray(data, dtype=np.float32)
+    return np.frombuffer(data, dtype=VECTOR_DTYPE)
+
+
+def has_values(vector) -> bool:
+    """값이 하나 이상 있는 벡터인지 (목록/배열 공통, 배열의 진리값 모호성 회피)"""
+    return vector is not None and len(vector) > 0
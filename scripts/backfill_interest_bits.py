@@ -0,0 +1,37 @@
+"""
+사용자 관심사 비트셋 백필
+
+interest_bits 가 없는 사용자의 settings["interests"] 를 interests 테이블에 인터닝하고 비트셋을 저장한다.
+비트셋이 없는 사용자는 DB 어휘에 등록된 관심사만 매칭에 반영되므로, 기존 데이터는 한 번 실행해 둔다.
+배치마다 커밋하므로 중간에 멈춰도 다시 실행하면 남은 사용자부터 이어진다.
+
+사용법: python scripts/backfill_interest_bits.py [--batch-size N]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config.database import AsyncSessionLocal
+from app.services.interest_index import backfill_interest_bits, load_interest_vocabulary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="사용자 관심사 비트셋 백필")
+    parser.add_argument("--batch-size", type=int, default=500, help="한 번에 처리할 사용자 수")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    async with AsyncSessionLocal() as db:
+        await load_interest_vocabulary(db)
+        processed = await backfill_interest_bits(db, batch_size=args.batch_size)
+    print(f"✅ 관심사 비트셋 백필 완료: 사용자 {processed}명")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+"""
+사용자 매칭 벡터 백필
+
+벡터가 없거나 버전(VECTOR_VERSION)이 다른 사용자의 벡터를 저장된 분석 이력으로 다시 만든다.
+사용자 ID 순으로 청크 단위 처리/커밋하므로 중간에 멈춰도 다시 실행하면 남은 사용자부터 이어진다.
+
+사용법: python scripts/backfill_user_vectors.py [--chunk-size N] [--force]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.user_vectors import backfill_user_vectors
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="사용자 매칭 벡터 백필")
+    parser.add_argument("--chunk-size", type=int, default=None, help="한 번에 처리할 사용자 수")
+    parser.add_argument("--force", action="store_true", help="현재 버전 벡터도 다시 구축")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    stats = await backfill_user_vectors(chunk_size=args.chunk_size, force=args.force)
+    print(f"✅ 벡터 백필 완료: 사용자 {stats['users']}명 중 {stats['built']}명 구축, {stats['seconds']}초")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
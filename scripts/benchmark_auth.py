@@ -0,0 +1,112 @@
+"""
+Firebase 인증 경로 요청당 비용 벤치마크
+
+네트워크 없이 자체 서명 인증서로 토큰을 만들어 다음 경로를 측정한다.
+- 캐시 적중 (이미 검증된 토큰)
+- 로컬 서명 검증 (캐시 미스)
+- FIREBASE_AUTH_DEBUG 진단 로그 포함
+- 검증 실패 (진단 로그 출력)
+
+사용법: python scripts/benchmark_auth.py [반복 횟수]
+"""
+import asyncio
+import datetime
+import logging
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt as google_jwt
+
+from app.core import security
+from app.core.exceptions import AuthenticationException
+from app.core.firebase_keys import StaticKeySource
+
+PROJECT_ID = "benchmark-project"
+KEY_ID = "benchmark-key"
+
+
+def create_signer_and_certificate():
+    """벤치마크용 RSA 키와 자체 서명 인증서 생성"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.benchmark")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(private_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(private_key, hashes.SHA256())
+    )
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    certificate_pem = certificate.public_bytes(serialization.Encoding.PEM).decode()
+    return crypt.RSASigner.from_string(private_pem, key_id=KEY_ID), certificate_pem
+
+
+def make_token(signer, uid: str) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+
+async def measure(name: str, tokens, expect_failure: bool = False) -> None:
+    """토큰 목록을 순서대로 검증하고 요청당 평균 비용 출력"""
+    start = time.perf_counter()
+    for token in tokens:
+        try:
+            await security.verify_firebase_token(token)
+        except AuthenticationException:
+            if not expect_failure:
+                raise
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<28} {elapsed / len(tokens) * 1e6:10.1f} µs/req  ({len(tokens)}회)")
+
+
+async def run_benchmark(iterations: int) -> None:
+    signer, certificate_pem = create_signer_and_certificate()
+    security.set_key_source(StaticKeySource({KEY_ID: certificate_pem}))
+    security.settings.FIREBASE_PROJECT_ID = PROJECT_ID
+    security.firebase_initialized = True
+
+    # 진단 로그가 실제로 포맷/출력되도록 INFO 레벨 핸들러 연결 (출력은 버림)
+    logging.basicConfig(level=logging.INFO, stream=open("/dev/null", "w"))
+
+    tokens = [make_token(signer, f"bench-user-{i}") for i in range(iterations)]
+    print(f"🔐 Firebase 인증 벤치마크 (반복 {iterations}회)")
+
+    security.token_cache.clear()
+    await measure("로컬 검증 (캐시 미스)", tokens)
+    await measure("캐시 적중", tokens)
+
+    security.token_cache.clear()
+    security.settings.FIREBASE_AUTH_DEBUG = True
+    await measure("로컬 검증 + 디버그 진단", tokens)
+    security.settings.FIREBASE_AUTH_DEBUG = False
+
+    invalid_tokens = [token[:-8] + "AAAAAAAA" for token in tokens]
+    await measure("검증 실패 + 진단", invalid_tokens, expect_failure=True)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    asyncio.run(run_benchmark(count))
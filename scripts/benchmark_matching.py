@@ -0,0 +1,260 @@
+"""
+매칭 규모 벤치마크
+
+합성 사용자 집단(scripts/synthetic_population.py)을 크기별로 채운 뒤 다음 경로의
+요청당 지연(p50/p95), 쿼리 수, 후보 수와 메모리를 측정한다.
+- 후보 조회: 최근 활동 순 / 벡터 인덱스 / 반경 (위치 인덱스)
+- 매칭 데이터 일괄 로드, 배치 채점 (NumPy)
+- 전체 경로 (MatchingService.find_matching_candidates)
+
+크기는 작은 것부터 같은 DB 에 이어서 채우므로 10k → 100k → 1M 을 한 번에 돌릴 수 있다.
+결과를 --save 로 저장해 두고 변경 후 --compare 로 같은 조건의 결과와 비교한다.
+
+사용법: python scripts/benchmark_matching.py [--sizes 10000,100000] [--requests 50] [--seed 42]
+        [--database-url URL] [--save result.json] [--compare baseline.json]
+(--database-url 을 주지 않으면 임시 SQLite 파일을 쓴다. 주면 벤치마크 전용 빈 DB 여야 한다)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import structlog
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config.database import Base
+from app.services.geo_index import build_user_geo_index, user_geo_index
+from app.services.matching_scoring import select_diverse_top_k
+from app.services.matching_service import MatchingService
+from app.services.vector_index import build_user_vector_index, user_vector_index
+from scripts.synthetic_population import seed_population
+
+SEARCH_RADIUS_KM = 30
+MEMORY_SAMPLE_REQUESTS = 5
+
+
+class StatementCounter:
+    """엔진에서 실행된 SQL 문 수"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self)
+
+    def __call__(self, conn, cursor, statement, *args):
+        self.count += 1
+
+
+class Measurement:
+    """한 경로의 요청별 지연/쿼리 수/결과 수"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.queries: List[int] = []
+        self.results: List[int] = []
+
+    def summary(self) -> Dict:
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "queries": round(float(np.mean(self.queries)), 1),
+            "results": round(float(np.mean(self.results)), 1),
+        }
+
+
+async def measure(measurement: Measurement, counter: StatementCounter, call) -> object:
+    """call() 한 번의 지연/쿼리 수 기록 후 결과 반환"""
+    queries = counter.count
+    started = time.perf_counter()
+    result = await call()
+    measurement.latencies.append(time.perf_counter() - started)
+    measurement.queries.append(counter.count - queries)
+    measurement.results.append(len(result))
+    return result
+
+
+async def sample_requesters(session_factory, count: int, seed: int) -> List[Dict]:
+    """매칭 가능한 사용자 중 재현 가능한 요청자 표본 (매칭 데이터 포함)"""
+    from app.models.user import User
+
+    async with session_factory() as db:
+        result = await db.execute(
+            select(User.id).where(User.is_active == True, User.matching_enabled == True).order_by(User.id)
+        )
+        ids = [row[0] for row in result.all()]
+        chosen = np.random.default_rng(seed).choice(len(ids), size=min(count, len(ids)), replace=False)
+        users = await MatchingService()._get_users_matching_data([ids[i] for i in sorted(chosen)], db)
+    return list(users.values())
+
+
+async def benchmark_size(session_factory, counter: StatementCounter, size: int, args) -> Dict:
+    """현재 DB (size 명) 에 대한 경로별 측정"""
+    service = MatchingService()
+    report = {"size": size}
+
+    started = time.perf_counter()
+    async with session_factory() as db:
+        await build_user_vector_index(db)
+    report["vector_index_build_s"] = round(time.perf_counter() - started, 2)
+    if not len(user_vector_index):
+        # 벡터 경로가 조용히 최근 활동 순으로 대체되어 측정이 무의미해지므로 중단
+        raise RuntimeError(
+            f"벡터 인덱스가 비어 있음 (사용자 {size}명): combined_vector 의 vector_version 과 차원을 확인"
+        )
+    # 벡터 행렬 + 클러스터 중심 (ID 매핑/역파일 목록 제외)
+    centroids = user_vector_index._centroids
+    index_bytes = user_vector_index._vectors.nbytes + (centroids.nbytes if centroids is not None else 0)
+    report["vector_index_mb"] = round(index_bytes / 2 ** 20, 1)
+
+    started = time.perf_counter()
+    async with session_factory() as db:
+        await build_user_geo_index(db)
+    report["geo_index_build_s"] = round(time.perf_counter() - started, 2)
+
+    requesters = await sample_requesters(session_factory, args.requests, args.seed)
+    paths = {name: Measurement() for name in ("recent", "vector", "radius", "load", "score", "end_to_end")}
+
+    for requester in requesters:
+        user = requester["user"]
+        user_id = str(user.id)
+        query_vector = requester["vector"].combined_vector if requester["vector"] else None
+        origin = service._coordinates(user)
+
+        async with session_factory() as db:
+            await measure(paths["recent"], counter, lambda: service._get_candidate_users(user_id, None, db))
+        async with session_factory() as db:
+            candidates = await measure(
+                paths["vector"], counter, lambda: service._get_candidate_users(user_id, None, db, query_vector)
+            )
+        async with session_factory() as db:
+            await measure(paths["radius"], counter, lambda: service._get_candidate_users(
+                user_id, None, db, query_vector, origin=origin, radius_km=SEARCH_RADIUS_KM
+            ))
+        async with session_factory() as db:
+            candidates_data = await measure(paths["load"], counter, lambda: service._get_users_matching_data(
+                [candidate.id for candidate in candidates], db, users=candidates
+            ))
+
+        async def score():
+            features = service.batch_scorer.features(list(candidates_data.values()))
+            scores = service.batch_scorer.score_features(
+                requester, service.batch_scorer.features([requester]), features
+            )["overall"]
+            return select_diverse_top_k(scores, features, 10, service.batch_scorer.diversity_for(requester), 0.5)
+
+        await measure(paths["score"], counter, score)
+        async with session_factory() as db:
+            await measure(paths["end_to_end"], counter, lambda: service.find_matching_candidates(user_id, db))
+
+    report["paths"] = {name: measurement.summary() for name, measurement in paths.items()}
+
+    # 전체 경로 요청당 Python 힙 최대 사용량 (tracemalloc 은 느리므로 일부 요청만)
+    peaks = []
+    for requester in requesters[:MEMORY_SAMPLE_REQUESTS]:
+        tracemalloc.start()
+        async with session_factory() as db:
+            await service.find_matching_candidates(str(requester["user"].id), db)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    report["request_peak_kb"] = round(float(np.mean(peaks)) / 1024, 1) if peaks else None
+    # Linux 는 KB, macOS 는 바이트 단위
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["process_max_rss_mb"] = round(maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+    return report
+
+
+def print_report(report: Dict, baseline: Dict = None) -> None:
+    """크기별 결과 표 (기준 결과가 있으면 p50/p95 변화율 포함)"""
+    print(f"\n📊 사용자 {report['size']:,}명")
+    print(
+        f"  적재 {report['seed_s']}초 · 벡터 인덱스 {report['vector_index_build_s']}초 · "
+        f"위치 인덱스 {report['geo_index_build_s']}초 · 벡터 {report['vector_index_mb']} MB\n"
+        f"  요청당 힙 최대 {report['request_peak_kb']} KB · 프로세스 RSS {report['process_max_rss_mb']} MB"
+    )
+    print(f"  {'경로':<12} {'p50 ms':>9} {'p95 ms':>9} {'쿼리':>6} {'결과':>7}" + ("   Δp50    Δp95" if baseline else ""))
+    for name, summary in report["paths"].items():
+        line = (
+            f"  {name:<12} {summary['p50_ms']:>9.2f} {summary['p95_ms']:>9.2f} "
+            f"{summary['queries']:>6.1f} {summary['results']:>7.1f}"
+        )
+        previous = (baseline or {}).get("paths", {}).get(name)
+        if previous:
+            for key in ("p50_ms", "p95_ms"):
+                change = (summary[key] - previous[key]) / previous[key] * 100 if previous[key] else 0.0
+                line += f" {change:+6.1f}%"
+        print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="매칭 규모 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000", help="쉼표로 구분한 사용자 수 (예: 10000,100000,1000000)")
+    parser.add_argument("--requests", type=int, default=50, help="크기별 측정 요청 수")
+    parser.add_argument("--seed", type=int, default=42, help="집단/요청자 표본 시드")
+    parser.add_argument("--batch-size", type=int, default=5000, help="INSERT 배치 크기")
+    parser.add_argument("--database-url", default=None, help="벤치마크 전용 비동기 DB URL (기본: 임시 SQLite)")
+    parser.add_argument("--save", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    return parser.parse_args()
+
+
+async def run_benchmark(args) -> List[Dict]:
+    from app.models.user import User
+
+    # 요청마다 나오는 info 로그는 측정을 왜곡하므로 경고 이상만 출력
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    workdir = tempfile.TemporaryDirectory(prefix="matching-bench-")
+    database_url = args.database_url or f"sqlite+aiosqlite:///{workdir.name}/bench.db"
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    baseline = {}
+    if args.compare:
+        baseline = {report["size"]: report for report in json.loads(Path(args.compare).read_text())}
+
+    print(f"🏁 매칭 규모 벤치마크 (크기 {', '.join(f'{size:,}' for size in sizes)} · 요청 {args.requests}회 · 시드 {args.seed})")
+    counter = StatementCounter(engine)
+    reports = []
+    try:
+        for size in sizes:
+            async with session_factory() as db:
+                existing = await db.scalar(select(func.count()).select_from(User))
+                started = time.perf_counter()
+                if existing < size:
+                    await seed_population(db, size, args.seed, args.batch_size, start=existing)
+            seed_seconds = round(time.perf_counter() - started, 2)
+
+            report = await benchmark_size(session_factory, counter, size, args)
+            report["seed_s"] = seed_seconds
+            print_report(report, baseline.get(size))
+            reports.append(report)
+    finally:
+        user_vector_index.clear()
+        user_geo_index.clear()
+        await engine.dispose()
+        workdir.cleanup()
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(reports, ensure_ascii=False, indent=2))
+        print(f"\n💾 결과 저장: {args.save}")
+    return reports
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(parse_args()))
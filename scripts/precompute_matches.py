@@ -0,0 +1,35 @@
+"""
+야간 매칭 후보 사전 계산 작업
+
+매칭 가능한 사용자 전체의 상위 K명 후보를 다시 계산해 match_candidates 테이블에 저장한다.
+cron 등에서 하루 한 번 (트래픽이 적은 새벽) 실행하는 것을 전제로 한다.
+
+사용법: python scripts/precompute_matches.py [--top-k N] [--workers N] [--block-size N]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.match_precompute import run_precompute_job
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="매칭 후보 사전 계산")
+    parser.add_argument("--top-k", type=int, default=None, help="사용자별 저장 후보 수")
+    parser.add_argument("--workers", type=int, default=None, help="채점 프로세스 수")
+    parser.add_argument("--block-size", type=int, default=None, help="작업 단위 사용자 수")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    stats = await run_precompute_job(top_k=args.top_k, workers=args.workers, block_size=args.block_size)
+    print(f"✅ 사전 계산 완료: 사용자 {stats['users']}명, 후보 {stats['rows']}행, {stats['seconds']}초")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
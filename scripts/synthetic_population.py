@@ -0,0 +1,258 @@
+"""
+매칭 벤치마크용 합성 사용자 집단 생성기
+
+같은 시드와 배치 크기면 항상 같은 집단을 만든다. 잠재 성향을 몇 개의 군집 중심 주변에
+흩어 두고 이를 합성 분석 결과로 바꿔 서비스와 같은 함수(user_vectors.analysis_features /
+combine_vectors)로 현재 버전 벡터를 만든다. 벡터 인덱스가 실제 데이터와 같은 차원/버전의
+군집 구조를 보게 된다. 좌표는 주요 도시 주변에 분포시켜 반경 검색이 의미 있는 후보 수를
+돌려주도록 한다.
+
+생성 테이블: users, user_vectors, user_personality_summary, user_emotion_patterns,
+matching_preferences (서비스 계층과 같은 컬럼 값 형식)
+
+사용법: python scripts/synthetic_population.py --size 100000 [--seed 42] [--database-url URL]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.geo_index import encode_geohash
+from app.services.interest_index import bitset_to_bytes, ids_to_bitset
+from app.services.emotion_service import EMOTION_CATEGORIES
+from app.services.matching_scoring import BIG5_TRAITS, COMPLEMENTARY_EMOTION_PAIRS
+from app.services.user_vectors import (
+    LIFESTYLE_GROUPS,
+    MBTI_AXES,
+    VECTOR_VERSION,
+    analysis_features,
+    combine_vectors,
+)
+
+MBTI_TYPES = [a + b + c + d for a in "EI" for b in "SN" for c in "TF" for d in "JP"]
+EMOTIONS = sorted({emotion for pair in COMPLEMENTARY_EMOTION_PAIRS for emotion in pair})
+TRAITS = ["창의적", "분석적", "사교적", "신중함", "낙천적", "공감력", "독립적", "계획적", "즉흥적", "차분함"]
+INTEREST_VOCABULARY = [f"관심사{i:03d}" for i in range(1, 201)]
+
+# (지역, 위도, 경도, 인구 비중)
+CITIES = [
+    ("서울 강남구", 37.4979, 127.0276, 0.30),
+    ("서울 마포구", 37.5663, 126.9019, 0.20),
+    ("경기 성남시", 37.4201, 127.1266, 0.12),
+    ("인천 연수구", 37.4101, 126.6783, 0.10),
+    ("대전 유성구", 36.3622, 127.3562, 0.08),
+    ("대구 수성구", 35.8582, 128.6306, 0.08),
+    ("부산 해운대구", 35.1631, 129.1635, 0.12),
+]
+
+# 합성 분석에 쓰는 감정 (벡터 축에 있는 EMOTION_CATEGORIES 중 앞쪽 일부)
+VECTOR_EMOTIONS = EMOTION_CATEGORIES[:24]
+LIFESTYLE_KEYS = 2  # 생활 패턴 그룹당 키 수
+
+# 잠재 성향 차원 (성격: Big5 + MBTI 축, 감정: 감정별 점수 + 감정 점수 + 강도, 생활 패턴: 그룹 × 키)
+PERSONALITY_DIMENSION = len(BIG5_TRAITS) + len(MBTI_AXES)
+EMOTION_DIMENSION = len(VECTOR_EMOTIONS) + 2
+LIFESTYLE_DIMENSION = len(LIFESTYLE_GROUPS) * LIFESTYLE_KEYS
+CLUSTERS = 32
+
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-values))
+
+
+def synthetic_analysis(personality: np.ndarray, emotion: np.ndarray, lifestyle: np.ndarray) -> Dict:
+    """잠재 성향 한 명분 → diary_analysis 형식의 합성 분석 결과"""
+    big5 = np.clip(0.5 + 0.15 * personality[:len(BIG5_TRAITS)], 0, 1)
+    mbti = _sigmoid(personality[len(BIG5_TRAITS):])
+    scores = emotion[:len(VECTOR_EMOTIONS)]
+    shares = np.exp(scores - scores.max())
+    shares /= shares.sum()
+    return {
+        "big5_traits": {trait: float(value) for trait, value in zip(BIG5_TRAITS, big5)},
+        "mbti_indicators": {axis: float(value) for axis, value in zip(MBTI_AXES, mbti)},
+        "emotions": {name: float(share) for name, share in zip(VECTOR_EMOTIONS, shares)},
+        "primary_emotion": VECTOR_EMOTIONS[int(np.argmax(shares))],
+        "sentiment_score": float(np.tanh(emotion[-2])),
+        "emotional_intensity": float(_sigmoid(emotion[-1])),
+        "lifestyle_patterns": {
+            group: {f"{group}_{k}": float(lifestyle[g * LIFESTYLE_KEYS + k]) for k in range(LIFESTYLE_KEYS)}
+            for g, group in enumerate(LIFESTYLE_GROUPS)
+        },
+    }
+
+
+class SyntheticPopulation:
+    """
+    재현 가능한 합성 사용자 집단
+
+    배치마다 (시드, 시작 번호) 로 난수 생성기를 새로 만들므로 배치 단위로 나눠 생성해도
+    같은 번호의 사용자는 같은 값을 갖는다 (같은 배치 크기 기준).
+    """
+
+    def __init__(self, seed: int = 42, now: Optional[datetime] = None):
+        self.seed = seed
+        self.now = now or datetime(2026, 1, 1, tzinfo=timezone.utc)
+        centers = np.random.default_rng(seed).normal(
+            size=(CLUSTERS, PERSONALITY_DIMENSION + EMOTION_DIMENSION + LIFESTYLE_DIMENSION)
+        )
+        self.centers = centers.astype(np.float32)
+        weights = np.array([city[3] for city in CITIES])
+        self.city_weights = weights / weights.sum()
+
+    def user_id(self, number: int) -> uuid.UUID:
+        """번호 → 고정 사용자 ID"""
+        return uuid.uuid5(uuid.NAMESPACE_OID, f"synthetic-{self.seed}-{number}")
+
+    def batch(self, start: int, count: int) -> Dict[str, List[Dict]]:
+        """start 번부터 count 명의 테이블별 행"""
+        rng = np.random.default_rng([self.seed, start])
+        rows = {name: [] for name in ("users", "vectors", "personality", "emotion", "preference")}
+
+        clusters = rng.integers(0, CLUSTERS, size=count)
+        latent = self.centers[clusters] + rng.normal(scale=0.6, size=(count, self.centers.shape[1])).astype(np.float32)
+        personality = latent[:, :PERSONALITY_DIMENSION]
+        emotion = latent[:, PERSONALITY_DIMENSION:PERSONALITY_DIMENSION + EMOTION_DIMENSION]
+        lifestyle = _sigmoid(latent[:, PERSONALITY_DIMENSION + EMOTION_DIMENSION:])
+
+        cities = rng.choice(len(CITIES), size=count, p=self.city_weights)
+        offsets = rng.normal(scale=0.08, size=(count, 2))
+        ages = rng.integers(20, 46, size=count)
+        active = rng.random(count) < 0.97
+        matching = rng.random(count) < 0.9
+        idle_hours = rng.exponential(72, size=count)
+        big5 = np.clip(0.5 + 0.15 * latent[:, :len(BIG5_TRAITS)], 0, 1)
+        distributions = rng.dirichlet(np.ones(len(EMOTIONS)), size=count)
+
+        for i in range(count):
+            number = start + i
+            user_id = self.user_id(number)
+            name, base_lat, base_lon, _ = CITIES[cities[i]]
+            latitude = float(base_lat + offsets[i, 0])
+            longitude = float(base_lon + offsets[i, 1])
+            interest_ids = rng.choice(len(INTEREST_VOCABULARY), size=int(rng.integers(3, 9)), replace=False) + 1
+            last_active = self.now - timedelta(hours=float(idle_hours[i]))
+
+            rows["users"].append({
+                "id": user_id,
+                "firebase_uid": f"synthetic_{self.seed}_{number}",
+                "name": f"사용자{number}",
+                "age": int(ages[i]),
+                "location": name,
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": encode_geohash(latitude, longitude),
+                "settings": {"interests": [INTEREST_VOCABULARY[j - 1] for j in interest_ids]},
+                "interest_bits": bitset_to_bytes(ids_to_bitset(interest_ids)),
+                "preferences": {},
+                "is_active": bool(active[i]),
+                "matching_enabled": bool(matching[i]),
+                "created_at": last_active - timedelta(days=int(rng.integers(1, 365))),
+                "updated_at": last_active,
+                "last_active": last_active,
+            })
+            features = analysis_features(synthetic_analysis(personality[i], emotion[i], lifestyle[i]))
+            rows["vectors"].append({
+                "user_id": user_id,
+                "personality_vector": features["personality"].round(4).tolist(),
+                "emotion_vector": features["emotion"].round(4).tolist(),
+                "lifestyle_vector": features["lifestyle"].round(4).tolist(),
+                "combined_vector": combine_vectors(features).round(4).tolist(),
+                "vector_version": VECTOR_VERSION,
+                "analysis_count": int(rng.integers(1, 50)),
+                "updated_at": last_active,
+            })
+            rows["personality"].append({
+                "user_id": user_id,
+                "overall_mbti": MBTI_TYPES[int(rng.integers(0, len(MBTI_TYPES)))],
+                "overall_big5": {trait: round(float(big5[i, j]), 3) for j, trait in enumerate(BIG5_TRAITS)},
+                "personality_traits": list(rng.choice(TRAITS, size=3, replace=False)),
+                "confidence_level": round(float(rng.uniform(0.3, 0.95)), 3),
+                "updated_at": last_active,
+            })
+            rows["emotion"].append({
+                "user_id": user_id,
+                "emotion_distribution": {emotion: round(float(p), 3) for emotion, p in zip(EMOTIONS, distributions[i])},
+                "dominant_emotions": [EMOTIONS[int(np.argmax(distributions[i]))]],
+                "avg_sentiment_score": round(float(rng.uniform(-0.5, 0.8)), 3),
+                "emotional_volatility": round(float(rng.uniform(0.05, 0.6)), 3),
+                "updated_at": last_active,
+            })
+            rows["preference"].append({
+                "user_id": user_id,
+                "preferred_location_radius": int(rng.choice([10, 30, 50])) if rng.random() < 0.3 else None,
+                "diversity_factor": 20 if rng.random() < 0.2 else 0,
+                "excluded_users": [],
+                "blocked_users": [],
+                "updated_at": last_active,
+            })
+        return rows
+
+    def batches(self, size: int, batch_size: int = 5000, start: int = 0) -> Iterator[Dict[str, List[Dict]]]:
+        """start 번부터 size 번 전까지 배치 단위로"""
+        for batch_start in range(start, size, batch_size):
+            yield self.batch(batch_start, min(batch_size, size - batch_start))
+
+
+async def seed_population(
+    db, size: int, seed: int = 42, batch_size: int = 5000, start: int = 0
+) -> SyntheticPopulation:
+    """
+    합성 집단을 배치 단위 Core INSERT 로 저장 (배치마다 커밋)
+
+    start 를 주면 그 번호부터 이어서 채운다 (작은 집단을 큰 집단으로 늘릴 때).
+    """
+    from sqlalchemy import insert
+
+    from app.models.analysis import UserEmotionPattern, UserPersonalitySummary
+    from app.models.user import MatchingPreference, User, UserVector
+
+    tables = {
+        "users": User.__table__,
+        "vectors": UserVector.__table__,
+        "personality": UserPersonalitySummary.__table__,
+        "emotion": UserEmotionPattern.__table__,
+        "preference": MatchingPreference.__table__,
+    }
+    population = SyntheticPopulation(seed)
+    for rows in population.batches(size, batch_size, start):
+        for name, table in tables.items():
+            await db.execute(insert(table), rows[name])
+        await db.commit()
+    return population
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="합성 사용자 집단 생성")
+    parser.add_argument("--size", type=int, required=True, help="사용자 수")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드")
+    parser.add_argument("--batch-size", type=int, default=5000, help="INSERT 배치 크기")
+    parser.add_argument("--database-url", default=None, help="비동기 DB URL (기본: 설정의 DATABASE_URL)")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if args.database_url:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        engine = create_async_engine(args.database_url)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    else:
+        from app.config.database import AsyncSessionLocal as session_factory
+
+    started = time.perf_counter()
+    async with session_factory() as db:
+        await seed_population(db, args.size, args.seed, args.batch_size)
+    print(f"✅ 합성 사용자 {args.size:,}명 생성 완료: {time.perf_counter() - started:.1f}초")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
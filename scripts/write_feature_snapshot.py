@@ -0,0 +1,39 @@
+"""
+매칭 특성 행렬 스냅샷 생성
+
+사용자 전체의 매칭 특성(벡터/성격/감정/선호도/관심사 비트셋)을 mmap 용 바이너리 파일로 저장한다.
+서빙 워커는 시작 시 이 파일을 매핑하고 이후 바뀐 사용자만 DB 에서 델타로 갱신한다.
+관심사가 interests 테이블에 없는 사용자는 제외되므로 interest_bits 를 먼저 채워 두는 것이 좋다 (scripts/backfill_interest_bits.py).
+cron 등에서 주기적으로 (예: 매칭 후보 사전 계산 직후) 실행하는 것을 전제로 한다.
+
+사용법: python scripts/write_feature_snapshot.py [--path PATH] [--chunk-size N]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.feature_snapshot import write_feature_snapshot
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="매칭 특성 행렬 스냅샷 생성")
+    parser.add_argument("--path", default=None, help="스냅샷 파일 경로 (기본: FEATURE_SNAPSHOT_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="한 번에 조회할 사용자 수")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    stats = await write_feature_snapshot(path=args.path, chunk_size=args.chunk_size)
+    print(
+        f"✅ 특성 스냅샷 저장 완료: 사용자 {stats['users']}명 (관심사 미등록 {stats['deferred']}명 제외), "
+        f"세대 {stats['generation']} → {stats['path']}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())